@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Carousel Builder Benchmark
+==========================
+
+Compares carousel_configs.build_batch() with the per-campaign dict literals
+the SCAN_HOMEPAGE_CONFIG / PTP_STREAK_CONFIG processors used before it
+(create_initial_config / create_inprogress_config / create_single_config,
+loaded from git at the revision before carousel_configs.py was added):
+
+- build:    time to build every campaign's entries
+- retained: memory held by the built entries (tracemalloc)
+- output:   both are serialized and compared byte for byte
+
+Every campaign gets the same two entries (_0 and _1_N) whatever its
+max_allowed, so max_allowed only changes the copy; the campaign count is
+what scales. --max-allowed sets it for every campaign (default 100).
+
+Usage:
+    python3 benchmarks/bench_carousel_builder.py                    # 1k and 10k campaigns
+    python3 benchmarks/bench_carousel_builder.py --campaigns 50000 --max-allowed 1000
+    python3 benchmarks/bench_carousel_builder.py --baseline-rev <git rev>
+
+Exit code is 1 if the builder's output ever differs from the old builders'.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+import tracemalloc
+import types
+from pathlib import Path
+
+
+APP_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(APP_DIR))
+sys.path.insert(0, str(APP_DIR / "benchmarks"))
+
+import carousel_configs  # noqa: E402
+import synthetic_configs  # noqa: E402
+
+PROCESSORS = {
+    'SCAN_HOMEPAGE_CONFIG': 'process_scan_homepage_config',
+    'PTP_STREAK_CONFIG': 'process_ptp_streak_config'
+}
+
+
+def git(*args):
+    return subprocess.run(['git', '-C', str(APP_DIR)] + list(args), capture_output=True,
+                          text=True, check=True).stdout
+
+
+def baseline_rev():
+    """Parent of the commit that added carousel_configs.py (HEAD if it isn't committed yet)"""
+    added = git('log', '--diff-filter=A', '--format=%H', '-1', '--', 'carousel_configs.py').strip()
+    return f"{added}~1" if added else 'HEAD'
+
+
+def legacy_processor(module_name, rev):
+    """The processor module as it was at rev"""
+    path = APP_DIR / "scripts" / f"{module_name}.py"
+    source = git('show', f"{rev}:scripts/{module_name}.py")
+    module = types.ModuleType(f"legacy_{module_name}")
+    module.__file__ = str(path)
+    exec(compile(source, str(path), 'exec'), module.__dict__)
+    return module
+
+
+def legacy_batch(processor, config_key, campaigns):
+    entries = []
+    for c in campaigns:
+        if config_key == 'SCAN_HOMEPAGE_CONFIG' and c['max_allowed'] == 1:
+            entries.append(processor.create_single_config(
+                c['name'], c['type'], c['duration_days'], c['per_txn_reward']))
+            continue
+        entries.append(processor.create_initial_config(
+            c['name'], c['type'], c['duration_days'], c['total_offer'], c['max_allowed']))
+        entries.append(processor.create_inprogress_config(
+            c['name'], c['type'], c['max_allowed'], c['per_txn_reward']))
+    return entries
+
+
+def best_time(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def retained_bytes(fn):
+    """Memory still allocated by fn's result after it returns"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = fn()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del result
+    return retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare carousel_configs with the old per-processor builders')
+    parser.add_argument('--campaigns', type=int, nargs='+', default=[1000, 10000],
+                        help='Campaign counts (default: 1000 10000)')
+    parser.add_argument('--max-allowed', type=int, default=100,
+                        help='max_allowed of every campaign (default: 100)')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per path (best is kept)')
+    parser.add_argument('--baseline-rev', help='Git revision with the old builders (default: before carousel_configs.py)')
+    args = parser.parse_args()
+
+    rev = args.baseline_rev or baseline_rev()
+    legacy = {key: legacy_processor(module, rev) for key, module in PROCESSORS.items()}
+    print(f"Baseline: processors at {rev}, max_allowed={args.max_allowed}")
+    mismatches = []
+
+    for count in args.campaigns:
+        campaigns = synthetic_configs.make_campaigns(count)
+        for c in campaigns:
+            c['max_allowed'] = args.max_allowed
+            c['total_offer'] = c['per_txn_reward'] * args.max_allowed
+
+        print(f"\n{count:,} campaigns")
+        print(f"  {'config':22} {'entries':>8} {'build old':>10} {'new':>9} {'speedup':>8}"
+              f" {'retained old':>13} {'new':>9} {'saved':>6}")
+
+        for config_key, processor in legacy.items():
+            batch = campaigns
+            if config_key == 'PTP_STREAK_CONFIG':
+                batch = [c for c in campaigns if c['type'] in carousel_configs.PTP_CAMPAIGN_TYPES]
+
+            def build_old():
+                return legacy_batch(processor, config_key, batch)
+
+            def build_new():
+                return carousel_configs.build_batch(config_key, batch)
+
+            old_entries = build_old()
+            new_entries = build_new()
+            if json.dumps(old_entries, indent=2) != json.dumps(new_entries, indent=2):
+                mismatches.append(f"{config_key} at {count:,}")
+
+            old_time = best_time(build_old, args.repeat)
+            new_time = best_time(build_new, args.repeat)
+            old_memory = retained_bytes(build_old)
+            new_memory = retained_bytes(build_new)
+
+            print(f"  {config_key:22} {len(new_entries):8,} {old_time * 1000:8.1f}ms {new_time * 1000:7.1f}ms"
+                  f" {old_time / new_time:7.1f}x {old_memory / 1024 / 1024:11.1f}MB"
+                  f" {new_memory / 1024 / 1024:7.1f}MB {1 - new_memory / old_memory:6.0%}")
+
+    if mismatches:
+        print("\n❌ carousel_configs output differs from the old builders:")
+        for mismatch in mismatches:
+            print(f"  - {mismatch}")
+        return 1
+
+    print("\n✓ carousel_configs output byte-identical to the old builders")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
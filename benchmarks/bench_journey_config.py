@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Journey Config Engine Benchmark
+===============================
+
+Adds a batch of new campaigns to a synthetic STREAK_JOURNEY_JOB_CONFIG:
+
+- old: the add_campaign_to_config before JourneyConfigView (loaded from
+       git at the revision before the view was added), once per campaign,
+       plus check_campaign_exists for the report - every call rescans
+       the rule lists and inserts into them
+- new: journey_config.add_campaigns(), one JourneyConfigView for the batch
+
+Both results are serialized and compared byte for byte. The batch mixes
+in campaigns that already exist (fully or partially) and a duplicate.
+
+Usage:
+    python3 benchmarks/bench_journey_config.py                       # 5k rules, 100/1k/5k new
+    python3 benchmarks/bench_journey_config.py --campaigns 20000 --add 20000
+    python3 benchmarks/bench_journey_config.py --baseline-rev <git rev>
+
+Exit code is 1 if the results ever differ.
+"""
+
+import argparse
+import copy
+import json
+import random
+import subprocess
+import sys
+import time
+import types
+from pathlib import Path
+
+
+APP_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(APP_DIR))
+sys.path.insert(0, str(APP_DIR / "benchmarks"))
+
+import journey_config  # noqa: E402
+import synthetic_configs  # noqa: E402
+
+
+def git(*args):
+    return subprocess.run(['git', '-C', str(APP_DIR)] + list(args), capture_output=True,
+                          text=True, check=True).stdout
+
+
+def baseline_rev():
+    """Parent of the commit that added JourneyConfigView (HEAD if it isn't committed yet)"""
+    added = git('log', '-S', 'class JourneyConfigView', '--format=%H', '-1', '--', 'journey_config.py').strip()
+    return f"{added}~1" if added else 'HEAD'
+
+
+def legacy_engine(rev):
+    """journey_config as it was at rev"""
+    path = APP_DIR / "journey_config.py"
+    module = types.ModuleType("legacy_journey_config")
+    module.__file__ = str(path)
+    exec(compile(git('show', f"{rev}:journey_config.py"), str(path), 'exec'), module.__dict__)
+    return module
+
+
+def new_campaigns(count, existing, seed=7):
+    rnd = random.Random(seed)
+    batch = [{'campaign_name': f"bench_new_{i}",
+              'campaign_id': f"{i:08d}-0000-4000-8000-000000000000",
+              'next_campaign': rnd.choice(["NA", f"bench_new_{i + 1}"])}
+             for i in range(count)]
+    for c in rnd.sample(existing, min(10, len(existing))):
+        batch.insert(rnd.randrange(len(batch) + 1), {'campaign_name': c['name'], 'campaign_id': c['campaign_id']})
+        batch.insert(rnd.randrange(len(batch) + 1), {'campaign_name': c['name'],
+                                                     'campaign_id': f"other-{c['campaign_id']}"})
+    if batch:
+        batch.append(dict(batch[0]))
+    return batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare JourneyConfigView with per-call add_campaign_to_config')
+    parser.add_argument('--campaigns', type=int, default=5000, help='Campaigns in the base config (default: 5000)')
+    parser.add_argument('--add', type=int, nargs='+', default=[100, 1000, 5000],
+                        help='New campaigns per batch (default: 100 1000 5000)')
+    parser.add_argument('--baseline-rev', help='Git revision with the old engine (default: before JourneyConfigView)')
+    args = parser.parse_args()
+
+    rev = args.baseline_rev or baseline_rev()
+    legacy = legacy_engine(rev)
+    campaigns, files = synthetic_configs.build_all(args.campaigns)
+    base = json.loads(files['STREAK_JOURNEY_JOB_CONFIG']['value'])
+    rules = len(base['journey_rules']['configs'])
+
+    print(f"Baseline: journey_config at {rev}; base config {args.campaigns:,} campaigns, {rules:,} journey rules")
+    print(f"\n  {'new':>7} {'old':>10} {'new':>9} {'speedup':>8}")
+    mismatches = []
+
+    for count in args.add:
+        batch = new_campaigns(count, campaigns)
+
+        old_value = copy.deepcopy(base)
+        started = time.perf_counter()
+        old_existed = []
+        for c in batch:
+            old_existed.append(legacy.check_campaign_exists(c['campaign_id'], c['campaign_name'], old_value))
+            legacy.add_campaign_to_config(c['campaign_name'], c['campaign_id'],
+                                          c.get('next_campaign') or "NA", old_value)
+        old_time = time.perf_counter() - started
+
+        new_value = copy.deepcopy(base)
+        started = time.perf_counter()
+        new_existed = journey_config.add_campaigns(new_value, batch)
+        new_time = time.perf_counter() - started
+
+        if json.dumps(old_value) != json.dumps(new_value) or old_existed != new_existed:
+            mismatches.append(f"{count:,} new campaigns")
+
+        print(f"  {count:7,} {old_time * 1000:8.1f}ms {new_time * 1000:7.1f}ms {old_time / new_time:7.0f}x")
+
+    if mismatches:
+        print("\n❌ JourneyConfigView result differs from the old engine:")
+        for mismatch in mismatches:
+            print(f"  - {mismatch}")
+        return 1
+
+    print("\n✓ JourneyConfigView result byte-identical to the old engine")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+JSON Backend Benchmark
+======================
+
+Compares the stdlib json module with json_backend (orjson when installed)
+on every synthetic config type (see synthetic_configs.py):
+
+- parse: GET response envelope + inner value
+- dump:  inner value in the config's pretty wire format + envelope with
+         indent=2 (what every processor writes to _after.json)
+
+Both outputs are compared byte for byte; any difference is a failure.
+
+Usage:
+    python3 benchmarks/bench_json_backend.py                 # 100, 1k, 10k campaigns
+    python3 benchmarks/bench_json_backend.py --sizes 1000
+
+Exit code is 1 if json_backend's output ever differs from the stdlib's.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+
+APP_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(APP_DIR))
+sys.path.insert(0, str(APP_DIR / "benchmarks"))
+
+import json_backend  # noqa: E402
+import synthetic_configs  # noqa: E402
+import wire_format  # noqa: E402
+
+
+def best_time(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def stdlib_value(value_obj, config_key):
+    """The pretty wire format with the stdlib only"""
+    if config_key in wire_format.PRETTY_COMPACT:
+        return json.dumps(value_obj, separators=(',', ':'))
+    if config_key in wire_format.PRETTY_CRLF:
+        return json.dumps(value_obj, indent=2).replace('\n', '\r\n')
+    return json.dumps(value_obj, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare stdlib json and json_backend per config type')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000],
+                        help='Campaign counts to generate (default: 100 1000 10000)')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per path (best is kept)')
+    args = parser.parse_args()
+
+    print(f"json_backend: {json_backend.backend_name()}")
+    mismatches = []
+
+    for size in args.sizes:
+        _, configs = synthetic_configs.build_all(size)
+        print(f"\n{size:,} campaigns")
+        print(f"  {'config':28} {'size':>9} {'parse json':>11} {'backend':>9} {'speedup':>8}"
+              f" {'dump json':>10} {'backend':>9} {'speedup':>8}")
+
+        for config_key, envelope in configs.items():
+            text = json.dumps(envelope, indent=2)
+            is_json = config_key != 'STREAK_BLOCK_TEMPLATE'
+
+            def parse(loads):
+                data = loads(text)
+                if is_json:
+                    loads(data['value'])
+
+            parse_std = best_time(lambda: parse(json.loads), args.repeat)
+            parse_fast = best_time(lambda: parse(json_backend.loads), args.repeat)
+
+            value_obj = json.loads(envelope['value']) if is_json else None
+
+            def dump_std():
+                data = dict(envelope)
+                if is_json:
+                    data['value'] = stdlib_value(value_obj, config_key)
+                return json.dumps(data, indent=2)
+
+            def dump_fast():
+                data = dict(envelope)
+                if is_json:
+                    data['value'] = wire_format.serialize(value_obj, config_key, 'pretty')
+                return json_backend.dumps(data, indent=2)
+
+            if dump_std() != dump_fast():
+                mismatches.append(f"{config_key} at {size:,}")
+            dump_std_time = best_time(dump_std, args.repeat)
+            dump_fast_time = best_time(dump_fast, args.repeat)
+
+            print(f"  {config_key:28} {len(text) / 1024:8.0f}K "
+                  f"{parse_std * 1000:9.2f}ms {parse_fast * 1000:7.2f}ms {parse_std / parse_fast:7.1f}x "
+                  f"{dump_std_time * 1000:8.2f}ms {dump_fast_time * 1000:7.2f}ms "
+                  f"{dump_std_time / dump_fast_time:7.1f}x")
+
+    if mismatches:
+        print("\n❌ json_backend output differs from stdlib json:")
+        for mismatch in mismatches:
+            print(f"  - {mismatch}")
+        return 1
+
+    print("\n✓ json_backend output byte-identical to stdlib json for every config")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Scaling Benchmark
+=================
+
+Times every processing and cleanup path against synthetic configs with
+10, 100, 1k and 10k campaigns (see synthetic_configs.py) and reports time,
+throughput and peak memory per path.
+
+Paths measured per size:
+- parse / dump:  GET response + inner value, for every config
+- stream:        config_response.fetch_to_file (response streamed to disk in
+                 64KB chunks, envelope parsed incrementally) + inner value
+- process:       each scripts/process_*.py adding one new campaign
+                 (run in-process, compiled once, so interpreter startup
+                 isn't counted)
+- retool:        parse_value_field + add_campaign_to_config
+- cleanup:       remove_from_json_value (cleanup_orphaned_campaigns),
+                 clean_config_value (cleanup_cred_mtu_from_templates),
+                 remove_campaigns (remove_promotional_campaigns)
+
+Usage:
+    python3 benchmarks/bench_scaling.py                     # all sizes
+    python3 benchmarks/bench_scaling.py --sizes 10 1000     # pick sizes
+    python3 benchmarks/bench_scaling.py --only process      # filter paths
+    python3 benchmarks/bench_scaling.py --json results.json # save results
+
+Time is the best of --repeat runs; peak memory is measured in one extra run
+under tracemalloc (Python allocations only).
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+
+APP_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(APP_DIR))
+sys.path.insert(0, str(APP_DIR / "benchmarks"))
+
+import synthetic_configs  # noqa: E402
+
+
+# The campaign every processor adds (not present in the synthetic data)
+NEW_CAMPAIGN = {
+    'name': 'bench_new_campaign',
+    'campaign_id': '00000000-0000-4000-8000-000000000001',
+    'type': 'UPI',
+    'duration_days': '14',
+    'max_allowed': '5',
+    'per_txn_reward': '10',
+    'total_offer': '50',
+    'min_txn_amount': '100',
+    'banner_url': 'https://d704ayip06922.cloudfront.net/prod-rewards-assets-data/bench_new.png'
+}
+
+
+def processor_args(config_key):
+    """Per-config argv the master script passes after the three file paths"""
+    c = NEW_CAMPAIGN
+    return {
+        'STREAK_ELIGIBILITY': [c['name'], c['type'], c['duration_days'], c['max_allowed']],
+        'STREAK_TXN_ELIGIBILITY': [c['name'], c['type'], c['min_txn_amount']],
+        'STREAK_CONFIG': [c['campaign_id']],
+        'STREAK_BLOCK_TEMPLATE': [c['campaign_id'], c['banner_url'],
+                                  "<format>earn <icon>INR</icon>10</format>", "make 5 payments"],
+        'SCAN_HOMEPAGE_CONFIG': [c['name'], c['type'], c['duration_days'], c['max_allowed'],
+                                 c['per_txn_reward'], c['total_offer']],
+        'PTP_STREAK_CONFIG': [c['name'], c['type'], c['duration_days'], c['max_allowed'],
+                              c['per_txn_reward'], c['total_offer']]
+    }[config_key]
+
+
+def measure(fn, repeat):
+    """(best seconds, peak bytes) for fn()"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return best, peak
+
+
+def build_paths(size, work_dir):
+    """[(label, input_bytes, fn)] for one size"""
+    from campaign_daemon import WarmCache, run_processor
+    import config_response
+    from setup_campaign_master import PROCESSOR_SCRIPTS
+    import cleanup_orphaned_campaigns as orphaned
+    import cleanup_cred_mtu_from_templates as cred_mtu
+    import remove_promotional_campaigns as promotional
+    import retool_integration
+
+    files = synthetic_configs.write_all(size, work_dir)
+    raw = {key: open(path, 'r').read() for key, path in files.items()}
+    responses = {key: json.loads(text) for key, text in raw.items()}
+    paths = []
+
+    for key, text in raw.items():
+        is_template = key == 'STREAK_BLOCK_TEMPLATE'
+
+        def parse(text=text, is_template=is_template):
+            data = json.loads(text)
+            if not is_template:
+                json.loads(data['value'])
+
+        paths.append((f"parse {key}", len(text), parse))
+
+        def stream(key=key, body=text.encode('utf-8')):
+            chunks = (body[i:i + config_response.CHUNK_SIZE]
+                      for i in range(0, len(body), config_response.CHUNK_SIZE))
+            response = config_response.fetch_to_file(chunks, os.path.join(work_dir, f"{key}_stream.json"))
+            response.parsed_value()
+
+        paths.append((f"stream {key}", len(text), stream))
+
+        if not is_template:
+            value_obj = json.loads(responses[key]['value'])
+
+            def dump(key=key, value_obj=value_obj):
+                data = dict(responses[key])
+                data['value'] = json.dumps(value_obj, indent=2).replace('\n', '\r\n')
+                json.dumps(data, indent=2)
+
+            paths.append((f"dump {key}", len(text), dump))
+
+    cache = WarmCache()
+    for key, script in PROCESSOR_SCRIPTS.items():
+        cmd = ['python3', str(APP_DIR / "scripts" / script), files[key],
+               os.path.join(work_dir, f"{key}_after_unescaped.json"),
+               os.path.join(work_dir, f"{key}_after.json")] + processor_args(key)
+        cache.compiled_script(cmd[1])
+        paths.append((f"process {key}", len(raw[key]), lambda cmd=cmd: run_processor(cache, cmd)))
+
+    journey = responses['STREAK_JOURNEY_JOB_CONFIG']
+
+    def retool_add():
+        _, value_obj, _ = retool_integration.parse_value_field(journey)
+        retool_integration.add_campaign_to_config(
+            NEW_CAMPAIGN['name'], NEW_CAMPAIGN['campaign_id'], "NA", value_obj)
+        json.dumps(value_obj, indent=2)
+
+    paths.append(("retool add_campaign_to_config", len(raw['STREAK_JOURNEY_JOB_CONFIG']), retool_add))
+
+    for key, remove_type in orphaned.CONFIGS_TO_CLEAN.items():
+        value = responses[key]['value']
+        paths.append((f"cleanup orphaned {key}", len(value),
+                      lambda value=value, remove_type=remove_type:
+                      orphaned.remove_from_json_value(value, remove_type)))
+
+    for key in cred_mtu.CONFIGS_TO_CLEAN:
+        value = responses[key]['value']
+        paths.append((f"cleanup cred_mtu {key}", len(value),
+                      lambda value=value: cred_mtu.clean_config_value(value, cred_mtu.CAMPAIGNS_TO_REMOVE)))
+
+    def remove_promotional():
+        value_obj = json.loads(journey['value'])
+        promotional.remove_campaigns(value_obj, promotional.CAMPAIGNS_TO_REMOVE)
+        json.dumps(value_obj, indent=2)
+
+    paths.append(("cleanup promotional STREAK_JOURNEY_JOB_CONFIG", len(journey['value']), remove_promotional))
+
+    # Every path re-parses from text (or re-reads its file), so repeated runs
+    # never see an earlier run's mutations
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark processing/cleanup paths at scale')
+    parser.add_argument('--sizes', type=int, nargs='+', default=synthetic_configs.SIZES,
+                        help='Campaign counts to generate (default: 10 100 1000 10000)')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per path (best is kept)')
+    parser.add_argument('--only', help='Only run paths whose label contains this text')
+    parser.add_argument('--json', help='Also write results to this JSON file')
+    args = parser.parse_args()
+
+    results = []
+
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory(prefix=f"bench_{size}_") as work_dir:
+            paths = build_paths(size, work_dir)
+            print(f"\n{size:,} campaigns")
+            print(f"  {'path':50} {'input':>10} {'time':>10} {'MB/s':>8} {'campaigns/s':>12} {'peak':>10}")
+
+            for label, input_bytes, fn in paths:
+                if args.only and args.only not in label:
+                    continue
+
+                seconds, peak = measure(fn, args.repeat)
+                mb_per_s = input_bytes / seconds / 1e6 if seconds else 0
+                per_s = size / seconds if seconds else 0
+                print(f"  {label:50} {input_bytes / 1024:8.0f}KB {seconds * 1000:8.1f}ms "
+                      f"{mb_per_s:8.1f} {per_s:12,.0f} {peak / 1024 / 1024:8.1f}MB")
+
+                results.append({
+                    'size': size, 'path': label, 'input_bytes': input_bytes,
+                    'seconds': seconds, 'peak_bytes': peak
+                })
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✓ Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Campaign Removal Traversal Benchmark
+====================================
+
+Removes the 17 orphaned campaigns from the synthetic configs cleaned by
+name (cleanup_orphaned_campaigns "remove_campaign_names"):
+
+- old: clean_value() before value_prune (loaded from git at the revision
+       before value_prune.py was added) - recursive, visits everything
+- new: clean_value() on value_prune.remove_strings - explicit stack,
+       skips values without targets and stops once every occurrence in
+       the text is accounted for
+
+Each config is run as generated (the orphaned campaigns come first, like
+the oldest entries of a real config), reversed (they come last, so the
+whole value is traversed) and already cleaned (nothing to remove, e.g. a
+second run). Times are for the traversal on a parsed value; the cleaned
+values and removed lists are compared with the old ones.
+
+Usage:
+    python3 benchmarks/bench_value_prune.py                    # 1k and 10k campaigns
+    python3 benchmarks/bench_value_prune.py --sizes 100 1000 --repeat 5
+    python3 benchmarks/bench_value_prune.py --baseline-rev <git rev>
+
+Exit code is 1 if the results ever differ.
+"""
+
+import argparse
+import copy
+import json
+import subprocess
+import sys
+import time
+import types
+from pathlib import Path
+
+
+APP_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(APP_DIR))
+sys.path.insert(0, str(APP_DIR / "benchmarks"))
+
+import cleanup_orphaned_campaigns as orphaned  # noqa: E402
+import synthetic_configs  # noqa: E402
+import value_prune  # noqa: E402
+
+
+def git(*args):
+    return subprocess.run(['git', '-C', str(APP_DIR)] + list(args), capture_output=True,
+                          text=True, check=True).stdout
+
+
+def baseline_rev():
+    """Parent of the commit that added value_prune.py (HEAD if it isn't committed yet)"""
+    added = git('log', '--diff-filter=A', '--format=%H', '-1', '--', 'value_prune.py').strip()
+    return f"{added}~1" if added else 'HEAD'
+
+
+def legacy_cleanup(rev):
+    """cleanup_orphaned_campaigns as it was at rev"""
+    path = APP_DIR / "cleanup_orphaned_campaigns.py"
+    module = types.ModuleType("legacy_cleanup_orphaned_campaigns")
+    module.__file__ = str(path)
+    exec(compile(git('show', f"{rev}:cleanup_orphaned_campaigns.py"), str(path), 'exec'), module.__dict__)
+    return module
+
+
+def variants(value_obj):
+    """(label, value) of the config as generated, reversed and already cleaned"""
+    reversed_obj = copy.deepcopy(value_obj)
+    for configs in reversed_obj.values() if isinstance(reversed_obj, dict) else []:
+        if isinstance(configs, list):
+            configs.reverse()
+    cleaned_obj = copy.deepcopy(value_obj)
+    orphaned.clean_value(cleaned_obj, "remove_campaign_names")
+    return [("targets first", value_obj), ("targets last", reversed_obj), ("nothing to remove", cleaned_obj)]
+
+
+def best_of(repeat, value_obj, clean):
+    """Best time of clean(copy) over repeat fresh copies, and the last result"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        copy_obj = copy.deepcopy(value_obj)
+        started = time.perf_counter()
+        result = clean(copy_obj)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def deep_value(depth):
+    """A target under depth nested lists (beyond the recursion limit)"""
+    value_obj = ["upi_na_zom"]
+    for _ in range(depth):
+        value_obj = [value_obj, "keep"]
+    return value_obj
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare value_prune with the recursive campaign removal')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000],
+                        help='Campaign counts (default: 1000 10000)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement, best kept (default: 3)')
+    parser.add_argument('--baseline-rev', help='Git revision with the old traversal (default: before value_prune)')
+    args = parser.parse_args()
+
+    rev = args.baseline_rev or baseline_rev()
+    legacy = legacy_cleanup(rev)
+    print(f"Baseline: cleanup_orphaned_campaigns at {rev}")
+    mismatches = []
+
+    for size in args.sizes:
+        _, files = synthetic_configs.build_all(size)
+        print(f"\n{size:,} campaigns")
+        print(f"  {'config':<24} {'case':<18} {'KB':>7} {'removed':>7} {'old':>9} {'new':>9} {'speedup':>8}")
+
+        for config_key, remove_type in orphaned.CONFIGS_TO_CLEAN.items():
+            if remove_type != "remove_campaign_names":
+                continue
+            for label, value_obj in variants(json.loads(files[config_key]['value'])):
+                text = json.dumps(value_obj, indent=2)
+
+                old_time, (old_value, old_removed) = best_of(
+                    args.repeat, value_obj, lambda obj: legacy.clean_value(obj, remove_type))
+                new_time, (new_value, removals) = best_of(
+                    args.repeat, value_obj, lambda obj: orphaned.clean_value(obj, remove_type, text))
+
+                if json.dumps(old_value) != json.dumps(new_value) or old_removed != [item for _, item in removals]:
+                    mismatches.append(f"{size:,} campaigns, {config_key}, {label}")
+
+                print(f"  {config_key:<24} {label:<18} {len(text) / 1024:7,.0f} {len(removals):7} "
+                      f"{old_time * 1000:7.1f}ms {new_time * 1000:7.1f}ms {old_time / new_time:7.1f}x")
+
+    depth = sys.getrecursionlimit() * 5
+    removals = value_prune.remove_strings(deep_value(depth), orphaned.ORPHANED_NAMES)
+    print(f"\nDeep value ({depth:,} levels): removed {len(removals)} at {removals[0][0][:30]}... "
+          f"(no recursion limit)")
+
+    if mismatches:
+        print("\n❌ value_prune result differs from the old traversal:")
+        for mismatch in mismatches:
+            print(f"  - {mismatch}")
+        return 1
+
+    print("\n✓ Cleaned values and removed lists identical to the old traversal")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Velocity Condition Compaction Benchmark
+=======================================
+
+Compacts the campaign || chains of a synthetic STREAK_BLOCK_TEMPLATE (and
+of the saved one in the repo) with velocity_template.compact_conditions()
+and reports:
+
+- size, #if/#elseif conditions and campaign comparisons (one per
+  `$!campaign_id == "..."`, one per list item of a membership test)
+  before and after
+- campaign comparisons evaluated per render, on average over a sample of
+  the template's campaigns (|| short-circuits at the first matching
+  clause; ArrayList.contains calls equals() on the items up to the match,
+  or on all of them)
+- the time the equivalence check (every known campaign rendered with
+  both versions) takes
+
+Usage:
+    python3 benchmarks/bench_velocity_compaction.py                # 100 and 1k campaigns
+    python3 benchmarks/bench_velocity_compaction.py --sizes 100 1000 5000 --sample 500
+
+Exit code is 1 if compaction fails its equivalence check.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+
+APP_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(APP_DIR))
+sys.path.insert(0, str(APP_DIR / "benchmarks"))
+
+import synthetic_configs  # noqa: E402
+import velocity_template  # noqa: E402
+
+
+def comparisons_per_render(template, campaign_ids):
+    """Mean campaign comparisons evaluated per render (each chain once) over campaign_ids"""
+    lists = velocity_template.campaign_lists(template)
+    chains = []
+    for chain in velocity_template.parse_chains(template):
+        conditions = [velocity_template.campaign_terms(template[b['condition'][0]:b['condition'][1]], lists)
+                      for b in chain['branches'] if b['kind'] != 'else']
+        if conditions and all(terms is not None for terms in conditions):
+            chains.append([[({campaign_id: index for index, campaign_id in reversed(list(enumerate(ids)))}, len(ids))
+                             for _, _, ids, _ in terms] for terms in conditions])
+
+    total = 0
+    for campaign_id in campaign_ids:
+        for conditions in chains:
+            for terms in conditions:
+                matched = False
+                for positions, length in terms:
+                    if campaign_id in positions:
+                        total += positions[campaign_id] + 1
+                        matched = True
+                        break
+                    total += length
+                if matched:
+                    break
+    return total / max(len(campaign_ids), 1)
+
+
+def measure(label, template, sample, rnd):
+    started = time.perf_counter()
+    try:
+        compacted, report = velocity_template.compact_conditions(template)
+    except velocity_template.TemplateError as e:
+        print(f"  {label:<14} ❌ {e}")
+        return False
+    check_time = time.perf_counter() - started
+
+    campaign_ids = velocity_template.known_campaign_ids(template)
+    campaign_ids = rnd.sample(campaign_ids, min(sample, len(campaign_ids)))
+    before, after = report['before'], report['after']
+    old_compares = comparisons_per_render(template, campaign_ids)
+    new_compares = comparisons_per_render(compacted, campaign_ids)
+
+    print(f"  {label:<14} {before['bytes'] / 1024:8,.0f} {after['bytes'] / 1024:8,.0f} "
+          f"{before['comparisons']:8,} {after['comparisons']:8,} "
+          f"{len(report['compacted']):9,} {old_compares:10,.1f} {new_compares:9,.1f} {check_time:7.1f}s")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure velocity_template.compact_conditions')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000],
+                        help='Campaign counts of the synthetic template (default: 100 1000)')
+    parser.add_argument('--sample', type=int, default=200, help='Campaigns sampled per template for comparisons per render (default: 200)')
+    args = parser.parse_args()
+
+    rnd = random.Random(7)
+    print(f"  {'template':<14} {'KB':>8} {'KB after':>8} {'compares':>8} {'after':>8} "
+          f"{'compacted':>9} {'per render':>10} {'after':>9} {'check':>8}")
+    ok = True
+
+    saved = APP_DIR / "streak_block_template_raw.json"
+    if saved.exists():
+        ok &= measure("saved", json.loads(saved.read_text())['value'], args.sample, rnd)
+
+    for size in args.sizes:
+        _, files = synthetic_configs.build_all(size)
+        ok &= measure(f"{size:,} campaigns", files['STREAK_BLOCK_TEMPLATE']['value'], args.sample, rnd)
+
+    if not ok:
+        return 1
+    print("\n✓ Compacted templates render identically for every known campaign")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Memory Budget Check
+===================
+
+Runs every parse/dump/process/cleanup path from bench_scaling.py under
+tracemalloc and fails if a path's peak memory exceeds its budget, expressed
+as a multiple of the input size (e.g. process SCAN_HOMEPAGE_CONFIG may peak
+at most 14x the size of the GET response it processes).
+
+It also fails if the ratio grows with config size, i.e. a path that used to
+scale linearly starts holding extra copies as configs grow.
+
+Usage:
+    python3 benchmarks/memory_budget.py                   # 100 and 1k campaigns
+    python3 benchmarks/memory_budget.py --sizes 100 10000
+    python3 benchmarks/memory_budget.py --only cleanup
+
+Exit code is 1 when any budget is exceeded, so this can run in CI next to
+startup_budget.py. Use `--profile-memory` on the master or cleanup scripts
+to find the allocation sites behind a failure.
+"""
+
+import argparse
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import bench_scaling  # noqa: E402
+
+
+# Peak memory budget per path type, as a multiple of input bytes
+# (measured ratios with stdlib json are in comments)
+RATIO_BUDGETS = {
+    'parse': 6,      # 1.0x (template) - 5.0x (SCAN_HOMEPAGE_CONFIG)
+    'stream': 6,     # 3.1x - 5.0x (the inner value parse dominates)
+    'dump': 12,      # 4.7x - 9.6x
+    'process': 14,   # 4.8x - 11.1x
+    'retool': 12,    # 8.2x
+    'cleanup': 20    # 7.1x - 15.3x
+}
+
+# Largest allowed growth of a path's ratio from the smallest to the largest size
+MAX_RATIO_GROWTH = 1.5
+
+
+def peak_bytes(fn):
+    """tracemalloc peak of one warm run of fn()"""
+    fn()  # warm-up: imports and caches shouldn't count against the path
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check peak memory per path against size-relative budgets')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000],
+                        help='Campaign counts to generate (default: 100 1000)')
+    parser.add_argument('--only', help='Only check paths whose label contains this text')
+    parser.add_argument('--budget-scale', type=float, default=1.0,
+                        help='Multiply every budget (e.g. 1.5 on a noisy machine)')
+    args = parser.parse_args()
+
+    ratios = {}
+    failures = []
+
+    for size in sorted(args.sizes):
+        with tempfile.TemporaryDirectory(prefix=f"memory_{size}_") as work_dir:
+            print(f"\n{size:,} campaigns")
+            for label, input_bytes, fn in bench_scaling.build_paths(size, work_dir):
+                if args.only and args.only not in label:
+                    continue
+
+                ratio = peak_bytes(fn) / input_bytes
+                budget = RATIO_BUDGETS[label.split()[0]] * args.budget_scale
+                ratios.setdefault(label, []).append(ratio)
+
+                ok = ratio <= budget
+                if not ok:
+                    failures.append(f"{label} at {size:,}: {ratio:.1f}x > {budget:.1f}x")
+                print(f"  {'✓' if ok else '❌'} {label:50} {input_bytes / 1024:8.0f}KB "
+                      f"{ratio:6.1f}x  (budget {budget:.0f}x)")
+
+    if len(args.sizes) > 1:
+        for label, values in ratios.items():
+            if values[0] and values[-1] / values[0] > MAX_RATIO_GROWTH:
+                failures.append(f"{label}: ratio grew {values[0]:.1f}x -> {values[-1]:.1f}x with size")
+
+    if failures:
+        print("\n❌ Memory budget exceeded:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+
+    print("\n✓ All paths within memory budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
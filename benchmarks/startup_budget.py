@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Startup Budget Check
+====================
+
+Runs each CLI entry point under `python -X importtime` and fails if:
+- a heavy dependency (requests, rich, streamlit, ...) is imported on a path
+  that doesn't need it, or
+- total import time (minus a bare interpreter) exceeds the entry's budget.
+
+Usage:
+    python3 benchmarks/startup_budget.py             # check all entry points
+    python3 benchmarks/startup_budget.py --profile   # also show heaviest imports
+
+Exit code is 1 when any budget is exceeded; benchmarks/test_startup_budget.py
+runs it as the startup regression test (python3 -m pytest benchmarks).
+"""
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+# Modules that must never be imported just to show --help or reject bad args
+HEAVY_MODULES = ['requests', 'urllib3', 'rich', 'streamlit', 'subprocess']
+
+# (label, argv after `python -X importtime`, forbidden modules, budget in ms)
+ENTRY_POINTS = [
+    ("master --help",
+     ['setup_campaign_master.py', '--help'], HEAVY_MODULES, 50),
+    ("master --dry-run (arg validation)",
+     ['setup_campaign_master.py', '--dry-run', '--campaign-name', 'budget_check'], HEAVY_MODULES, 50),
+    ("retool_integration --help",
+     ['retool_integration.py', '--help'], HEAVY_MODULES, 50),
+    ("cleanup_orphaned_campaigns --help",
+     ['cleanup_orphaned_campaigns.py', '--help'], HEAVY_MODULES, 60),
+    ("generate_retool_configs --help",
+     ['generate_retool_configs.py', '--help'], HEAVY_MODULES, 50),
+    ("import ui_enhanced",
+     ['-c', 'import ui_enhanced'], HEAVY_MODULES, 80),
+]
+
+# Each entry is run this many times and the fastest run is kept (less noise)
+RUNS = 5
+
+
+def parse_importtime(stderr):
+    """
+    Parse `-X importtime` output.
+
+    Returns (total_us, {module: cumulative_us}) where total_us is the sum of
+    cumulative times of top-level imports.
+    """
+    total = 0
+    modules = {}
+
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3:
+            continue
+        _, cumulative_us, name = fields
+        try:
+            cumulative = int(cumulative_us.strip())
+        except ValueError:
+            continue
+        module = name.strip()
+        modules[module] = cumulative
+        if not name[1:].startswith(' '):
+            # Top-level import (nested ones are indented further)
+            total += cumulative
+
+    return total, modules
+
+
+def measure(argv):
+    """
+    Fastest total import time (us) over RUNS runs, the module table of that
+    run, and whether the entry point crashed with a traceback.
+    """
+    best_total, best_modules, crashed = None, {}, False
+
+    for _ in range(RUNS):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime'] + argv,
+            cwd=APP_DIR, capture_output=True, text=True, stdin=subprocess.DEVNULL
+        )
+        crashed = crashed or 'Traceback (most recent call last)' in result.stderr
+        total, modules = parse_importtime(result.stderr)
+        if best_total is None or total < best_total:
+            best_total, best_modules = total, modules
+
+    return best_total, best_modules, crashed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check CLI import-time budgets')
+    parser.add_argument('--profile', action='store_true', help='Show the heaviest imports per entry point')
+    parser.add_argument('--top', type=int, default=8, help='Number of imports shown with --profile')
+    parser.add_argument('--budget-scale', type=float, default=1.0,
+                        help='Multiply every budget (e.g. 2.0 on a slow CI runner)')
+    args = parser.parse_args()
+
+    baseline_us, baseline_modules, _ = measure(['-c', 'pass'])
+    print(f"Bare interpreter: {baseline_us / 1000:.1f} ms (subtracted below)\n")
+
+    failures = []
+
+    for label, argv, forbidden, budget_ms in ENTRY_POINTS:
+        budget_ms *= args.budget_scale
+        total_us, modules, crashed = measure(argv)
+        startup_ms = max(total_us - baseline_us, 0) / 1000
+
+        heavy = [m for m in forbidden if m in modules]
+        over = startup_ms > budget_ms
+        status = "✗" if heavy or over or crashed else "✓"
+
+        print(f"{status} {label:40} {startup_ms:6.1f} ms  (budget {budget_ms:.0f} ms)")
+        if crashed:
+            print("    entry point crashed (run it directly to see the traceback)")
+        if heavy:
+            print(f"    heavy imports on this path: {', '.join(heavy)}")
+        if crashed or heavy or over:
+            failures.append(label)
+
+        if args.profile:
+            extra = {m: us for m, us in modules.items() if m not in baseline_modules}
+            for module, us in sorted(extra.items(), key=lambda kv: -kv[1])[:args.top]:
+                print(f"      {us / 1000:6.1f} ms  {module}")
+
+    print()
+    if failures:
+        print(f"✗ Startup budget exceeded: {', '.join(failures)}")
+        return 1
+
+    print("✓ All entry points within startup budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
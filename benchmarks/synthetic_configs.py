@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Synthetic Heimdall Configs
+==========================
+
+Builds realistic GET responses for every config the scripts touch, scaled
+to any number of campaigns, so processors and cleanup paths can be measured
+without hitting Heimdall.
+
+Shapes follow what the processors expect:
+- STREAK_ELIGIBILITY / STREAK_TXN_ELIGIBILITY: one block per campaign
+- STREAK_CONFIG: one block per campaign_id, empty-conditions fallback last
+- SCAN_HOMEPAGE_CONFIG / PTP_STREAK_CONFIG: _0 and _1_N carousel blocks per
+  campaign (built with the processors' builder, carousel_configs.py),
+  system configs last
+- STREAK_JOURNEY_JOB_CONFIG: supported_campaign_ids, batch and journey rules
+  (chained campaigns), with the real anchor entries
+- STREAK_BLOCK_TEMPLATE: the real template from streak_block_template_raw.json
+  grown with banner OR-chains and bottom_sheet blocks
+
+The first campaigns reuse the names/UUIDs the cleanup scripts target, so
+cleanup benchmarks remove real entries instead of scanning for nothing.
+
+Usage:
+    python3 benchmarks/synthetic_configs.py 1000 /tmp/configs_1k
+    # writes <CONFIG_KEY>.json (full GET response) per config
+"""
+
+import json
+import os
+import random
+import sys
+import uuid
+from pathlib import Path
+from typing import Dict, List, Any, Tuple
+
+
+APP_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(APP_DIR))
+sys.path.insert(0, str(APP_DIR / "scripts"))
+
+SIZES = [10, 100, 1000, 10000]
+
+# Campaigns sharing one banner URL (the template's OR-chains)
+CAMPAIGNS_PER_BANNER = 4
+
+CAMPAIGN_TYPES = ['UPI', 'SNP', 'P2P']
+
+BANNER_URL = "https://d704ayip06922.cloudfront.net/prod-rewards-assets-data/bench_{:05d}.png"
+
+SCAN_SYSTEM_CONFIGS = ['widget_assured_20_and', 'widget_assured_20_ios', 'widget_campaign_and',
+                       'widget_campaign_ios', 'wr_pay_ios', 'wr_pay_android', 'snp_catch_all']
+PTP_SYSTEM_CONFIGS = ['p2p_0_state', 'p2p_default']
+
+
+def seeded_campaigns() -> List[str]:
+    """Campaign names targeted by the cleanup/removal scripts"""
+    from cleanup_orphaned_campaigns import ORPHANED_CAMPAIGNS
+    from cleanup_cred_mtu_from_templates import CAMPAIGNS_TO_REMOVE as CRED_MTU
+    from remove_promotional_campaigns import CAMPAIGNS_TO_REMOVE as PROMOTIONAL
+
+    return list(ORPHANED_CAMPAIGNS) + list(CRED_MTU) + list(PROMOTIONAL)
+
+
+def make_campaigns(count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """
+    Deterministic campaign list: name, campaign_id, type, duration, max_allowed,
+    reward numbers and banner URL.
+    """
+    from cleanup_orphaned_campaigns import ORPHANED_CAMPAIGNS
+
+    rng = random.Random(seed)
+    seeded = seeded_campaigns()
+    campaigns = []
+
+    for i in range(count):
+        name = seeded[i] if i < len(seeded) else f"bench_streak_{i:05d}"
+        campaign_id = ORPHANED_CAMPAIGNS.get(name) or str(uuid.UUID(int=rng.getrandbits(128), version=4))
+        max_allowed = rng.choice([1, 3, 5, 10])
+        per_txn = rng.choice([5, 10, 15, 20, 25])
+        campaigns.append({
+            'name': name,
+            'campaign_id': campaign_id,
+            'type': CAMPAIGN_TYPES[i % len(CAMPAIGN_TYPES)],
+            'duration_days': rng.choice([7, 14, 30]),
+            'max_allowed': max_allowed,
+            'per_txn_reward': per_txn,
+            'total_offer': per_txn * max_allowed,
+            'min_txn_amount': rng.choice([1, 50, 100]),
+            'banner_url': BANNER_URL.format(i // CAMPAIGNS_PER_BANNER)
+        })
+
+    return campaigns
+
+
+def envelope(config_key: str, value: str) -> Dict[str, Any]:
+    """Full GET response around a value string"""
+    return {
+        'key': config_key,
+        'description': f"{config_key} (synthetic benchmark data)",
+        'value': value,
+        'created_by': 'benchmark',
+        'updated_by': 'benchmark',
+        'updated_at': '2026-01-01T00:00:00Z'
+    }
+
+
+def escape_pretty(value_obj: Any) -> str:
+    """Value encoding used by the eligibility/streak processors"""
+    return json.dumps(value_obj, indent=2).replace('\n', '\r\n')
+
+
+def streak_eligibility(campaigns: List[Dict[str, Any]]) -> Dict[str, Any]:
+    configs = [{
+        "config_key": c['name'],
+        "uas_attributes": [{
+            "attribute": {"namespace": "heimdall", "name": "heimdall.dynamic_attributes.streak_type"},
+            "type": "STRING", "operator": "EQ", "value": c['name']
+        }],
+        "metadata": {
+            "live": True,
+            "streaks": [{
+                "name": c['name'], "type": c['type'], "duration_in_days": c['duration_days'],
+                "max_allowed": c['max_allowed'], "juno_check_enabled": True, "juno_percentage": 75,
+                "same_day_unique_beneficiary_txn_allowed": True, "duplicate_beneficiary_txn_allowed": True,
+                "self_transfer_allowed": False, "cross_beneficiary_name_check_enabled": False,
+                "same_day_txn_allowed": True
+            }]
+        }
+    } for c in campaigns]
+    return envelope('STREAK_ELIGIBILITY', escape_pretty({'configs': configs}))
+
+
+def streak_txn_eligibility(campaigns: List[Dict[str, Any]]) -> Dict[str, Any]:
+    flow_types = {"UPI": ["SNP", "P2P"], "SNP": ["SNP"], "P2P": ["P2P"]}
+    configs = [{
+        "config_key": c['name'],
+        "conditions": {
+            "streak_type": {"type": "STRING", "operator": "EQ", "value": c['type']},
+            "streak_name": {"type": "STRING", "operator": "EQ", "value": c['name']},
+            "flow_type": {"type": "STRING", "operator": "IN", "value": flow_types[c['type']]},
+            "payment_type": {"type": "STRING", "operator": "EQ", "value": "DEBIT"},
+            "amount": {"type": "NUMBER", "operator": "GTE", "value": c['min_txn_amount']}
+        },
+        "metadata": {"value": True}
+    } for c in campaigns]
+    return envelope('STREAK_TXN_ELIGIBILITY', escape_pretty({'configs': configs}))
+
+
+def streak_config(campaigns: List[Dict[str, Any]]) -> Dict[str, Any]:
+    configs = [{
+        "conditions": {"campaign_id": {"type": "STRING", "value": c['campaign_id'], "operator": "EQ"}},
+        "metadata": {
+            "claimed_state_text": "",
+            "allotted_state_text": "<format><text fgClr='#B3FFEB34'>CLAIM</text></format>",
+            "next_state_text": "",
+            "default_state_text": "",
+            "show_actual_reward_text": True
+        }
+    } for c in campaigns]
+    configs.append({"conditions": {}, "metadata": {"show_actual_reward_text": False}})
+    return envelope('STREAK_CONFIG', escape_pretty({'configs': configs}))
+
+
+def _carousel_config(config_key: str, campaigns: List[Dict[str, Any]],
+                     system_configs: List[str]) -> Dict[str, Any]:
+    """SCAN_HOMEPAGE_CONFIG / PTP_STREAK_CONFIG using the processors' builder"""
+    import carousel_configs
+
+    configs = carousel_configs.build_batch(config_key, campaigns)
+    configs.extend({"config_key": key, "conditions": {}, "metadata": {}} for key in system_configs)
+    value = json.dumps({'configs': configs}, separators=(',', ':'))
+    return envelope(config_key, value)
+
+
+def scan_homepage_config(campaigns: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return _carousel_config('SCAN_HOMEPAGE_CONFIG', campaigns, SCAN_SYSTEM_CONFIGS)
+
+
+def ptp_streak_config(campaigns: List[Dict[str, Any]]) -> Dict[str, Any]:
+    ptp_campaigns = [c for c in campaigns if c['type'] in ('UPI', 'P2P')]
+    return _carousel_config('PTP_STREAK_CONFIG', ptp_campaigns, PTP_SYSTEM_CONFIGS)
+
+
+def streak_journey_job_config(campaigns: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Campaigns are chained in runs of 3 (a → b → c → NA)"""
+    def assign_block(name):
+        return {
+            "conditions": {"assign_next_streak_type": {"type": "STRING", "operator": "EQ", "value": name}},
+            "config_key": name,
+            "metadata": {"next_eligible_streak_type": name}
+        }
+
+    batch = [assign_block(c['name']) for c in campaigns]
+    batch.append({"conditions": {}, "config_key": "users_removal_streak_assignment",
+                  "metadata": {"next_eligible_streak_type": "NA"}})
+
+    journey = [assign_block(c['name']) for c in campaigns]
+    journey.append({"conditions": {}, "config_key": "users_removal_streak_assignment",
+                    "metadata": {"next_eligible_streak_type": "NA"}})
+    for i, c in enumerate(campaigns):
+        chained = (i % 3 != 2) and i + 1 < len(campaigns)
+        journey.append({
+            "conditions": {"campaign_id": {"type": "STRING", "value": c['campaign_id'], "operator": "EQ"}},
+            "config_key": c['name'],
+            "metadata": {"next_eligible_streak_type": campaigns[i + 1]['name'] if chained else "NA"}
+        })
+    journey.append({"conditions": {}, "config_key": "catch_all_condition",
+                    "metadata": {"next_eligible_streak_type": "NA"}})
+
+    value = {
+        'supported_campaign_ids': [c['campaign_id'] for c in campaigns],
+        'batch_assignment_rules': {'configs': batch},
+        'journey_rules': {'configs': journey}
+    }
+    return envelope('STREAK_JOURNEY_JOB_CONFIG', json.dumps(value, indent=2))
+
+
+def streak_block_template(campaigns: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Real template plus one banner OR-chain per CAMPAIGNS_PER_BANNER and one bottom_sheet per campaign"""
+    import re
+
+    with open(APP_DIR / "streak_block_template_raw.json", 'r') as f:
+        data = json.load(f)
+    template = data['value']
+
+    banners: Dict[str, List[str]] = {}
+    for c in campaigns:
+        banners.setdefault(c['banner_url'], []).append(c['campaign_id'])
+
+    banner_blocks = "".join(
+        '              #elseif(' + " || ".join(f'$!campaign_id == "{cid}"' for cid in ids) + ')\r\n'
+        f'              "url": "{url}",\r\n'
+        for url, ids in banners.items()
+    )
+
+    sheet_blocks = "".join(
+        f'''#elseif($!campaign_id == "{c['campaign_id']}")
+              #if($streak_item.status != "allotted" && $streak_item.status != "claimed")
+              ,
+          "bottom_sheet": {{
+              "reward_details": {{
+                  "title": "<format>earn <icon>INR</icon>{c['per_txn_reward']}</format>",
+                  "subtitle": "make {c['max_allowed']} payments\\nand claim cashback"
+              }}
+          }}
+              #end
+          '''.replace('\n', '\r\n')
+        for c in campaigns
+    )
+
+    banner_match = re.search(r'(#elseif\(\$!campaign_id[^#]+)\s+(#else\s+"url":)', template)
+    at = banner_match.start(2)
+    template = template[:at] + banner_blocks.lstrip(' ') + '              ' + template[at:]
+
+    sheet_match = re.search(r'(#end\s+)(#else\s+#if\(\$streak_item\.status)', template)
+    at = sheet_match.start(2)
+    template = template[:at] + sheet_blocks + template[at:]
+
+    return envelope('STREAK_BLOCK_TEMPLATE', template)
+
+
+GENERATORS = {
+    'STREAK_ELIGIBILITY': streak_eligibility,
+    'STREAK_TXN_ELIGIBILITY': streak_txn_eligibility,
+    'STREAK_CONFIG': streak_config,
+    'STREAK_BLOCK_TEMPLATE': streak_block_template,
+    'SCAN_HOMEPAGE_CONFIG': scan_homepage_config,
+    'PTP_STREAK_CONFIG': ptp_streak_config,
+    'STREAK_JOURNEY_JOB_CONFIG': streak_journey_job_config
+}
+
+
+def build_all(count: int, seed: int = 42) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """(campaigns, {config_key: GET response}) for count campaigns"""
+    campaigns = make_campaigns(count, seed)
+    return campaigns, {key: build(campaigns) for key, build in GENERATORS.items()}
+
+
+def write_all(count: int, output_dir: str, seed: int = 42) -> Dict[str, str]:
+    """Write <CONFIG_KEY>.json per config; returns {config_key: path}"""
+    os.makedirs(output_dir, exist_ok=True)
+    _, configs = build_all(count, seed)
+    paths = {}
+
+    for config_key, data in configs.items():
+        path = os.path.join(output_dir, f"{config_key}.json")
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+        paths[config_key] = path
+
+    return paths
+
+
+def main():
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(1)
+
+    count, output_dir = int(sys.argv[1]), sys.argv[2]
+    for config_key, path in write_all(count, output_dir).items():
+        print(f"✓ {config_key}: {os.path.getsize(path):,} bytes → {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+commit_queue: when edits of one config are coalesced into one POST and one
+of them fails (its edit returns None or raises), only that submitter gets
+the error; the others still go out.
+
+    python3 -m pytest benchmarks
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+
+APP_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(APP_DIR))
+
+import commit_queue  # noqa: E402
+import optimistic_write  # noqa: E402
+
+CONFIG_KEY = 'STREAK_CONFIG'
+
+
+class MissingAnchor(ValueError):
+    pass
+
+
+@pytest.fixture(autouse=True)
+def isolated(tmp_path, monkeypatch):
+    monkeypatch.setenv('CAMPAIGN_NO_METRICS', '1')
+    monkeypatch.setattr(commit_queue, 'LOCK_DIR', str(tmp_path / "locks"))
+    monkeypatch.setattr(optimistic_write, 'backoff', lambda attempt: 0)
+
+
+def envelope(value):
+    return {'key': CONFIG_KEY, 'value': value}
+
+
+def add(name):
+    """edit that appends name to the value's list"""
+    return lambda version: envelope(version['value'] + [name])
+
+
+def broken(version):
+    raise MissingAnchor("no journey rule to anchor on")
+
+
+def submit_queued(tickets, live):
+    """
+    Submit every (name, base, payload, edit) from its own thread while the
+    config's lock is held, so they are all coalesced into one commit.
+    Returns ({name: (result, stats) or the exception}, [POSTed payloads]).
+    """
+    posted = []
+    outcomes = {}
+
+    def post(payload):
+        posted.append(payload)
+        live['envelope'] = payload
+        return 'ok'
+
+    def run(name, base, payload, edit):
+        try:
+            outcomes[name] = commit_queue.submit(CONFIG_KEY, base, payload, edit,
+                                                 refetch=lambda: live['envelope'], post=post, log=None)
+        except Exception as e:
+            outcomes[name] = e
+
+    threads = []
+    with commit_queue.config_lock(CONFIG_KEY, log=None):
+        for ticket in tickets:
+            threads.append(threading.Thread(target=run, args=ticket))
+            threads[-1].start()
+            while len(commit_queue._pending.get(CONFIG_KEY, [])) < len(threads):
+                time.sleep(0.01)  # keep the queue in submission order
+    for thread in threads:
+        thread.join(timeout=10)
+    return outcomes, posted
+
+
+def test_raising_edit_fails_only_its_ticket():
+    base = envelope(['a'])
+    live = {'envelope': base}
+    outcomes, posted = submit_queued([
+        ('first', base, envelope(['a', 'first']), add('first')),
+        ('broken', base, envelope(['a', 'broken']), broken),
+        ('last', base, envelope(['a', 'last']), add('last')),
+    ], live)
+
+    assert isinstance(outcomes['broken'], MissingAnchor)
+    assert posted == [envelope(['a', 'first', 'last'])]
+    for name in ('first', 'last'):
+        result, stats = outcomes[name]
+        assert result == 'ok'
+        assert stats['coalesced'] == 2
+
+
+def test_raising_edit_fails_only_its_ticket_on_rebase():
+    base = envelope(['a'])
+    live = {'envelope': envelope(['a', 'someone else'])}  # changed since base was fetched
+    outcomes, posted = submit_queued([
+        ('broken', base, envelope(['a', 'broken']), broken),
+        ('last', base, envelope(['a', 'last']), add('last')),
+    ], live)
+
+    assert isinstance(outcomes['broken'], MissingAnchor)
+    assert posted == [envelope(['a', 'someone else', 'last'])]
+    result, stats = outcomes['last']
+    assert result == 'ok'
+    assert stats['rebases'] == 1
+
+
+def test_edit_returning_none_is_a_write_conflict():
+    base = envelope(['a'])
+    live = {'envelope': base}
+    outcomes, posted = submit_queued([
+        ('first', base, envelope(['a', 'first']), add('first')),
+        ('stale', base, envelope(['a', 'stale']), lambda version: None),
+    ], live)
+
+    assert isinstance(outcomes['stale'], optimistic_write.WriteConflict)
+    assert posted == [envelope(['a', 'first'])]
@@ -0,0 +1,93 @@
+"""
+config_diff: the RFC 6902 patch from json_patch(before, after), re-applied
+to before with apply_patch, must give exactly after (types included).
+
+    python3 -m pytest benchmarks
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+
+APP_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(APP_DIR))
+sys.path.insert(0, str(APP_DIR / "benchmarks"))
+
+import config_diff  # noqa: E402
+import synthetic_configs  # noqa: E402
+
+
+def entry(campaign_id, config_key="STREAK", **fields):
+    return dict({'config_key': config_key, 'conditions': {'campaign_id': {'value': campaign_id}}}, **fields)
+
+
+CASES = {
+    'add entry': ([entry("a", level=1)], [entry("a", level=1), entry("b", level=2)]),
+    'remove entries': ([entry("a"), entry("b"), entry("c"), entry("d")], [entry("b"), entry("d")]),
+    'change entry field': ([entry("a", level=1), entry("b", level=2)], [entry("a", level=1), entry("b", level=3)]),
+    'reorder': ([entry("a"), entry("b")], [entry("b"), entry("a")]),
+    'duplicates': ([entry("a", n=1), entry("a", n=2)], [entry("a", n=1), entry("a", n=3), entry("a", n=4)]),
+    'scalars': (["x", "y", 3], ["y", 3, "z", None]),
+    'true to 1': ({'enabled': True, 'flags': [True, 1]}, {'enabled': 1, 'flags': [1, True]}),
+    '1 to 1.0': ({'rate': 1, 'rates': [1, 2]}, {'rate': 1.0, 'rates': [1.0, 2]}),
+    'unhashable keys': ([entry({'v': 1}, level=1), entry(["a"], level=2)],
+                        [entry({'v': 1}, level=5), entry(["a"], level=2), entry(["b"])]),
+    'pointer escaping': ({'a/b': 1, 'm~n': {'x': [1]}}, {'a/b': 2, 'm~n': {'x': [1, 2]}, '~/': 0}),
+    'nested': ({'journey_rules': {'configs': [entry("a", rules=[{'day': 1}])]}},
+               {'journey_rules': {'configs': [entry("a", rules=[{'day': 1}, {'day': 2}])], 'version': 2}}),
+    'type change': ({'value': [1, 2]}, {'value': {'1': 2}}),
+}
+
+
+@pytest.mark.parametrize('before, after', CASES.values(), ids=list(CASES))
+def test_patch_round_trip(before, after):
+    patch = config_diff.json_patch(before, after)
+
+    patched = config_diff.apply_patch(before, patch)
+
+    assert config_diff.same_value(patched, after)
+    assert json.loads(json.dumps(patch)) == patch  # what write_patch saves
+
+
+def test_patch_of_unchanged_value_is_empty():
+    before, _ = CASES['nested']
+    assert config_diff.json_patch(before, json.loads(json.dumps(before))) == []
+
+
+def test_true_and_1_are_different():
+    assert not config_diff.same_value(True, 1)
+    assert not config_diff.same_value([{'a': 1}], [{'a': 1.0}])
+    assert config_diff.same_value([{'a': 1, 'b': [None, "x"]}], [{'a': 1, 'b': [None, "x"]}])
+    patch = config_diff.json_patch({'enabled': True}, {'enabled': 1})
+    assert patch == [{'op': 'replace', 'path': '/enabled', 'value': 1}]
+    hunks = config_diff.diff_json({'enabled': True}, {'enabled': 1})
+    assert [(hunk['op'], hunk['path']) for hunk in hunks] == [('changed', '/enabled')]
+
+
+def test_synthetic_configs_round_trip():
+    _, before_files = synthetic_configs.build_all(40)
+    _, after_files = synthetic_configs.build_all(60)
+    for config_key, data in before_files.items():
+        try:
+            before = json.loads(data['value'])
+        except ValueError:
+            continue  # STREAK_BLOCK_TEMPLATE is Velocity, diffed as text
+        after = json.loads(after_files[config_key]['value'])
+
+        patch = config_diff.json_patch(before, after)
+
+        assert patch, config_key
+        assert config_diff.same_value(config_diff.apply_patch(before, patch), after), config_key
+        assert config_diff.apply_patch(before, []) == before
+
+
+def test_apply_patch_rejects_bad_paths():
+    with pytest.raises(ValueError):
+        config_diff.apply_patch({'a': [1]}, [{'op': 'remove', 'path': '/a/5'}])
+    with pytest.raises(ValueError):
+        config_diff.apply_patch({'a': [1]}, [{'op': 'replace', 'path': '/b', 'value': 1}])
+    with pytest.raises(ValueError):
+        config_diff.apply_patch({'a': 1}, [{'op': 'remove', 'path': ''}])
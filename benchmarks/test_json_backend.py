@@ -0,0 +1,54 @@
+"""
+json_backend must give the same values and text as the stdlib json module,
+including for integers that don't fit in 64 bits (orjson reads those as
+floats).
+
+    python3 -m pytest benchmarks
+"""
+
+import json
+import sys
+from pathlib import Path
+
+
+APP_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(APP_DIR))
+
+import json_backend  # noqa: E402
+
+
+BIG_INT_CONFIG = {
+    "configs": [
+        {"campaign_id": "2f6c1a4e-0d55-4c0b-9a57-1b2f0c9e7d11", "reward": 1180591620717411303424},
+        {"campaign_id": "9a0b7c3d-61e2-4f5a-8d40-3e6b5c2a9f08", "reward": -9223372036854775809},
+        {"campaign_id": "c41d2e8f-7a93-4b06-a5d1-0f8e9c7b6a52", "reward": 18446744073709551616},
+    ],
+    "limit": 9223372036854775807,
+}
+
+
+def assert_same(value, expected):
+    assert value == expected
+    assert type(value) is type(expected)
+    if isinstance(expected, dict):
+        for key in expected:
+            assert_same(value[key], expected[key])
+    elif isinstance(expected, list):
+        for item, expected_item in zip(value, expected):
+            assert_same(item, expected_item)
+
+
+def test_big_int_config_round_trips():
+    for kwargs in ({'indent': 2}, {'separators': (',', ':')}):
+        text = json.dumps(BIG_INT_CONFIG, **kwargs)
+        assert json_backend.dumps(BIG_INT_CONFIG, **kwargs) == text
+        assert_same(json_backend.loads(text), BIG_INT_CONFIG)
+        assert_same(json_backend.loads(text.encode('utf-8')), BIG_INT_CONFIG)
+        assert json_backend.dumps(json_backend.loads(text), **kwargs) == text
+
+
+def test_big_int_in_value_string():
+    envelope = {"key": "STREAK_CONFIG", "value": json.dumps(BIG_INT_CONFIG, indent=2)}
+    data = json_backend.loads(json.dumps(envelope, indent=2))
+    assert data == envelope
+    assert_same(json_backend.loads(data['value']), BIG_INT_CONFIG)
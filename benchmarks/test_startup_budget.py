@@ -0,0 +1,29 @@
+"""
+Startup regression test: runs benchmarks/startup_budget.py and fails if any
+entry point is over its import-time budget or imports a heavy module for
+--help.
+
+    python3 -m pytest benchmarks
+
+CAMPAIGN_STARTUP_BUDGET_SCALE=2 multiplies every budget (slow machines),
+CAMPAIGN_SKIP_STARTUP_BUDGET=1 skips the test.
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+
+SCRIPT = Path(__file__).resolve().parent / "startup_budget.py"
+
+
+@pytest.mark.skipif(os.environ.get('CAMPAIGN_SKIP_STARTUP_BUDGET') == '1',
+                    reason='CAMPAIGN_SKIP_STARTUP_BUDGET=1')
+def test_entry_points_within_startup_budget():
+    scale = os.environ.get('CAMPAIGN_STARTUP_BUDGET_SCALE', '1.0')
+    result = subprocess.run([sys.executable, str(SCRIPT), '--budget-scale', scale],
+                            capture_output=True, text=True, stdin=subprocess.DEVNULL)
+    assert result.returncode == 0, result.stdout + result.stderr
@@ -0,0 +1,119 @@
+"""
+value_splice: a JSON Patch spliced into the original value text must parse
+back to the edited value and leave the original layout (LF or CRLF pretty,
+compact) as it was.
+
+    python3 -m pytest benchmarks
+"""
+
+import copy
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+
+APP_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(APP_DIR))
+
+import config_diff  # noqa: E402
+import value_splice  # noqa: E402
+import wire_format  # noqa: E402
+
+
+BEFORE = {
+    "enabled": True,
+    "configs": [
+        {"campaign_id": "a1", "max_levels": 5, "tags": ["upi"]},
+        {"campaign_id": "b2", "max_levels": 7, "tags": []},
+        {"campaign_id": "c3", "max_levels": 3, "tags": ["txn", "upi"]},
+    ],
+    "supported_ids": ["a1", "b2", "c3"],
+    "limits": {},
+}
+
+LAYOUTS = {
+    'lf': lambda value: json.dumps(value, indent=2),
+    'crlf': lambda value: json.dumps(value, indent=2).replace('\n', '\r\n'),
+    'compact': lambda value: json.dumps(value, separators=(',', ':')),
+    'spaced': lambda value: json.dumps(value),
+}
+
+
+def add_campaign(value):
+    value['configs'].append({"campaign_id": "d4", "max_levels": 2, "tags": ["upi"]})
+    value['supported_ids'].append("d4")
+
+
+def remove_campaign(value):
+    del value['configs'][1]
+    value['supported_ids'].remove("b2")
+
+
+def change_fields(value):
+    value['configs'][2]['max_levels'] = 4
+    value['configs'][1]['tags'].append("txn")
+    value['limits']['daily'] = 10
+    value['new_key'] = {"nested": [1, 2]}
+
+
+def true_to_one(value):
+    value['enabled'] = 1  # == would call this unchanged
+
+
+EDITS = [add_campaign, remove_campaign, change_fields, true_to_one]
+
+
+def edited(edit):
+    value = copy.deepcopy(BEFORE)
+    edit(value)
+    return value
+
+
+@pytest.mark.parametrize('layout', sorted(LAYOUTS))
+@pytest.mark.parametrize('edit', EDITS, ids=lambda edit: edit.__name__)
+def test_splice_round_trip(layout, edit):
+    dumps = LAYOUTS[layout]
+    after = edited(edit)
+    patch = config_diff.json_patch(BEFORE, after)
+    assert patch
+
+    text = value_splice.splice_patch(dumps(BEFORE), patch)
+
+    assert config_diff.same_value(json.loads(text), after)
+    assert text == dumps(after)  # laid out exactly as the original was
+
+
+def test_splice_leaves_other_bytes_alone():
+    # Not json.dumps' layout: a full re-serialization would rewrite all of it
+    original = ('{\r\n    "configs" : [\r\n        {"campaign_id": "a1",  "max_levels": 5}\r\n    ],\r\n'
+                '    "supported_ids": ["a1", "z9"],  "note": "keep   this"\r\n}')
+    after = json.loads(original)
+    after['configs'][0]['max_levels'] = 6
+    after['supported_ids'].append("b2")
+
+    text = value_splice.splice_patch(original, config_diff.json_patch(json.loads(original), after))
+
+    assert json.loads(text) == after
+    assert text == original.replace('"max_levels": 5', '"max_levels": 6').replace('"z9"]', '"z9", "b2"]')
+
+
+def test_unsupported_op_raises_splice_error():
+    with pytest.raises(value_splice.SpliceError):
+        value_splice.splice_patch(json.dumps(BEFORE), [{'op': 'move', 'from': '/limits', 'path': '/x'}])
+    with pytest.raises(value_splice.SpliceError):
+        value_splice.splice_patch('"not a container"', [{'op': 'add', 'path': '/x', 'value': 1}])
+
+
+@pytest.mark.parametrize('config_key', ['STREAK_CONFIG', 'PTP_STREAK_CONFIG', 'STREAK_JOURNEY_JOB_CONFIG'])
+@pytest.mark.parametrize('edit', EDITS, ids=lambda edit: edit.__name__)
+def test_edit_value_keeps_the_pretty_layout(config_key, edit):
+    # STREAK_CONFIG is CRLF-indented, PTP_STREAK_CONFIG compact, the journey config LF-indented
+    original = wire_format.serialize(BEFORE, config_key, 'pretty')
+    after = edited(edit)
+
+    text = wire_format.edit_value(original, after, config_key, 'pretty')
+
+    assert config_diff.same_value(json.loads(text), after)
+    assert text == wire_format.serialize(after, config_key, 'pretty')
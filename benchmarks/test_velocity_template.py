@@ -0,0 +1,95 @@
+"""
+velocity_template on the saved STREAK_BLOCK_TEMPLATE: removing the orphaned
+campaigns (cleanup_orphaned_campaigns.ORPHANED_UUIDS) and compacting ||
+chains must leave every other campaign rendering exactly as before.
+
+    python3 -m pytest benchmarks
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+
+APP_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(APP_DIR))
+
+import velocity_template  # noqa: E402
+from cleanup_orphaned_campaigns import ORPHANED_UUIDS  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def template():
+    return json.loads((APP_DIR / "streak_block_template_raw.json").read_text())['value']
+
+
+def others(template, removed):
+    return [campaign_id for campaign_id in velocity_template.known_campaign_ids(template)
+            if campaign_id not in removed]
+
+
+def test_remove_orphans(template):
+    orphans = ORPHANED_UUIDS & set(velocity_template.known_campaign_ids(template))
+    assert orphans
+
+    pruned, report = velocity_template.remove_campaigns(template, ORPHANED_UUIDS)
+
+    assert {campaign_id for campaign_id, _ in report['removed']} == orphans
+    assert not report['skipped']
+    assert not any(campaign_id in pruned for campaign_id in ORPHANED_UUIDS)
+    assert "\r\n" in pruned and "\n" not in pruned.replace("\r\n", "")
+    assert report['after']['comparisons'] < report['before']['comparisons']
+    velocity_template.check_equivalent(template, pruned, others(template, ORPHANED_UUIDS))
+
+    again, report = velocity_template.remove_campaigns(pruned, ORPHANED_UUIDS)
+    assert again == pruned
+    assert not report['removed'] and not report['dropped_branches']
+
+
+def test_remove_first_branch_promotes_elseif():
+    template = ('#if($!campaign_id == "a")\nA\n#elseif($!campaign_id == "b" || $!campaign_id == "c")\nBC\n'
+                '#else\nX\n#end\n')
+    pruned, report = velocity_template.remove_campaigns(template, {"a", "c"})
+    assert pruned == '#if($!campaign_id == "b")\nBC\n#else\nX\n#end\n'
+    assert report['dropped_branches'] == [1]
+    velocity_template.check_equivalent(template, pruned, ["b"])
+
+
+def test_check_equivalent_catches_a_changed_route(template):
+    pruned, _ = velocity_template.remove_campaigns(template, ORPHANED_UUIDS)
+    with pytest.raises(velocity_template.TemplateError):
+        velocity_template.check_equivalent(template, pruned, velocity_template.known_campaign_ids(template))
+
+
+def test_compact(template):
+    compacted, report = velocity_template.compact_conditions(template)
+
+    assert report['compacted']
+    assert '.contains("$!campaign_id")' in compacted
+    assert report['after']['longest_or_chain'] < report['before']['longest_or_chain']
+    assert report['after']['comparisons'] == report['before']['comparisons']
+    velocity_template.check_equivalent(template, compacted, velocity_template.known_campaign_ids(template))
+
+
+def test_compacted_list_matches_non_string_campaign_id(template):
+    compacted, _ = velocity_template.compact_conditions(template)
+    name = next(iter(velocity_template.campaign_lists(compacted)))
+    campaign_id = velocity_template.campaign_lists(compacted)[name]['ids'][0]
+    context = dict(velocity_template.SAMPLE_CONTEXTS[0], campaign_id=velocity_template.JavaObject(campaign_id))
+    assert velocity_template.render(compacted, context) == velocity_template.render(template, context)
+
+    # contains() uses equals(): without the interpolation a UUID object misses the list
+    unquoted = compacted.replace('.contains("$!campaign_id")', '.contains($!campaign_id)')
+    assert velocity_template.render(unquoted, context) != velocity_template.render(template, context)
+    with pytest.raises(velocity_template.TemplateError):
+        velocity_template.check_equivalent(template, unquoted, velocity_template.known_campaign_ids(template))
+
+
+def test_remove_from_compacted(template):
+    compacted, _ = velocity_template.compact_conditions(template)
+    pruned, report = velocity_template.remove_campaigns(compacted, ORPHANED_UUIDS)
+
+    assert not any(campaign_id in pruned for campaign_id in ORPHANED_UUIDS)
+    velocity_template.check_equivalent(template, pruned, others(template, ORPHANED_UUIDS))
@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+"""
+Warm Daemon for Campaign Setup Scripts
+======================================
+
+Keeps the master script, removal scripts and processors imported in one
+long-running process and runs jobs for them over a Unix domain socket.
+
+Usage:
+    python3 campaign_daemon.py start     # run the daemon (foreground; use & or tmux)
+    python3 campaign_daemon.py status    # uptime, jobs served, warm caches
+    python3 campaign_daemon.py stop      # shut it down
+
+Once the daemon is running, the existing commands automatically send their
+job to it instead of starting cold:
+
+    python3 setup_campaign_master.py --campaign-name ... --dry-run
+    python3 remove_promotional_campaigns.py
+
+If no daemon is running (or CAMPAIGN_NO_DAEMON=1 is set) they run in-process
+exactly as before. Prompts still work: the client relays your terminal's
+stdin/stdout to the job.
+
+What stays warm between jobs:
+- imported entry-point modules (reloaded if their source file changes)
+- compiled processor scripts (recompiled if the file changes), run
+  in-process instead of spawning a new python3 per config
+- credentials.json, banner_registry.json and subtitle_templates.json
+  (re-read only when the file's mtime/size changes)
+- one HTTP session, so Heimdall connections are reused across jobs
+
+Protocol: newline-delimited JSON. The client sends one header
+{"script", "argv", "cwd"} (or {"command": "status"|"shutdown"}), then
+{"stdin": "..."} lines. The daemon sends {"out": "..."} lines and a final
+{"exit": <code>}.
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+
+# Base directory for the app (works both locally and on Streamlit Cloud)
+APP_DIR = Path(__file__).parent
+
+SOCKET_PATH = Path(os.environ.get('CAMPAIGN_DAEMON_SOCKET', str(APP_DIR / '.campaign_daemon.sock')))
+
+# Entry points the daemon is allowed to run (module name == script name)
+JOB_SCRIPTS = {
+    'setup_campaign_master',
+    'cleanup_orphaned_campaigns',
+    'cleanup_cred_mtu_from_templates',
+    'remove_promotional_campaigns',
+    'remove_activation_campaigns',
+    'remove_cred_mtu_campaigns',
+    'remove_last_2_orphaned',
+}
+
+
+# ============================================================================
+# Client side (imported by every entry point - keep it cheap)
+# ============================================================================
+
+def forward_or_run(script_file, main_fn):
+    """
+    Run a script's job on the warm daemon if one is listening, otherwise call
+    main_fn() in-process. Returns the exit code.
+    """
+    script = Path(script_file).stem
+
+    # --profile-memory measures this process, so it never runs on the daemon
+    forward = '--profile-memory' not in sys.argv and not os.environ.get('CAMPAIGN_NO_DAEMON')
+
+    if script in JOB_SCRIPTS and forward and SOCKET_PATH.exists():
+        exit_code = send_job(script, sys.argv[1:])
+        if exit_code is not None:
+            return exit_code
+
+    result = main_fn()
+    return result if isinstance(result, int) else 0
+
+
+def _connect():
+    """Connect to the daemon socket, or None if it isn't answering"""
+    import socket
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(SOCKET_PATH))
+        return sock
+    except OSError:
+        # Stale socket file from a daemon that died
+        sock.close()
+        return None
+
+
+def _send(wfile, message):
+    wfile.write((json.dumps(message) + '\n').encode('utf-8'))
+    wfile.flush()
+
+
+def send_job(script, argv):
+    """
+    Send a job to the daemon and relay stdin/stdout until it finishes.
+
+    Returns the job's exit code, or None if the daemon isn't reachable.
+    """
+    import threading
+
+    sock = _connect()
+    if sock is None:
+        return None
+
+    rfile = sock.makefile('rb')
+    wfile = sock.makefile('wb')
+    _send(wfile, {'script': script, 'argv': argv, 'cwd': os.getcwd()})
+
+    def relay_stdin():
+        try:
+            for line in sys.stdin:
+                _send(wfile, {'stdin': line})
+            _send(wfile, {'stdin': ''})  # EOF
+        except (OSError, ValueError):
+            pass
+
+    threading.Thread(target=relay_stdin, daemon=True).start()
+
+    try:
+        for raw in rfile:
+            message = json.loads(raw)
+            if 'out' in message:
+                sys.stdout.write(message['out'])
+                sys.stdout.flush()
+            elif 'exit' in message:
+                return message['exit']
+    except KeyboardInterrupt:
+        print("\nDisconnected from daemon (the job keeps running there)")
+        return 130
+    finally:
+        sock.close()
+
+    print("✗ Lost connection to daemon")
+    return 1
+
+
+def send_command(command):
+    """Send a control command (status/shutdown); returns the reply dict or None"""
+    sock = _connect()
+    if sock is None:
+        return None
+
+    with sock:
+        wfile = sock.makefile('wb')
+        _send(wfile, {'command': command})
+        line = sock.makefile('rb').readline()
+        return json.loads(line) if line else {}
+
+
+# ============================================================================
+# Daemon side
+# ============================================================================
+
+class WarmCache:
+    """Parsed JSON files and compiled scripts, revalidated by mtime/size"""
+
+    def __init__(self):
+        self.json_files = {}
+        self.scripts = {}
+        self.modules = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _signature(path):
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def load_json(self, path):
+        """Parsed JSON for path; callers get a fresh copy they may mutate"""
+        import copy
+
+        path = str(path)
+        signature = self._signature(path)
+        cached = self.json_files.get(path)
+        if cached and cached[0] == signature:
+            self.hits += 1
+        else:
+            self.misses += 1
+            with open(path, 'r') as f:
+                cached = (signature, json.load(f))
+            self.json_files[path] = cached
+        return copy.deepcopy(cached[1])
+
+    def compiled_script(self, path):
+        """Compiled code object for a processor script"""
+        path = str(path)
+        signature = self._signature(path)
+        cached = self.scripts.get(path)
+        if cached and cached[0] == signature:
+            self.hits += 1
+            return cached[1]
+
+        self.misses += 1
+        with open(path, 'r') as f:
+            code = compile(f.read(), path, 'exec')
+        self.scripts[path] = (signature, code)
+        return code
+
+    def module(self, name):
+        """Import (or reload, if its source changed) an entry-point module"""
+        import importlib
+
+        path = APP_DIR / f"{name}.py"
+        signature = self._signature(path)
+        cached = self.modules.get(name)
+        if cached and cached[0] == signature:
+            self.hits += 1
+            return cached[1]
+
+        self.misses += 1
+        module = importlib.reload(cached[1]) if cached else importlib.import_module(name)
+        self.modules[name] = (signature, module)
+        return module
+
+
+class _JobOutput:
+    """sys.stdout/sys.stderr replacement that streams to the client"""
+
+    def __init__(self, send):
+        self._send = send
+
+    def write(self, text):
+        if text:
+            self._send({'out': text})
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+
+class _JobInput:
+    """sys.stdin replacement that reads lines relayed by the client"""
+
+    def __init__(self, rfile):
+        self._rfile = rfile
+        self._eof = False
+
+    def readline(self, *args):
+        if self._eof:
+            return ''
+        raw = self._rfile.readline()
+        if not raw:
+            self._eof = True
+            return ''
+        line = json.loads(raw).get('stdin', '')
+        if line == '':
+            self._eof = True
+        return line
+
+    def isatty(self):
+        return False
+
+
+def run_processor(cache, cmd):
+    """
+    Run a processor script in-process (drop-in for subprocess.run(cmd, check=True)).
+
+    cmd is the same ['python3', script_path, *args] list the master script
+    builds; the compiled script is cached so each config skips interpreter
+    startup and recompilation.
+    """
+    import io
+    import subprocess
+    import traceback
+    from contextlib import redirect_stdout, redirect_stderr
+
+    script_path = cmd[1]
+    code = cache.compiled_script(script_path)
+
+    stdout, stderr = io.StringIO(), io.StringIO()
+    saved_argv = sys.argv
+    sys.argv = [script_path] + list(cmd[2:])
+    returncode = 0
+
+    try:
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            exec(code, {'__name__': '__main__', '__file__': script_path})
+    except SystemExit as e:
+        returncode = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        if e.code is not None and not isinstance(e.code, int):
+            stderr.write(f"{e.code}\n")
+    except Exception:
+        returncode = 1
+        stderr.write(traceback.format_exc())
+    finally:
+        sys.argv = saved_argv
+
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd, stdout.getvalue(), stderr.getvalue())
+    return subprocess.CompletedProcess(cmd, 0, stdout.getvalue(), stderr.getvalue())
+
+
+def install_hooks(cache, http_session):
+    """
+    Point the master script and retool_integration at the warm caches.
+
+    Called before every job because reloading a changed module resets its
+    globals to the defaults.
+    """
+    master = cache.module('setup_campaign_master')
+    retool = cache.module('retool_integration')
+
+    def load_credentials():
+        creds_file = APP_DIR / 'credentials.json'
+        return cache.load_json(creds_file) if creds_file.exists() else None
+
+    master.processor_runner = lambda cmd: run_processor(cache, cmd)
+    master.load_credentials = load_credentials
+    master.load_banner_registry = lambda: cache.load_json(APP_DIR / 'banner_registry.json')
+    master.load_subtitle_templates = lambda: cache.load_json(APP_DIR / 'subtitle_templates.json')
+
+    retool.http_session = http_session
+
+
+def warm_up(cache):
+    """Import every entry point and compile every processor once"""
+    sys.path.insert(0, str(APP_DIR / 'scripts'))
+    sys.path.insert(0, str(APP_DIR))
+
+    for name in sorted(JOB_SCRIPTS):
+        cache.module(name)
+
+    for script in sorted((APP_DIR / 'scripts').glob('process_*.py')):
+        cache.compiled_script(script)
+
+
+def serve():
+    """Run the daemon until it receives a shutdown command"""
+    import socketserver
+    import threading
+    import time
+    import traceback
+    import requests
+
+    if SOCKET_PATH.exists():
+        if send_command('status') is not None:
+            print(f"✗ A daemon is already running on {SOCKET_PATH}")
+            return 1
+        SOCKET_PATH.unlink()
+
+    cache = WarmCache()
+    started = time.time()
+    print("→ Warming up (imports, processors, HTTP session)...")
+    warm_up(cache)
+    http_session = requests.Session()
+    print(f"✓ Warm in {time.time() - started:.2f}s")
+
+    job_lock = threading.Lock()
+    stats = {'jobs': 0, 'started': started}
+
+    class Handler(socketserver.StreamRequestHandler):
+        def send(self, message):
+            self.wfile.write((json.dumps(message) + '\n').encode('utf-8'))
+            self.wfile.flush()
+
+        def handle(self):
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            header = json.loads(raw)
+
+            command = header.get('command')
+            if command == 'status':
+                self.send({
+                    'pid': os.getpid(),
+                    'uptime_s': round(time.time() - stats['started'], 1),
+                    'jobs': stats['jobs'],
+                    'busy': job_lock.locked(),
+                    'cache_hits': cache.hits,
+                    'cache_misses': cache.misses,
+                    'modules': sorted(cache.modules),
+                    'processors': len(cache.scripts)
+                })
+                return
+            if command == 'shutdown':
+                self.send({'ok': True})
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+
+            script = header.get('script')
+            if script not in JOB_SCRIPTS:
+                self.send({'out': f"✗ Unknown job: {script}\n"})
+                self.send({'exit': 2})
+                return
+
+            # stdout/stdin/cwd are process-wide, so jobs run one at a time
+            with job_lock:
+                self.send({'exit': self.run_job(script, header)})
+
+        def run_job(self, script, header):
+            output = _JobOutput(self.send)
+            saved = (sys.stdin, sys.stdout, sys.stderr, sys.argv, os.getcwd())
+            sys.stdin, sys.stdout, sys.stderr = _JobInput(self.rfile), output, output
+            sys.argv = [str(APP_DIR / f"{script}.py")] + list(header.get('argv', []))
+            exit_code = 0
+
+            try:
+                os.chdir(header.get('cwd') or APP_DIR)
+                install_hooks(cache, http_session)
+                result = cache.module(script).main()
+                exit_code = result if isinstance(result, int) else 0
+            except SystemExit as e:
+                exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            except Exception:
+                output.write(traceback.format_exc())
+                exit_code = 1
+            finally:
+                sys.stdin, sys.stdout, sys.stderr, sys.argv, cwd = saved
+                os.chdir(cwd)
+                stats['jobs'] += 1
+
+            return exit_code
+
+    class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    old_umask = os.umask(0o077)  # socket only usable by this user
+    try:
+        server = Server(str(SOCKET_PATH), Handler)
+    finally:
+        os.umask(old_umask)
+
+    print(f"✓ Listening on {SOCKET_PATH} (Ctrl+C or `campaign_daemon.py stop` to exit)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if SOCKET_PATH.exists():
+            SOCKET_PATH.unlink()
+
+    print(f"✓ Daemon stopped after {stats['jobs']} job(s)")
+    return 0
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Warm daemon for campaign setup scripts')
+    parser.add_argument('command', choices=['start', 'status', 'stop'])
+    args = parser.parse_args()
+
+    if args.command == 'start':
+        return serve()
+
+    reply = send_command('status' if args.command == 'status' else 'shutdown')
+    if reply is None:
+        print("→ No daemon running")
+        return 1
+
+    if args.command == 'stop':
+        print("✓ Daemon stopping")
+    else:
+        for key, value in reply.items():
+            print(f"  {key}: {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Carousel Config Builder (SCAN_HOMEPAGE_CONFIG / PTP_STREAK_CONFIG)
+
+Both configs get the same streak-state entries per campaign, built here from
+one compact parameter record:
+
+    params = carousel_configs.campaign_params('upi_streak_5', 'UPI', 14, 5, 10, 50)
+    entries = carousel_configs.build_entries('SCAN_HOMEPAGE_CONFIG', params)
+    # -> [<name>_0, <name>_1_5]  (or [<name>] when max_allowed is 1, scan only)
+
+    entries = carousel_configs.build_batch('PTP_STREAK_CONFIG', [params, ...])
+
+States per campaign (the app picks the first entry whose conditions match):
+- <name>_0:   nothing completed yet - total offer and expiry copy
+- <name>_1_N: 1+ payments completed - per-payment reward copy
+- <name>:     SCAN_HOMEPAGE_CONFIG only, max_allowed = 1 campaigns
+
+Everything that doesn't depend on the campaign (search blocks, CTAs,
+flags, the status condition) is a module-level constant shared by every
+entry instead of a fresh copy, and the uas_attributes/type condition are
+shared between a campaign's two entries. Treat built entries as read-only:
+copy.deepcopy() one before editing it in place.
+"""
+
+from typing import Dict, List, Any
+
+
+CAROUSEL_CONFIGS = ('SCAN_HOMEPAGE_CONFIG', 'PTP_STREAK_CONFIG')
+
+# Campaign types PTP_STREAK_CONFIG (the P2P home screen) applies to
+PTP_CAMPAIGN_TYPES = ('UPI', 'P2P')
+
+_STREAK_TYPE_ATTRIBUTE = {
+    "namespace": "heimdall",
+    "name": "heimdall.dynamic_attributes.streak_type"
+}
+
+_STATUS_ACTIVE = {
+    "type": "STRING",
+    "operator": "IN",
+    "value": ["IN_PROGRESS", "ELIGIBLE"]
+}
+
+_COMPLETED_AT_LEAST_ONE = {
+    "type": "NUMBER",
+    "operator": "GTE",
+    "value": 1
+}
+
+# Carousel rotation settings, the first keys of every carousel block
+_CAROUSEL_TIMING = {
+    "duration": 2000,
+    "interval": 2000,
+    "turns": 8,
+    "timer_threshold": 172800000
+}
+
+_FLAGS_OFFER_NUDGE = {
+    "show_streak": True,
+    "forward_streak_data": True,
+    "forward_offer_nudge_data": True
+}
+
+_FLAGS_NO_OFFER_NUDGE = {
+    "show_streak": True,
+    "forward_streak_data": True,
+    "forward_offer_nudge_data": False
+}
+
+_EMPTY = {}
+
+# SCAN_HOMEPAGE_CONFIG search bar
+_SEARCH_ICON = {
+    "url": "https://d2tecn3vwkchpd.cloudfront.net/fabrik/patterns/search_icon",
+    "type": "svg"
+}
+
+_SCAN_SEARCH_OFFER = {
+    "left_asset": _SEARCH_ICON,
+    "text": "<format>search & pay contacts</format>",
+    "border_animation_count": 2,
+    "cta": {
+        "type": "p2p_home",
+        "additional_info": {
+            "search_phone_num_keyboard": True,
+            "headers": _EMPTY,
+            "offer_nudge": {
+                "asset": _EMPTY
+            }
+        }
+    },
+    "right_asset": {
+        "asset": _EMPTY
+    }
+}
+
+_SCAN_SEARCH_CASHBACK = {
+    "left_asset": _SEARCH_ICON,
+    "text": "<format>search & pay contacts</format>",
+    "right_asset": {
+        "text": "CASHBACK"
+    },
+    "border_animation_count": 2,
+    "cta": {
+        "type": "p2p_home",
+        "additional_info": {
+            "search_phone_num_keyboard": True
+        }
+    }
+}
+
+# Standard search.data array used across all PTP_STREAK_CONFIG entries
+STANDARD_SEARCH_DATA = [
+    {
+        "text": "pay to",
+        "right_asset": {
+            "url": "https://d704ayip06922.cloudfront.net/prod-rewards-assets-data/6b23258061e311eeaa853f670a0e3012.svg",
+            "type": "svg",
+            "aspect_ratio": 1
+        }
+    },
+    {
+        "text": "pay to",
+        "right_asset": {
+            "url": "https://d704ayip06922.cloudfront.net/prod-rewards-assets-data/6325b4b061e311eeaa853f670a0e3012.svg",
+            "type": "svg",
+            "aspect_ratio": 1
+        }
+    },
+    {
+        "text": "pay to",
+        "right_asset": {
+            "url": "https://d704ayip06922.cloudfront.net/prod-rewards-assets-data/5c5c08f061e311eeaa853f670a0e3012.svg",
+            "type": "svg",
+            "aspect_ratio": 1
+        }
+    },
+    {
+        "text": "pay to",
+        "right_asset": {
+            "url": "https://d704ayip06922.cloudfront.net/prod-rewards-assets-data/4ab46e30629211eea0ed0bd74220cbfb.png",
+            "type": "image",
+            "aspect_ratio": 1
+        }
+    },
+    {
+        "text": "pay via",
+        "right_asset": {
+            "url": "https://d704ayip06922.cloudfront.net/prod-rewards-assets-data/eb8447a0627311eebf66138229c45306.svg",
+            "type": "svg",
+            "aspect_ratio": 1.823
+        }
+    },
+    {
+        "text": "pay to contacts",
+        "right_asset": None
+    },
+    {
+        "text": "pay to phone number",
+        "right_asset": None
+    }
+]
+
+_PTP_CTA = {
+    "asset": {
+        "url": "https://d2tecn3vwkchpd.cloudfront.net/fabrik/patterns/snp_gallery_icon.svg",
+        "type": "svg"
+    },
+    "type": "DEEPLINK",
+    "action": "cred://app/launch?target=scan_pay&source=p2p_home_screen"
+}
+
+_PTP_SEARCH = {
+    "data": STANDARD_SEARCH_DATA,
+    "interval": 1000,
+    "turns": 15
+}
+
+
+def campaign_params(name: str, campaign_type: str, duration_days: int, max_allowed: int,
+                    per_txn_reward: int, total_offer: int) -> Dict[str, Any]:
+    """
+    The parameter record build_entries() takes (same keys as the campaign
+    records in benchmarks/synthetic_configs.py)
+    """
+    return {
+        'name': name,
+        'type': campaign_type,
+        'duration_days': duration_days,
+        'max_allowed': max_allowed,
+        'per_txn_reward': per_txn_reward,
+        'total_offer': total_offer
+    }
+
+
+def state_keys(config_key: str, params: Dict[str, Any]) -> List[str]:
+    """config_keys of the entries build_entries() returns, without building them"""
+    name = params['name']
+    if config_key == 'SCAN_HOMEPAGE_CONFIG' and params['max_allowed'] == 1:
+        return [name]
+    return [f"{name}_0", f"{name}_1_{params['max_allowed']}"]
+
+
+def _entry(config_key: str, uas_attributes: List[Dict[str, Any]], conditions: Dict[str, Any],
+           metadata: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "config_key": config_key,
+        "uas_attributes": uas_attributes,
+        "conditions": conditions,
+        "metadata": metadata
+    }
+
+
+def _scan_entries(params: Dict[str, Any], uas_attributes: List[Dict[str, Any]],
+                  type_condition: Dict[str, Any]) -> List[Dict[str, Any]]:
+    name = params['name']
+    max_allowed = params['max_allowed']
+    payment_text = "scan & pay" if params['type'] == "SNP" else "UPI payment"
+    expiry_text = f"offer expires in {params['duration_days']} days"
+
+    if max_allowed == 1:
+        # Single transaction campaigns always use the UPI type
+        conditions = {"type": {"type": "STRING", "operator": "EQ", "value": "UPI"},
+                      "status": _STATUS_ACTIVE}
+        carousel = dict(_CAROUSEL_TIMING, text=[
+            f"<format>assured <icon>INR</icon> {params['per_txn_reward']} cashback on next {payment_text}</format>",
+            expiry_text
+        ], timer_prefix_asset=_EMPTY)
+        metadata = {"carousel": carousel, "search": _SCAN_SEARCH_OFFER,
+                    "config": _FLAGS_OFFER_NUDGE, "cta": _EMPTY}
+        return [_entry(name, uas_attributes, conditions, metadata)]
+
+    initial_carousel = dict(_CAROUSEL_TIMING, text=[
+        f"<format>assured cashback of <icon>INR</icon>{params['total_offer']} on next {max_allowed} payments</format>",
+        expiry_text
+    ], timer_prefix_asset=_EMPTY)
+    inprogress_carousel = dict(
+        _CAROUSEL_TIMING,
+        streak_text="ends in <expiry_timer>",
+        offer_text=f"<format>assured <icon>INR</icon>{params['per_txn_reward']} cashback on next {payment_text}</format>"
+    )
+
+    return [
+        _entry(f"{name}_0", uas_attributes,
+               {"type": type_condition, "status": _STATUS_ACTIVE},
+               {"carousel": initial_carousel, "search": _SCAN_SEARCH_OFFER,
+                "config": _FLAGS_OFFER_NUDGE, "cta": _EMPTY}),
+        _entry(f"{name}_1_{max_allowed}", uas_attributes,
+               {"type": type_condition, "status": _STATUS_ACTIVE, "completed": _COMPLETED_AT_LEAST_ONE},
+               {"carousel": inprogress_carousel, "search": _SCAN_SEARCH_CASHBACK,
+                "config": _FLAGS_NO_OFFER_NUDGE})
+    ]
+
+
+def _ptp_entries(params: Dict[str, Any], uas_attributes: List[Dict[str, Any]],
+                 type_condition: Dict[str, Any]) -> List[Dict[str, Any]]:
+    name = params['name']
+    max_allowed = params['max_allowed']
+
+    # Unlike SCAN_HOMEPAGE_CONFIG, _0 has both the text array and streak_text
+    initial_carousel = dict(_CAROUSEL_TIMING, streak_text="ENDS IN <expiry_timer>", text=[
+        f"<format>assured <icon>INR</icon>{params['total_offer']} cashback on {max_allowed} UPI payments</format>",
+        f"<format>offer expires in {params['duration_days']} days</format>"
+    ])
+    inprogress_carousel = dict(
+        _CAROUSEL_TIMING,
+        streak_text="ENDS IN <expiry_timer>",
+        offer_text=f"<format>assured <icon>INR</icon>{params['per_txn_reward']} cashback on next UPI payment</format>"
+    )
+
+    return [
+        _entry(f"{name}_0", uas_attributes,
+               {"type": type_condition, "status": _STATUS_ACTIVE},
+               {"cta": _PTP_CTA, "carousel": initial_carousel, "search": _PTP_SEARCH,
+                "config": _FLAGS_OFFER_NUDGE}),
+        _entry(f"{name}_1_{max_allowed}", uas_attributes,
+               {"type": type_condition, "status": _STATUS_ACTIVE, "completed": _COMPLETED_AT_LEAST_ONE},
+               {"cta": _PTP_CTA, "carousel": inprogress_carousel, "search": _PTP_SEARCH,
+                "config": _FLAGS_OFFER_NUDGE})
+    ]
+
+
+def build_entries(config_key: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Streak-state entries of one campaign for config_key, in insertion order.
+    Raises ValueError for an unknown config or a campaign type the config
+    doesn't support (SNP campaigns have no PTP_STREAK_CONFIG entries).
+    """
+    if config_key not in CAROUSEL_CONFIGS:
+        raise ValueError(f"Not a carousel config: {config_key}")
+    if config_key == 'PTP_STREAK_CONFIG' and params['type'] not in PTP_CAMPAIGN_TYPES:
+        raise ValueError(f"PTP_STREAK_CONFIG only supports {' and '.join(PTP_CAMPAIGN_TYPES)} "
+                         f"campaigns, not {params['type']}")
+
+    uas_attributes = [{
+        "attribute": _STREAK_TYPE_ATTRIBUTE,
+        "type": "STRING",
+        "operator": "IN",
+        "value": [params['name']]
+    }]
+    type_condition = {"type": "STRING", "operator": "EQ", "value": params['type']}
+
+    if config_key == 'SCAN_HOMEPAGE_CONFIG':
+        return _scan_entries(params, uas_attributes, type_condition)
+    return _ptp_entries(params, uas_attributes, type_condition)
+
+
+def build_batch(config_key: str, campaigns: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Entries of several campaigns (parameter records) in one list, campaign by campaign"""
+    entries = []
+    for params in campaigns:
+        entries.extend(build_entries(config_key, params))
+    return entries
@@ -3,11 +3,11 @@
 Check if orphaned campaigns exist in the main 6 streak configs
 """
 
-import requests
 import json
 import sys
 from typing import Dict, List, Any, Tuple
 from retool_integration import load_credentials
+import metrics
 
 
 # The 6 main Heimdall configs to check
@@ -44,6 +44,8 @@ ORPHANED_CAMPAIGNS = {
 
 def fetch_config(config_key: str, userid: str, apikey: str) -> Tuple[bool, Any, str]:
     """Fetch a Heimdall config"""
+    import requests  # deferred to keep script startup fast
+
     base_url = "http://kongproxy.infra.dreamplug.net/heimdall/heartbeat/v1/template"
     url = f"{base_url}/{config_key}"
     headers = {
@@ -53,9 +55,11 @@ def fetch_config(config_key: str, userid: str, apikey: str) -> Tuple[bool, Any,
     }
 
     try:
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
+        with metrics.request(config_key, 'GET'):
+            response = requests.get(url, headers=headers, timeout=30)
+            response.raise_for_status()
         data = response.json()
+        metrics.observe_template(config_key, data.get('value'))
         return True, data, ""
     except Exception as e:
         return False, None, str(e)
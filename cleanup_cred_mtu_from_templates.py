@@ -3,11 +3,13 @@
 Remove 4 cred_mtu campaigns from other streak templates (except STREAK_BLOCK_TEMPLATE)
 """
 
-import requests
 import json
 import sys
 from typing import Dict, Any, List, Tuple
-from retool_integration import load_credentials
+from retool_integration import load_credentials, http_client
+import memory_profile
+import metrics
+import value_prune
 
 # Base URL
 BASE_URL = "http://kongproxy.infra.dreamplug.net/heimdall/heartbeat/v1/template"
@@ -34,64 +36,60 @@ def fetch_config(config_key: str, headers: Dict[str, str]) -> Tuple[bool, Dict[s
     """Fetch a config"""
     try:
         url = f"{BASE_URL}/{config_key}"
-        response = requests.get(url, headers=headers, timeout=30)
+        with metrics.request(config_key, 'GET'):
+            response = http_client().get(url, headers=headers, timeout=30)
 
         if response.status_code == 200:
-            return True, response.json(), ""
+            data = response.json()
+            metrics.observe_template(config_key, data.get('value'))
+            return True, data, ""
         else:
+            metrics.count_error(config_key, 'GET', f"http_{response.status_code}")
             return False, {}, f"HTTP {response.status_code}: {response.text}"
     except Exception as e:
         return False, {}, str(e)
 
 
 def clean_config_value(value_str: str, campaigns: List[str]) -> Tuple[str, int]:
-    """Remove campaign references from value string"""
-    removed_count = 0
-
+    """Remove campaign references (list items and dict keys) from value string"""
     try:
         value_obj = json.loads(value_str)
-
-        def clean_obj(obj):
-            nonlocal removed_count
-            if isinstance(obj, dict):
-                for key, val in list(obj.items()):
-                    if key in campaigns:
-                        del obj[key]
-                        removed_count += 1
-                    else:
-                        obj[key] = clean_obj(val)
-            elif isinstance(obj, list):
-                new_list = []
-                for item in obj:
-                    if isinstance(item, str) and item in campaigns:
-                        removed_count += 1
-                    else:
-                        new_list.append(clean_obj(item) if not isinstance(item, str) else item)
-                obj[:] = new_list
-            return obj
-
-        cleaned = clean_obj(value_obj)
-        return json.dumps(cleaned, indent=2), removed_count
-
     except json.JSONDecodeError:
         # If it's not JSON (like STREAK_BLOCK_TEMPLATE), return as-is
         return value_str, 0
 
+    removals = value_prune.remove_strings(value_obj, frozenset(campaigns), value_str, keys=True)
+    return json.dumps(value_obj, indent=2), len(removals)
+
 
 def update_config(config_data: Dict[str, Any], headers: Dict[str, str]) -> Tuple[bool, str]:
     """Update a config"""
     try:
-        response = requests.post(BASE_URL, json=config_data, headers=headers, timeout=30)
+        config_key = config_data.get('key', 'unknown')
+        with metrics.request(config_key, 'POST'):
+            response = http_client().post(BASE_URL, json=config_data, headers=headers, timeout=30)
 
         if response.status_code == 200:
+            metrics.observe_template(config_key, config_data.get('value'))
             return True, "Success"
         else:
+            metrics.count_error(config_key, 'POST', f"http_{response.status_code}")
             return False, f"HTTP {response.status_code}: {response.text}"
     except Exception as e:
         return False, str(e)
 
 
 def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Remove cred_mtu campaigns from streak templates')
+    parser.add_argument('--profile-memory', action='store_true',
+                        help='Report peak memory and top allocation sites per stage (tracemalloc)')
+    args = parser.parse_args()
+
+    if args.profile_memory:
+        memory_profile.start()
+
     print("\n" + "="*80)
     print("CLEANUP 4 CRED_MTU CAMPAIGNS FROM STREAK TEMPLATES")
     print("="*80)
@@ -129,7 +127,8 @@ def main():
 
         # Fetch
         print("  📡 Fetching...")
-        success, config_data, error = fetch_config(config_key, headers)
+        with memory_profile.stage(f"fetch {config_key}"):
+            success, config_data, error = fetch_config(config_key, headers)
         if not success:
             print(f"  ❌ Failed to fetch: {error}")
             results.append((config_key, 0, False, error))
@@ -138,7 +137,8 @@ def main():
         # Clean
         print("  🔍 Cleaning...")
         original_value = config_data.get('value', '')
-        cleaned_value, removed = clean_config_value(original_value, CAMPAIGNS_TO_REMOVE)
+        with memory_profile.stage(f"clean {config_key}"):
+            cleaned_value, removed = clean_config_value(original_value, CAMPAIGNS_TO_REMOVE)
 
         if removed == 0:
             print(f"  ✓ No references found (already clean)")
@@ -152,7 +152,8 @@ def main():
         config_data['updated_by'] = "campaign_cleanup_cred_mtu_templates"
 
         print("  📤 Updating...")
-        success, message = update_config(config_data, headers)
+        with memory_profile.stage(f"post {config_key}"):
+            success, message = update_config(config_data, headers)
 
         if success:
             print(f"  ✅ Success! Removed {removed} reference(s)")
@@ -174,6 +175,10 @@ def main():
     print(f"\nTotal references removed: {total_removed}")
     print("\n" + "="*80)
 
+    if args.profile_memory:
+        print(f"\n{memory_profile.finish()}")
+
 
 if __name__ == "__main__":
-    main()
+    from campaign_daemon import forward_or_run
+    sys.exit(forward_or_run(__file__, main))
@@ -1,16 +1,19 @@
 #!/usr/bin/env python3
 """
 SAFE CLEANUP: Remove 17 orphaned campaigns from 6 configs
-(SKIPS STREAK_BLOCK_TEMPLATE to preserve image URLs)
+(STREAK_BLOCK_TEMPLATE only with --include-template: campaign clauses are
+cut out of its #if/#elseif chains by velocity_template, keeping every
+banner URL another campaign still uses)
 """
 
-import requests
-import json
 import sys
 import os
+import time
+from contextlib import nullcontext
 from datetime import datetime
-from typing import Dict, List, Any, Tuple
-from retool_integration import load_credentials
+from typing import Dict, List, Any, Optional, Tuple
+from retool_integration import load_credentials, http_client
+import json_backend
 
 
 # The 17 orphaned campaigns to remove
@@ -44,9 +47,29 @@ CONFIGS_TO_CLEAN = {
     "STREAK_JOURNEY_JOB_CONFIG": "remove_uuids"
 }
 
+# Velocity templates, cleaned only with --include-template
+TEMPLATE_CONFIGS = {
+    "STREAK_BLOCK_TEMPLATE": "prune_template"
+}
+
+ORPHANED_NAMES = frozenset(ORPHANED_CAMPAIGNS)
+ORPHANED_UUIDS = frozenset(ORPHANED_CAMPAIGNS.values())
+
+
+def _is_orphaned_uuid(item: Any) -> bool:
+    return isinstance(item, str) and item in ORPHANED_UUIDS
+
+
+def profile_stage(label: str):
+    """memory_profile.stage() with --profile-memory; memory_profile is only imported then"""
+    profiler = sys.modules.get('memory_profile')
+    return profiler.stage(label) if profiler else nullcontext()
+
 
 def fetch_config(config_key: str, userid: str, apikey: str) -> Tuple[bool, Dict, str]:
     """Fetch a Heimdall config"""
+    import metrics
+
     base_url = "http://kongproxy.infra.dreamplug.net/heimdall/heartbeat/v1/template"
     url = f"{base_url}/{config_key}"
     headers = {
@@ -56,15 +79,20 @@ def fetch_config(config_key: str, userid: str, apikey: str) -> Tuple[bool, Dict,
     }
 
     try:
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        return True, response.json(), ""
+        with metrics.request(config_key, 'GET'):
+            response = http_client().get(url, headers=headers, timeout=30)
+            response.raise_for_status()
+        data = response.json()
+        metrics.observe_template(config_key, data.get('value'))
+        return True, data, ""
     except Exception as e:
         return False, {}, str(e)
 
 
 def update_config(config_key: str, config_data: Dict, userid: str, apikey: str) -> Tuple[bool, str]:
     """Update a Heimdall config"""
+    import metrics
+
     base_url = "http://kongproxy.infra.dreamplug.net/heimdall/heartbeat/v1/template"
     url = base_url
     headers = {
@@ -74,8 +102,10 @@ def update_config(config_key: str, config_data: Dict, userid: str, apikey: str)
     }
 
     try:
-        response = requests.post(url, headers=headers, json=config_data, timeout=30)
-        response.raise_for_status()
+        with metrics.request(config_key, 'POST'):
+            response = http_client().post(url, headers=headers, json=config_data, timeout=30)
+            response.raise_for_status()
+        metrics.observe_template(config_key, config_data.get('value'))
         return True, "Success"
     except Exception as e:
         return False, str(e)
@@ -88,64 +118,152 @@ def backup_configs(configs: Dict[str, Dict], backup_dir: str):
     for config_key, config_data in configs.items():
         backup_file = os.path.join(backup_dir, f"{config_key}.json")
         with open(backup_file, 'w') as f:
-            json.dump(config_data, f, indent=2)
+            json_backend.dump(config_data, f, indent=2)
 
     print(f"✓ Backed up {len(configs)} configs to: {backup_dir}")
 
 
-def remove_from_json_value(value_str: str, remove_type: str) -> Tuple[str, List[str]]:
-    """Remove orphaned campaigns from a JSON value field"""
-    try:
-        value_obj = json.loads(value_str)
-    except:
-        return value_str, []
+def clean_value(value_obj: Any, remove_type: str, text: Optional[str] = None) -> Tuple[Any, List[Tuple[str, str]]]:
+    """
+    Remove orphaned campaigns from a parsed value
 
-    removed = []
+    Args:
+        value_obj: Parsed value (modified in place)
+        remove_type: "remove_campaign_names" or "remove_uuids"
+        text: The value's JSON text; lets value_prune skip what can't match
+
+    Returns:
+        (value, [(JSON pointer, removed item)])
+    """
+    removals = []
 
     if remove_type == "remove_campaign_names":
-        # Search recursively for arrays containing campaign names
-        def clean_obj(obj):
-            if isinstance(obj, dict):
-                for key, val in obj.items():
-                    obj[key] = clean_obj(val)
-            elif isinstance(obj, list):
-                # Only filter string items, keep non-string items as-is
-                new_list = []
-                for item in obj:
-                    if isinstance(item, str) and item in ORPHANED_CAMPAIGNS.keys():
-                        removed.append(item)
-                    else:
-                        new_list.append(clean_obj(item) if not isinstance(item, str) else item)
-                obj[:] = new_list
-            return obj
-
-        value_obj = clean_obj(value_obj)
+        import value_prune
+
+        # Anywhere in the value, as list items
+        removals = value_prune.remove_strings(value_obj, ORPHANED_NAMES, text)
 
     elif remove_type == "remove_uuids":
         # For STREAK_CONFIG and STREAK_JOURNEY_JOB_CONFIG
         if isinstance(value_obj, dict):
             # Remove from supported_campaign_ids array
             if 'supported_campaign_ids' in value_obj and isinstance(value_obj['supported_campaign_ids'], list):
-                original = value_obj['supported_campaign_ids'].copy()
-                value_obj['supported_campaign_ids'] = [
-                    uuid for uuid in value_obj['supported_campaign_ids']
-                    if uuid not in ORPHANED_CAMPAIGNS.values()
-                ]
-                removed = [uuid for uuid in original if uuid not in value_obj['supported_campaign_ids']]
+                original = value_obj['supported_campaign_ids']
+                value_obj['supported_campaign_ids'] = [uuid for uuid in original if not _is_orphaned_uuid(uuid)]
+                removals = [(f"/supported_campaign_ids/{i}", uuid)
+                            for i, uuid in enumerate(original) if _is_orphaned_uuid(uuid)]
 
             # Remove UUID keys from top level (for STREAK_CONFIG)
-            keys_to_remove = [k for k in value_obj.keys() if k in ORPHANED_CAMPAIGNS.values()]
+            keys_to_remove = [k for k in value_obj.keys() if k in ORPHANED_UUIDS]
             for key in keys_to_remove:
                 del value_obj[key]
-                removed.append(key)
+                removals.append((f"/{key}", key))
 
         elif isinstance(value_obj, list):
             # Remove UUIDs from array
-            original = value_obj.copy()
-            value_obj[:] = [uuid for uuid in value_obj if uuid not in ORPHANED_CAMPAIGNS.values()]
-            removed = [uuid for uuid in original if uuid not in value_obj]
+            removals = [(f"/{i}", uuid) for i, uuid in enumerate(value_obj) if _is_orphaned_uuid(uuid)]
+            value_obj[:] = [uuid for uuid in value_obj if not _is_orphaned_uuid(uuid)]
+
+    return value_obj, removals
+
+
+def remove_from_json_value(value_str: str, remove_type: str) -> Tuple[str, List[str]]:
+    """Remove orphaned campaigns from a JSON value field"""
+    try:
+        value_obj = json_backend.loads(value_str)
+    except:
+        return value_str, []
+
+    value_obj, removals = clean_value(value_obj, remove_type, value_str)
+    return json_backend.dumps(value_obj, indent=2), [item for _, item in removals]
+
+
+def analyze_template(config_data: Dict) -> Dict[str, Any]:
+    """analyze_config() for a Velocity template (remove_type "prune_template")"""
+    import velocity_template
+
+    started = time.perf_counter()
+    try:
+        pruned, report = velocity_template.remove_campaigns(config_data['value'], ORPHANED_UUIDS)
+    except velocity_template.TemplateError as e:
+        return {'removed': [], 'paths': [], 'value': None, 'template': None, 'error': str(e),
+                'seconds': time.perf_counter() - started}
+
+    removed = [campaign_id for campaign_id, _ in report['removed']]
+    return {'removed': removed, 'paths': [f"line {line}" for _, line in report['removed']],
+            'value': pruned if removed else None, 'template': report,
+            'seconds': time.perf_counter() - started}
+
+
+def analyze_config(config_data: Dict, remove_type: str) -> Dict[str, Any]:
+    """
+    Clean one fetched config once, for both the preview and the real run
+
+    Returns:
+        {'removed': [...], 'paths': JSON pointer of each removed item,
+        'value': cleaned value string to POST (None if nothing is removed),
+        'seconds': analysis time, 'error': set if the value can't be
+        parsed or, for a template, pruned safely}; "prune_template" adds
+        'template' (the velocity_template report)
+    """
+    if remove_type == "prune_template":
+        return analyze_template(config_data)
+
+    started = time.perf_counter()
+    removals = []
+    new_value = None
+    error = None
+    try:
+        value_obj = json_backend.loads(config_data['value'])
+    except Exception as e:
+        error = f"value isn't valid JSON: {e}"
+    else:
+        value_obj, removals = clean_value(value_obj, remove_type, config_data['value'])
+        if removals:
+            new_value = json_backend.dumps(value_obj, indent=2)
 
-    return json.dumps(value_obj, indent=2), removed
+    return {'removed': [item for _, item in removals], 'paths': [path for path, _ in removals],
+            'value': new_value, 'error': error, 'seconds': time.perf_counter() - started}
+
+
+def run_parallel(task, config_keys: List[str], workers: int) -> Dict[str, Any]:
+    """task(config_key) for every config, on up to workers threads; results by config key"""
+    if workers <= 1 or len(config_keys) <= 1:
+        return {config_key: task(config_key) for config_key in config_keys}
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(config_keys))) as pool:
+        futures = {config_key: pool.submit(task, config_key) for config_key in config_keys}
+        return {config_key: future.result() for config_key, future in futures.items()}
+
+
+def fetch_and_analyze(userid: str, apikey: str, workers: int = len(CONFIGS_TO_CLEAN),
+                      configs_to_clean: Optional[Dict[str, str]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Fetch every config in configs_to_clean (default CONFIGS_TO_CLEAN) and
+    analyze it as soon as it arrives (one config's analysis overlaps the
+    other configs' fetches)
+
+    Returns:
+        {config_key: {'ok', 'error', 'config', 'fetch_seconds', 'analysis'}};
+        analysis is analyze_config()'s result, or None if the fetch failed or
+        the config has no value field
+    """
+    configs_to_clean = configs_to_clean or CONFIGS_TO_CLEAN
+
+    def task(config_key):
+        started = time.perf_counter()
+        with profile_stage(f"fetch {config_key}"):
+            success, config_data, error = fetch_config(config_key, userid, apikey)
+        result = {'ok': success, 'error': error, 'config': config_data,
+                  'fetch_seconds': time.perf_counter() - started, 'analysis': None}
+        if success and 'value' in config_data:
+            with profile_stage(f"analyze {config_key}"):
+                result['analysis'] = analyze_config(config_data, configs_to_clean[config_key])
+        return result
+
+    return run_parallel(task, list(configs_to_clean), workers)
 
 
 def analyze_cleanup(configs: Dict[str, Dict]) -> Dict[str, List[str]]:
@@ -160,18 +278,95 @@ def analyze_cleanup(configs: Dict[str, Dict]) -> Dict[str, List[str]]:
         if 'value' not in config_data:
             continue
 
-        _, removed = remove_from_json_value(config_data['value'], remove_type)
+        with profile_stage(f"analyze {config_key}"):
+            removed = analyze_config(config_data, remove_type)['removed']
         if removed:
             analysis[config_key] = removed
 
     return analysis
 
 
-def perform_cleanup(configs: Dict[str, Dict], userid: str, apikey: str, dry_run: bool = True) -> Dict[str, bool]:
-    """Perform the cleanup"""
+class AlreadyClean(Exception):
+    """The live config changed since the fetch and has nothing left to remove"""
+
+
+def post_cleaned(config_key: str, config_data: Dict, cleaned: Dict[str, Any],
+                 userid: str, apikey: str) -> Tuple[bool, str]:
+    """
+    POST the cached cleaned value, through commit_queue so the config's
+    lock is held and a version changed since the fetch is cleaned again
+    instead of overwritten. If that version can't be cleaned, nothing is
+    POSTed and it's a failure
+
+    Raises:
+        AlreadyClean: The changed version has nothing left to remove (not POSTed)
+    """
+    import commit_queue
+    from optimistic_write import WriteConflict
+
+    payload = dict(config_data, value=cleaned['value'], updated_by="campaign_cleanup_automation")
+
+    def edit(version):
+        cleaned_again = analyze_config(version, dict(CONFIGS_TO_CLEAN, **TEMPLATE_CONFIGS)[config_key])
+        if cleaned_again.get('error'):
+            raise RuntimeError(f"{config_key} changed since it was fetched and the current version "
+                               f"can't be cleaned: {cleaned_again['error']}; not POSTed")
+        if cleaned_again['value'] is None:
+            raise AlreadyClean(f"{config_key} changed since it was fetched and has nothing left "
+                               f"to remove; not POSTed")
+        return dict(version, value=cleaned_again['value'], updated_by="campaign_cleanup_automation")
+
+    def refetch():
+        success, current, error = fetch_config(config_key, userid, apikey)
+        if not success:
+            raise RuntimeError(f"Couldn't re-fetch {config_key}: {error}")
+        return current
+
+    def post(envelope):
+        success, message = update_config(config_key, envelope, userid, apikey)
+        if not success:
+            raise RuntimeError(message)
+        return message
+
+    try:
+        message, _ = commit_queue.submit(config_key, config_data, payload, edit, refetch, post)
+        return True, message
+    except (WriteConflict, commit_queue.LockTimeout, RuntimeError) as e:
+        return False, str(e)
+
+
+def print_template_report(report: Dict[str, Any]):
+    """Dropped branches, banner URLs and size/condition counts of a pruned template"""
+    import velocity_template
+
+    print(f"  → {len(report['dropped_branches'])} branches left without campaigns dropped")
+    for url in report['urls_kept']:
+        print(f"    ✓ Banner still used by other campaigns: {url}")
+    for url in report['urls_dropped']:
+        print(f"    - Banner no longer used: {url}")
+    for campaign_id, line in report['skipped']:
+        print(f"    ⚠️  {campaign_id} at line {line}: not a plain campaign_id condition, left in place")
+    print(f"  → {velocity_template.format_stats(report['before'], report['after'])}")
+
+
+def perform_cleanup(configs: Dict[str, Dict], userid: str, apikey: str, dry_run: bool = True,
+                    analysis: Optional[Dict[str, Dict[str, Any]]] = None,
+                    workers: int = len(CONFIGS_TO_CLEAN),
+                    configs_to_clean: Optional[Dict[str, str]] = None) -> Dict[str, bool]:
+    """
+    Perform the cleanup
+
+    Args:
+        analysis: analyze_config() results by config key (from
+                  fetch_and_analyze); configs missing from it are analyzed here
+        workers: Configs POSTed at the same time
+        configs_to_clean: Config key → remove type (default CONFIGS_TO_CLEAN)
+    """
     results = {}
+    analysis = dict(analysis or {})
+    to_post = []
 
-    for config_key, remove_type in CONFIGS_TO_CLEAN.items():
+    for config_key, remove_type in (configs_to_clean or CONFIGS_TO_CLEAN).items():
         if config_key not in configs:
             print(f"\n⚠️  {config_key}: Not found, skipping")
             results[config_key] = False
@@ -185,8 +380,16 @@ def perform_cleanup(configs: Dict[str, Dict], userid: str, apikey: str, dry_run:
 
         print(f"\n🔧 Processing {config_key}...")
 
-        # Remove orphaned campaigns
-        new_value, removed = remove_from_json_value(config_data['value'], remove_type)
+        # Remove orphaned campaigns (reusing the preview's analysis)
+        if analysis.get(config_key) is None:
+            with profile_stage(f"clean {config_key}"):
+                analysis[config_key] = analyze_config(config_data, remove_type)
+        removed = analysis[config_key]['removed']
+
+        if analysis[config_key].get('error'):
+            print(f"  ❌ Can't prune safely, skipping: {analysis[config_key]['error']}")
+            results[config_key] = False
+            continue
 
         if not removed:
             print(f"  ℹ️  Nothing to remove")
@@ -194,27 +397,44 @@ def perform_cleanup(configs: Dict[str, Dict], userid: str, apikey: str, dry_run:
             continue
 
         print(f"  → Will remove {len(removed)} items")
-        for item in removed[:5]:  # Show first 5
+        for item, path in list(zip(removed, analysis[config_key]['paths']))[:5]:  # Show first 5
             display = item[:40] + "..." if len(item) > 40 else item
-            print(f"    - {display}")
+            print(f"    - {display}  at {path}")
         if len(removed) > 5:
             print(f"    ... and {len(removed) - 5} more")
+        if analysis[config_key].get('template'):
+            print_template_report(analysis[config_key]['template'])
 
         if dry_run:
             print(f"  ⏸️  DRY RUN - no changes made")
             results[config_key] = True
         else:
-            # Update config
-            config_data['value'] = new_value
-            config_data['updated_by'] = "campaign_cleanup_automation"
-
-            success, message = update_config(config_key, config_data, userid, apikey)
-            if success:
-                print(f"  ✓ Updated successfully")
-                results[config_key] = True
-            else:
-                print(f"  ❌ Update failed: {message}")
-                results[config_key] = False
+            to_post.append(config_key)
+
+    if not to_post:
+        return results
+
+    print(f"\n📤 Posting {len(to_post)} configs...")
+
+    def task(config_key):
+        started = time.perf_counter()
+        with profile_stage(f"post {config_key}"):
+            try:
+                success, message = post_cleaned(config_key, configs[config_key], analysis[config_key], userid, apikey)
+            except AlreadyClean as e:
+                success, message = None, str(e)
+        return success, message, time.perf_counter() - started
+
+    for config_key, (success, message, seconds) in run_parallel(task, to_post, workers).items():
+        if success is None:
+            print(f"  ℹ️  {message} ({seconds:.2f}s)")
+            results[config_key] = True
+        elif success:
+            print(f"  ✓ {config_key}: Updated successfully ({seconds:.2f}s)")
+            results[config_key] = True
+        else:
+            print(f"  ❌ {config_key}: Update failed: {message} ({seconds:.2f}s)")
+            results[config_key] = False
 
     return results
 
@@ -225,14 +445,31 @@ def main():
     parser = argparse.ArgumentParser(description='Clean up orphaned campaigns from Heimdall configs')
     parser.add_argument('--execute', action='store_true', help='Execute cleanup (default is dry-run)')
     parser.add_argument('--skip-backup', action='store_true', help='Skip backup step')
+    parser.add_argument('--profile-memory', action='store_true',
+                        help='Report peak memory and top allocation sites per stage (tracemalloc)')
+    parser.add_argument('--workers', type=int, default=len(CONFIGS_TO_CLEAN),
+                        help=f'Configs fetched/analyzed/POSTed at the same time (default: {len(CONFIGS_TO_CLEAN)})')
+    parser.add_argument('--include-template', action='store_true',
+                        help='Also remove the campaigns from STREAK_BLOCK_TEMPLATE (banner URLs in use are kept)')
     args = parser.parse_args()
 
+    configs_to_clean = dict(CONFIGS_TO_CLEAN, **TEMPLATE_CONFIGS) if args.include_template else CONFIGS_TO_CLEAN
+
+    workers = args.workers
+    if args.profile_memory:
+        import memory_profile
+        memory_profile.start()
+        workers = 1  # stages must not overlap to be measured
+
     print("\n" + "="*80)
     print("SAFE CLEANUP: Remove 17 Orphaned Campaigns")
     print("="*80)
-    print("\n⚠️  IMPORTANT: This script SKIPS STREAK_BLOCK_TEMPLATE to preserve image URLs")
+    if args.include_template:
+        print("\n⚠️  STREAK_BLOCK_TEMPLATE included: campaign clauses removed, banner URLs in use kept")
+    else:
+        print("\n⚠️  IMPORTANT: This script SKIPS STREAK_BLOCK_TEMPLATE to preserve image URLs (--include-template)")
     print(f"\nMode: {'🔴 EXECUTE (WILL MODIFY PROD)' if args.execute else '🟢 DRY RUN (safe, read-only)'}")
-    print(f"Configs to clean: {len(CONFIGS_TO_CLEAN)}")
+    print(f"Configs to clean: {len(configs_to_clean)}")
     print(f"Campaigns to remove: {len(ORPHANED_CAMPAIGNS)}\n")
 
     # Load credentials
@@ -241,32 +478,39 @@ def main():
         print("❌ Error: Could not load credentials")
         sys.exit(1)
 
-    # Fetch all configs
-    print("📡 Fetching configs...")
-    configs = {}
+    # Fetch and analyze all configs
+    print(f"📡 Fetching and analyzing configs ({workers} at a time)...")
+    started = time.perf_counter()
+    fetched = fetch_and_analyze(userid, apikey, workers, configs_to_clean)
+    elapsed = time.perf_counter() - started
 
-    for config_key in CONFIGS_TO_CLEAN.keys():
-        print(f"  - {config_key}...", end=" ")
-        success, config_data, error = fetch_config(config_key, userid, apikey)
-        if success:
-            configs[config_key] = config_data
-            print("✓")
+    configs = {}
+    cached = {}
+    for config_key, result in fetched.items():
+        if result['ok']:
+            configs[config_key] = result['config']
+            cached[config_key] = result['analysis']
+            timing = f"fetch {result['fetch_seconds']:.2f}s"
+            if result['analysis'] is not None:
+                timing += f", analyze {result['analysis']['seconds']:.2f}s"
+            print(f"  - {config_key}... ✓ ({timing})")
         else:
-            print(f"❌ {error}")
+            print(f"  - {config_key}... ❌ {result['error']}")
+    print(f"  {len(configs)} configs in {elapsed:.2f}s")
 
-    if len(configs) != len(CONFIGS_TO_CLEAN):
-        print(f"\n⚠️  Warning: Only fetched {len(configs)}/{len(CONFIGS_TO_CLEAN)} configs")
+    if len(configs) != len(configs_to_clean):
+        print(f"\n⚠️  Warning: Only fetched {len(configs)}/{len(configs_to_clean)} configs")
 
     # Backup
     if not args.skip_backup:
         print(f"\n💾 Creating backups...")
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         backup_dir = f"./config_backups_{timestamp}"
-        backup_configs(configs, backup_dir)
+        with profile_stage("backup"):
+            backup_configs(configs, backup_dir)
 
-    # Analyze
-    print(f"\n🔍 Analyzing cleanup impact...")
-    analysis = analyze_cleanup(configs)
+    analysis = {config_key: cleaned['removed'] for config_key, cleaned in cached.items()
+                if cleaned is not None and cleaned['removed']}
 
     print("\n" + "="*80)
     print("CLEANUP PREVIEW")
@@ -282,6 +526,8 @@ def main():
             print(f"  - {display}")
         if len(removed_items) > 3:
             print(f"  ... and {len(removed_items) - 3} more")
+        if cached[config_key].get('template'):
+            print_template_report(cached[config_key]['template'])
 
     # Confirm
     if args.execute:
@@ -295,7 +541,8 @@ def main():
             sys.exit(0)
 
         print("\n🔴 EXECUTING CLEANUP...")
-        results = perform_cleanup(configs, userid, apikey, dry_run=False)
+        results = perform_cleanup(configs, userid, apikey, dry_run=False, analysis=cached, workers=workers,
+                                  configs_to_clean=configs_to_clean)
 
         # Summary
         print("\n" + "="*80)
@@ -320,6 +567,14 @@ def main():
 
     print("\n" + "="*80)
 
+    if args.profile_memory:
+        import memory_profile
+        report_dir = None if args.skip_backup else backup_dir
+        print(f"\n{memory_profile.finish(report_dir)}")
+        if report_dir:
+            print(f"\n✓ Memory profile saved to: {os.path.join(report_dir, memory_profile.REPORT_FILE)}")
+
 
 if __name__ == "__main__":
-    main()
+    from campaign_daemon import forward_or_run
+    sys.exit(forward_or_run(__file__, main))
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Per-Config Write Locks and Commit Queue
+
+The web app, the CLI (setup_campaign_master.py, in-process or on the warm
+daemon) and retool_integration.py can all POST the same templates. Their
+POSTs go through submit(), which adds two things to optimistic_write.py's
+compare-before-POST:
+
+- config_lock(config_key) serializes the writers of one config: a thread
+  lock inside the process plus an flock on <lock dir>/<config_key>.lock
+  across processes. The whole refetch-compare-POST runs under it, so two
+  of our writers can no longer both pass the compare before either POSTs.
+- Edits of the same config that queue up in one process while its lock is
+  held (the web app's sessions are threads of one server) are coalesced:
+  the next submitter to get the lock applies all of them, one after the
+  other, and makes one POST for everyone.
+
+Writers that don't go through here (Heimdall's UI, other teams' jobs) are
+still only caught by the compare.
+
+Usage:
+    result, stats = commit_queue.submit(
+        'STREAK_CONFIG', base, payload,
+        edit=lambda version: ...,     # our change applied to another version, or None
+        refetch=lambda: ...,          # live envelope
+        post=lambda payload: ...)     # POST it
+    # stats: {'conflicts': 0, 'rebases': 0, 'coalesced': 3}
+
+    with commit_queue.config_lock('STREAK_CONFIG'):
+        ...                           # any other read-modify-write
+
+Locks live in .locks in the app directory (CAMPAIGN_LOCK_DIR moves them).
+"""
+
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import metrics
+import optimistic_write
+import tracing
+
+
+APP_DIR = Path(__file__).parent
+
+LOCK_DIR = os.environ.get('CAMPAIGN_LOCK_DIR', str(APP_DIR / ".locks"))
+
+# Longest wait for another writer of the same config (a POST with three
+# rebases and their backoff takes well under a minute)
+LOCK_TIMEOUT_SECONDS = 300
+POLL_SECONDS = 0.2
+
+
+class LockTimeout(Exception):
+    """Another writer held the config's lock for longer than LOCK_TIMEOUT_SECONDS"""
+
+
+_mutex = threading.Lock()
+_thread_locks: Dict[str, threading.Lock] = {}
+_pending: Dict[str, List[Dict[str, Any]]] = {}
+
+
+def _thread_lock(config_key: str) -> threading.Lock:
+    with _mutex:
+        return _thread_locks.setdefault(config_key, threading.Lock())
+
+
+def _holder(lock_file) -> str:
+    try:
+        lock_file.seek(0)
+        return lock_file.read().strip() or "another process"
+    except OSError:
+        return "another process"
+
+
+@contextmanager
+def _file_lock(config_key: str, deadline: float, log: Optional[Callable[[str], None]]):
+    try:
+        import fcntl
+    except ImportError:
+        yield  # no flock on this platform; the thread lock still serializes this process
+        return
+
+    os.makedirs(LOCK_DIR, exist_ok=True)
+    with open(os.path.join(LOCK_DIR, f"{config_key}.lock"), 'a+') as lock_file:
+        waiting = False
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise LockTimeout(f"{config_key} is locked by {_holder(lock_file)}")
+                if log and not waiting:
+                    log(f"⏳ Waiting for {config_key}: being written by {_holder(lock_file)}")
+                waiting = True
+                time.sleep(POLL_SECONDS)
+
+        try:
+            lock_file.seek(0)
+            lock_file.truncate()
+            lock_file.write(f"pid {os.getpid()} ({Path(sys.argv[0]).name or 'python'}) "
+                            f"since {datetime.now().strftime('%H:%M:%S')}\n")
+            lock_file.flush()
+            yield
+        finally:
+            lock_file.seek(0)
+            lock_file.truncate()
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+@contextmanager
+def config_lock(config_key: str, timeout: float = LOCK_TIMEOUT_SECONDS,
+                log: Optional[Callable[[str], None]] = print):
+    """Hold the write lock of config_key (this process's threads and other processes)"""
+    deadline = time.monotonic() + timeout
+    lock = _thread_lock(config_key)
+    if not lock.acquire(timeout=timeout):
+        raise LockTimeout(f"{config_key} is locked by another thread of this process")
+    try:
+        with _file_lock(config_key, deadline, log):
+            yield
+    finally:
+        lock.release()
+
+
+def _replay(version: Dict[str, Any], batch: List[Dict[str, Any]]
+            ) -> Tuple[Optional[Dict[str, Any]], List[Tuple[Dict[str, Any], Optional[Exception]]]]:
+    """
+    Apply each queued edit in turn on top of version. Returns (the combined
+    payload or None, [(ticket, the exception its edit raised or None if it
+    returned None)] for the edits that couldn't be applied). A failing edit
+    is skipped; the others are still applied.
+    """
+    payload = None
+    failed = []
+    for ticket in batch:
+        if optimistic_write.same_version(version, ticket['base']):
+            result = ticket['payload']
+        else:
+            try:
+                result = ticket['edit'](version)
+            except Exception as e:
+                failed.append((ticket, e))
+                continue
+        if result is None:
+            failed.append((ticket, None))
+            continue
+        payload = version = result
+    return payload, failed
+
+
+def _finish(tickets: List[Dict[str, Any]], result: Any = None, stats: Optional[Dict[str, int]] = None,
+            error: Optional[BaseException] = None):
+    for ticket in tickets:
+        ticket['result'] = result
+        ticket['stats'] = stats
+        ticket['error'] = error
+        ticket['done'].set()
+
+
+def _fail(failed: List[Tuple[Dict[str, Any], Optional[Exception]]], message: str):
+    """Finish each ticket whose edit failed with the exception it raised (or a WriteConflict)"""
+    for ticket, error in failed:
+        _finish([ticket], error=error or optimistic_write.WriteConflict(message))
+
+
+def _commit(config_key: str, batch: List[Dict[str, Any]], log: Optional[Callable[[str], None]]):
+    """POST every edit in batch at once (the caller holds the config's lock)"""
+    payload, failed = _replay(batch[0]['base'], batch)
+    _fail(failed, f"Couldn't combine the change with the other queued {config_key} edits; not POSTed")
+    batch = [ticket for ticket in batch if not ticket['done'].is_set()]
+    if not batch:
+        return
+    if log and len(batch) > 1:
+        log(f"📦 {len(batch)} queued {config_key} edits go out in one POST")
+
+    pending = {'payload': payload}
+
+    def rebase(current):
+        replayed, lost = _replay(current, batch)
+        _fail(lost, f"Couldn't replay the change onto the current {config_key}; not POSTed")
+        batch[:] = [ticket for ticket in batch if not ticket['done'].is_set()]
+        if not batch:
+            return False
+        pending['payload'] = replayed
+        return True
+
+    # Whoever applied the last edit POSTs the combined payload
+    result, stats = optimistic_write.write_with_rebase(
+        config_key, batch[0]['base'], batch[0]['refetch'], rebase,
+        post=lambda: batch[-1]['post'](pending['payload']), log=log)
+
+    stats['coalesced'] = len(batch)
+    if len(batch) > 1:
+        metrics.coalesced(config_key, len(batch) - 1)
+        tracing.annotate(coalesced=len(batch) - 1)
+    _finish(batch, result, stats)
+
+
+def submit(config_key: str, base: Dict[str, Any], payload: Dict[str, Any],
+           edit: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]],
+           refetch: Callable[[], Dict[str, Any]],
+           post: Callable[[Dict[str, Any]], Any],
+           timeout: float = LOCK_TIMEOUT_SECONDS,
+           log: Optional[Callable[[str], None]] = print) -> Tuple[Any, Dict[str, int]]:
+    """
+    Queue an edit of config_key and wait until it has been POSTed, alone or
+    together with the other edits queued meanwhile.
+
+    Args:
+        base: The envelope the edit was made on
+        payload: base with the edit applied, ready to POST
+        edit: Applies the same change to another version of the config (the
+              live one after a conflict, or another queued edit's payload)
+              and returns the new envelope; None if it can't
+        refetch: GETs the live envelope
+        post: POSTs an envelope this submitter's edit returned
+
+    Returns (post's result, {'conflicts', 'rebases', 'coalesced'}) of the
+    POST that carried the edit. Raises optimistic_write.WriteConflict if the
+    edit wasn't POSTed, LockTimeout if the lock wasn't free in time, or
+    whatever edit/refetch/post raised (an exception from another queued
+    edit's edit only fails that edit).
+    """
+    ticket = {'base': base, 'payload': payload, 'edit': edit, 'refetch': refetch, 'post': post,
+              'done': threading.Event(), 'result': None, 'stats': None, 'error': None}
+    with _mutex:
+        _pending.setdefault(config_key, []).append(ticket)
+
+    try:
+        with config_lock(config_key, timeout, log):
+            if not ticket['done'].is_set():
+                with _mutex:
+                    batch = _pending.pop(config_key, [])
+                try:
+                    _commit(config_key, batch, log)
+                except BaseException as e:
+                    _finish([t for t in batch if not t['done'].is_set()], error=e)
+    except LockTimeout:
+        with _mutex:
+            queued = _pending.get(config_key, [])
+            if ticket in queued:
+                queued.remove(ticket)
+                raise
+        ticket['done'].wait()  # already picked up by another submitter
+
+    if ticket['error'] is not None:
+        raise ticket['error']
+    return ticket['result'], ticket['stats']
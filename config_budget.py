@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Size and Complexity Budgets for POSTed Configs
+
+STREAK_BLOCK_TEMPLATE, SCAN_HOMEPAGE_CONFIG and the journey rules are
+served on hot app paths, and every campaign makes them a little bigger.
+Before a session POSTs, each _after.json is measured and compared with
+the budgets in config_budgets.json and with its _before.json:
+
+    bytes              size of the value string
+    entries            metrics.count_entries (#if/#elseif conditions for
+                       the template, supported ids for the journey config,
+                       "configs" items otherwise)
+    elseif             #elseif branches (template)
+    longest_or_chain   clauses in the longest campaign || chain (template)
+    journey_rules      journey_rules configs (STREAK_JOURNEY_JOB_CONFIG)
+
+config_budgets.json, per config key:
+
+    {"STREAK_BLOCK_TEMPLATE": {"action": "block", "bytes": 65536, "elseif": 150,
+                               "longest_or_chain": 10, "growth_pct": 25}, ...}
+
+- a metric over its limit, and growing, is handled per "action": "block"
+  keeps the config from being POSTed (--allow-over-budget on
+  setup_campaign_master.py and retool_integration.py overrides), "warn"
+  only reports it
+- a metric already over its limit that the change doesn't grow is a
+  warning (e.g. a cleanup)
+- a metric growing more than growth_pct percent in one session is a
+  warning
+
+The master script checks its session's _after.json files before POSTing;
+STREAK_JOURNEY_JOB_CONFIG, which only retool_integration.post_with_rebase
+POSTs, is checked there on the final payload (check_values). The master's
+checks are saved as budget_report.json in the session folder, so the
+sessions under backups/ are the trend history for capacity planning:
+
+    python3 config_budget.py backups/<session_folder>    # check a session
+    python3 config_budget.py --trend [CONFIG_KEY]        # sizes across sessions
+"""
+
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+
+APP_DIR = Path(__file__).parent
+BUDGETS_FILE = APP_DIR / "config_budgets.json"
+REPORT_FILE = "budget_report.json"
+
+ACTIONS = ['warn', 'block']
+METRICS = ['bytes', 'entries', 'elseif', 'longest_or_chain', 'journey_rules']
+
+_budgets: Optional[Dict[str, Dict[str, Any]]] = None
+
+
+def load_budgets() -> Dict[str, Dict[str, Any]]:
+    """config_key -> budget from config_budgets.json (missing keys have no budget)"""
+    global _budgets
+    if _budgets is None:
+        try:
+            with open(BUDGETS_FILE, 'r') as f:
+                _budgets = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            _budgets = {}
+        for config_key, budget in _budgets.items():
+            unknown = set(budget) - set(METRICS) - {'action', 'growth_pct'}
+            if unknown or budget.get('action', 'warn') not in ACTIONS:
+                raise ValueError(f"Bad budget for {config_key} in {BUDGETS_FILE.name}: "
+                                 f"{sorted(unknown) or budget.get('action')} (metrics: {', '.join(METRICS)}; "
+                                 f"action: {' or '.join(ACTIONS)})")
+    return _budgets
+
+
+def measure(config_key: str, value: str, value_obj: Any = None) -> Dict[str, int]:
+    """Budget metrics of a value string (value_obj if it's already parsed)"""
+    import metrics
+
+    value = value if isinstance(value, str) else ""
+    result = {'bytes': len(value.encode('utf-8'))}
+    entries = metrics.count_entries(config_key, value, value_obj)
+    if entries is not None:
+        result['entries'] = entries
+
+    if '#if(' in value or '#elseif(' in value:
+        import velocity_template
+
+        stats = velocity_template.template_stats(value)
+        result['elseif'] = stats['elseif']
+        result['longest_or_chain'] = stats['longest_or_chain']
+    elif isinstance(value_obj, dict) and isinstance(value_obj.get('journey_rules'), dict):
+        rules = value_obj['journey_rules'].get('configs')
+        if isinstance(rules, list):
+            result['journey_rules'] = len(rules)
+    return result
+
+
+def measure_file(config_key: str, path: str) -> Optional[Dict[str, int]]:
+    """Budget metrics of a saved GET response / _after.json (None if it doesn't exist)"""
+    import config_response
+
+    if not os.path.exists(path):
+        return None
+    response = config_response.load(path)
+    return measure(config_key, response.value, response.parsed_value())
+
+
+def check(config_key: str, before: Optional[Dict[str, int]], after: Dict[str, int],
+          budget: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Budget violations of a change: [{'metric', 'level' ('warn'/'block'),
+    'before', 'after', 'limit', 'reason'}]
+
+    Args:
+        before: Metrics of _before.json (None for a new config)
+        budget: Defaults to the config's entry in config_budgets.json
+    """
+    budget = load_budgets().get(config_key, {}) if budget is None else budget
+    action = budget.get('action', 'warn')
+    violations = []
+
+    for metric in METRICS:
+        if metric not in after:
+            continue
+        new = after[metric]
+        old = before.get(metric) if before else None
+        grows = old is None or new > old
+
+        limit = budget.get(metric)
+        if limit is not None and new > limit:
+            if grows:
+                violations.append({'metric': metric, 'level': action, 'before': old, 'after': new,
+                                   'limit': limit, 'reason': 'over budget'})
+            else:
+                violations.append({'metric': metric, 'level': 'warn', 'before': old, 'after': new,
+                                   'limit': limit, 'reason': 'already over budget'})
+            continue
+
+        growth_pct = budget.get('growth_pct')
+        if growth_pct is not None and old and (new - old) * 100 > old * growth_pct:
+            violations.append({'metric': metric, 'level': 'warn', 'before': old, 'after': new,
+                               'limit': growth_pct, 'reason': 'growth'})
+    return violations
+
+
+def format_violation(violation: Dict[str, Any]) -> str:
+    before = "new" if violation['before'] is None else f"{violation['before']:,}"
+    if violation['reason'] == 'growth':
+        percent = (violation['after'] - violation['before']) * 100 / violation['before']
+        return (f"{violation['metric']} {before} → {violation['after']:,} "
+                f"(+{percent:.0f}% in one session, warn above +{violation['limit']}%)")
+    return (f"{violation['metric']} {before} → {violation['after']:,}, "
+            f"budget {violation['limit']:,}" + (" (already over, not growing)"
+                                                if violation['reason'] == 'already over budget' else ""))
+
+
+def check_values(config_key: str, before_value: Optional[str], after_value: str) -> List[Dict[str, Any]]:
+    """check() of a value string about to replace before_value (None for a new config)"""
+    import json_backend
+
+    def metrics_of(value):
+        try:
+            value_obj = json_backend.loads(value)
+        except ValueError:
+            value_obj = None  # Velocity template
+        return measure(config_key, value, value_obj)
+
+    return check(config_key, None if before_value is None else metrics_of(before_value), metrics_of(after_value))
+
+
+def check_session(session_folder: str, config_keys: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Check every config's _after.json against its budget and _before.json
+
+    Returns:
+        {config_key: {'before', 'after' (metrics), 'violations',
+        'blocked' (True if a violation's level is 'block')}}; configs
+        without an _after.json are left out
+    """
+    results = {}
+    for config_key in config_keys:
+        after = measure_file(config_key, os.path.join(session_folder, f"{config_key}_after.json"))
+        if after is None:
+            continue
+        before = measure_file(config_key, os.path.join(session_folder, f"{config_key}_before.json"))
+        violations = check(config_key, before, after)
+        results[config_key] = {'before': before, 'after': after, 'violations': violations,
+                               'blocked': any(v['level'] == 'block' for v in violations)}
+    return results
+
+
+def save_report(session_folder: str, results: Dict[str, Dict[str, Any]]):
+    """Write the check to the session's budget_report.json (the trend history)"""
+    report = {'checked_at': datetime.now().isoformat(timespec='seconds'), 'configs': results}
+    with open(os.path.join(session_folder, REPORT_FILE), 'w') as f:
+        json.dump(report, f, indent=2)
+
+
+def trend(backups_dir: str, config_key: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    [{'session', 'checked_at', 'config_key', 'before', 'after', 'blocked'}]
+    from every session's budget_report.json, oldest check first
+    """
+    rows = []
+    try:
+        sessions = os.listdir(backups_dir)
+    except OSError:
+        return rows
+    for session in sessions:
+        try:
+            with open(os.path.join(backups_dir, session, REPORT_FILE), 'r') as f:
+                report = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+        for key, result in report.get('configs', {}).items():
+            if config_key is None or key == config_key:
+                rows.append({'session': session, 'checked_at': report.get('checked_at', ''), 'config_key': key,
+                             'before': result.get('before'), 'after': result.get('after'),
+                             'blocked': result.get('blocked', False)})
+    rows.sort(key=lambda row: (row['checked_at'], row['session'], row['config_key']))
+    return rows
+
+
+def format_trend(rows: List[Dict[str, Any]]) -> str:
+    lines = [f"  {'checked':<19} {'config':<28} {'bytes':>10} {'entries':>8} {'elseif':>7} "
+             f"{'|| chain':>8} {'rules':>6}  session"]
+    for row in rows:
+        after = row['after'] or {}
+        cells = [f"{after[metric]:,}" if metric in after else "-"
+                 for metric in ('bytes', 'entries', 'elseif', 'longest_or_chain', 'journey_rules')]
+        lines.append(f"  {row['checked_at']:<19} {row['config_key']:<28} {cells[0]:>10} {cells[1]:>8} "
+                     f"{cells[2]:>7} {cells[3]:>8} {cells[4]:>6}  {row['session']}"
+                     + ("  (blocked)" if row['blocked'] else ""))
+    return "\n".join(lines)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Check a session against config_budgets.json, or show the trend')
+    parser.add_argument('session_folder', nargs='?', help='Session folder containing *_after.json files')
+    parser.add_argument('--trend', nargs='?', const='', metavar='CONFIG_KEY',
+                        help='Sizes recorded by every session under backups/ (optionally one config)')
+    parser.add_argument('--backups', default=str(APP_DIR / "backups"), help='Session folders (default: ./backups)')
+    args = parser.parse_args()
+
+    if args.trend is not None:
+        rows = trend(args.backups, args.trend or None)
+        if not rows:
+            print(f"No {REPORT_FILE} under {args.backups}")
+            return 0
+        print(f"📈 Config sizes per session ({len(rows)} checks)\n")
+        print(format_trend(rows))
+        return 0
+
+    if not args.session_folder:
+        parser.error("give a session folder or --trend")
+
+    config_keys = sorted(name[:-len("_after.json")] for name in os.listdir(args.session_folder)
+                         if name.endswith("_after.json"))
+    results = check_session(args.session_folder, config_keys)
+    save_report(args.session_folder, results)
+
+    print(f"📏 Budgets for {args.session_folder} (from {BUDGETS_FILE.name})\n")
+    for config_key, result in results.items():
+        after = ", ".join(f"{metric} {value:,}" for metric, value in result['after'].items())
+        print(f"  {'❌' if result['blocked'] else '⚠️ ' if result['violations'] else '✓'} {config_key}: {after}")
+        for violation in result['violations']:
+            print(f"      {violation['level']}: {format_violation(violation)}")
+    print(f"\n✓ Saved to: {os.path.join(args.session_folder, REPORT_FILE)}")
+    return 1 if any(result['blocked'] for result in results.values()) else 0
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
@@ -0,0 +1,544 @@
+#!/usr/bin/env python3
+"""
+Before/After Diff for Session Configs
+
+Computes structural diffs between a config's _before.json and _after.json
+in a session folder, so reviewers don't have to eyeball the full files.
+
+- JSON configs: list entries are matched by config_key / campaign_id, so
+  only the blocks that were added, removed or changed are reported.
+- STREAK_BLOCK_TEMPLATE (Velocity): line-based hunks with a few lines of
+  surrounding context.
+
+For JSON configs the same keyed matching also produces an RFC 6902 JSON
+Patch (written as <CONFIG_KEY>_patch.json next to _after.json), so a new
+campaign shows up as one "add" instead of a shift of every later entry.
+Both run in time linear in the size of the config.
+
+Diffs are computed lazily (one config at a time) and cached by the content
+hash of both files, so re-rendering the same session costs nothing. Files
+are read through config_response, so a value the fetch step already parsed
+isn't parsed again.
+"""
+
+import copy
+import difflib
+import json
+import os
+from collections import OrderedDict
+from typing import Dict, List, Any, Tuple, Optional
+
+import config_response
+import json_backend
+
+
+# Configs whose value is a Velocity template, not JSON
+TEXT_CONFIGS = {'STREAK_BLOCK_TEMPLATE'}
+
+# Lines of unchanged context shown around each text hunk
+TEXT_CONTEXT_LINES = 3
+
+# Max number of computed diffs kept in memory
+DIFF_CACHE_SIZE = 32
+
+# Ops listed per config in campaign_info.txt (the rest are in the patch file)
+PATCH_OPS_IN_SUMMARY = 10
+
+_diff_cache: "OrderedDict[Tuple[str, str, str], Dict[str, Any]]" = OrderedDict()
+_patch_cache: "OrderedDict[Tuple[str, str, str], List[Dict[str, Any]]]" = OrderedDict()
+
+
+def escape_pointer_token(token: Any) -> str:
+    """Escape a single JSON Pointer token (RFC 6901)"""
+    return str(token).replace('~', '~0').replace('/', '~1')
+
+
+def entry_label(entry: Any) -> str:
+    """Short human-readable label for a config entry"""
+    if isinstance(entry, dict):
+        config_key = entry.get('config_key')
+        campaign_id = _campaign_id_of(entry)
+        if config_key and campaign_id:
+            return f"{config_key} ({campaign_id})"
+        if config_key:
+            return str(config_key)
+        if campaign_id:
+            return f"campaign_id {campaign_id}"
+        if entry.get('conditions') == {}:
+            return "fallback (empty conditions)"
+        return "entry"
+    return json.dumps(entry)
+
+
+def _campaign_id_of(entry: Dict[str, Any]) -> Optional[str]:
+    """conditions.campaign_id.value of an entry, if present"""
+    conditions = entry.get('conditions')
+    if isinstance(conditions, dict):
+        campaign_id = conditions.get('campaign_id')
+        if isinstance(campaign_id, dict):
+            return campaign_id.get('value')
+    return None
+
+
+def same_value(before: Any, after: Any) -> bool:
+    """== that also tells true from 1 and 1 from 1.0, at any depth"""
+    if before != after or type(before) is not type(after):
+        return False
+    if type(before) is not dict and type(before) is not list:
+        return True
+
+    # Equal under ==, so the keys and lengths match: only the types can differ
+    stack = [(before, after)]
+    while stack:
+        old, new = stack.pop()
+        pairs = ((val, new[key]) for key, val in old.items()) if type(old) is dict else zip(old, new)
+        for old_val, new_val in pairs:
+            kind = type(old_val)
+            if kind is not type(new_val):
+                return False
+            if kind is dict or kind is list:
+                stack.append((old_val, new_val))
+    return True
+
+
+def _key_part(value: Any) -> bool:
+    """True if value can be part of an entry's identity (hashable, and not a bool equal to 0/1)"""
+    return value is None or type(value) in (str, int)
+
+
+def _identity(entry: Any) -> Any:
+    """Identity of a list entry used for keyed matching (None = unkeyed)"""
+    if isinstance(entry, dict):
+        config_key = entry.get('config_key')
+        campaign_id = _campaign_id_of(entry)
+        if config_key is None and campaign_id is None:
+            return None
+        if not (_key_part(config_key) and _key_part(campaign_id)):
+            return None  # e.g. a dict or list: matched by position instead
+        return ('entry', config_key, campaign_id)
+    if isinstance(entry, (str, int, float, bool)) or entry is None:
+        return ('scalar', type(entry).__name__, entry)
+    return None
+
+
+def keyed_list_index(items: List[Any]) -> "OrderedDict[Tuple, int]":
+    """
+    Map each list entry to a unique key, preserving order.
+
+    Entries are keyed on (config_key, campaign_id) when those are strings or
+    ints, scalars on their type and value; repeated identities get an
+    occurrence counter so duplicates still match one-to-one. Entries without
+    any identity are matched by their position among unkeyed entries.
+    """
+    index: "OrderedDict[Tuple, int]" = OrderedDict()
+    seen: Dict[Any, int] = {}
+
+    for i, item in enumerate(items):
+        identity = _identity(item)
+        occurrence = seen.get(identity, 0)
+        seen[identity] = occurrence + 1
+        index[(identity, occurrence)] = i
+
+    return index
+
+
+def _hunk(op: str, path: str, before: Any = None, after: Any = None,
+          label: str = "", context: Optional[List[str]] = None) -> Dict[str, Any]:
+    return {
+        'op': op,
+        'path': path,
+        'label': label,
+        'before': before,
+        'after': after,
+        'context': context or []
+    }
+
+
+def _neighbour_labels(items: List[Any], i: int) -> List[str]:
+    """Labels of the entries right before and after position i"""
+    context = []
+    if i > 0:
+        context.append(f"after: {entry_label(items[i - 1])}")
+    if i + 1 < len(items):
+        context.append(f"before: {entry_label(items[i + 1])}")
+    return context
+
+
+def diff_json(before: Any, after: Any, path: str = "") -> List[Dict[str, Any]]:
+    """
+    Structural diff of two parsed values.
+
+    Returns a list of hunks: {'op': 'added'|'removed'|'changed', 'path',
+    'label', 'before', 'after', 'context'}. List entries with an identity are
+    reported as whole blocks rather than field-by-field.
+    """
+    hunks = []
+
+    if isinstance(before, dict) and isinstance(after, dict):
+        for key, before_val in before.items():
+            child = f"{path}/{escape_pointer_token(key)}"
+            if key not in after:
+                hunks.append(_hunk('removed', child, before=before_val, label=str(key)))
+            elif not same_value(before_val, after[key]):
+                hunks.extend(diff_json(before_val, after[key], child))
+        for key, after_val in after.items():
+            if key not in before:
+                child = f"{path}/{escape_pointer_token(key)}"
+                hunks.append(_hunk('added', child, after=after_val, label=str(key)))
+        return hunks
+
+    if isinstance(before, list) and isinstance(after, list):
+        before_index = keyed_list_index(before)
+        after_index = keyed_list_index(after)
+
+        for key, i in before_index.items():
+            if key not in after_index:
+                hunks.append(_hunk('removed', f"{path}/{i}", before=before[i],
+                                   label=entry_label(before[i]),
+                                   context=_neighbour_labels(before, i)))
+
+        for key, j in after_index.items():
+            item = after[j]
+            if key not in before_index:
+                hunks.append(_hunk('added', f"{path}/{j}", after=item,
+                                   label=entry_label(item),
+                                   context=_neighbour_labels(after, j)))
+                continue
+
+            old = before[before_index[key]]
+            if same_value(old, item):
+                continue
+
+            if key[0] is not None and key[0][0] == 'entry':
+                # Keyed block: show the whole block, not individual fields
+                hunks.append(_hunk('changed', f"{path}/{j}", before=old, after=item,
+                                   label=entry_label(item),
+                                   context=_neighbour_labels(after, j)))
+            else:
+                hunks.extend(diff_json(old, item, f"{path}/{j}"))
+        return hunks
+
+    if not same_value(before, after):
+        hunks.append(_hunk('changed', path or "/", before=before, after=after,
+                           label=path.rsplit('/', 1)[-1] if path else "value"))
+    return hunks
+
+
+def diff_text(before: str, after: str,
+              context_lines: int = TEXT_CONTEXT_LINES) -> List[Dict[str, Any]]:
+    """Line-based hunks for Velocity templates"""
+    before_lines = before.splitlines()
+    after_lines = after.splitlines()
+
+    matcher = difflib.SequenceMatcher(None, before_lines, after_lines, autojunk=False)
+    hunks = []
+
+    for group in matcher.get_grouped_opcodes(context_lines):
+        lines = []
+        ops = set()
+        for tag, i1, i2, j1, j2 in group:
+            if tag == 'equal':
+                lines.extend(f"  {line}" for line in before_lines[i1:i2])
+                continue
+            ops.add(tag)
+            lines.extend(f"- {line}" for line in before_lines[i1:i2])
+            lines.extend(f"+ {line}" for line in after_lines[j1:j2])
+
+        first, last = group[0], group[-1]
+        op = 'added' if ops == {'insert'} else 'removed' if ops == {'delete'} else 'changed'
+        hunks.append({
+            'op': op,
+            'path': f"lines {first[3] + 1}-{last[4]}",
+            'label': f"@@ -{first[1] + 1},{last[2] - first[1]} +{first[3] + 1},{last[4] - first[3]} @@",
+            'lines': lines
+        })
+
+    return hunks
+
+
+def json_patch(before: Any, after: Any, path: str = "") -> List[Dict[str, Any]]:
+    """
+    RFC 6902 JSON Patch that turns before into after.
+
+    Lists are matched with keyed_list_index, like diff_json: removed entries
+    are removed (last first, so earlier indexes stay valid), new entries are
+    added at their final index and matched entries are patched field by
+    field. Ops are meant to be applied in order.
+    """
+    ops: List[Dict[str, Any]] = []
+    _patch_value(ops, before, after, path)
+    return ops
+
+
+def _patch_value(ops: List[Dict[str, Any]], before: Any, after: Any, path: str):
+    if isinstance(before, dict) and isinstance(after, dict):
+        for key in before:
+            if key not in after:
+                ops.append({'op': 'remove', 'path': f"{path}/{escape_pointer_token(key)}"})
+        for key, after_val in after.items():
+            child = f"{path}/{escape_pointer_token(key)}"
+            if key not in before:
+                ops.append({'op': 'add', 'path': child, 'value': after_val})
+            elif not same_value(before[key], after_val):
+                _patch_value(ops, before[key], after_val, child)
+        return
+
+    if isinstance(before, list) and isinstance(after, list):
+        _patch_list(ops, before, after, path)
+        return
+
+    if not same_value(before, after):
+        ops.append({'op': 'replace', 'path': path, 'value': after})
+
+
+def _patch_list(ops: List[Dict[str, Any]], before: List[Any], after: List[Any], path: str):
+    before_index = keyed_list_index(before)
+    after_index = keyed_list_index(after)
+
+    kept_before = [key for key in before_index if key in after_index]
+    kept_after = [key for key in after_index if key in before_index]
+    if kept_before != kept_after:
+        # Matched entries changed order; processors never reorder, so one
+        # replace is simpler than a sequence of moves
+        ops.append({'op': 'replace', 'path': path, 'value': after})
+        return
+
+    removed = [i for key, i in before_index.items() if key not in after_index]
+    for i in reversed(removed):
+        ops.append({'op': 'remove', 'path': f"{path}/{i}"})
+
+    # With removals applied, the list holds the kept entries in their final
+    # order, so entry j of after is either already at j or gets added there
+    for key, j in after_index.items():
+        if key not in before_index:
+            ops.append({'op': 'add', 'path': f"{path}/{j}", 'value': after[j]})
+        else:
+            old = before[before_index[key]]
+            if not same_value(old, after[j]):
+                _patch_value(ops, old, after[j], f"{path}/{j}")
+
+
+def _parse_pointer(path: str) -> List[str]:
+    if path == "":
+        return []
+    if not path.startswith("/"):
+        raise ValueError(f"Invalid JSON Pointer: {path!r}")
+    return [token.replace('~1', '/').replace('~0', '~') for token in path[1:].split("/")]
+
+
+def _list_index(container: List[Any], token: str, allow_end: bool) -> int:
+    if token == '-' and allow_end:
+        return len(container)
+    if not token.isdigit() or (token != '0' and token.startswith('0')):
+        raise ValueError(f"Invalid list index: {token!r}")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise ValueError(f"List index out of range: {index}")
+    return index
+
+
+def apply_patch(document: Any, patch: List[Dict[str, Any]]) -> Any:
+    """
+    Apply a JSON Patch made of add/remove/replace ops and return the result
+    (document itself is not modified). Raises ValueError if an op doesn't fit.
+    """
+    document = copy.deepcopy(document)
+
+    for op in patch:
+        tokens = _parse_pointer(op['path'])
+        if not tokens:
+            if op['op'] == 'remove':
+                raise ValueError("Cannot remove the whole document")
+            document = copy.deepcopy(op['value'])
+            continue
+
+        parent = document
+        for token in tokens[:-1]:
+            if isinstance(parent, list):
+                parent = parent[_list_index(parent, token, allow_end=False)]
+            elif isinstance(parent, dict) and token in parent:
+                parent = parent[token]
+            else:
+                raise ValueError(f"Path not found: {op['path']}")
+
+        last = tokens[-1]
+        if isinstance(parent, list):
+            index = _list_index(parent, last, allow_end=op['op'] == 'add')
+            if op['op'] == 'add':
+                parent.insert(index, copy.deepcopy(op['value']))
+            elif op['op'] == 'remove':
+                del parent[index]
+            elif op['op'] == 'replace':
+                parent[index] = copy.deepcopy(op['value'])
+            else:
+                raise ValueError(f"Unsupported op: {op['op']}")
+        elif isinstance(parent, dict):
+            if op['op'] != 'add' and last not in parent:
+                raise ValueError(f"Path not found: {op['path']}")
+            if op['op'] in ('add', 'replace'):
+                parent[last] = copy.deepcopy(op['value'])
+            elif op['op'] == 'remove':
+                del parent[last]
+            else:
+                raise ValueError(f"Unsupported op: {op['op']}")
+        else:
+            raise ValueError(f"Path not found: {op['path']}")
+
+    return document
+
+
+def get_config_diff(session_folder: str, config_key: str) -> Dict[str, Any]:
+    """
+    Diff one config's _before.json against its _after.json.
+
+    The result is cached by the content hash of both files, so calling this
+    again for an unchanged session is a dictionary lookup.
+
+    Returns:
+        {'config_key', 'kind': 'json'|'text', 'hunks': [...],
+         'stats': {'added', 'removed', 'changed'}, 'before_bytes', 'after_bytes'}
+    """
+    is_text = config_key in TEXT_CONFIGS
+    before_file = os.path.join(session_folder, f"{config_key}_before.json")
+    after_file = os.path.join(session_folder, f"{config_key}_after.json")
+
+    before = config_response.load(before_file)
+    after = config_response.load(after_file)
+
+    cache_key = (config_key, before.content_hash(), after.content_hash())
+    cached = _diff_cache.get(cache_key)
+    if cached is not None:
+        _diff_cache.move_to_end(cache_key)
+        return cached
+
+    if is_text:
+        hunks = diff_text(before.value or '', after.value or '')
+    else:
+        hunks = diff_json(before.parsed_value(), after.parsed_value())
+
+    stats = {'added': 0, 'removed': 0, 'changed': 0}
+    for hunk in hunks:
+        stats[hunk['op']] += 1
+
+    result = {
+        'config_key': config_key,
+        'kind': 'text' if is_text else 'json',
+        'hunks': hunks,
+        'stats': stats,
+        'before_bytes': before.size,
+        'after_bytes': after.size
+    }
+
+    _diff_cache[cache_key] = result
+    if len(_diff_cache) > DIFF_CACHE_SIZE:
+        _diff_cache.popitem(last=False)
+
+    return result
+
+
+def get_config_patch(session_folder: str, config_key: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    JSON Patch from one config's _before.json value to its _after.json value,
+    cached by the content hash of both files. None for text configs or
+    values that aren't JSON.
+    """
+    if config_key in TEXT_CONFIGS:
+        return None
+
+    before = config_response.load(os.path.join(session_folder, f"{config_key}_before.json"))
+    after = config_response.load(os.path.join(session_folder, f"{config_key}_after.json"))
+
+    cache_key = (config_key, before.content_hash(), after.content_hash())
+    cached = _patch_cache.get(cache_key)
+    if cached is not None:
+        _patch_cache.move_to_end(cache_key)
+        return cached
+
+    before_value, after_value = before.parsed_value(), after.parsed_value()
+    if before_value is None or after_value is None:
+        return None
+
+    patch = json_patch(before_value, after_value)
+    _patch_cache[cache_key] = patch
+    if len(_patch_cache) > DIFF_CACHE_SIZE:
+        _patch_cache.popitem(last=False)
+    return patch
+
+
+def write_patch(session_folder: str, config_key: str) -> Optional[List[Dict[str, Any]]]:
+    """Save get_config_patch() as <CONFIG_KEY>_patch.json in the session folder"""
+    patch = get_config_patch(session_folder, config_key)
+    if patch is not None:
+        with open(os.path.join(session_folder, f"{config_key}_patch.json"), 'w') as f:
+            json_backend.dump(patch, f, indent=2)
+    return patch
+
+
+def patch_summary(patch: List[Dict[str, Any]]) -> str:
+    """e.g. '3 ops (1 add, 2 replace)'"""
+    counts: Dict[str, int] = {}
+    for op in patch:
+        counts[op['op']] = counts.get(op['op'], 0) + 1
+    if not counts:
+        return "no changes"
+    detail = ", ".join(f"{count} {name}" for name, count in sorted(counts.items()))
+    return f"{len(patch)} op{'s' if len(patch) != 1 else ''} ({detail})"
+
+
+def render_hunk(hunk: Dict[str, Any]) -> str:
+    """Render a single hunk as text (only called for hunks being displayed)"""
+    if 'lines' in hunk:
+        return "\n".join(hunk['lines'])
+
+    if hunk['op'] == 'added':
+        return json.dumps(hunk['after'], indent=2)
+    if hunk['op'] == 'removed':
+        return json.dumps(hunk['before'], indent=2)
+
+    before_lines = json.dumps(hunk['before'], indent=2).splitlines()
+    after_lines = json.dumps(hunk['after'], indent=2).splitlines()
+    return "\n".join(
+        line.rstrip() for line in difflib.unified_diff(
+            before_lines, after_lines, 'before', 'after', lineterm='', n=TEXT_CONTEXT_LINES
+        )
+    )
+
+
+def main():
+    """Print the diff summary for every config in a session folder"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Show before/after diffs for a session folder')
+    parser.add_argument('session_folder', help='Path to backups/<date>_<campaign> folder')
+    parser.add_argument('--config', help='Only diff this config key')
+    parser.add_argument('--full', action='store_true', help='Print every hunk, not just the summary')
+    parser.add_argument('--patch', action='store_true',
+                        help='Print the JSON Patch (RFC 6902) and save it as <CONFIG_KEY>_patch.json')
+    args = parser.parse_args()
+
+    config_keys = [args.config] if args.config else sorted(
+        name[:-len('_after.json')] for name in os.listdir(args.session_folder)
+        if name.endswith('_after.json')
+    )
+
+    for config_key in config_keys:
+        diff = get_config_diff(args.session_folder, config_key)
+        stats = diff['stats']
+        print(f"{config_key}: +{stats['added']} -{stats['removed']} ~{stats['changed']} "
+              f"({diff['before_bytes']} → {diff['after_bytes']} bytes)")
+
+        if args.patch:
+            patch = write_patch(args.session_folder, config_key)
+            if patch is not None:
+                print(f"  JSON Patch: {patch_summary(patch)}")
+                print("\n".join(f"    {line}" for line in json.dumps(patch, indent=2).splitlines()))
+
+        if args.full:
+            for hunk in diff['hunks']:
+                print(f"  [{hunk['op']}] {hunk['path']} {hunk['label']}")
+                for line in render_hunk(hunk).splitlines():
+                    print(f"    {line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Streamed Heimdall Config Responses
+
+A Heimdall GET returns an envelope whose "value" is the whole config as a
+JSON string:
+
+    {"key": "STREAK_CONFIG", "value": "{\\r\\n  \\"configs\\": ...}", "description": ...}
+
+Buffering curl's stdout, json.loads-ing it, dumping it again with indent=2
+and later parsing "value" meant up to four full copies of a config in
+memory. Instead:
+
+- fetch_to_file() streams the body straight to <KEY>_before.json (exactly
+  as the server sent it) and feeds the same chunks to EnvelopeParser, so
+  the envelope is parsed while the download is still running.
+- The inner value is parsed only when a consumer asks for it, at most once
+  per file: load() hands back the same ConfigResponse for an unchanged
+  file, so the fetch check, metrics and the diff panel share one parse.
+
+Parsed values are shared - treat them as read-only (processors run on
+their own copy of the file).
+"""
+
+import codecs
+import json
+import os
+import re
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, Optional
+
+import json_backend
+
+
+CHUNK_SIZE = 65536
+
+# Responses (and their parsed values) are kept until their files add up to
+# this many bytes; parsed JSON takes roughly 5x its file size
+RESPONSE_CACHE_BYTES = 16 * 1024 * 1024
+
+# String content up to the closing quote (escapes included). Possessive
+# quantifiers (Python 3.11+) stop sre from keeping a backtrack point per
+# escape, which otherwise costs ~1MB of scratch memory per 64KB chunk.
+try:
+    _STRING_BODY = re.compile(r'[^"\\]*+(?:\\.[^"\\]*+)*+', re.DOTALL)
+except re.error:
+    _STRING_BODY = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+
+# The next character that matters outside a string
+_STRUCTURE_SPECIAL = re.compile(r'["{}\[\],]')
+_NON_SPACE = re.compile(r'\S')
+
+_UNPARSED = object()
+
+_responses: "OrderedDict[str, ConfigResponse]" = OrderedDict()
+
+
+class EnvelopeParser:
+    """
+    Incremental parser for a top-level JSON object fed in text chunks.
+
+    Only the object's structure is scanned as chunks arrive; each member is
+    decoded with json.loads once its closing ',' or '}' is seen, so the big
+    "value" string is decoded exactly once.
+    """
+
+    def __init__(self):
+        self.envelope: Dict[str, Any] = {}
+        self.depth = 0
+        self.done = False
+        self._in_string = False
+        self._escaped = False
+        self._member = []
+
+    def feed(self, text: str):
+        pos = 0
+        seg = 0  # start of text not yet added to the current member
+        end = len(text)
+
+        while pos < end:
+            if self.done:
+                if text[pos:].strip():
+                    self._fail("Extra data after JSON object")
+                return
+
+            if self._in_string:
+                if self._escaped:
+                    # Escape sequence split across chunks
+                    self._escaped = False
+                    pos += 1
+                    continue
+                pos = _STRING_BODY.match(text, pos).end()
+                if pos == end:
+                    break
+                if text[pos] == '\\':
+                    # Chunk ends right after a backslash
+                    self._escaped = True
+                else:
+                    self._in_string = False
+                pos += 1
+                continue
+
+            if self.depth == 0:
+                match = _NON_SPACE.search(text, pos)
+                if not match:
+                    seg = pos = end
+                    break
+                if match.group() != '{':
+                    self._fail("Expecting a JSON object")
+                self.depth = 1
+                seg = pos = match.end()
+                continue
+
+            match = _STRUCTURE_SPECIAL.search(text, pos)
+            if not match:
+                pos = end
+                break
+            char = match.group()
+            pos = match.end()
+
+            if char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self.depth += 1
+            elif self.depth > 1:
+                # ']' / '}' / ',' inside a nested envelope field
+                if char != ',':
+                    self.depth -= 1
+            elif char == ']':
+                self._fail("Unexpected ']'")
+            else:
+                # ',' or '}' at the envelope's own level ends a member
+                self._member.append(text[seg:match.start()])
+                seg = pos
+                self._finish_member()
+                if char == '}':
+                    self.depth = 0
+                    self.done = True
+
+        if not self.done and seg < end:
+            self._member.append(text[seg:end])
+
+    def _finish_member(self):
+        member = "".join(self._member).strip()
+        self._member = []
+        if member:
+            self.envelope.update(json_backend.loads("{" + member + "}"))
+
+    def close(self) -> Dict[str, Any]:
+        if not self.done:
+            self._fail("Unterminated JSON object")
+        return self.envelope
+
+    def _fail(self, message: str):
+        raise json.JSONDecodeError(message, "".join(self._member)[-200:], 0)
+
+
+class ConfigResponse:
+    """A Heimdall GET response saved on disk; envelope and value parsed lazily, once"""
+
+    def __init__(self, path: str, envelope: Optional[Dict[str, Any]] = None):
+        self.path = path
+        stat = os.stat(path)
+        self.stamp = (stat.st_mtime_ns, stat.st_size)
+        self.size = stat.st_size
+        self._envelope = envelope
+        self._parsed = _UNPARSED
+        self._hash = None
+
+    @property
+    def envelope(self) -> Dict[str, Any]:
+        if self._envelope is None:
+            with open(self.path, 'r') as f:
+                self._envelope = json_backend.load(f)
+        return self._envelope
+
+    @property
+    def value(self) -> Any:
+        return self.envelope.get('value')
+
+    def parsed_value(self) -> Any:
+        """The inner value parsed as JSON (None if it isn't JSON, e.g. the Velocity template)"""
+        if self._parsed is _UNPARSED:
+            try:
+                self._parsed = json_backend.loads(self.value)
+            except (json.JSONDecodeError, TypeError):
+                self._parsed = None
+        return self._parsed
+
+    def content_hash(self) -> str:
+        """SHA-256 of the file's bytes"""
+        if self._hash is None:
+            from session_journal import file_hash
+            self._hash = file_hash(self.path)
+        return self._hash
+
+
+def _remember(response: ConfigResponse) -> ConfigResponse:
+    key = os.path.abspath(response.path)
+    _responses[key] = response
+    _responses.move_to_end(key)
+    while len(_responses) > 1 and sum(r.size for r in _responses.values()) > RESPONSE_CACHE_BYTES:
+        _responses.popitem(last=False)
+    return response
+
+
+def load(path: str) -> ConfigResponse:
+    """Shared ConfigResponse for a saved response file (re-read only if the file changed)"""
+    key = os.path.abspath(path)
+    cached = _responses.get(key)
+    if cached is not None:
+        stat = os.stat(path)
+        if cached.stamp == (stat.st_mtime_ns, stat.st_size):
+            _responses.move_to_end(key)
+            return cached
+    return _remember(ConfigResponse(path))
+
+
+def fetch_to_file(chunks: Iterable[bytes], path: str) -> ConfigResponse:
+    """
+    Write a streamed response body to path while parsing its envelope.
+
+    The body goes to <path>.part first and only replaces path once it has
+    parsed as a complete JSON object, so a failed fetch never leaves a
+    truncated file behind. Raises json.JSONDecodeError for non-JSON bodies.
+    """
+    part_path = f"{path}.part"
+    parser = EnvelopeParser()
+    decoder = codecs.getincrementaldecoder('utf-8')()
+
+    try:
+        with open(part_path, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+                parser.feed(decoder.decode(chunk))
+            parser.feed(decoder.decode(b'', final=True))
+        envelope = parser.close()
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+
+    os.replace(part_path, path)
+    return _remember(ConfigResponse(path, envelope))
+
+
+def curl_chunks(curl_cmd):
+    """
+    Yield curl's stdout in CHUNK_SIZE pieces as it downloads.
+
+    Raises subprocess.CalledProcessError if curl exits non-zero, like
+    subprocess.run(..., check=True).
+    """
+    import subprocess
+
+    process = subprocess.Popen(curl_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        while True:
+            chunk = process.stdout.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+        stderr = process.stderr.read()
+    finally:
+        process.stdout.close()
+        process.stderr.close()
+        returncode = process.wait()
+
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, curl_cmd, stderr=stderr.decode('utf-8', 'replace'))
@@ -3,12 +3,30 @@
 Generate Retool Dashboard Configurations for Campaign Setup
 
 This script generates the 3 JSON configurations needed for Retool:
-1. Campaign IDs List
-2. Batch Assignment Job
-3. Journey Assignment Job
+1. Campaign IDs List         → campaign_ids.json
+2. Batch Assignment Job      → batch_assignment.json
+3. Journey Assignment Job    → journey_assignment.json
+
+It works offline, on a local copy of STREAK_JOURNEY_JOB_CONFIG, and adds
+campaigns with the same engine retool_integration.py uses on the live
+config (journey_config.py), so the files match what integrate_campaign()
+would POST. Any number of campaigns are added in one pass.
+
+Base configs (one of):
+    --snapshot FILE   a saved GET response of STREAK_JOURNEY_JOB_CONFIG (or its parsed value)
+    --mirror DIR      the 3 JSONs written by an earlier run
+    (neither)         empty base configs
 
 Usage:
-    python3 generate_retool_configs.py --campaign-name upi_streak_5 --campaign-id abc-123-xyz
+    python3 generate_retool_configs.py --snapshot journey.json --campaign-name upi_streak_5 --campaign-id abc-123-xyz
+    python3 generate_retool_configs.py --mirror retool_configs --campaigns new_campaigns.json --output-dir retool_configs
+    python3 generate_retool_configs.py --snapshot journey.json --output-dir retool_configs --check
+
+new_campaigns.json:
+    [{"campaign_name": "upi_streak_5", "campaign_id": "abc-123-xyz", "next_campaign": "NA"}, ...]
+
+--check writes nothing and exits 1 if any of the 3 files in --output-dir
+would change (e.g. in a pre-commit hook that keeps a mirror up to date).
 
 Or run interactively:
     python3 generate_retool_configs.py
@@ -16,392 +34,268 @@ Or run interactively:
 
 import json
 import argparse
+import os
 import sys
-from typing import Dict, List, Any
-
-
-def check_campaign_exists(campaign_id: str, configs: Dict[str, Any]) -> Dict[str, bool]:
-    """Check if campaign_id already exists in any of the configs"""
-    exists_in = {
-        'campaign_ids': False,
-        'batch_assignment': False,
-        'journey_assignment': False
-    }
-
-    # Check in campaign IDs list
-    if campaign_id in configs.get('campaign_ids', []):
-        exists_in['campaign_ids'] = True
-
-    # Check in batch assignment
-    for config in configs.get('batch_assignment', {}).get('configs', []):
-        if config.get('config_key') == configs.get('campaign_name'):
-            exists_in['batch_assignment'] = True
-            break
+import time
+from typing import Dict, List, Any, Optional
 
-    # Check in journey assignment
-    for config in configs.get('journey_assignment', {}).get('configs', []):
-        conditions = config.get('conditions', {})
-        campaign_id_cond = conditions.get('campaign_id', {})
-        if campaign_id_cond.get('value') == campaign_id:
-            exists_in['journey_assignment'] = True
-            break
+import journey_config
 
-    return exists_in
 
+# Output file of each Retool JSON
+VIEW_FILES = {
+    'campaign_ids': 'campaign_ids.json',
+    'batch_assignment': 'batch_assignment.json',
+    'journey_assignment': 'journey_assignment.json'
+}
 
-def add_to_campaign_ids(campaign_id: str, campaign_ids_list: List[str]) -> List[str]:
-    """Add campaign_id to the list if not already present"""
-    if campaign_id not in campaign_ids_list:
-        campaign_ids_list.append(campaign_id)
-    return campaign_ids_list
 
+def load_snapshot(path: str) -> Dict[str, Any]:
+    """Value object from a saved GET response (value is a JSON string) or a saved value"""
+    import json_backend
 
-def generate_batch_assignment_block(campaign_name: str) -> Dict[str, Any]:
-    """Generate batch assignment config block for a campaign"""
-    return {
-        "conditions": {
-            "assign_next_streak_type": {
-                "type": "STRING",
-                "operator": "EQ",
-                "value": campaign_name
-            }
-        },
-        "config_key": campaign_name,
-        "metadata": {
-            "next_eligible_streak_type": campaign_name
-        }
-    }
-
+    with open(path, 'r') as f:
+        data = json_backend.load(f)
+    if isinstance(data.get('value'), str):
+        return json_backend.loads(data['value'])
+    return data
 
-def add_to_batch_assignment(campaign_name: str, batch_config: Dict[str, Any]) -> Dict[str, Any]:
-    """Add campaign to batch assignment config"""
-    # Find the index of "users_removal_streak_assignment"
-    configs = batch_config.get('configs', [])
-    insert_index = None
 
-    for i, config in enumerate(configs):
-        if config.get('config_key') == 'users_removal_streak_assignment':
-            insert_index = i
-            break
+def load_mirror(mirror_dir: str) -> Dict[str, Any]:
+    """Value object holding the 3 Retool JSONs saved in mirror_dir"""
+    import json_backend
 
-    # Check if campaign already exists
-    campaign_exists = False
-    for config in configs:
-        if config.get('config_key') == campaign_name:
-            campaign_exists = True
-            break
+    views = {}
+    for view, filename in VIEW_FILES.items():
+        with open(os.path.join(mirror_dir, filename), 'r') as f:
+            views[view] = json_backend.load(f)
+    return journey_config.value_from_views(views)
 
-    if not campaign_exists:
-        new_block = generate_batch_assignment_block(campaign_name)
-        if insert_index is not None:
-            configs.insert(insert_index, new_block)
-        else:
-            # Fallback: insert before last config
-            configs.insert(-1, new_block)
 
-        batch_config['configs'] = configs
+def load_campaigns(path: str) -> List[Dict[str, Any]]:
+    """Campaign list file: [{"campaign_name", "campaign_id", "next_campaign" (optional)}, ...]"""
+    with open(path, 'r') as f:
+        campaigns = json.load(f)
 
-    return batch_config
+    for i, campaign in enumerate(campaigns):
+        if not campaign.get('campaign_name') or not campaign.get('campaign_id'):
+            raise ValueError(f"{path}: entry {i} needs campaign_name and campaign_id")
+    return campaigns
 
 
-def generate_journey_assignment_blocks(campaign_name: str, campaign_id: str) -> List[Dict[str, Any]]:
-    """Generate journey assignment config blocks for a campaign"""
-
-    # Block 1: Initial assignment (for users in NA streak)
-    initial_assignment = {
-        "uas_attributes": [
-            {
-                "attribute": {
-                    "name": "heimdall.dynamic_attributes.streak_type",
-                    "namespace": "heimdall"
-                },
-                "value": "NA",
-                "operator": "EQ",
-                "type": "STRING"
-            }
-        ],
-        "conditions": {
-            "assign_next_streak_type": {
-                "type": "STRING",
-                "operator": "EQ",
-                "value": campaign_name
-            }
-        },
-        "config_key": campaign_name,
-        "metadata": {
-            "next_eligible_streak_type": campaign_name
-        }
-    }
-
-    # Block 2: Progression (after campaign completes → NA)
-    progression = {
-        "conditions": {
-            "campaign_id": {
-                "type": "STRING",
-                "value": campaign_id,
-                "operator": "EQ"
-            }
-        },
-        "config_key": campaign_name,
-        "metadata": {
-            "next_eligible_streak_type": "NA"
-        }
-    }
-
-    return [initial_assignment, progression]
-
-
-def add_to_journey_assignment(campaign_name: str, campaign_id: str, journey_config: Dict[str, Any]) -> Dict[str, Any]:
-    """Add campaign to journey assignment config"""
-    configs = journey_config.get('configs', [])
-
-    # Check if campaign already exists
-    campaign_exists_initial = False
-    campaign_exists_progression = False
-
-    for config in configs:
-        if config.get('config_key') == campaign_name:
-            conditions = config.get('conditions', {})
-            if 'assign_next_streak_type' in conditions:
-                campaign_exists_initial = True
-            if 'campaign_id' in conditions and conditions['campaign_id'].get('value') == campaign_id:
-                campaign_exists_progression = True
-
-    # Generate blocks
-    blocks = generate_journey_assignment_blocks(campaign_name, campaign_id)
-    initial_block, progression_block = blocks
-
-    # Find insertion points
-    # Initial assignment: insert before "users_removal_streak_assignment"
-    # Progression: insert before "catch_all_condition"
-
-    initial_insert_index = None
-    progression_insert_index = None
-
-    for i, config in enumerate(configs):
-        if config.get('config_key') == 'users_removal_streak_assignment':
-            initial_insert_index = i
-        if config.get('config_key') == 'catch_all_condition':
-            progression_insert_index = i
-
-    # Add initial assignment block
-    if not campaign_exists_initial:
-        if initial_insert_index is not None:
-            configs.insert(initial_insert_index, initial_block)
-            # Adjust progression index if we inserted before it
-            if progression_insert_index is not None:
-                progression_insert_index += 1
-        else:
-            # Fallback: insert at a reasonable position (after fraud checks)
-            configs.insert(20, initial_block)
-            if progression_insert_index is not None:
-                progression_insert_index += 1
-
-    # Add progression block
-    if not campaign_exists_progression:
-        if progression_insert_index is not None:
-            configs.insert(progression_insert_index, progression_block)
-        else:
-            # Fallback: insert before last config
-            configs.insert(-1, progression_block)
-
-    journey_config['configs'] = configs
-    return journey_config
-
-
-def generate_retool_configs(campaign_name: str, campaign_id: str,
-                           existing_configs: Dict[str, Any] = None) -> Dict[str, Any]:
+def generate_retool_configs(campaigns: List[Dict[str, Any]],
+                            existing_configs: Optional[Dict[str, Any]] = None,
+                            verbose: bool = True) -> Dict[str, Any]:
     """
-    Generate all 3 Retool configurations for a campaign
+    Generate all 3 Retool configurations with the campaigns added
 
     Args:
-        campaign_name: Campaign name (e.g., "upi_streak_5")
-        campaign_id: Campaign UUID
-        existing_configs: Optional dict with existing configs to merge with
+        campaigns: [{"campaign_name", "campaign_id", "next_campaign" (optional, "NA")}, ...]
+        existing_configs: Optional value object to add them to (modified in place)
+        verbose: Print what was added per campaign
 
     Returns:
-        Dict containing all 3 modified configs
+        Dict containing all 3 configs (campaign_ids, batch_assignment, journey_assignment)
+
+    Raises:
+        journey_config.MissingAnchor: A non-empty rules list lacks
+            users_removal_streak_assignment / catch_all_condition (nothing added)
     """
 
     # Initialize with existing or empty configs
     if existing_configs is None:
-        existing_configs = {
+        existing_configs = journey_config.value_from_views({
             'campaign_ids': [],
             'batch_assignment': {'configs': []},
             'journey_assignment': {'configs': []}
-        }
+        })
 
-    # Check if campaign already exists
-    exists_check = check_campaign_exists(campaign_id, {
-        'campaign_name': campaign_name,
-        'campaign_ids': existing_configs.get('campaign_ids', []),
-        'batch_assignment': existing_configs.get('batch_assignment', {}),
-        'journey_assignment': existing_configs.get('journey_assignment', {})
-    })
-
-    print("\n" + "="*60)
-    print("CAMPAIGN EXISTENCE CHECK")
-    print("="*60)
-    print(f"Campaign Name: {campaign_name}")
-    print(f"Campaign ID: {campaign_id}")
-    print(f"\nExists in Campaign IDs List: {exists_check['campaign_ids']}")
-    print(f"Exists in Batch Assignment: {exists_check['batch_assignment']}")
-    print(f"Exists in Journey Assignment: {exists_check['journey_assignment']}")
-
-    if all(exists_check.values()):
-        print("\n⚠️  WARNING: Campaign already exists in ALL configs!")
-        print("No changes will be made.")
-        return existing_configs
-
-    print("\n" + "="*60)
-    print("GENERATING CONFIGURATIONS")
-    print("="*60)
-
-    # 1. Add to Campaign IDs
-    campaign_ids = add_to_campaign_ids(campaign_id, existing_configs.get('campaign_ids', []))
-    if not exists_check['campaign_ids']:
-        print(f"✓ Added to Campaign IDs list")
-    else:
-        print(f"- Campaign ID already exists in list")
-
-    # 2. Add to Batch Assignment
-    batch_assignment = add_to_batch_assignment(
-        campaign_name,
-        existing_configs.get('batch_assignment', {'configs': []})
-    )
-    if not exists_check['batch_assignment']:
-        print(f"✓ Added to Batch Assignment")
-    else:
-        print(f"- Campaign already exists in Batch Assignment")
-
-    # 3. Add to Journey Assignment
-    journey_assignment = add_to_journey_assignment(
-        campaign_name,
-        campaign_id,
-        existing_configs.get('journey_assignment', {'configs': []})
-    )
-    if not exists_check['journey_assignment']:
-        print(f"✓ Added to Journey Assignment (2 blocks)")
-    else:
-        print(f"- Campaign already exists in Journey Assignment")
+    existed = journey_config.add_campaigns(existing_configs, campaigns)
 
-    return {
-        'campaign_ids': campaign_ids,
-        'batch_assignment': batch_assignment,
-        'journey_assignment': journey_assignment
-    }
+    if verbose and campaigns:
+        print("\n" + "="*60)
+        print("GENERATING CONFIGURATIONS")
+        print("="*60)
+        for campaign, exists in zip(campaigns, existed):
+            missing = [part for part, found in exists.items() if not found]
+            if missing:
+                print(f"✓ {campaign['campaign_name']}: added to {', '.join(missing)}")
+            else:
+                print(f"- {campaign['campaign_name']}: already in all configs")
+
+    return journey_config.retool_views(existing_configs)
 
 
-def save_configs(configs: Dict[str, Any], output_dir: str, campaign_name: str):
-    """Save the generated configs to files"""
-    import os
+def render_configs(configs: Dict[str, Any]) -> Dict[str, str]:
+    """File contents of the 3 configs"""
+    import json_backend
+
+    return {filename: json_backend.dumps(configs[view], indent=2) for view, filename in VIEW_FILES.items()}
+
+
+def changed_files(rendered: Dict[str, str], output_dir: str) -> List[str]:
+    """Files in output_dir whose content differs from rendered (or that don't exist)"""
+    changed = []
+    for filename, text in rendered.items():
+        try:
+            with open(os.path.join(output_dir, filename), 'r') as f:
+                if f.read() == text:
+                    continue
+        except OSError:
+            pass
+        changed.append(filename)
+    return changed
+
+
+def save_configs(configs: Dict[str, Any], output_dir: str):
+    """Save the generated configs to files (unchanged files aren't rewritten)"""
 
     # Create output directory if it doesn't exist
     os.makedirs(output_dir, exist_ok=True)
 
-    # Save each config
-    with open(f"{output_dir}/campaign_ids.json", 'w') as f:
-        json.dump(configs['campaign_ids'], f, indent=2)
+    rendered = render_configs(configs)
+    changed = changed_files(rendered, output_dir)
+    for filename in changed:
+        with open(os.path.join(output_dir, filename), 'w') as f:
+            f.write(rendered[filename])
 
-    with open(f"{output_dir}/batch_assignment.json", 'w') as f:
-        json.dump(configs['batch_assignment'], f, indent=2)
+    print(f"\n✓ Saved configs to: {output_dir}/")
+    for filename in VIEW_FILES.values():
+        print(f"  - {filename}{'' if filename in changed else ' (unchanged)'}")
 
-    with open(f"{output_dir}/journey_assignment.json", 'w') as f:
-        json.dump(configs['journey_assignment'], f, indent=2)
 
-    print(f"\n✓ Saved configs to: {output_dir}/")
-    print(f"  - campaign_ids.json")
-    print(f"  - batch_assignment.json")
-    print(f"  - journey_assignment.json")
+def mock_configs() -> Dict[str, Any]:
+    """Small value object with both anchors, for --mock"""
+    return {
+        'supported_campaign_ids': [
+            "df36a1e6-b8f8-4c57-a64e-6922d010d4c9",
+            "6d9fad25-66e9-4750-be8b-a5e9acdc5a24"
+        ],
+        'batch_assignment_rules': {
+            'configs': [
+                {
+                    "config_key": "users_removal_streak_assignment",
+                    "conditions": {"assign_next_streak_type": {"type": "STRING", "operator": "EQ", "value": "NA"}},
+                    "metadata": {"next_eligible_streak_type": "NA"}
+                }
+            ]
+        },
+        'journey_rules': {
+            'configs': [
+                {
+                    "config_key": "users_removal_streak_assignment",
+                    "conditions": {"assign_next_streak_type": {"type": "STRING", "operator": "EQ", "value": "NA"}},
+                    "metadata": {"next_eligible_streak_type": "NA"}
+                },
+                {
+                    "config_key": "catch_all_condition",
+                    "metadata": {"next_eligible_streak_type": "NA"}
+                }
+            ]
+        }
+    }
 
 
 def main():
     parser = argparse.ArgumentParser(description='Generate Retool configs for campaign setup')
     parser.add_argument('--campaign-name', help='Campaign name (e.g., upi_streak_5)')
     parser.add_argument('--campaign-id', help='Campaign UUID')
-    parser.add_argument('--mock', action='store_true', help='Run with mock data for testing')
+    parser.add_argument('--next-campaign', default='NA', help='Campaign to chain to (default: NA)')
+    parser.add_argument('--campaigns', metavar='FILE', help='JSON list of campaigns to add in one pass')
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--snapshot', metavar='FILE', help='Saved STREAK_JOURNEY_JOB_CONFIG (GET response or value)')
+    source.add_argument('--mirror', metavar='DIR', help='Directory with the 3 JSONs from an earlier run')
+    source.add_argument('--mock', action='store_true', help='Run with mock data for testing')
+    parser.add_argument('--output-dir', help='Where to write the 3 JSONs (default: ./retool_configs_<campaign>)')
+    parser.add_argument('--check', action='store_true',
+                        help="Don't write; exit 1 if any file in --output-dir would change")
 
     args = parser.parse_args()
 
+    if args.check and not args.output_dir:
+        parser.error("--check needs --output-dir")
+
     if args.mock:
         print("\n" + "="*60)
         print("MOCK MODE - Testing with sample data")
         print("="*60)
 
-        # Mock existing configs (empty for testing)
-        existing_configs = {
-            'campaign_ids': [
-                "df36a1e6-b8f8-4c57-a64e-6922d010d4c9",
-                "6d9fad25-66e9-4750-be8b-a5e9acdc5a24"
-            ],
-            'batch_assignment': {
-                'configs': [
-                    {
-                        "config_key": "users_removal_streak_assignment",
-                        "conditions": {"assign_next_streak_type": {"type": "STRING", "operator": "EQ", "value": "NA"}},
-                        "metadata": {"next_eligible_streak_type": "NA"}
-                    }
-                ]
-            },
-            'journey_assignment': {
-                'configs': [
-                    {
-                        "config_key": "users_removal_streak_assignment",
-                        "conditions": {"assign_next_streak_type": {"type": "STRING", "operator": "EQ", "value": "NA"}},
-                        "metadata": {"next_eligible_streak_type": "NA"}
-                    },
-                    {
-                        "config_key": "catch_all_condition",
-                        "metadata": {"next_eligible_streak_type": "NA"}
-                    }
-                ]
-            }
-        }
-
-        # Mock campaign data
-        campaign_name = "test_campaign_mock"
-        campaign_id = "12345678-1234-1234-1234-123456789abc"
-
-        print(f"\nMock Campaign: {campaign_name}")
-        print(f"Mock UUID: {campaign_id}")
-
-        # Generate configs
-        result = generate_retool_configs(campaign_name, campaign_id, existing_configs)
-
-        # Save to mock output directory
-        output_dir = "./mock_retool_output"
-        save_configs(result, output_dir, campaign_name)
-
-        print("\n" + "="*60)
-        print("MOCK TEST COMPLETE")
-        print("="*60)
-        print(f"\nReview the generated files in: {output_dir}/")
+        existing_configs = mock_configs()
+        campaigns = [{'campaign_name': "test_campaign_mock",
+                      'campaign_id': "12345678-1234-1234-1234-123456789abc"}]
+        print(f"\nMock Campaign: {campaigns[0]['campaign_name']}")
+        print(f"Mock UUID: {campaigns[0]['campaign_id']}")
+        output_dir = args.output_dir or "./mock_retool_output"
 
     else:
-        # Interactive or command-line mode
+        campaigns = []
+        try:
+            if args.campaigns:
+                campaigns = load_campaigns(args.campaigns)
+
+            if args.snapshot:
+                existing_configs = load_snapshot(args.snapshot)
+            elif args.mirror:
+                existing_configs = load_mirror(args.mirror)
+            else:
+                existing_configs = None
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+
         campaign_name = args.campaign_name
         campaign_id = args.campaign_id
 
-        if not campaign_name or not campaign_id:
+        if not campaigns and not (campaign_name and campaign_id) and existing_configs is None:
             print("\nInteractive Mode")
             print("="*60)
             campaign_name = input("Campaign Name (e.g., upi_streak_5): ").strip()
             campaign_id = input("Campaign UUID: ").strip()
 
-        if not campaign_name or not campaign_id:
+            if not campaign_name or not campaign_id:
+                print("Error: Both campaign name and ID are required!")
+                sys.exit(1)
+
+        if bool(campaign_name) != bool(campaign_id):
             print("Error: Both campaign name and ID are required!")
             sys.exit(1)
+        if campaign_name:
+            campaigns.append({'campaign_name': campaign_name, 'campaign_id': campaign_id,
+                              'next_campaign': args.next_campaign})
+
+        if existing_configs is None:
+            print("\nNote: No --snapshot or --mirror given; generating with empty base configs...")
+
+        output_dir = args.output_dir
+        if not output_dir:
+            output_dir = f"./retool_configs_{campaigns[0]['campaign_name']}" if campaigns else "./retool_configs"
+
+    started = time.perf_counter()
+    try:
+        result = generate_retool_configs(campaigns, existing_configs, verbose=not args.check)
+    except journey_config.MissingAnchor as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    if args.check:
+        changed = changed_files(render_configs(result), output_dir)
+        elapsed = time.perf_counter() - started
+        if changed:
+            print(f"✗ Out of date in {output_dir}/: {', '.join(changed)} ({elapsed:.2f}s)")
+            sys.exit(1)
+        print(f"✓ {output_dir}/ is up to date ({elapsed:.2f}s)")
+        return
 
-        print("\nNote: This script generates configs for NEW campaigns.")
-        print("You'll need to provide existing Retool configs to merge with,")
-        print("or use --mock mode for testing.")
-        print("\nFor now, generating with empty base configs...")
-
-        result = generate_retool_configs(campaign_name, campaign_id)
+    save_configs(result, output_dir)
+    print(f"\n{len(campaigns)} campaign(s), {len(result['campaign_ids'])} campaign IDs, "
+          f"{len(result['journey_assignment'].get('configs', []))} journey rules "
+          f"in {time.perf_counter() - started:.2f}s")
 
-        # Save to output directory
-        output_dir = f"./retool_configs_{campaign_name}"
-        save_configs(result, output_dir, campaign_name)
+    if args.mock:
+        print("\n" + "="*60)
+        print("MOCK TEST COMPLETE")
+        print("="*60)
+        print(f"\nReview the generated files in: {output_dir}/")
 
 
 if __name__ == "__main__":
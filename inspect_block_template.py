@@ -3,14 +3,16 @@
 Inspect STREAK_BLOCK_TEMPLATE to understand structure before cleanup
 """
 
-import requests
 import json
 import sys
 from retool_integration import load_credentials
+import metrics
 
 
 def fetch_config(config_key: str, userid: str, apikey: str):
     """Fetch a Heimdall config"""
+    import requests  # deferred to keep script startup fast
+
     base_url = "http://kongproxy.infra.dreamplug.net/heimdall/heartbeat/v1/template"
     url = f"{base_url}/{config_key}"
     headers = {
@@ -20,9 +22,12 @@ def fetch_config(config_key: str, userid: str, apikey: str):
     }
 
     try:
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        return response.json()
+        with metrics.request(config_key, 'GET'):
+            response = requests.get(url, headers=headers, timeout=30)
+            response.raise_for_status()
+        data = response.json()
+        metrics.observe_template(config_key, data.get('value'))
+        return data
     except Exception as e:
         print(f"Error: {str(e)}")
         sys.exit(1)
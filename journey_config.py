@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Journey Config Engine (STREAK_JOURNEY_JOB_CONFIG)
+
+The one implementation of "add a campaign to the journey config", shared by
+retool_integration.py (live config) and generate_retool_configs.py (local
+snapshot). A campaign needs:
+
+1. its UUID in supported_campaign_ids
+2. a batch_assignment_rules entry, before users_removal_streak_assignment
+3. two journey_rules entries: the initial assignment (before
+   users_removal_streak_assignment) and the progression to the next
+   campaign (before catch_all_condition)
+
+Everything works on the parsed value object, in place:
+
+    journey_config.check_campaign_exists(campaign_id, campaign_name, value_obj)
+    journey_config.add_campaign_to_config(campaign_name, campaign_id, "NA", value_obj)
+    journey_config.add_campaigns(value_obj, [{'campaign_name': ..., 'campaign_id': ...}, ...])
+
+    view = journey_config.JourneyConfigView(value_obj)   # indexes, built once
+    view.add(campaign_name, campaign_id, "NA")           # any number of times
+    view.flush()
+
+If an anchor is missing from a rules list that has entries, MissingAnchor
+is raised and nothing is added for that campaign - there's no right place
+to guess.
+
+The Retool dashboard shows the three parts as separate JSONs;
+retool_views() / value_from_views() convert between the two shapes.
+"""
+
+from typing import Dict, List, Any, Optional, Tuple
+
+
+# journey_rules / batch_assignment_rules entries new campaigns go before
+USERS_REMOVAL_KEY = 'users_removal_streak_assignment'
+CATCH_ALL_KEY = 'catch_all_condition'
+
+# The three Retool JSONs and the value keys they come from
+VIEW_KEYS = {
+    'campaign_ids': 'supported_campaign_ids',
+    'batch_assignment': 'batch_assignment_rules',
+    'journey_assignment': 'journey_rules'
+}
+
+
+def assignment_block(campaign_name: str) -> Dict[str, Any]:
+    """Batch/journey entry that assigns the campaign (no NA check - for manual experiments)"""
+    return {
+        "conditions": {
+            "assign_next_streak_type": {
+                "type": "STRING",
+                "operator": "EQ",
+                "value": campaign_name
+            }
+        },
+        "config_key": campaign_name,
+        "metadata": {
+            "next_eligible_streak_type": campaign_name
+        }
+    }
+
+
+def progression_block(campaign_name: str, campaign_id: str, next_campaign: str) -> Dict[str, Any]:
+    """Journey entry that moves users on once the campaign completes ("NA" ends the chain)"""
+    return {
+        "conditions": {
+            "campaign_id": {
+                "type": "STRING",
+                "value": campaign_id,
+                "operator": "EQ"
+            }
+        },
+        "config_key": campaign_name,
+        "metadata": {
+            "next_eligible_streak_type": next_campaign
+        }
+    }
+
+
+class MissingAnchor(ValueError):
+    """A rules list has entries but not the anchor new campaigns go before"""
+
+
+def _conditions(config: Dict[str, Any]) -> Dict[str, Any]:
+    return config.get('conditions') or {}
+
+
+def _anchor_position(configs: List[Dict[str, Any]], anchor: str) -> Optional[int]:
+    return next((i for i, config in enumerate(configs) if config.get('config_key') == anchor), None)
+
+
+class JourneyConfigView:
+    """
+    Indexes over one value object for adding campaigns without rescanning it.
+
+    Built once (one pass over the rules), then every add() is a few set
+    lookups: which campaigns have a batch entry, an initial assignment, a
+    progression for a given UUID, and where the anchors are. New blocks are
+    queued per anchor and spliced into the lists in one go by flush(), so
+    adding N campaigns to M rules is O(N + M) instead of O(N * M).
+
+    A rules list that has entries but no anchor raises MissingAnchor
+    instead of guessing a position; an empty list just gets the blocks.
+    """
+
+    def __init__(self, value_obj: Dict[str, Any]):
+        self.value_obj = value_obj
+        self._ids = set(value_obj.get('supported_campaign_ids', []))
+        self._batch_names = {config.get('config_key')
+                             for config in value_obj.get('batch_assignment_rules', {}).get('configs', [])}
+
+        self._initial = set()
+        self._progression = set()
+        journey = value_obj.get('journey_rules', {}).get('configs', [])
+        for config in journey:
+            conditions = _conditions(config)
+            if 'assign_next_streak_type' in conditions:
+                self._initial.add(config.get('config_key'))
+            if 'campaign_id' in conditions:
+                self._progression.add((config.get('config_key'), conditions['campaign_id'].get('value')))
+
+        batch = value_obj.get('batch_assignment_rules', {}).get('configs', [])
+        # (section, anchor) -> index of the anchor in the section's configs
+        self._anchors = {
+            ('batch_assignment_rules', USERS_REMOVAL_KEY): _anchor_position(batch, USERS_REMOVAL_KEY),
+            ('journey_rules', USERS_REMOVAL_KEY): _anchor_position(journey, USERS_REMOVAL_KEY),
+            ('journey_rules', CATCH_ALL_KEY): _anchor_position(journey, CATCH_ALL_KEY)
+        }
+        self._pending: Dict[Tuple[str, str], List[Dict[str, Any]]] = {key: [] for key in self._anchors}
+
+    def exists(self, campaign_id: str, campaign_name: str) -> Dict[str, bool]:
+        """Same result as check_campaign_exists() (pending adds count as existing)"""
+        return {
+            'supported_campaigns': campaign_id in self._ids,
+            'batch_assignment': campaign_name in self._batch_names,
+            'journey_assignment': (campaign_name, campaign_id) in self._progression
+        }
+
+    def missing_anchors(self) -> List[str]:
+        """'<section>: <anchor>' for every anchor a non-empty rules list lacks"""
+        missing = []
+        for (section, anchor), position in self._anchors.items():
+            if position is None and self.value_obj.get(section, {}).get('configs'):
+                missing.append(f"{section}: {anchor}")
+        return missing
+
+    def _check_anchor(self, section: str, anchor: str, campaign_name: str):
+        if self._anchors[(section, anchor)] is None and self.value_obj.get(section, {}).get('configs'):
+            raise MissingAnchor(f"Can't add {campaign_name}: {section} has no {anchor} entry "
+                                f"to insert before")
+
+    def add(self, campaign_name: str, campaign_id: str, next_campaign: str = "NA") -> Dict[str, bool]:
+        """
+        Queue the campaign's missing parts (see add_campaign_to_config).
+        Returns what already existed. Nothing is queued if an anchor it
+        needs is missing.
+        """
+        existed = self.exists(campaign_id, campaign_name)
+        add_batch = not existed['batch_assignment']
+        add_initial = campaign_name not in self._initial
+        add_progression = not existed['journey_assignment']
+
+        if add_batch:
+            self._check_anchor('batch_assignment_rules', USERS_REMOVAL_KEY, campaign_name)
+        if add_initial:
+            self._check_anchor('journey_rules', USERS_REMOVAL_KEY, campaign_name)
+        if add_progression:
+            self._check_anchor('journey_rules', CATCH_ALL_KEY, campaign_name)
+
+        if not existed['supported_campaigns']:
+            self.value_obj.setdefault('supported_campaign_ids', []).append(campaign_id)
+            self._ids.add(campaign_id)
+        if add_batch:
+            self._pending[('batch_assignment_rules', USERS_REMOVAL_KEY)].append(assignment_block(campaign_name))
+            self._batch_names.add(campaign_name)
+        if add_initial:
+            self._pending[('journey_rules', USERS_REMOVAL_KEY)].append(assignment_block(campaign_name))
+            self._initial.add(campaign_name)
+        if add_progression:
+            self._pending[('journey_rules', CATCH_ALL_KEY)].append(
+                progression_block(campaign_name, campaign_id, next_campaign))
+            self._progression.add((campaign_name, campaign_id))
+
+        return existed
+
+    def flush(self) -> Dict[str, Any]:
+        """Splice the queued blocks in before their anchors; returns the value object"""
+        for section in ('batch_assignment_rules', 'journey_rules'):
+            keys = [key for key in self._pending if key[0] == section and self._pending[key]]
+            if not keys:
+                continue
+            rules = self.value_obj.setdefault(section, {'configs': []})
+            configs = rules.setdefault('configs', [])
+
+            # An empty list has no anchors: blocks go in anchor order
+            # (initial assignments before progressions)
+            positions = {key: len(configs) if self._anchors[key] is None else self._anchors[key]
+                         for key in keys}
+            # Splice from the back so earlier positions stay valid
+            for key in sorted(keys, key=lambda k: (positions[k], list(self._anchors).index(k)), reverse=True):
+                configs[positions[key]:positions[key]] = self._pending[key]
+
+            # Anchors move down by the blocks spliced in at or before them
+            for anchor_key, position in self._anchors.items():
+                if anchor_key[0] == section and position is not None:
+                    self._anchors[anchor_key] = position + sum(
+                        len(self._pending[key]) for key in keys if positions[key] <= position)
+            for key in keys:
+                self._pending[key] = []
+
+        return self.value_obj
+
+
+def check_campaign_exists(campaign_id: str, campaign_name: str,
+                          value_obj: Dict[str, Any]) -> Dict[str, bool]:
+    """Check if campaign already exists in any of the nested configs"""
+    return JourneyConfigView(value_obj).exists(campaign_id, campaign_name)
+
+
+def add_campaign_to_config(campaign_name: str, campaign_id: str,
+                           next_campaign: str,
+                           value_obj: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Add campaign to all 3 nested configs
+
+    Args:
+        campaign_name: Campaign name
+        campaign_id: Campaign UUID
+        next_campaign: Next campaign to chain to (or "NA")
+        value_obj: Parsed value object
+
+    Returns:
+        Modified value_obj
+
+    Raises:
+        MissingAnchor: A rules list has no users_removal_streak_assignment /
+                       catch_all_condition entry to insert before
+    """
+    view = JourneyConfigView(value_obj)
+    view.add(campaign_name, campaign_id, next_campaign)
+    return view.flush()
+
+
+def add_campaigns(value_obj: Dict[str, Any], campaigns: List[Dict[str, Any]]) -> List[Dict[str, bool]]:
+    """
+    Add several campaigns ({'campaign_name', 'campaign_id', 'next_campaign'
+    (optional, "NA")}) in order, in one pass. Returns what already existed
+    for each, like check_campaign_exists(). Raises MissingAnchor (with
+    nothing added) if an anchor is missing.
+    """
+    view = JourneyConfigView(value_obj)
+    missing = view.missing_anchors()
+    if missing:
+        raise MissingAnchor(f"Missing anchor entries: {'; '.join(missing)}")
+
+    existed = [view.add(campaign['campaign_name'], campaign['campaign_id'],
+                        campaign.get('next_campaign') or "NA")
+               for campaign in campaigns]
+    view.flush()
+    return existed
+
+
+def retool_views(value_obj: Dict[str, Any]) -> Dict[str, Any]:
+    """The three Retool JSONs (campaign_ids, batch_assignment, journey_assignment) of a value"""
+    return {
+        'campaign_ids': value_obj.get('supported_campaign_ids', []),
+        'batch_assignment': value_obj.get('batch_assignment_rules', {'configs': []}),
+        'journey_assignment': value_obj.get('journey_rules', {'configs': []})
+    }
+
+
+def value_from_views(views: Dict[str, Any]) -> Dict[str, Any]:
+    """A value object holding just the three Retool JSONs (the inverse of retool_views)"""
+    return {value_key: views[view_key] for view_key, value_key in VIEW_KEYS.items() if view_key in views}
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Journey-Chain Graph Index (STREAK_JOURNEY_JOB_CONFIG)
+
+Chained streaks are journey_rules entries keyed by campaign_id whose
+metadata.next_eligible_streak_type names the campaign a user moves on to
+("NA" ends the chain). JourneyGraph indexes a parsed config value once, so
+questions about chains are dict lookups instead of scans over the rules:
+
+    graph = JourneyGraph(value_obj)
+    graph.successors('upi_25x1_streak')      # {'snp_new_10x5_streak'}
+    graph.predecessors('snp_new_10x5_streak')
+    graph.name_for_id('9d1c...')             # campaign name for a UUID
+    graph.chain('upi_25x1_streak')           # every campaign reachable from it
+    graph.cycles()                           # [['a', 'b', 'a'], ...]
+    graph.dangling()                         # [('a', 'missing_campaign'), ...]
+
+Only progression rules (conditions.campaign_id) are edges. The initial
+assignment rules (conditions.assign_next_streak_type) always point at their
+own campaign, and the anchor entries (users_removal_streak_assignment,
+catch_all_condition) aren't campaigns.
+
+Build a new graph after every fetch; it doesn't follow later edits to
+value_obj.
+
+Usage:
+    python3 journey_graph.py                 # fetch and print chains, cycles, dangling
+    python3 journey_graph.py config.json     # from a saved GET response
+"""
+
+import sys
+from typing import AbstractSet, Dict, List, Any, Optional, Set, Tuple
+
+from journey_config import CATCH_ALL_KEY, USERS_REMOVAL_KEY
+
+
+# journey_rules / batch_assignment_rules entries that aren't campaigns
+ANCHOR_KEYS = frozenset([USERS_REMOVAL_KEY, CATCH_ALL_KEY])
+
+# next_eligible_streak_type values that end a chain
+END_OF_CHAIN = frozenset(['NA', ''])
+
+_NO_NAMES: frozenset = frozenset()
+
+
+class JourneyGraph:
+    """Successor/predecessor and UUID indexes over one STREAK_JOURNEY_JOB_CONFIG value"""
+
+    def __init__(self, value_obj: Dict[str, Any]):
+        self._successors: Dict[str, AbstractSet[str]] = {}
+        self._predecessors: Dict[str, AbstractSet[str]] = {}
+        self._names_by_id: Dict[str, str] = {}
+        self._ids_by_name: Dict[str, AbstractSet[str]] = {}
+        self._rules: Dict[str, List[Dict[str, Any]]] = {}
+        self._campaigns: Set[str] = set()
+
+        for rule in value_obj.get('batch_assignment_rules', {}).get('configs', []):
+            name = rule.get('config_key')
+            if name and name not in ANCHOR_KEYS:
+                self._campaigns.add(name)
+
+        for rule in value_obj.get('journey_rules', {}).get('configs', []):
+            name = rule.get('config_key')
+            if not name:
+                continue
+            self._rules.setdefault(name, []).append(rule)
+            if name in ANCHOR_KEYS:
+                continue
+            self._campaigns.add(name)
+
+            condition = (rule.get('conditions') or {}).get('campaign_id')
+            if not isinstance(condition, dict) or not condition.get('value'):
+                continue
+            campaign_id = condition['value']
+            self._names_by_id.setdefault(campaign_id, name)
+            self._ids_by_name.setdefault(name, set()).add(campaign_id)
+
+            next_name = (rule.get('metadata') or {}).get('next_eligible_streak_type')
+            if isinstance(next_name, str) and next_name not in END_OF_CHAIN:
+                self._successors.setdefault(name, set()).add(next_name)
+                self._predecessors.setdefault(next_name, set()).add(name)
+
+        # Lookups hand these out directly
+        for index in (self._successors, self._predecessors, self._ids_by_name):
+            for key, names in index.items():
+                index[key] = frozenset(names)
+
+    # Lookups
+
+    def campaigns(self) -> List[str]:
+        """Every campaign with a batch or journey rule, sorted (the next-campaign choices)"""
+        return sorted(self._campaigns)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._campaigns
+
+    def __len__(self) -> int:
+        return len(self._campaigns)
+
+    def successors(self, name: str) -> frozenset:
+        return self._successors.get(name, _NO_NAMES)
+
+    def predecessors(self, name: str) -> frozenset:
+        return self._predecessors.get(name, _NO_NAMES)
+
+    def name_for_id(self, campaign_id: str) -> Optional[str]:
+        return self._names_by_id.get(campaign_id)
+
+    def ids_for_name(self, name: str) -> frozenset:
+        return self._ids_by_name.get(name, _NO_NAMES)
+
+    def rules_for(self, name: str) -> List[Dict[str, Any]]:
+        """journey_rules entries with this config_key, in config order"""
+        return list(self._rules.get(name, []))
+
+    # Traversals
+
+    def chain(self, name: str) -> List[str]:
+        """Campaigns reachable from name (not including it), nearest first"""
+        seen = {name}
+        order = []
+        frontier = [name]
+        while frontier:
+            next_frontier = []
+            for current in frontier:
+                for successor in sorted(self._successors.get(current, _NO_NAMES)):
+                    if successor not in seen:
+                        seen.add(successor)
+                        order.append(successor)
+                        next_frontier.append(successor)
+            frontier = next_frontier
+        return order
+
+    def reaches(self, start: str, target: str) -> bool:
+        """True if target is start or reachable from it"""
+        return start == target or target in self.chain(start)
+
+    def on_cycle(self, name: str) -> bool:
+        """True if following next campaigns from name leads back to it"""
+        return any(self.reaches(successor, name) for successor in self._successors.get(name, _NO_NAMES))
+
+    def chains(self) -> List[List[str]]:
+        """
+        Every maximal path from a chain head (a campaign with a successor but
+        no predecessor). Stops where a path would revisit a campaign;
+        campaigns only on cycles have no head - see cycles().
+        """
+        paths = []
+        heads = sorted(name for name in self._successors if name not in self._predecessors)
+        for head in heads:
+            stack = [[head]]
+            while stack:
+                path = stack.pop()
+                successors = [s for s in self._successors.get(path[-1], _NO_NAMES) if s not in path]
+                if not successors:
+                    paths.append(path)
+                    continue
+                for successor in sorted(successors, reverse=True):
+                    stack.append(path + [successor])
+        return paths
+
+    def cycles(self) -> List[List[str]]:
+        """
+        Cycles as closed paths (['a', 'b', 'a']), each listed once starting
+        from its smallest name. A user on one would never leave the chain.
+        """
+        found = {}
+        state: Dict[str, int] = {}  # 1 = on the current path, 2 = done
+        for root in sorted(self._successors):
+            if root in state:
+                continue
+            path = [root]
+            state[root] = 1
+            iterators = [iter(sorted(self._successors.get(root, _NO_NAMES)))]
+            while iterators:
+                successor = next(iterators[-1], None)
+                if successor is None:
+                    state[path.pop()] = 2
+                    iterators.pop()
+                    continue
+                if state.get(successor) == 1:
+                    cycle = path[path.index(successor):]
+                    start = cycle.index(min(cycle))
+                    cycle = cycle[start:] + cycle[:start]
+                    found.setdefault(tuple(cycle), cycle + [cycle[0]])
+                elif successor not in state:
+                    state[successor] = 1
+                    path.append(successor)
+                    iterators.append(iter(sorted(self._successors.get(successor, _NO_NAMES))))
+        return [found[key] for key in sorted(found)]
+
+    def dangling(self) -> List[Tuple[str, str]]:
+        """(campaign, next campaign) pairs whose next campaign has no rules in the config"""
+        return sorted((name, successor)
+                      for name, successors in self._successors.items()
+                      for successor in successors
+                      if successor not in self._campaigns)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'campaigns': len(self._campaigns),
+            'chained': len(self._successors),
+            'edges': sum(len(s) for s in self._successors.values()),
+            'chains': len(self.chains()),
+            'cycles': len(self.cycles()),
+            'dangling': len(self.dangling())
+        }
+
+
+def main():
+    import json_backend
+
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], 'r') as f:
+            config_data = json_backend.load(f)
+    else:
+        from retool_integration import load_credentials, HeimdalJourneyConfigAPI
+
+        userid, apikey = load_credentials()
+        if not userid or not apikey:
+            print("❌ Error: Could not load credentials")
+            sys.exit(1)
+        print("📡 Fetching STREAK_JOURNEY_JOB_CONFIG...")
+        success, config_data, error = HeimdalJourneyConfigAPI(userid, apikey).get_config()
+        if not success:
+            print(f"❌ Failed: {error}")
+            sys.exit(1)
+
+    graph = JourneyGraph(json_backend.loads(config_data.get('value', '{}')))
+    summary = graph.summary()
+    print(f"\n📊 {summary['campaigns']} campaigns, {summary['chained']} chained "
+          f"({summary['edges']} next-campaign links)")
+
+    print(f"\n🔗 Chains ({summary['chains']}):")
+    for path in graph.chains():
+        print(f"  {' → '.join(path)}")
+
+    cycles = graph.cycles()
+    print(f"\n{'❌' if cycles else '✓'} Cycles: {len(cycles)}")
+    for cycle in cycles:
+        print(f"  {' → '.join(cycle)}")
+
+    dangling = graph.dangling()
+    print(f"\n{'⚠️ ' if dangling else '✓'} Dangling next campaigns: {len(dangling)}")
+    for name, successor in dangling:
+        print(f"  {name} → {successor} (not in config)")
+
+    sys.exit(1 if cycles or dangling else 0)
+
+
+if __name__ == "__main__":
+    main()
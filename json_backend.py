@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Pluggable JSON Backend
+
+Drop-in replacements for json.loads/load/dumps/dump that use orjson when it
+is installed and fall back to the stdlib json module otherwise:
+
+    import json_backend
+    value_obj = json_backend.loads(data['value'])
+    json_backend.dump(value_obj, f, indent=2)
+
+Output is byte-identical to the stdlib with the arguments this repo uses
+(indent=2, or separators=(',', ':'), optionally with sort_keys), so
+_before/_after diffs and wire formats don't change with the backend:
+- non-ASCII characters (and DEL) are escaped as \\uXXXX, like ensure_ascii
+- documents with floats the stdlib writes in exponent form (1e+16, 1e-05)
+  or as NaN/Infinity, integers beyond 64 bits or non-string keys are left
+  to the stdlib
+Documents with 19+ digit numbers are parsed by the stdlib too: orjson
+reads integers beyond 64 bits as floats.
+Any other combination of arguments goes straight to the stdlib.
+
+Set CAMPAIGN_JSON_BACKEND=stdlib to force the stdlib (e.g. to compare).
+"""
+
+import json
+import os
+import re
+from typing import Any, Optional, Tuple
+
+_UNLOADED = object()
+_orjson = _UNLOADED
+
+_COMPACT = (',', ':')
+
+# Characters the stdlib escapes with ensure_ascii but orjson writes raw
+_NOT_ASCII = re.compile(r'[^\x00-\x7e]')
+
+# A run of digits that could be an integer outside 64 bits (2**63 has 19
+# digits): orjson 3.8 reads those as floats, silently losing precision.
+# Found with translate + find, a regex scan costs as much as the stdlib
+# parse; runs inside strings or fractions only cost a slower parse.
+_DIGITS_ONLY = bytes(0x30 if 0x30 <= b <= 0x39 else 0x20 for b in range(256))
+_LONG_DIGITS = b'0' * 19
+
+
+def _fast_backend():
+    """orjson, or None to use the stdlib (imported on first use; the import takes ~25ms)"""
+    global _orjson
+    if _orjson is _UNLOADED:
+        _orjson = None
+        if os.environ.get('CAMPAIGN_JSON_BACKEND') != 'stdlib':
+            try:
+                import orjson
+                _orjson = orjson
+            except ImportError:
+                pass
+    return _orjson
+
+
+def backend_name() -> str:
+    return 'orjson' if _fast_backend() is not None else 'json'
+
+
+def _escape_char(match) -> str:
+    return json.dumps(match.group())[1:-1]
+
+
+def _floats_match_stdlib(obj: Any) -> bool:
+    """
+    False if obj holds a float orjson writes differently from the stdlib:
+    exponent form (below 1e-4 or from 1e16 up) and NaN/Infinity (which
+    orjson writes as null).
+    """
+    stack = [obj]
+    while stack:
+        container = stack.pop()
+        for item in (container.values() if isinstance(container, dict) else container):
+            kind = type(item)
+            if kind is str or kind is int:
+                continue
+            if kind is float:
+                if item != 0.0 and not 1e-4 <= abs(item) < 1e16:
+                    return False
+            elif isinstance(item, (dict, list, tuple)):
+                stack.append(item)
+    return True
+
+
+def _orjson_dumps(orjson, obj: Any, indent: Optional[int], separators: Optional[Tuple[str, str]],
+                  sort_keys: bool) -> Optional[str]:
+    """orjson rendering of obj, or None where it wouldn't match the stdlib byte for byte"""
+    if indent == 2 and separators is None:
+        option = orjson.OPT_INDENT_2
+    elif indent is None and separators is not None and tuple(separators) == _COMPACT:
+        option = 0
+    else:
+        return None
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+
+    if not _floats_match_stdlib([obj]):
+        return None
+
+    try:
+        text = orjson.dumps(obj, option=option).decode('utf-8')
+    except TypeError:
+        return None  # integers beyond 64 bits, non-string keys, unsupported types
+
+    if not text.isascii() or '\x7f' in text:
+        text = _NOT_ASCII.sub(_escape_char, text)
+    return text
+
+
+def dumps(obj: Any, indent: Optional[int] = None, separators: Optional[Tuple[str, str]] = None,
+          sort_keys: bool = False) -> str:
+    """json.dumps(obj, indent=..., separators=..., sort_keys=...)"""
+    orjson = _fast_backend()
+    if orjson is not None:
+        text = _orjson_dumps(orjson, obj, indent, separators, sort_keys)
+        if text is not None:
+            return text
+    return json.dumps(obj, indent=indent, separators=separators, sort_keys=sort_keys)
+
+
+def dump(obj: Any, f, indent: Optional[int] = None, separators: Optional[Tuple[str, str]] = None,
+         sort_keys: bool = False):
+    """json.dump(obj, f, ...) - writes the same bytes as dumps()"""
+    f.write(dumps(obj, indent=indent, separators=separators, sort_keys=sort_keys))
+
+
+def _has_long_digits(text) -> bool:
+    data = text.encode('utf-8', 'surrogatepass') if isinstance(text, str) else bytes(text)
+    return data.translate(_DIGITS_ONLY).find(_LONG_DIGITS) != -1
+
+
+def loads(text) -> Any:
+    """
+    json.loads(text). Documents with integers that may not fit in 64 bits
+    (19+ digits) and documents orjson rejects but the stdlib accepts (NaN,
+    lone surrogates) are parsed by the stdlib; invalid JSON raises
+    json.JSONDecodeError either way.
+    """
+    orjson = _fast_backend()
+    if orjson is not None and not _has_long_digits(text):
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(text)
+
+
+def load(f) -> Any:
+    """json.load(f)"""
+    return loads(f.read())
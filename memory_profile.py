@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Per-Stage Memory Profiling (--profile-memory)
+
+Uses tracemalloc to record, for each stage of a run (fetch, process, post,
+... per config):
+- peak:     highest traced memory while the stage ran, above what was
+            already allocated when it started
+- retained: memory still held when the stage ended
+- top allocation sites (file:line) of the retained memory
+
+Usage:
+    memory_profile.start()
+    with memory_profile.stage("fetch STREAK_CONFIG"):
+        ...
+    print(memory_profile.report())
+
+tracing.span() opens a stage automatically when profiling is on, so the
+master script only has to call start() and finish(). When profiling isn't
+started, stage() does nothing.
+
+Only Python allocations are traced, and tracing slows everything down -
+use the timings from trace.json, not from a profiled run.
+"""
+
+from contextlib import contextmanager
+from typing import Dict, List, Any, Optional
+
+
+REPORT_FILE = "memory_profile.txt"
+
+# Allocation sites listed per stage, for the stages with the highest peak
+TOP_SITES = 5
+HEAVIEST_STAGES = 3
+
+_active = None
+
+
+class MemoryProfiler:
+    """Collects per-stage peaks and allocation sites for one run"""
+
+    def __init__(self, top: int = TOP_SITES):
+        self.top = top
+        self.stages: List[Dict[str, Any]] = []
+        self.overall_peak = 0
+        self._stack: List[Dict[str, Any]] = []
+
+    def begin(self, label: str) -> Dict[str, Any]:
+        import tracemalloc
+
+        current, peak = tracemalloc.get_traced_memory()
+        self.overall_peak = max(self.overall_peak, peak)
+        if self._stack:
+            # Resetting the peak below would lose the enclosing stage's peak so far
+            self._stack[-1]['peak'] = max(self._stack[-1]['peak'], peak)
+        tracemalloc.reset_peak()
+
+        entry = {'label': label, 'start': current, 'peak': current,
+                 'snapshot': self._snapshot() if self.top else None}
+        self._stack.append(entry)
+        return entry
+
+    def end(self, entry: Dict[str, Any]):
+        import tracemalloc
+
+        current, peak = tracemalloc.get_traced_memory()
+        self.overall_peak = max(self.overall_peak, peak)
+        entry['peak'] = max(entry['peak'], peak)
+        if entry in self._stack:
+            self._stack.remove(entry)
+        if self._stack:
+            self._stack[-1]['peak'] = max(self._stack[-1]['peak'], entry['peak'])
+
+        sites = []
+        if entry['snapshot'] is not None:
+            diff = self._snapshot().compare_to(entry['snapshot'], 'lineno')
+            for stat in diff:
+                if stat.size_diff <= 0:
+                    continue
+                frame = stat.traceback[0]
+                sites.append({'site': f"{frame.filename}:{frame.lineno}",
+                              'bytes': stat.size_diff, 'count': stat.count_diff})
+                if len(sites) == self.top:
+                    break
+
+        self.stages.append({
+            'label': entry['label'],
+            'peak': entry['peak'] - entry['start'],
+            'retained': current - entry['start'],
+            'sites': sites
+        })
+
+    @staticmethod
+    def _snapshot():
+        import tracemalloc
+
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            tracemalloc.Filter(False, __file__)
+        ])
+
+
+def start(top: int = TOP_SITES) -> MemoryProfiler:
+    """Start tracemalloc and profile stages from now on"""
+    import tracemalloc
+
+    global _active
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _active = MemoryProfiler(top)
+    return _active
+
+
+def active() -> Optional[MemoryProfiler]:
+    return _active
+
+
+@contextmanager
+def stage(label: str):
+    """Profile a stage (no-op when profiling isn't started)"""
+    if _active is None:
+        yield None
+        return
+
+    entry = _active.begin(label)
+    try:
+        yield entry
+    finally:
+        _active.end(entry)
+
+
+def _mb(size: int) -> str:
+    return f"{size / 1024 / 1024:.2f}MB"
+
+
+def report(profiler: Optional[MemoryProfiler] = None) -> str:
+    """Peak/retained table per stage, then allocation sites of the heaviest stages"""
+    import tracemalloc
+
+    profiler = profiler or _active
+    if profiler is None:
+        return ""
+
+    lines = ["Memory profile (tracemalloc)", ""]
+    lines.append(f"  {'stage':48} {'peak':>10} {'retained':>10}")
+    for entry in profiler.stages:
+        lines.append(f"  {entry['label']:48} {_mb(entry['peak']):>10} {_mb(entry['retained']):>10}")
+
+    overall_peak = profiler.overall_peak
+    if tracemalloc.is_tracing():
+        overall_peak = max(overall_peak, tracemalloc.get_traced_memory()[1])
+    lines.append(f"\n  Overall peak: {_mb(overall_peak)}")
+
+    # Allocation sites only for the heaviest stages, to keep the report short
+    heaviest = sorted(profiler.stages, key=lambda e: e['peak'], reverse=True)[:HEAVIEST_STAGES]
+    for entry in heaviest:
+        if not entry['sites']:
+            continue
+        lines.append(f"\n  {entry['label']} - top retained allocations:")
+        for site in entry['sites']:
+            lines.append(f"    {site['bytes'] / 1024:10.1f}KB {site['count']:7} blocks  {site['site']}")
+
+    return "\n".join(lines)
+
+
+def finish(output_dir: Optional[str] = None) -> str:
+    """Stop tracing, return the report and save it to output_dir/memory_profile.txt"""
+    import os
+    import tracemalloc
+
+    text = report()
+    if output_dir and text:
+        with open(os.path.join(output_dir, REPORT_FILE), 'w') as f:
+            f.write(text + "\n")
+    tracemalloc.stop()
+    return text
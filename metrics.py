@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Heimdall API Metrics (Prometheus text-file exporter)
+
+Every entry point that talks to Heimdall (setup_campaign_master.py, the web
+app, retool_integration.py, the cleanup/inspection scripts) records into
+one persistent metrics file:
+
+    heimdall_request_duration_seconds   histogram  {config_key, method}
+    heimdall_request_errors_total       counter    {config_key, method, reason}
+    heimdall_request_retries_total      counter    {config_key, method}
+    heimdall_write_conflicts_total      counter    {config_key}
+    heimdall_write_rebases_total        counter    {config_key}
+    heimdall_coalesced_edits_total      counter    {config_key}
+    heimdall_template_bytes             gauge      {config_key}
+    heimdall_config_entries             gauge      {config_key}
+
+Counters and histograms accumulate across runs (state is kept in
+heimdall_metrics.json next to the .prom file); gauges hold the last value
+seen. The .prom file is rewritten atomically after every update, so it can
+be scraped by node_exporter's textfile collector:
+
+    node_exporter --collector.textfile.directory=<metrics dir>
+
+The directory defaults to ./metrics and can be moved with
+CAMPAIGN_METRICS_DIR. Set CAMPAIGN_NO_METRICS=1 to disable recording.
+
+Usage:
+    with metrics.request("STREAK_CONFIG", "GET"):
+        response = http_client().get(url, ...)
+        response.raise_for_status()
+    metrics.observe_template("STREAK_CONFIG", response.json()['value'])
+
+    python3 metrics.py          # p50/p99 per config and current sizes
+"""
+
+import json
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+
+APP_DIR = Path(__file__).parent
+
+METRICS_DIR = os.environ.get('CAMPAIGN_METRICS_DIR', str(APP_DIR / "metrics"))
+STATE_FILE = "heimdall_metrics.json"
+PROM_FILE = "heimdall.prom"
+LOCK_FILE = ".heimdall_metrics.lock"
+
+# Upper bounds in seconds; requests use timeout=30 so the last finite bucket
+# catches everything short of a timeout
+BUCKETS = [0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]
+
+
+def enabled() -> bool:
+    return os.environ.get('CAMPAIGN_NO_METRICS') != '1'
+
+
+def count_entries(config_key: str, value: str, value_obj: Any = None) -> Optional[int]:
+    """
+    Number of entries in a config's value string:
+    - STREAK_BLOCK_TEMPLATE: #if/#elseif conditions
+    - STREAK_JOURNEY_JOB_CONFIG: supported_campaign_ids
+    - everything else: items in "configs"
+
+    Pass value_obj if the value has already been parsed.
+    """
+    if config_key == 'STREAK_BLOCK_TEMPLATE':
+        return value.count('#if(') + value.count('#elseif(')
+
+    if value_obj is None:
+        try:
+            value_obj = json.loads(value)
+        except (json.JSONDecodeError, TypeError):
+            return None
+
+    if not isinstance(value_obj, dict):
+        return len(value_obj) if isinstance(value_obj, list) else None
+    if config_key == 'STREAK_JOURNEY_JOB_CONFIG':
+        return len(value_obj.get('supported_campaign_ids', []))
+    configs = value_obj.get('configs')
+    return len(configs) if isinstance(configs, list) else None
+
+
+def _label_key(*labels: str) -> str:
+    return "|".join(labels)
+
+
+def _empty_state() -> Dict[str, Any]:
+    return {'buckets': BUCKETS, 'requests': {}, 'errors': {}, 'retries': {},
+            'conflicts': {}, 'rebases': {}, 'coalesced': {}, 'template_bytes': {}, 'entries': {}}
+
+
+def _load_state(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, 'r') as f:
+            state = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return _empty_state()
+    if state.get('buckets') != BUCKETS:
+        # Bucket layout changed; old counts can't be re-binned
+        return _empty_state()
+    return state
+
+
+def _write_atomic(path: str, text: str):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def _update(apply):
+    """Load state, apply(state), save it and re-render the .prom file"""
+    if not enabled():
+        return
+    try:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        lock = open(os.path.join(METRICS_DIR, LOCK_FILE), 'w')
+    except OSError:
+        return
+
+    try:
+        try:
+            import fcntl
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        except ImportError:
+            pass  # no flock on this platform; last writer wins
+
+        state_path = os.path.join(METRICS_DIR, STATE_FILE)
+        state = _load_state(state_path)
+        apply(state)
+        state['updated_at'] = time.time()
+        _write_atomic(state_path, json.dumps(state, indent=1))
+        _write_atomic(os.path.join(METRICS_DIR, PROM_FILE), render(state))
+    except OSError:
+        pass  # metrics must never break a run
+    finally:
+        lock.close()
+
+
+def observe_request(config_key: str, method: str, seconds: float, error: Optional[str] = None):
+    """Record one Heimdall call (and its error reason, if it failed)"""
+    def apply(state):
+        series = state['requests'].setdefault(
+            _label_key(config_key, method), {'counts': [0] * (len(BUCKETS) + 1), 'sum': 0.0})
+        index = next((i for i, bound in enumerate(BUCKETS) if seconds <= bound), len(BUCKETS))
+        series['counts'][index] += 1
+        series['sum'] += seconds
+        if error:
+            key = _label_key(config_key, method, error)
+            state['errors'][key] = state['errors'].get(key, 0) + 1
+
+    _update(apply)
+
+
+def count_error(config_key: str, method: str, reason: str):
+    """Count a failure found after the call returned (bad JSON, API error body)"""
+    def apply(state):
+        key = _label_key(config_key, method, reason)
+        state['errors'][key] = state['errors'].get(key, 0) + 1
+
+    _update(apply)
+
+
+def retry(config_key: str, method: str, count: int = 1):
+    """Count retried calls"""
+    def apply(state):
+        key = _label_key(config_key, method)
+        state['retries'][key] = state['retries'].get(key, 0) + count
+
+    _update(apply)
+
+
+def write_conflict(config_key: str):
+    """Count a template that changed between our GET and our POST (optimistic_write.py)"""
+    def apply(state):
+        conflicts = state.setdefault('conflicts', {})
+        conflicts[config_key] = conflicts.get(config_key, 0) + 1
+
+    _update(apply)
+
+
+def rebase(config_key: str):
+    """Count an edit replayed onto a newer version of the template"""
+    def apply(state):
+        rebases = state.setdefault('rebases', {})
+        rebases[config_key] = rebases.get(config_key, 0) + 1
+
+    _update(apply)
+
+
+def coalesced(config_key: str, edits: int):
+    """Count edits that went out in another edit's POST (commit_queue.py)"""
+    def apply(state):
+        counts = state.setdefault('coalesced', {})
+        counts[config_key] = counts.get(config_key, 0) + edits
+
+    _update(apply)
+
+
+def observe_template(config_key: str, value: str, value_obj: Any = None):
+    """Set the size gauges from a config's value string (and its parsed form, if known)"""
+    if not isinstance(value, str):
+        return
+    size = len(value) if value.isascii() else len(value.encode('utf-8'))
+    entries = count_entries(config_key, value, value_obj)
+
+    def apply(state):
+        state['template_bytes'][config_key] = size
+        if entries is not None:
+            state['entries'][config_key] = entries
+
+    _update(apply)
+
+
+def _error_reason(e: BaseException) -> str:
+    status = getattr(getattr(e, 'response', None), 'status_code', None)
+    if status is not None:
+        return f"http_{status}"
+    return type(e).__name__
+
+
+@contextmanager
+def request(config_key: str, method: str):
+    """
+    Time a Heimdall call. An exception raised inside the block is counted
+    as an error (http_<status> for HTTPError, else the exception name) and
+    re-raised.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        observe_request(config_key, method, time.perf_counter() - started, error=_error_reason(e))
+        raise
+    observe_request(config_key, method, time.perf_counter() - started)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names: List[str], key: str, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, key.split("|"))]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}"
+
+
+def render(state: Dict[str, Any]) -> str:
+    """Prometheus text exposition format"""
+    lines = [
+        "# HELP heimdall_request_duration_seconds Heimdall API call latency",
+        "# TYPE heimdall_request_duration_seconds histogram"
+    ]
+    for key in sorted(state['requests']):
+        series = state['requests'][key]
+        cumulative = 0
+        for bound, count in zip(BUCKETS + [None], series['counts']):
+            cumulative += count
+            le = "+Inf" if bound is None else repr(bound)
+            labels = _labels(['config_key', 'method'], key, 'le="' + le + '"')
+            lines.append(f"heimdall_request_duration_seconds_bucket{labels} {cumulative}")
+        lines.append(f"heimdall_request_duration_seconds_sum{_labels(['config_key', 'method'], key)} "
+                     f"{series['sum']:.6f}")
+        lines.append(f"heimdall_request_duration_seconds_count{_labels(['config_key', 'method'], key)} "
+                     f"{cumulative}")
+
+    sections = [
+        ('heimdall_request_errors_total', 'counter', 'Failed Heimdall API calls',
+         'errors', ['config_key', 'method', 'reason']),
+        ('heimdall_request_retries_total', 'counter', 'Retried Heimdall API calls',
+         'retries', ['config_key', 'method']),
+        ('heimdall_write_conflicts_total', 'counter', 'Templates changed by someone else between our GET and POST',
+         'conflicts', ['config_key']),
+        ('heimdall_write_rebases_total', 'counter', 'Edits replayed onto a newer template version',
+         'rebases', ['config_key']),
+        ('heimdall_coalesced_edits_total', 'counter', 'Edits POSTed together with another queued edit of the template',
+         'coalesced', ['config_key']),
+        ('heimdall_template_bytes', 'gauge', 'Size of the config value string in bytes (last seen)',
+         'template_bytes', ['config_key']),
+        ('heimdall_config_entries', 'gauge', 'Entries in the config value (last seen)',
+         'entries', ['config_key'])
+    ]
+    for name, kind, help_text, field, label_names in sections:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        values = state.get(field, {})
+        for key in sorted(values):
+            lines.append(f"{name}{_labels(label_names, key)} {values[key]}")
+
+    if 'updated_at' in state:
+        lines += [
+            "# HELP heimdall_metrics_updated_timestamp_seconds Last time any entry point recorded metrics",
+            "# TYPE heimdall_metrics_updated_timestamp_seconds gauge",
+            f"heimdall_metrics_updated_timestamp_seconds {state['updated_at']:.0f}"
+        ]
+
+    return "\n".join(lines) + "\n"
+
+
+def quantile(counts: List[int], q: float) -> Optional[float]:
+    """Bucket upper bound that contains quantile q (like histogram_quantile, no interpolation)"""
+    total = sum(counts)
+    if not total:
+        return None
+    target = q * total
+    cumulative = 0
+    for bound, count in zip(BUCKETS + [float('inf')], counts):
+        cumulative += count
+        if cumulative >= target:
+            return bound
+    return float('inf')
+
+
+def main():
+    state = _load_state(os.path.join(METRICS_DIR, STATE_FILE))
+    if not state['requests'] and not state['template_bytes']:
+        print(f"No metrics recorded yet in {METRICS_DIR}")
+        return
+
+    print(f"📊 Heimdall metrics ({os.path.join(METRICS_DIR, PROM_FILE)})\n")
+    print(f"  {'config':28} {'method':6} {'calls':>6} {'p50':>7} {'p99':>7} {'errors':>7} {'retries':>8}")
+    for key in sorted(state['requests']):
+        config_key, method = key.split("|")
+        counts = state['requests'][key]['counts']
+        errors = sum(n for k, n in state['errors'].items() if k.startswith(key + "|"))
+        p50, p99 = quantile(counts, 0.5), quantile(counts, 0.99)
+        print(f"  {config_key:28} {method:6} {sum(counts):6} {'≤' + format(p50, 'g') + 's':>7} "
+              f"{'≤' + format(p99, 'g') + 's':>7} {errors:7} {state['retries'].get(key, 0):8}")
+
+    conflicts = state.get('conflicts', {})
+    coalesced_edits = state.get('coalesced', {})
+    if conflicts or coalesced_edits:
+        print(f"\n  {'config':28} {'conflicts':>10} {'rebases':>8} {'coalesced':>10}")
+        for config_key in sorted(set(conflicts) | set(coalesced_edits)):
+            print(f"  {config_key:28} {conflicts.get(config_key, 0):10} "
+                  f"{state.get('rebases', {}).get(config_key, 0):8} {coalesced_edits.get(config_key, 0):10}")
+
+    if state['template_bytes']:
+        print(f"\n  {'config':28} {'bytes':>10} {'entries':>8}")
+        for config_key in sorted(state['template_bytes']):
+            entries = state['entries'].get(config_key, '-')
+            print(f"  {config_key:28} {state['template_bytes'][config_key]:10,} {entries:>8}")
+
+
+if __name__ == "__main__":
+    main()
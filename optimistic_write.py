@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Optimistic-Concurrency Writes (compare before POST, rebase on conflict)
+
+A Heimdall template POST replaces the whole value and there's no
+conditional write, so two read-modify-write runs that overlap (two
+operators, or a batch job) silently drop the first writer's campaigns.
+write_with_rebase() checks before every POST instead:
+
+1. refetch the template
+2. compare it with the base our edit was made on (SHA-256 of the value;
+   updated_at is only reported - a re-save of the same content isn't a
+   conflict)
+3. unchanged: POST. Changed: replay our edit onto the fresh version
+   (a rebase), wait, and go back to 1
+4. give up with WriteConflict after MAX_REBASES rebases
+
+The replay is the caller's: the master re-runs the config's processor on
+the fresh _before.json, retool_integration re-applies
+add_campaign_to_config(). Both are idempotent, so replaying onto a version
+that already has our campaign changes nothing.
+
+Usage:
+    result, stats = optimistic_write.write_with_rebase(
+        'STREAK_CONFIG', base_envelope,
+        refetch=lambda: ...,          # -> current envelope
+        rebase=lambda current: ...,   # replay the edit onto it; False = can't
+        post=lambda: ...)             # POST the pending edit
+    # stats: {'conflicts': 1, 'rebases': 1}
+
+This narrows the lost-update window to the time between the refetch and
+the POST; it can't close it without server support. Conflicts and rebases
+are counted in metrics.py and annotated on the current trace span.
+"""
+
+import hashlib
+import random
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import metrics
+import tracing
+
+
+MAX_REBASES = 3
+
+# Wait before re-checking after a rebase: doubles per attempt (with jitter)
+# so two writers that keep colliding drift apart
+BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 8.0
+
+
+class WriteConflict(Exception):
+    """The template kept changing (or the edit couldn't be replayed); nothing was POSTed"""
+
+
+def value_hash(envelope: Dict[str, Any]) -> str:
+    value = envelope.get('value')
+    text = value if isinstance(value, str) else repr(value)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def same_version(base: Dict[str, Any], current: Dict[str, Any]) -> bool:
+    return value_hash(base) == value_hash(current)
+
+
+def backoff(attempt: int) -> float:
+    """Seconds to wait after the attempt-th rebase (1-based)"""
+    delay = min(BACKOFF_SECONDS * 2 ** (attempt - 1), MAX_BACKOFF_SECONDS)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def write_with_rebase(config_key: str, base: Dict[str, Any],
+                      refetch: Callable[[], Dict[str, Any]],
+                      rebase: Callable[[Dict[str, Any]], bool],
+                      post: Callable[[], Any],
+                      max_rebases: int = MAX_REBASES,
+                      log: Optional[Callable[[str], None]] = print,
+                      sleep: Callable[[float], None] = time.sleep) -> Tuple[Any, Dict[str, int]]:
+    """
+    POST our pending edit of config_key only once a fresh GET still matches
+    the version it was made on, rebasing onto newer versions in between.
+
+    Returns (post()'s result, {'conflicts': n, 'rebases': n}). Raises
+    WriteConflict when the template is still changing after max_rebases
+    rebases or rebase() returns False; refetch/post exceptions propagate.
+    """
+    stats = {'conflicts': 0, 'rebases': 0}
+
+    while True:
+        current = refetch()
+        if same_version(base, current):
+            break
+
+        stats['conflicts'] += 1
+        metrics.write_conflict(config_key)
+        tracing.annotate(conflicts=1)
+        if log:
+            log(f"⚠️  {config_key} changed since it was fetched "
+                f"(updated_at {base.get('updated_at', '?')} → {current.get('updated_at', '?')}, "
+                f"updated_by {current.get('updated_by', '?')})")
+
+        if stats['rebases'] >= max_rebases:
+            metrics.count_error(config_key, 'POST', 'write_conflict')
+            raise WriteConflict(f"{config_key} still changing after {stats['rebases']} rebase(s); "
+                                f"not POSTed")
+
+        if log:
+            log(f"🔁 Rebasing {config_key}: replaying our change onto the current version")
+        if not rebase(current):
+            metrics.count_error(config_key, 'POST', 'rebase_failed')
+            raise WriteConflict(f"Couldn't replay the change onto the current {config_key}; not POSTed")
+        stats['rebases'] += 1
+        metrics.rebase(config_key)
+        tracing.annotate(rebases=1)
+
+        base = current
+        sleep(backoff(stats['rebases']))
+
+    return post(), stats
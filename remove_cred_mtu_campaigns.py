@@ -3,7 +3,6 @@
 Remove 4 unused cred_mtu retention campaigns
 """
 
-import requests
 import json
 import sys
 from typing import Dict, List, Any, Tuple
@@ -154,4 +153,5 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    from campaign_daemon import forward_or_run
+    sys.exit(forward_or_run(__file__, main))
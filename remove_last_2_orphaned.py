@@ -3,7 +3,6 @@
 Remove the last 2 orphaned UUIDs
 """
 
-import requests
 import json
 import sys
 from retool_integration import load_credentials, HeimdalJourneyConfigAPI, parse_value_field
@@ -75,4 +74,5 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    from campaign_daemon import forward_or_run
+    sys.exit(forward_or_run(__file__, main))
@@ -10,10 +10,24 @@ This script integrates with the Heimdall API to update:
 All three are nested keys within a SINGLE config: STREAK_JOURNEY_JOB_CONFIG
 """
 
-import requests
 import json
 import sys
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Callable, Dict, List, Any, Optional, Tuple
+
+import json_backend
+
+
+# Shared requests.Session (set by campaign_daemon.py to keep connections warm).
+# When None, each call uses the plain requests module.
+http_session = None
+
+
+def http_client():
+    """requests.Session if one is shared, otherwise the requests module"""
+    if http_session is not None:
+        return http_session
+    import requests  # deferred to keep startup fast
+    return requests
 
 
 class HeimdalJourneyConfigAPI:
@@ -46,12 +60,19 @@ class HeimdalJourneyConfigAPI:
                 ...
             }
         """
+        import requests  # deferred to keep startup fast
+        import metrics
+        import tracing
+
         url = f"{self.base_url}/{self.config_key}"
 
         try:
-            response = requests.get(url, headers=self.headers, timeout=30)
-            response.raise_for_status()
+            with metrics.request(self.config_key, 'GET'):
+                response = http_client().get(url, headers=self.headers, timeout=30)
+                tracing.annotate(bytes_in=len(response.content))
+                response.raise_for_status()
             data = response.json()
+            metrics.observe_template(self.config_key, data.get('value'))
             return True, data, ""
 
         except requests.exceptions.Timeout:
@@ -73,11 +94,18 @@ class HeimdalJourneyConfigAPI:
         Returns:
             (success: bool, message: str)
         """
+        import requests  # deferred to keep startup fast
+        import metrics
+        import tracing
+
         url = self.base_url
 
         try:
-            response = requests.post(url, headers=self.headers, json=config_data, timeout=30)
-            response.raise_for_status()
+            with metrics.request(self.config_key, 'POST'):
+                response = http_client().post(url, headers=self.headers, json=config_data, timeout=30)
+                tracing.annotate(bytes_out=len(response.request.body or b''), bytes_in=len(response.content))
+                response.raise_for_status()
+            metrics.observe_template(self.config_key, config_data.get('value'))
             return True, "Successfully updated config"
 
         except requests.exceptions.Timeout:
@@ -98,7 +126,7 @@ def parse_value_field(config_data: Dict[str, Any]) -> Tuple[bool, Dict[str, Any]
     """
     try:
         value_str = config_data.get('value', '{}')
-        value_obj = json.loads(value_str)
+        value_obj = json_backend.loads(value_str)
         return True, value_obj, ""
     except json.JSONDecodeError as e:
         return False, {}, f"Failed to parse value field: {str(e)}"
@@ -106,170 +134,101 @@ def parse_value_field(config_data: Dict[str, Any]) -> Tuple[bool, Dict[str, Any]
 
 def check_campaign_exists(campaign_id: str, campaign_name: str,
                           value_obj: Dict[str, Any]) -> Dict[str, bool]:
-    """Check if campaign already exists in any of the nested configs"""
-    exists_in = {
-        'supported_campaigns': False,
-        'batch_assignment': False,
-        'journey_assignment': False
-    }
-
-    # Check in supported_campaign_ids
-    campaign_ids = value_obj.get('supported_campaign_ids', [])
-    if campaign_id in campaign_ids:
-        exists_in['supported_campaigns'] = True
-
-    # Check in batch_assignment_rules
-    batch_rules = value_obj.get('batch_assignment_rules', {})
-    for config in batch_rules.get('configs', []):
-        if config.get('config_key') == campaign_name:
-            exists_in['batch_assignment'] = True
-            break
-
-    # Check in journey_rules
-    journey_rules = value_obj.get('journey_rules', {})
-    for config in journey_rules.get('configs', []):
-        if config.get('config_key') == campaign_name:
-            conditions = config.get('conditions', {})
-            if 'campaign_id' in conditions and conditions['campaign_id'].get('value') == campaign_id:
-                exists_in['journey_assignment'] = True
-                break
-
-    return exists_in
-
-
-def add_campaign_to_config(campaign_name: str, campaign_id: str,
-                           next_campaign: str,
+    """journey_config.check_campaign_exists (imported on first use)"""
+    import journey_config
+    return journey_config.check_campaign_exists(campaign_id, campaign_name, value_obj)
+
+
+def add_campaign_to_config(campaign_name: str, campaign_id: str, next_campaign: str,
                            value_obj: Dict[str, Any]) -> Dict[str, Any]:
+    """journey_config.add_campaign_to_config (imported on first use)"""
+    import journey_config
+    return journey_config.add_campaign_to_config(campaign_name, campaign_id, next_campaign, value_obj)
+
+
+def post_with_rebase(api: HeimdalJourneyConfigAPI, base_config: Dict[str, Any],
+                     payload: Dict[str, Any], apply_edit: Callable[[Dict[str, Any]], Dict[str, Any]],
+                     verbose: bool = True, allow_over_budget: bool = False) -> Tuple[bool, str]:
     """
-    Add campaign to all 3 nested configs
+    POST payload (apply_edit's change on top of base_config) only if the
+    config still matches base_config. If it changed in the meantime,
+    apply_edit is replayed onto the fresh value and checked again, with
+    backoff (optimistic_write.py). Runs under the config's write lock, and
+    other edits queued in this process meanwhile go out in the same POST
+    (commit_queue.py).
+
+    The final payload is checked against config_budgets.json and the live
+    version it replaces just before the POST: over a 'block' budget it
+    isn't POSTed (unless allow_over_budget), 'warn' violations are added
+    to the message.
 
     Args:
-        campaign_name: Campaign name
-        campaign_id: Campaign UUID
-        next_campaign: Next campaign to chain to (or "NA")
-        value_obj: Parsed value object
+        base_config: The config_data the change was made on (unmodified)
+        payload: base_config with the changed value, ready to POST
+        apply_edit: Applies the change to a parsed value object in place
+                    and returns it (add_campaign_to_config is idempotent)
 
     Returns:
-        Modified value_obj
+        (success: bool, message: str)
     """
+    import commit_queue
+    import config_budget
+    import optimistic_write
+    import wire_format
 
-    # 1. Add to supported_campaign_ids
-    campaign_ids = value_obj.get('supported_campaign_ids', [])
-    if campaign_id not in campaign_ids:
-        campaign_ids.append(campaign_id)
-    value_obj['supported_campaign_ids'] = campaign_ids
-
-    # 2. Add to batch_assignment_rules
-    batch_rules = value_obj.get('batch_assignment_rules', {'configs': []})
-    configs = batch_rules.get('configs', [])
-
-    # Check if already exists
-    campaign_exists = any(config.get('config_key') == campaign_name for config in configs)
-
-    if not campaign_exists:
-        # Find insertion point (before "users_removal_streak_assignment")
-        insert_index = next(
-            (i for i, config in enumerate(configs)
-             if config.get('config_key') == 'users_removal_streak_assignment'),
-            len(configs) - 1
-        )
-
-        new_block = {
-            "conditions": {
-                "assign_next_streak_type": {
-                    "type": "STRING",
-                    "operator": "EQ",
-                    "value": campaign_name
-                }
-            },
-            "config_key": campaign_name,
-            "metadata": {
-                "next_eligible_streak_type": campaign_name
-            }
-        }
-
-        configs.insert(insert_index, new_block)
-        batch_rules['configs'] = configs
-        value_obj['batch_assignment_rules'] = batch_rules
-
-    # 3. Add to journey_rules
-    journey_rules = value_obj.get('journey_rules', {'configs': []})
-    configs = journey_rules.get('configs', [])
-
-    # Check if blocks already exist
-    has_initial = any(
-        config.get('config_key') == campaign_name and
-        'assign_next_streak_type' in config.get('conditions', {})
-        for config in configs
-    )
-
-    has_progression = any(
-        config.get('config_key') == campaign_name and
-        'campaign_id' in config.get('conditions', {}) and
-        config['conditions']['campaign_id'].get('value') == campaign_id
-        for config in configs
-    )
-
-    # Add initial assignment block (no NA check - for manual experiments)
-    if not has_initial:
-        initial_block = {
-            "conditions": {
-                "assign_next_streak_type": {
-                    "type": "STRING",
-                    "operator": "EQ",
-                    "value": campaign_name
-                }
-            },
-            "config_key": campaign_name,
-            "metadata": {
-                "next_eligible_streak_type": campaign_name
-            }
-        }
-
-        # Insert before "users_removal_streak_assignment"
-        insert_index = next(
-            (i for i, config in enumerate(configs)
-             if config.get('config_key') == 'users_removal_streak_assignment'),
-            len(configs) // 2
-        )
-
-        configs.insert(insert_index, initial_block)
-
-    # Add progression block
-    if not has_progression:
-        progression_block = {
-            "conditions": {
-                "campaign_id": {
-                    "type": "STRING",
-                    "value": campaign_id,
-                    "operator": "EQ"
-                }
-            },
-            "config_key": campaign_name,
-            "metadata": {
-                "next_eligible_streak_type": next_campaign
-            }
-        }
+    # The version the POST replaces: the last refetch (it matched, or was rebased onto)
+    live = {'version': base_config}
+    warnings = []
 
-        # Insert before "catch_all_condition"
-        insert_index = next(
-            (i for i, config in enumerate(configs)
-             if config.get('config_key') == 'catch_all_condition'),
-            len(configs) - 1
-        )
+    def refetch():
+        success, current, error = api.get_config()
+        if not success:
+            raise RuntimeError(f"Failed to refetch config: {error}")
+        live['version'] = current
+        return current
 
-        configs.insert(insert_index, progression_block)
+    def edit(version):
+        success, value_obj, error = parse_value_field(version)
+        if not success:
+            return None
+        edited = dict(version)
+        edited['value'] = wire_format.edit_value(version['value'], apply_edit(value_obj),
+                                                 api.config_key)
+        edited['updated_by'] = payload.get('updated_by', version.get('updated_by'))
+        return edited
+
+    def post(envelope):
+        violations = config_budget.check_values(api.config_key, live['version'].get('value'), envelope['value'])
+        blocked = [v for v in violations if v['level'] == 'block']
+        if blocked and not allow_over_budget:
+            raise RuntimeError(f"{api.config_key} over its budget in config_budgets.json "
+                               f"({'; '.join(config_budget.format_violation(v) for v in blocked)}); not POSTed")
+        warnings.extend(config_budget.format_violation(v) for v in violations)
+        if verbose:
+            for warning in warnings:
+                print(f"  ⚠️  Budget: {warning}")
+        return api.update_config(envelope)
 
-    journey_rules['configs'] = configs
-    value_obj['journey_rules'] = journey_rules
+    try:
+        (success, message), stats = commit_queue.submit(
+            api.config_key, base_config, payload, edit, refetch,
+            post=post, log=print if verbose else None)
+    except (optimistic_write.WriteConflict, commit_queue.LockTimeout, RuntimeError) as e:
+        return False, str(e)
 
-    return value_obj
+    if success and stats['rebases']:
+        message += f" (rebased onto a newer version {stats['rebases']}x)"
+    if success and stats['coalesced'] > 1:
+        message += f" (together with {stats['coalesced'] - 1} other queued edit(s))"
+    if success and warnings:
+        message += f" (budget: {'; '.join(warnings)})"
+    return success, message
 
 
 def integrate_campaign(campaign_name: str, campaign_id: str,
                        is_chain: bool = False, next_campaign: str = "NA",
                        api: HeimdalJourneyConfigAPI = None,
-                       verbose: bool = True) -> Tuple[bool, str]:
+                       verbose: bool = True, allow_over_budget: bool = False) -> Tuple[bool, str]:
     """
     Main function to integrate campaign into Retool configs
 
@@ -280,10 +239,13 @@ def integrate_campaign(campaign_name: str, campaign_id: str,
         next_campaign: Next campaign name (if is_chain=True)
         api: HeimdalJourneyConfigAPI instance
         verbose: Print detailed output
+        allow_over_budget: POST even over a 'block' budget in config_budgets.json
 
     Returns:
         (success: bool, message: str)
     """
+    from journey_config import MissingAnchor
+    import wire_format
 
     if verbose:
         print("\n" + "="*60)
@@ -345,8 +307,11 @@ def integrate_campaign(campaign_name: str, campaign_id: str,
             print("\n⚙️  Updating configs...")
 
         next_camp = next_campaign if is_chain else "NA"
-        modified_value_obj = add_campaign_to_config(campaign_name, campaign_id,
-                                                     next_camp, value_obj)
+        try:
+            modified_value_obj = add_campaign_to_config(campaign_name, campaign_id,
+                                                         next_camp, value_obj)
+        except MissingAnchor as e:
+            return False, str(e)
 
         if verbose:
             if not exists['supported_campaigns']:
@@ -360,18 +325,22 @@ def integrate_campaign(campaign_name: str, campaign_id: str,
         if verbose:
             print("\n📦 Preparing payload...")
 
-        # Stringify the modified value object
-        modified_value_str = json.dumps(modified_value_obj, indent=2)
-
-        # Update the config_data with new value
-        config_data['value'] = modified_value_str
-        config_data['updated_by'] = "campaign_setup_automation"
+        # Splice the new entries into the original value text (falls back to
+        # the configured wire format if that isn't possible)
+        payload = dict(config_data)
+        payload['value'] = wire_format.edit_value(config_data['value'], modified_value_obj,
+                                                  "STREAK_JOURNEY_JOB_CONFIG")
+        payload['updated_by'] = "campaign_setup_automation"
 
-        # Step 6: POST back to API
+        # Step 6: POST back to API, unless someone changed the config since
+        # step 1 (then our campaign is added to their version first)
         if verbose:
             print("\n📤 Posting updated config to Heimdall...")
 
-        success, message = api.update_config(config_data)
+        success, message = post_with_rebase(
+            api, config_data, payload,
+            lambda value: add_campaign_to_config(campaign_name, campaign_id, next_camp, value),
+            verbose=verbose, allow_over_budget=allow_over_budget)
         if not success:
             return False, f"Failed to update config: {message}"
 
@@ -409,6 +378,8 @@ def main():
     parser.add_argument('--chain', action='store_true', help='Is this a chain streak?')
     parser.add_argument('--next-campaign', default='NA', help='Next campaign name (if chain)')
     parser.add_argument('--test', action='store_true', help='Test mode (fetch only, no POST)')
+    parser.add_argument('--allow-over-budget', action='store_true',
+                        help='POST even if the config exceeds its size/complexity budget in config_budgets.json')
 
     args = parser.parse_args()
 
@@ -462,7 +433,8 @@ def main():
             args.chain,
             args.next_campaign,
             api,
-            verbose=True
+            verbose=True,
+            allow_over_budget=args.allow_over_budget
         )
 
         if success:
@@ -13,6 +13,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 from setup_campaign_master import load_credentials, print_header, print_success, print_error, print_info
 from retool_integration import HeimdalJourneyConfigAPI, parse_value_field
+import metrics
 
 # Campaign details to remove
 CAMPAIGN_NAME = "upi_dormant_140"
@@ -231,8 +232,10 @@ def main():
         ]
 
         try:
-            result = subprocess.run(curl_cmd, capture_output=True, text=True, check=True)
+            with metrics.request(config_key, 'GET'):
+                result = subprocess.run(curl_cmd, capture_output=True, text=True, check=True)
             data = json.loads(result.stdout)
+            metrics.observe_template(config_key, data.get('value'))
             configs_fetched[config_key] = data
             print_success(f"Fetched {config_key}")
         except Exception as e:
@@ -289,7 +292,9 @@ def main():
             ]
 
             try:
-                result = subprocess.run(curl_cmd, capture_output=True, text=True, check=True)
+                with metrics.request(config_key, 'POST'):
+                    result = subprocess.run(curl_cmd, capture_output=True, text=True, check=True)
+                metrics.observe_template(config_key, data.get('value'))
                 print_success(f"✓ Posted {config_key}")
             except Exception as e:
                 print_error(f"✗ Failed to post {config_key}: {e}")
@@ -31,61 +31,16 @@ Example:
         50
 """
 
-import json
+import os
 import sys
 
-
-# Standard search.data array used across all configs
-STANDARD_SEARCH_DATA = [
-    {
-        "text": "pay to",
-        "right_asset": {
-            "url": "https://d704ayip06922.cloudfront.net/prod-rewards-assets-data/6b23258061e311eeaa853f670a0e3012.svg",
-            "type": "svg",
-            "aspect_ratio": 1
-        }
-    },
-    {
-        "text": "pay to",
-        "right_asset": {
-            "url": "https://d704ayip06922.cloudfront.net/prod-rewards-assets-data/6325b4b061e311eeaa853f670a0e3012.svg",
-            "type": "svg",
-            "aspect_ratio": 1
-        }
-    },
-    {
-        "text": "pay to",
-        "right_asset": {
-            "url": "https://d704ayip06922.cloudfront.net/prod-rewards-assets-data/5c5c08f061e311eeaa853f670a0e3012.svg",
-            "type": "svg",
-            "aspect_ratio": 1
-        }
-    },
-    {
-        "text": "pay to",
-        "right_asset": {
-            "url": "https://d704ayip06922.cloudfront.net/prod-rewards-assets-data/4ab46e30629211eea0ed0bd74220cbfb.png",
-            "type": "image",
-            "aspect_ratio": 1
-        }
-    },
-    {
-        "text": "pay via",
-        "right_asset": {
-            "url": "https://d704ayip06922.cloudfront.net/prod-rewards-assets-data/eb8447a0627311eebf66138229c45306.svg",
-            "type": "svg",
-            "aspect_ratio": 1.823
-        }
-    },
-    {
-        "text": "pay to contacts",
-        "right_asset": None
-    },
-    {
-        "text": "pay to phone number",
-        "right_asset": None
-    }
-]
+# wire_format.py, json_backend.py and carousel_configs.py live in the app directory, one level up
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+import wire_format
+import json_backend
+import carousel_configs
 
 
 def find_insertion_index(configs):
@@ -104,135 +59,25 @@ def find_insertion_index(configs):
     return len(configs)
 
 
-def create_initial_config(campaign_name, campaign_type, duration_days, total_offer, max_allowed):
+def find_campaign_configs(configs, campaign_name):
     """
-    Create _0 config (initial state, no transactions yet).
+    Index this campaign's existing entries (config_key -> index) in one pass.
 
-    KEY DIFFERENCE from SCAN_HOMEPAGE_CONFIG:
-    - Has BOTH text array AND streak_text field
-    """
-    return {
-        "config_key": f"{campaign_name}_0",
-        "uas_attributes": [
-            {
-                "attribute": {
-                    "namespace": "heimdall",
-                    "name": "heimdall.dynamic_attributes.streak_type"
-                },
-                "type": "STRING",
-                "operator": "IN",
-                "value": [campaign_name]
-            }
-        ],
-        "conditions": {
-            "type": {
-                "type": "STRING",
-                "operator": "EQ",
-                "value": campaign_type
-            },
-            "status": {
-                "type": "STRING",
-                "operator": "IN",
-                "value": ["IN_PROGRESS", "ELIGIBLE"]
-            }
-        },
-        "metadata": {
-            "cta": {
-                "asset": {
-                    "url": "https://d2tecn3vwkchpd.cloudfront.net/fabrik/patterns/snp_gallery_icon.svg",
-                    "type": "svg"
-                },
-                "type": "DEEPLINK",
-                "action": "cred://app/launch?target=scan_pay&source=p2p_home_screen"
-            },
-            "carousel": {
-                "duration": 2000,
-                "interval": 2000,
-                "turns": 8,
-                "timer_threshold": 172800000,
-                "streak_text": "ENDS IN <expiry_timer>",
-                "text": [
-                    f"<format>assured <icon>INR</icon>{total_offer} cashback on {max_allowed} UPI payments</format>",
-                    f"<format>offer expires in {duration_days} days</format>"
-                ]
-            },
-            "search": {
-                "data": STANDARD_SEARCH_DATA,
-                "interval": 1000,
-                "turns": 15
-            },
-            "config": {
-                "show_streak": True,
-                "forward_streak_data": True,
-                "forward_offer_nudge_data": True
-            }
-        }
-    }
-
-
-def create_inprogress_config(campaign_name, campaign_type, max_allowed, per_txn_reward):
-    """
-    Create _1_X config (in-progress state, 1+ transactions completed).
+    Matches the keys this script generates: <name>, <name>_0 and <name>_1_<N>,
+    so reruns (or a changed max_allowed) can replace them instead of
+    inserting duplicates.
     """
-    return {
-        "config_key": f"{campaign_name}_1_{max_allowed}",
-        "uas_attributes": [
-            {
-                "attribute": {
-                    "namespace": "heimdall",
-                    "name": "heimdall.dynamic_attributes.streak_type"
-                },
-                "type": "STRING",
-                "operator": "IN",
-                "value": [campaign_name]
-            }
-        ],
-        "conditions": {
-            "type": {
-                "type": "STRING",
-                "operator": "EQ",
-                "value": campaign_type
-            },
-            "status": {
-                "type": "STRING",
-                "operator": "IN",
-                "value": ["IN_PROGRESS", "ELIGIBLE"]
-            },
-            "completed": {
-                "type": "NUMBER",
-                "operator": "GTE",
-                "value": 1
-            }
-        },
-        "metadata": {
-            "cta": {
-                "asset": {
-                    "url": "https://d2tecn3vwkchpd.cloudfront.net/fabrik/patterns/snp_gallery_icon.svg",
-                    "type": "svg"
-                },
-                "type": "DEEPLINK",
-                "action": "cred://app/launch?target=scan_pay&source=p2p_home_screen"
-            },
-            "carousel": {
-                "duration": 2000,
-                "interval": 2000,
-                "turns": 8,
-                "timer_threshold": 172800000,
-                "streak_text": "ENDS IN <expiry_timer>",
-                "offer_text": f"<format>assured <icon>INR</icon>{per_txn_reward} cashback on next UPI payment</format>"
-            },
-            "search": {
-                "data": STANDARD_SEARCH_DATA,
-                "interval": 1000,
-                "turns": 15
-            },
-            "config": {
-                "show_streak": True,
-                "forward_streak_data": True,
-                "forward_offer_nudge_data": True
-            }
-        }
-    }
+    prefix = f"{campaign_name}_"
+    found = {}
+    for i, config in enumerate(configs):
+        key = config.get('config_key')
+        if not isinstance(key, str):
+            continue
+        suffix = key[len(prefix):] if key.startswith(prefix) else None
+        if key == campaign_name or suffix == '0' or (
+                suffix and suffix.startswith('1_') and suffix[2:].isdigit()):
+            found.setdefault(key, i)
+    return found
 
 
 def main():
@@ -251,7 +96,7 @@ def main():
     total_offer = int(sys.argv[9])
 
     # Validate campaign type
-    if campaign_type not in ['UPI', 'P2P']:
+    if campaign_type not in carousel_configs.PTP_CAMPAIGN_TYPES:
         print(f"ERROR: PTP_STREAK_CONFIG only supports UPI and P2P campaigns!")
         print(f"       Campaign type '{campaign_type}' is not supported.")
         print(f"       SNP campaigns should skip this config.")
@@ -259,14 +104,18 @@ def main():
 
     # Read original config
     with open(before_json_path, 'r') as f:
-        data = json.load(f)
+        data = json_backend.load(f)
 
     # Unescape value
     value_str = data['value']
-    value_unescaped = json.loads(value_str)
+    value_unescaped = json_backend.loads(value_str)
+
+    # This campaign's entries from an earlier run, if any
+    configs = value_unescaped['configs']
+    existing = find_campaign_configs(configs, campaign_name)
 
     # Find insertion index
-    insertion_idx = find_insertion_index(value_unescaped['configs'])
+    insertion_idx = find_insertion_index(configs)
 
     print(f"Processing PTP_STREAK_CONFIG for: {campaign_name}")
     print(f"  Campaign type: {campaign_type}")
@@ -277,27 +126,42 @@ def main():
     # Create new configs (always 2 for UPI/P2P campaigns)
     print(f"  Creating 2 configs: {campaign_name}_0 and {campaign_name}_1_{max_allowed}")
 
-    new_configs = [
-        create_initial_config(campaign_name, campaign_type, duration_days, total_offer, max_allowed),
-        create_inprogress_config(campaign_name, campaign_type, max_allowed, per_txn_reward)
-    ]
-
-    # Insert at correct position
-    for i, new_config in enumerate(new_configs):
-        value_unescaped['configs'].insert(insertion_idx + i, new_config)
+    params = carousel_configs.campaign_params(campaign_name, campaign_type, duration_days,
+                                              max_allowed, per_txn_reward, total_offer)
+    new_configs = carousel_configs.build_entries('PTP_STREAK_CONFIG', params)
+
+    new_keys = [c['config_key'] for c in new_configs]
+    if existing and sorted(existing) == sorted(new_keys):
+        # Rerun with the same shape: replace in place (byte-identical output)
+        for new_config in new_configs:
+            configs[existing[new_config['config_key']]] = new_config
+        print(f"  ✓ Already present - replaced {len(new_configs)} existing config(s) in place")
+    else:
+        # Shape changed (e.g. new max_allowed): drop old entries, insert fresh
+        stale = sorted(existing.values(), reverse=True)
+        for i in stale:
+            print(f"  Removing stale config from earlier run: {configs[i]['config_key']}")
+            del configs[i]
+        if stale:
+            insertion_idx = find_insertion_index(configs)
+            print(f"  Insertion index after removal: {insertion_idx}")
+
+        # Insert at correct position
+        for i, new_config in enumerate(new_configs):
+            configs.insert(insertion_idx + i, new_config)
 
     # Save unescaped version
     with open(after_unescaped_path, 'w') as f:
-        json.dump(value_unescaped, f, indent=2)
+        json_backend.dump(value_unescaped, f, indent=2)
 
     print(f"  ✓ Saved unescaped: {after_unescaped_path}")
 
     # Re-escape value
-    data['value'] = json.dumps(value_unescaped, separators=(',', ':')).replace('\n', '\\r\\n')
+    data['value'] = wire_format.edit_value(value_str, value_unescaped, 'PTP_STREAK_CONFIG')
 
     # Save final version
     with open(after_json_path, 'w') as f:
-        json.dump(data, f, indent=2)
+        json_backend.dump(data, f, indent=2)
 
     print(f"  ✓ Saved escaped: {after_json_path}")
     print(f"  ✓ Total configs: {len(value_unescaped['configs'])}")
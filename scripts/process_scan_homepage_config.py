@@ -28,9 +28,16 @@ Example:
         50
 """
 
-import json
+import os
 import sys
-import copy
+
+# wire_format.py, json_backend.py and carousel_configs.py live in the app directory, one level up
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+import wire_format
+import json_backend
+import carousel_configs
 
 
 def find_insertion_index(configs):
@@ -58,223 +65,25 @@ def find_insertion_index(configs):
     return len(configs)
 
 
-def create_initial_config(campaign_name, campaign_type, duration_days, total_offer, max_allowed):
-    """
-    Create _0 config (initial state, no transactions yet).
+def find_campaign_configs(configs, campaign_name):
     """
-    return {
-        "config_key": f"{campaign_name}_0",
-        "uas_attributes": [
-            {
-                "attribute": {
-                    "namespace": "heimdall",
-                    "name": "heimdall.dynamic_attributes.streak_type"
-                },
-                "type": "STRING",
-                "operator": "IN",
-                "value": [campaign_name]
-            }
-        ],
-        "conditions": {
-            "type": {
-                "type": "STRING",
-                "operator": "EQ",
-                "value": campaign_type
-            },
-            "status": {
-                "type": "STRING",
-                "operator": "IN",
-                "value": ["IN_PROGRESS", "ELIGIBLE"]
-            }
-        },
-        "metadata": {
-            "carousel": {
-                "duration": 2000,
-                "interval": 2000,
-                "turns": 8,
-                "timer_threshold": 172800000,
-                "text": [
-                    f"<format>assured cashback of <icon>INR</icon>{total_offer} on next {max_allowed} payments</format>",
-                    f"offer expires in {duration_days} days"
-                ],
-                "timer_prefix_asset": {}
-            },
-            "search": {
-                "left_asset": {
-                    "url": "https://d2tecn3vwkchpd.cloudfront.net/fabrik/patterns/search_icon",
-                    "type": "svg"
-                },
-                "text": "<format>search & pay contacts</format>",
-                "border_animation_count": 2,
-                "cta": {
-                    "type": "p2p_home",
-                    "additional_info": {
-                        "search_phone_num_keyboard": True,
-                        "headers": {},
-                        "offer_nudge": {
-                            "asset": {}
-                        }
-                    }
-                },
-                "right_asset": {
-                    "asset": {}
-                }
-            },
-            "config": {
-                "show_streak": True,
-                "forward_streak_data": True,
-                "forward_offer_nudge_data": True
-            },
-            "cta": {}
-        }
-    }
+    Index this campaign's existing entries (config_key -> index) in one pass.
 
-
-def create_inprogress_config(campaign_name, campaign_type, max_allowed, per_txn_reward):
-    """
-    Create _1_X config (in-progress state, 1+ transactions completed).
+    Matches the keys this script generates: <name>, <name>_0 and <name>_1_<N>,
+    so reruns (or a changed max_allowed) can replace them instead of
+    inserting duplicates.
     """
-    # Campaign-type aware copy
-    payment_text = "scan & pay" if campaign_type == "SNP" else "UPI payment"
-
-    return {
-        "config_key": f"{campaign_name}_1_{max_allowed}",
-        "uas_attributes": [
-            {
-                "attribute": {
-                    "namespace": "heimdall",
-                    "name": "heimdall.dynamic_attributes.streak_type"
-                },
-                "type": "STRING",
-                "operator": "IN",
-                "value": [campaign_name]
-            }
-        ],
-        "conditions": {
-            "type": {
-                "type": "STRING",
-                "operator": "EQ",
-                "value": campaign_type
-            },
-            "status": {
-                "type": "STRING",
-                "operator": "IN",
-                "value": ["IN_PROGRESS", "ELIGIBLE"]
-            },
-            "completed": {
-                "type": "NUMBER",
-                "operator": "GTE",
-                "value": 1
-            }
-        },
-        "metadata": {
-            "carousel": {
-                "duration": 2000,
-                "interval": 2000,
-                "turns": 8,
-                "timer_threshold": 172800000,
-                "streak_text": "ends in <expiry_timer>",
-                "offer_text": f"<format>assured <icon>INR</icon>{per_txn_reward} cashback on next {payment_text}</format>"
-            },
-            "search": {
-                "left_asset": {
-                    "url": "https://d2tecn3vwkchpd.cloudfront.net/fabrik/patterns/search_icon",
-                    "type": "svg"
-                },
-                "text": "<format>search & pay contacts</format>",
-                "right_asset": {
-                    "text": "CASHBACK"
-                },
-                "border_animation_count": 2,
-                "cta": {
-                    "type": "p2p_home",
-                    "additional_info": {
-                        "search_phone_num_keyboard": True
-                    }
-                }
-            },
-            "config": {
-                "show_streak": True,
-                "forward_streak_data": True,
-                "forward_offer_nudge_data": False
-            }
-        }
-    }
-
-
-def create_single_config(campaign_name, campaign_type, duration_days, per_txn_reward):
-    """
-    Create single config (no suffix) for max_allowed = 1 campaigns.
-    """
-    # Campaign-type aware copy
-    payment_text = "scan & pay" if campaign_type == "SNP" else "UPI payment"
-
-    return {
-        "config_key": campaign_name,
-        "uas_attributes": [
-            {
-                "attribute": {
-                    "namespace": "heimdall",
-                    "name": "heimdall.dynamic_attributes.streak_type"
-                },
-                "type": "STRING",
-                "operator": "IN",
-                "value": [campaign_name]
-            }
-        ],
-        "conditions": {
-            "type": {
-                "type": "STRING",
-                "operator": "EQ",
-                "value": "UPI"  # Single txn campaigns use UPI type
-            },
-            "status": {
-                "type": "STRING",
-                "operator": "IN",
-                "value": ["IN_PROGRESS", "ELIGIBLE"]
-            }
-        },
-        "metadata": {
-            "carousel": {
-                "duration": 2000,
-                "interval": 2000,
-                "turns": 8,
-                "timer_threshold": 172800000,
-                "text": [
-                    f"<format>assured <icon>INR</icon> {per_txn_reward} cashback on next {payment_text}</format>",
-                    f"offer expires in {duration_days} days"
-                ],
-                "timer_prefix_asset": {}
-            },
-            "search": {
-                "left_asset": {
-                    "url": "https://d2tecn3vwkchpd.cloudfront.net/fabrik/patterns/search_icon",
-                    "type": "svg"
-                },
-                "text": "<format>search & pay contacts</format>",
-                "border_animation_count": 2,
-                "cta": {
-                    "type": "p2p_home",
-                    "additional_info": {
-                        "search_phone_num_keyboard": True,
-                        "headers": {},
-                        "offer_nudge": {
-                            "asset": {}
-                        }
-                    }
-                },
-                "right_asset": {
-                    "asset": {}
-                }
-            },
-            "config": {
-                "show_streak": True,
-                "forward_streak_data": True,
-                "forward_offer_nudge_data": True
-            },
-            "cta": {}
-        }
-    }
+    prefix = f"{campaign_name}_"
+    found = {}
+    for i, config in enumerate(configs):
+        key = config.get('config_key')
+        if not isinstance(key, str):
+            continue
+        suffix = key[len(prefix):] if key.startswith(prefix) else None
+        if key == campaign_name or suffix == '0' or (
+                suffix and suffix.startswith('1_') and suffix[2:].isdigit()):
+            found.setdefault(key, i)
+    return found
 
 
 def main():
@@ -294,14 +103,18 @@ def main():
 
     # Read original config
     with open(before_json_path, 'r') as f:
-        data = json.load(f)
+        data = json_backend.load(f)
 
     # Unescape value
     value_str = data['value']
-    value_unescaped = json.loads(value_str)
+    value_unescaped = json_backend.loads(value_str)
+
+    # This campaign's entries from an earlier run, if any
+    configs = value_unescaped['configs']
+    existing = find_campaign_configs(configs, campaign_name)
 
     # Find insertion index
-    insertion_idx = find_insertion_index(value_unescaped['configs'])
+    insertion_idx = find_insertion_index(configs)
 
     print(f"Processing SCAN_HOMEPAGE_CONFIG for: {campaign_name}")
     print(f"  Campaign type: {campaign_type}")
@@ -309,35 +122,47 @@ def main():
     print(f"  Max allowed: {max_allowed}")
     print(f"  Insertion index: {insertion_idx}")
 
-    # Create new configs based on max_allowed
-    new_configs = []
-
+    # Create new configs based on max_allowed (a single config when it's 1)
+    params = carousel_configs.campaign_params(campaign_name, campaign_type, duration_days,
+                                              max_allowed, per_txn_reward, total_offer)
+    new_configs = carousel_configs.build_entries('SCAN_HOMEPAGE_CONFIG', params)
     if max_allowed == 1:
-        # Single transaction campaign
         print(f"  Creating single config: {campaign_name}")
-        new_configs.append(create_single_config(campaign_name, campaign_type, duration_days, per_txn_reward))
     else:
-        # Multi-transaction campaign
         print(f"  Creating 2 configs: {campaign_name}_0 and {campaign_name}_1_{max_allowed}")
-        new_configs.append(create_initial_config(campaign_name, campaign_type, duration_days, total_offer, max_allowed))
-        new_configs.append(create_inprogress_config(campaign_name, campaign_type, max_allowed, per_txn_reward))
 
-    # Insert at correct position
-    for i, new_config in enumerate(new_configs):
-        value_unescaped['configs'].insert(insertion_idx + i, new_config)
+    new_keys = [c['config_key'] for c in new_configs]
+    if existing and sorted(existing) == sorted(new_keys):
+        # Rerun with the same shape: replace in place (byte-identical output)
+        for new_config in new_configs:
+            configs[existing[new_config['config_key']]] = new_config
+        print(f"  ✓ Already present - replaced {len(new_configs)} existing config(s) in place")
+    else:
+        # Shape changed (e.g. new max_allowed): drop old entries, insert fresh
+        stale = sorted(existing.values(), reverse=True)
+        for i in stale:
+            print(f"  Removing stale config from earlier run: {configs[i]['config_key']}")
+            del configs[i]
+        if stale:
+            insertion_idx = find_insertion_index(configs)
+            print(f"  Insertion index after removal: {insertion_idx}")
+
+        # Insert at correct position
+        for i, new_config in enumerate(new_configs):
+            configs.insert(insertion_idx + i, new_config)
 
     # Save unescaped version
     with open(after_unescaped_path, 'w') as f:
-        json.dump(value_unescaped, f, indent=2)
+        json_backend.dump(value_unescaped, f, indent=2)
 
     print(f"  ✓ Saved unescaped: {after_unescaped_path}")
 
     # Re-escape value
-    data['value'] = json.dumps(value_unescaped, separators=(',', ':')).replace('\n', '\\r\\n')
+    data['value'] = wire_format.edit_value(value_str, value_unescaped, 'SCAN_HOMEPAGE_CONFIG')
 
     # Save final version
     with open(after_json_path, 'w') as f:
-        json.dump(data, f, indent=2)
+        json_backend.dump(data, f, indent=2)
 
     print(f"  ✓ Saved escaped: {after_json_path}")
     print(f"  ✓ Total configs: {len(value_unescaped['configs'])}")
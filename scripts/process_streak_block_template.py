@@ -3,13 +3,20 @@
 Process STREAK_BLOCK_TEMPLATE - Add campaign to Velocity template
 This is a VELOCITY TEMPLATE, not JSON. We modify it as a string.
 """
-import json
+import os
 import sys
 import re
 
+# json_backend.py lives in the app directory, one level up
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+import json_backend
+import velocity_template
+
 # Read the backup file (full GET response with all metadata)
 with open(sys.argv[1], 'r') as f:
-    full_response = json.load(f)
+    full_response = json_backend.load(f)
 
 # The value field is already a string containing a Velocity template with \r\n
 # We just work with it as a string (it's not JSON, it's Velocity template syntax)
@@ -35,22 +42,38 @@ print()
 # Case A: Banner URL EXISTS → Add campaign to existing condition
 # Case B: Banner URL is NEW → Add new #elseif block BEFORE #else
 
-banner_pattern = re.escape(banner_url)
-banner_condition_pattern = rf'(#elseif\([^)]*\))\s*"url":\s*"{banner_pattern}"'
-
-match = re.search(banner_condition_pattern, template)
-if match:
+# Banner branches of the asset chain, whether its conditions are || chains
+# or compacted into a campaign list (velocity_template.compact_conditions)
+banners = [branch for branch in velocity_template.banner_branches(template) if branch['kind'] == 'elseif']
+
+# Is this campaign already mapped to a banner (possibly a different one)?
+existing_banner = next((branch for branch in banners if campaign_id in branch['ids']), None)
+
+match = next((branch for branch in banners if branch['url'] == banner_url), None)
+if existing_banner and existing_banner['url'] != banner_url:
+    # Velocity uses the first matching #elseif, so adding the campaign to a
+    # second banner would be a dead clause - leave the existing mapping alone
+    print(f"⚠ WARNING: Campaign {campaign_id} is already mapped to another banner:")
+    print(f"  {existing_banner['url']}")
+    print(f"  Skipping banner modification to avoid a duplicate condition.")
+elif match:
     # Case A: Banner URL exists, add to existing condition
-    old_condition = match.group(1)
+    old_condition = template[match['start']:match['condition'][1] + 1]
 
     # Check if our campaign is already in the condition
-    if f'$!campaign_id == "{campaign_id}"' in old_condition:
+    if campaign_id in match['ids']:
         print(f"⚠ WARNING: Campaign {campaign_id} already exists in banner condition!")
         print(f"  Skipping banner modification to avoid duplicate.")
+    elif match['list']:
+        # Compacted condition: the campaign joins the banner's campaign list
+        template = velocity_template.add_campaign(template, match, campaign_id)
+        print(f"✓ Case A: Added campaign to the banner's campaign list ${match['list']}")
+        print(f"  Condition: {old_condition}")
+        print("  ⚠ Note: This banner URL is shared with other campaigns")
     else:
         # Add our campaign to the condition with ||
+        template = velocity_template.add_campaign(template, match, campaign_id)
         new_condition = old_condition.rstrip(')') + f' || $!campaign_id == "{campaign_id}")'
-        template = template.replace(old_condition, new_condition, 1)
         print(f"✓ Case A: Added campaign to existing banner condition")
         print(f"  Old: {old_condition}")
         print(f"  New: {new_condition}")
@@ -60,16 +83,16 @@ else:
     print(f"✓ Case B: Banner URL is NEW, adding new condition block")
 
     # Find the #else block in banner section (before "type": "image")
-    banner_else_pattern = r'(#elseif\(\$!campaign_id[^#]+)\s+(#else\s+"url":)'
-    banner_match = re.search(banner_else_pattern, template)
+    banner_else = next((branch for branch in velocity_template.banner_branches(template)
+                        if branch['kind'] == 'else'), None)
 
-    if banner_match:
+    if banner_else:
         # Insert new #elseif block before #else
         new_banner_block = f'''              #elseif($!campaign_id == "{campaign_id}")
               "url": "{banner_url}",
               '''
 
-        insertion_point = banner_match.start(2)
+        insertion_point = banner_else['start']
         template = template[:insertion_point] + new_banner_block + template[insertion_point:]
         print(f"  Added new banner condition for campaign {campaign_id}")
         print(f"  URL: {banner_url}")
@@ -103,8 +126,21 @@ new_bottom_sheet_block = f'''          #elseif($!campaign_id == "{campaign_id}")
 # Look for the last #end followed by whitespace before #else
 default_bottom_sheet_pattern = r'(#end\s+)(#else\s+#if\(\$streak_item\.status)'
 
+# An existing block for this campaign (from an earlier run) is replaced in place
+existing_bottom_sheet_pattern = (
+    rf'#elseif\(\$!campaign_id == "{re.escape(campaign_id)}"\)\s*'
+    r'#if\(\$streak_item\.status.*?"bottom_sheet".*?#end'
+)
+existing_block = re.search(existing_bottom_sheet_pattern, template, re.DOTALL)
+
 match = re.search(default_bottom_sheet_pattern, template)
-if match:
+if existing_block:
+    # Keep the existing indentation in front of #elseif
+    template = template[:existing_block.start()] + new_bottom_sheet_block.lstrip(' ') + template[existing_block.end():]
+    print(f"✓ Replaced existing bottom_sheet block for campaign {campaign_id}")
+    print(f"  Title: {bottom_sheet_title}")
+    print(f"  Subtitle: {bottom_sheet_subtitle}")
+elif match:
     # Insert between the #end and #else
     insertion_point = match.start(2)
     template = template[:insertion_point] + new_bottom_sheet_block + '\r\n          ' + template[insertion_point:]
@@ -132,7 +168,7 @@ full_response['value'] = template
 
 # Save the FULL response with ALL metadata fields for POST
 with open(sys.argv[3], 'w') as f:
-    json.dump(full_response, f, indent=2)
+    json_backend.dump(full_response, f, indent=2)
 
 print("✓ Processed STREAK_BLOCK_TEMPLATE")
 print(f"✓ Added campaign_id: {campaign_id}")
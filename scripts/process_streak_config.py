@@ -2,15 +2,22 @@
 """
 Process STREAK_CONFIG - Add new campaign before the fallback config
 """
-import json
+import os
 import sys
 
+# wire_format.py and json_backend.py live in the app directory, one level up
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+import wire_format
+import json_backend
+
 # Read the backup file (full GET response with all metadata)
 with open(sys.argv[1], 'r') as f:
-    full_response = json.load(f)
+    full_response = json_backend.load(f)
 
 # Unescape the value field
-value_unescaped = json.loads(full_response['value'])
+value_unescaped = json_backend.loads(full_response['value'])
 
 # Campaign details from command line args
 campaign_id = sys.argv[4]
@@ -33,23 +40,38 @@ new_campaign = {
     }
 }
 
-# IMPORTANT: Insert BEFORE the last config (empty conditions fallback)
-# The last config should always remain at the end
-value_unescaped['configs'].insert(-1, new_campaign)
+# Index existing entries by campaign_id in one pass, so reruns replace the
+# existing block instead of inserting a duplicate
+configs = value_unescaped['configs']
+existing = {}
+for i, c in enumerate(configs):
+    existing_id = c.get('conditions', {}).get('campaign_id', {}).get('value')
+    if isinstance(existing_id, str):
+        existing.setdefault(existing_id, i)
+
+if campaign_id in existing:
+    action = "Replaced existing" if configs[existing[campaign_id]] != new_campaign else "Unchanged (already present)"
+    configs[existing[campaign_id]] = new_campaign
+else:
+    action = "Added"
+    # IMPORTANT: Insert BEFORE the last config (empty conditions fallback)
+    # The last config should always remain at the end
+    configs.insert(-1, new_campaign)
 
 # Save unescaped version for comparison
 with open(sys.argv[2], 'w') as f:
-    json.dump(value_unescaped, f, indent=2)
+    json_backend.dump(value_unescaped, f, indent=2)
 
 # Escape back for POST
-full_response['value'] = json.dumps(value_unescaped, indent=2).replace('\n', '\r\n')
+full_response['value'] = wire_format.edit_value(full_response['value'], value_unescaped, 'STREAK_CONFIG')
 
 # Save the FULL response with ALL metadata fields for POST
 with open(sys.argv[3], 'w') as f:
-    json.dump(full_response, f, indent=2)
+    json_backend.dump(full_response, f, indent=2)
 
 print("✓ Processed STREAK_CONFIG")
-print(f"✓ Added campaign_id: {campaign_id}")
-print(f"✓ Inserted before fallback config (empty conditions)")
+print(f"✓ {action} campaign_id: {campaign_id}")
+if action == "Added":
+    print(f"✓ Inserted before fallback config (empty conditions)")
 print(f"✓ show_actual_reward_text: true (newer campaign pattern)")
 print(f"✓ Preserved metadata: created_by={full_response.get('created_by')}, updated_by={full_response.get('updated_by')}")
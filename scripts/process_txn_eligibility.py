@@ -2,15 +2,22 @@
 """
 Process STREAK_TXN_ELIGIBILITY - Add new campaign
 """
-import json
+import os
 import sys
 
+# wire_format.py and json_backend.py live in the app directory, one level up
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+import wire_format
+import json_backend
+
 # Read the backup file (full GET response with all metadata)
 with open(sys.argv[1], 'r') as f:
-    full_response = json.load(f)
+    full_response = json_backend.load(f)
 
 # Unescape the value field
-value_unescaped = json.loads(full_response['value'])
+value_unescaped = json_backend.loads(full_response['value'])
 
 # Campaign details from command line args
 campaign_name = sys.argv[4]
@@ -60,20 +67,32 @@ new_campaign = {
     }
 }
 
-value_unescaped['configs'].append(new_campaign)
+# Index existing campaigns by config_key in one pass, so reruns replace the
+# existing block instead of appending a duplicate
+configs = value_unescaped['configs']
+existing = {}
+for i, c in enumerate(configs):
+    existing.setdefault(c.get('config_key'), i)
+
+if campaign_name in existing:
+    action = "Replaced existing" if configs[existing[campaign_name]] != new_campaign else "Unchanged (already present)"
+    configs[existing[campaign_name]] = new_campaign
+else:
+    action = "Added"
+    configs.append(new_campaign)
 
 # Save unescaped version for comparison
 with open(sys.argv[2], 'w') as f:
-    json.dump(value_unescaped, f, indent=2)
+    json_backend.dump(value_unescaped, f, indent=2)
 
 # Escape back for POST
-full_response['value'] = json.dumps(value_unescaped, indent=2).replace('\n', '\r\n')
+full_response['value'] = wire_format.edit_value(full_response['value'], value_unescaped, 'STREAK_TXN_ELIGIBILITY')
 
 # Save the FULL response with ALL metadata fields for POST
 with open(sys.argv[3], 'w') as f:
-    json.dump(full_response, f, indent=2)
+    json_backend.dump(full_response, f, indent=2)
 
 print("✓ Processed STREAK_TXN_ELIGIBILITY")
-print(f"✓ Added campaign: {campaign_name}")
+print(f"✓ {action} campaign: {campaign_name}")
 print(f"✓ Type: {campaign_type}, flow_type: {flow_type}, min_amount: {min_amount}")
 print(f"✓ Preserved metadata: created_by={full_response.get('created_by')}, updated_by={full_response.get('updated_by')}")
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Checkpoint Journal for Session Folders
+
+Write-ahead log of pipeline stages (fetch, process, post, verify) kept as
+journal.jsonl inside each backups/<date>_<campaign> folder. Every stage is
+recorded as "started" before it runs and "done" (with content hashes) after
+it succeeds, so an interrupted run can be resumed with:
+
+    python3 setup_campaign_master.py --resume <session_folder>
+
+On resume a stage is skipped only if its last "done" record is still valid:
+- fetch:   _before.json still has the hash recorded at fetch time
+- process: same _before.json, same campaign inputs, same processor script
+           and first-party modules it imports, and _after.json unchanged
+           since processing
+- post:    the _after.json on disk is exactly what was posted
+
+A "started" record without a matching "done" means the stage was cut off
+and is redone.
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+
+JOURNAL_FILE = "journal.jsonl"
+
+# Input fields that are never written to the journal
+SECRET_FIELDS = {'userid', 'apikey'}
+
+
+def file_hash(file_path: str) -> Optional[str]:
+    """SHA-256 of a file's bytes, or None if it doesn't exist"""
+    import hashlib
+
+    if not os.path.exists(file_path):
+        return None
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_hash(script_path: str, module_dir: str) -> Optional[str]:
+    """
+    SHA-256 of a script and of every first-party module (a .py file in
+    module_dir) it imports, directly or through another such module; None
+    if the script doesn't exist
+    """
+    import ast
+    import hashlib
+
+    if not os.path.exists(script_path):
+        return None
+    hashes = {}
+    pending = [os.path.abspath(script_path)]
+    while pending:
+        path = pending.pop()
+        if path in hashes:
+            continue
+        with open(path, 'rb') as f:
+            source = f.read()
+        hashes[path] = hashlib.sha256(source).hexdigest()
+        try:
+            tree = ast.parse(source)
+        except SyntaxError:
+            continue
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and not node.level and node.module:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                module = os.path.abspath(os.path.join(module_dir, name.split('.')[0] + ".py"))
+                if os.path.exists(module):
+                    pending.append(module)
+
+    digest = hashlib.sha256()
+    for path in sorted(hashes):
+        digest.update(f"{os.path.basename(path)} {hashes[path]}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def inputs_fingerprint(inputs: Dict[str, Any]) -> str:
+    """Stable hash of the campaign inputs (credentials excluded)"""
+    import hashlib
+
+    public = {k: v for k, v in inputs.items() if k not in SECRET_FIELDS}
+    return hashlib.sha256(json.dumps(public, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class SessionJournal:
+    """Append-only stage journal for one session folder"""
+
+    def __init__(self, session_folder: str):
+        self.session_folder = session_folder
+        self.path = os.path.join(session_folder, JOURNAL_FILE)
+        self.records: List[Dict[str, Any]] = []
+
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                for line in f:
+                    try:
+                        self.records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # Torn last line from a crash mid-write
+                        break
+
+    def _append(self, record: Dict[str, Any]):
+        record['at'] = datetime.now().isoformat(timespec='seconds')
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.records.append(record)
+
+    def _current_run(self) -> List[Dict[str, Any]]:
+        """Records since the most recent 'session' record"""
+        for i in range(len(self.records) - 1, -1, -1):
+            if self.records[i].get('stage') == 'session':
+                return self.records[i:]
+        return []
+
+    def begin(self, inputs: Dict[str, Any], configs: List[str]):
+        """Start a new run (earlier records are kept but no longer count)"""
+        public = {k: v for k, v in inputs.items() if k not in SECRET_FIELDS}
+        self._append({'stage': 'session', 'inputs': public, 'configs': configs})
+
+    def session(self) -> Optional[Dict[str, Any]]:
+        """The 'session' record of the current run (inputs and config list)"""
+        run = self._current_run()
+        return run[0] if run else None
+
+    def start(self, stage: str, config_key: str):
+        """Record that a stage is about to run (write-ahead)"""
+        self._append({'stage': stage, 'config': config_key, 'status': 'started'})
+
+    def done(self, stage: str, config_key: str, **hashes):
+        """Record that a stage finished, with the hashes that make it valid"""
+        self._append({'stage': stage, 'config': config_key, 'status': 'done', **hashes})
+
+    def last(self, stage: str, config_key: str) -> Optional[Dict[str, Any]]:
+        """Last record for a stage/config in the current run"""
+        for record in reversed(self._current_run()):
+            if record.get('stage') == stage and record.get('config') == config_key:
+                return record
+        return None
+
+    def is_done(self, stage: str, config_key: str, **hashes) -> bool:
+        """
+        True if the stage's last record is 'done' and every given hash still
+        matches what was recorded.
+        """
+        record = self.last(stage, config_key)
+        if not record or record.get('status') != 'done':
+            return False
+        return all(value is not None and record.get(key) == value for key, value in hashes.items())
+
+    def interrupted(self) -> List[str]:
+        """'stage config' labels whose last record is 'started' (cut off mid-run)"""
+        latest = {}
+        for record in self._current_run()[1:]:
+            latest[(record['stage'], record['config'])] = record['status']
+        return [f"{stage} {config}" for (stage, config), status in latest.items() if status == 'started']
+
+    def pending(self) -> List[str]:
+        """Configs of the current run that have not been posted yet"""
+        session = self.session()
+        if not session:
+            return []
+        return [c for c in session['configs'] if not self.is_done('post', c)]
+
+
+def resolve_session_folder(session: str, backups_dir: str) -> Optional[str]:
+    """Accept a session folder path or just its name under backups/"""
+    for candidate in (session, os.path.join(backups_dir, session)):
+        if os.path.exists(os.path.join(candidate, JOURNAL_FILE)):
+            return os.path.abspath(candidate)
+    return None
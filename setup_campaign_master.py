@@ -25,14 +25,29 @@ import json
 import sys
 import os
 from datetime import datetime
-import subprocess
 from pathlib import Path
 import argparse
 
+from session_journal import SessionJournal, file_hash, inputs_fingerprint, resolve_session_folder, source_hash
+
 
 # Base directory for the app (works both locally and on Streamlit Cloud)
 APP_DIR = Path(__file__).parent
 
+# Optional in-process runner for processor scripts (set by campaign_daemon.py).
+# Takes the same cmd list as subprocess.run and behaves like check=True.
+processor_runner = None
+
+# Processing script (in scripts/) for each config
+PROCESSOR_SCRIPTS = {
+    'STREAK_ELIGIBILITY': 'process_streak_eligibility.py',
+    'STREAK_TXN_ELIGIBILITY': 'process_txn_eligibility.py',
+    'STREAK_CONFIG': 'process_streak_config.py',
+    'STREAK_BLOCK_TEMPLATE': 'process_streak_block_template.py',
+    'SCAN_HOMEPAGE_CONFIG': 'process_scan_homepage_config.py',
+    'PTP_STREAK_CONFIG': 'process_ptp_streak_config.py'
+}
+
 
 # ANSI color codes for terminal output
 class Colors:
@@ -368,7 +383,11 @@ def create_session_folder(campaign_name):
 
 
 def fetch_config(config_key, session_folder, userid, apikey):
-    """Fetch config via GET request and save to _before.json"""
+    """Fetch config via GET request and stream it to _before.json"""
+    import config_response  # deferred so --help and arg errors start fast
+    import metrics
+    import tracing
+
     print_info(f"Fetching {config_key}...")
 
     url = f"http://kongproxy.infra.dreamplug.net/heimdall/heartbeat/v1/template/{config_key}"
@@ -381,20 +400,22 @@ def fetch_config(config_key, session_folder, userid, apikey):
     ]
 
     try:
-        result = subprocess.run(curl_cmd, capture_output=True, text=True, check=True)
-
-        # Parse and pretty-print the JSON
-        data = json.loads(result.stdout)
+        # Stream the response straight to disk, parsing the envelope as it arrives
+        with metrics.request(config_key, 'GET'):
+            response = config_response.fetch_to_file(config_response.curl_chunks(curl_cmd), output_file)
+        tracing.annotate(bytes_in=response.size, bytes_out=response.size)
+        data = response.envelope
 
         # Check if response indicates auth failure
         if 'error' in data or 'message' in data:
+            os.remove(output_file)
+            metrics.count_error(config_key, 'GET', 'api_error')
             print_error(f"API Error: {data.get('error', data.get('message', 'Unknown error'))}")
             print_error("Your API credentials may be invalid or expired")
             print_error(f"Delete {APP_DIR / 'credentials.json'} and run again")
             return False
 
-        with open(output_file, 'w') as f:
-            json.dump(data, f, indent=2)
+        metrics.observe_template(config_key, response.value, response.parsed_value())
 
         print_success(f"Saved: {config_key}_before.json")
         return True
@@ -410,18 +431,12 @@ def fetch_config(config_key, session_folder, userid, apikey):
 
 def process_config(config_key, session_folder, inputs):
     """Process a config by calling the appropriate processing script"""
-    print_info(f"Processing {config_key}...")
+    import subprocess
+    import tracing
 
-    script_map = {
-        'STREAK_ELIGIBILITY': 'process_streak_eligibility.py',
-        'STREAK_TXN_ELIGIBILITY': 'process_txn_eligibility.py',
-        'STREAK_CONFIG': 'process_streak_config.py',
-        'STREAK_BLOCK_TEMPLATE': 'process_streak_block_template.py',
-        'SCAN_HOMEPAGE_CONFIG': 'process_scan_homepage_config.py',
-        'PTP_STREAK_CONFIG': 'process_ptp_streak_config.py'
-    }
+    print_info(f"Processing {config_key}...")
 
-    script_name = script_map.get(config_key)
+    script_name = PROCESSOR_SCRIPTS.get(config_key)
     if not script_name:
         print_error(f"No processing script found for {config_key}")
         return False
@@ -523,9 +538,19 @@ def process_config(config_key, session_folder, inputs):
         ]
 
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        tracing.annotate(bytes_in=os.path.getsize(before_file))
+        if processor_runner is not None:
+            result = processor_runner(cmd)
+        else:
+            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        tracing.annotate(bytes_out=os.path.getsize(after_file))
         print(result.stdout)
         print_success(f"Processed {config_key}")
+
+        import config_diff  # deferred like config_response
+        patch = config_diff.write_patch(session_folder, config_key)
+        if patch is not None:
+            print_info(f"JSON Patch: {config_diff.patch_summary(patch)} → {config_key}_patch.json")
         return True
     except subprocess.CalledProcessError as e:
         print_error(f"Failed to process {config_key}")
@@ -534,9 +559,109 @@ def process_config(config_key, session_folder, inputs):
         return False
 
 
-def post_config(config_key, session_folder, userid, apikey):
-    """POST a config to the API"""
-    print_info(f"Posting {config_key}...")
+def fetch_stage(config_key, session_folder, inputs, journal):
+    """fetch_config with journal checkpointing (skipped if already fetched and unchanged)"""
+    import tracing
+
+    before_file = os.path.join(session_folder, f"{config_key}_before.json")
+
+    if journal.is_done('fetch', config_key, before=file_hash(before_file)):
+        print_info(f"Skipping fetch of {config_key} (already fetched, unchanged)")
+        tracing.annotate(skipped=True)
+        return True
+
+    journal.start('fetch', config_key)
+    if not fetch_config(config_key, session_folder, inputs['userid'], inputs['apikey']):
+        return False
+    journal.done('fetch', config_key, before=file_hash(before_file))
+    return True
+
+
+def process_stage(config_key, session_folder, inputs, journal):
+    """
+    process_config with journal checkpointing.
+
+    Skipped only if the _before.json, campaign inputs, processing script
+    (with the first-party modules it imports: wire_format, json_backend,
+    velocity_template, ...) and wire format are the same as last time and
+    _after.json hasn't been touched since.
+    """
+    import tracing
+    import wire_format
+
+    after_file = os.path.join(session_folder, f"{config_key}_after.json")
+    script_name = PROCESSOR_SCRIPTS.get(config_key, '')
+    checks = {
+        'before': file_hash(os.path.join(session_folder, f"{config_key}_before.json")),
+        'inputs': inputs_fingerprint(inputs),
+        'script': source_hash(str(APP_DIR / "scripts" / script_name), str(APP_DIR)) if script_name else None,
+        'format': wire_format.mode_for(config_key)
+    }
+
+    if journal.is_done('process', config_key, after=file_hash(after_file), **checks):
+        print_info(f"Skipping processing of {config_key} (inputs unchanged)")
+        tracing.annotate(skipped=True)
+        return True
+
+    journal.start('process', config_key)
+    if not process_config(config_key, session_folder, inputs):
+        return False
+    journal.done('process', config_key, after=file_hash(after_file), **checks)
+    return True
+
+
+def fetch_current(config_key, session_folder, userid, apikey):
+    """GET the live config into _current.json just before POSTing; returns its envelope"""
+    import config_response
+    import metrics
+    import tracing
+
+    url = f"http://kongproxy.infra.dreamplug.net/heimdall/heartbeat/v1/template/{config_key}"
+    current_file = os.path.join(session_folder, f"{config_key}_current.json")
+
+    curl_cmd = [
+        'curl', '-s', '-X', 'GET', url,
+        '-H', f'userid: {userid}',
+        '-H', f'_cred_apikey: {apikey}'
+    ]
+
+    with metrics.request(config_key, 'GET'):
+        response = config_response.fetch_to_file(config_response.curl_chunks(curl_cmd), current_file)
+    tracing.annotate(bytes_in=response.size)
+    data = response.envelope
+    if 'error' in data or 'message' in data:
+        metrics.count_error(config_key, 'GET', 'api_error')
+        raise RuntimeError(f"API Error: {data.get('error', data.get('message', 'Unknown error'))}")
+    return data
+
+
+def rebase_config(config_key, session_folder, inputs, journal=None):
+    """
+    Replay our change onto the version in _current.json (the live config
+    after a conflict, or another session's queued edit): it becomes
+    _before.json (the superseded base is kept as _before_conflict<N>.json)
+    and the processor runs again.
+    """
+    before_file = os.path.join(session_folder, f"{config_key}_before.json")
+    current_file = os.path.join(session_folder, f"{config_key}_current.json")
+
+    attempt = 1
+    while os.path.exists(os.path.join(session_folder, f"{config_key}_before_conflict{attempt}.json")):
+        attempt += 1
+    os.replace(before_file, os.path.join(session_folder, f"{config_key}_before_conflict{attempt}.json"))
+    os.replace(current_file, before_file)
+
+    if journal is None:
+        return process_config(config_key, session_folder, inputs)
+    journal.done('fetch', config_key, before=file_hash(before_file))
+    return process_stage(config_key, session_folder, inputs, journal)
+
+
+def send_config(config_key, session_folder, userid, apikey):
+    """POST _after.json to the API (no conflict check - see post_config)"""
+    import subprocess
+    import metrics
+    import tracing
 
     url = "http://kongproxy.infra.dreamplug.net/heimdall/heartbeat/v1/template"
     after_file = os.path.join(session_folder, f"{config_key}_after.json")
@@ -549,23 +674,90 @@ def post_config(config_key, session_folder, userid, apikey):
         '-d', f'@{after_file}'
     ]
 
-    try:
+    with metrics.request(config_key, 'POST'):
         result = subprocess.run(curl_cmd, capture_output=True, text=True, check=True)
-        # Parse response to check for success
-        try:
-            response = json.loads(result.stdout)
-            print_success(f"Posted {config_key}")
-            return True
-        except json.JSONDecodeError:
-            print_error(f"Posted {config_key} but got unexpected response: {result.stdout}")
-            return False
+    tracing.annotate(bytes_out=os.path.getsize(after_file), bytes_in=len(result.stdout))
+    # Parse response to check for success
+    try:
+        json.loads(result.stdout)
+        print_success(f"Posted {config_key}")
+        return True
+    except json.JSONDecodeError:
+        metrics.count_error(config_key, 'POST', 'invalid_json')
+        print_error(f"Posted {config_key} but got unexpected response: {result.stdout}")
+        return False
+
+
+def post_config(config_key, session_folder, userid, apikey, inputs=None, journal=None):
+    """
+    POST a config to the API, if it hasn't changed since it was fetched.
+
+    Goes through commit_queue.py: the config's write lock is held while the
+    live config is fetched again and compared, and edits of the same config
+    queued by other sessions in this process are POSTed along with ours. If
+    someone else changed it in the meantime, our change is replayed onto
+    their version (rebase_config, needs inputs) and checked again, with
+    backoff (optimistic_write.py).
+    """
+    import commit_queue
+    import config_response
+    import json_backend
+    import optimistic_write
+
+    print_info(f"Posting {config_key}...")
+
+    before_file = os.path.join(session_folder, f"{config_key}_before.json")
+    current_file = os.path.join(session_folder, f"{config_key}_current.json")
+    after_file = os.path.join(session_folder, f"{config_key}_after.json")
+
+    def edit(version):
+        # version is the live config or another session's pending _after.json
+        if inputs is None:
+            print_error(f"No campaign inputs to replay the change to {config_key} with")
+            return None
+        with open(current_file, 'w') as f:
+            json_backend.dump(version, f, indent=2)
+        if not rebase_config(config_key, session_folder, inputs, journal):
+            return None
+        return config_response.load(after_file).envelope
+
+    try:
+        # post() is only ever handed the envelope our own edit() (or
+        # processing) left in _after.json, so that's the file that goes out
+        posted, stats = commit_queue.submit(
+            config_key, config_response.load(before_file).envelope,
+            config_response.load(after_file).envelope, edit,
+            refetch=lambda: fetch_current(config_key, session_folder, userid, apikey),
+            post=lambda payload: send_config(config_key, session_folder, userid, apikey),
+            log=print_info)
+    except optimistic_write.WriteConflict as e:
+        print_error(str(e))
+        print_error("Run again (or --resume) once the other change is done")
+        return False
+    except commit_queue.LockTimeout as e:
+        print_error(f"Not posted: {e}")
+        return False
     except Exception as e:
         print_error(f"Failed to post {config_key}: {e}")
         return False
+    finally:
+        if os.path.exists(current_file):
+            os.remove(current_file)
+
+    if stats['rebases']:
+        print_info(f"{config_key}: {stats['conflicts']} conflict(s), posted after "
+                   f"{stats['rebases']} rebase(s) - see {config_key}_before_conflict*.json")
+    if stats['coalesced'] > 1:
+        print_info(f"{config_key}: posted together with {stats['coalesced'] - 1} other queued edit(s)")
+    return posted
 
 
 def verify_config(config_key, session_folder, userid, apikey):
     """Verify a config by fetching it again"""
+    import config_response
+    import metrics
+    import tracing
+
     print_info(f"Verifying {config_key}...")
 
     url = f"http://kongproxy.infra.dreamplug.net/heimdall/heartbeat/v1/template/{config_key}"
@@ -578,10 +770,10 @@ def verify_config(config_key, session_folder, userid, apikey):
     ]
 
     try:
-        result = subprocess.run(curl_cmd, capture_output=True, text=True, check=True)
-        data = json.loads(result.stdout)
-        with open(verify_file, 'w') as f:
-            json.dump(data, f, indent=2)
+        with metrics.request(config_key, 'GET'):
+            response = config_response.fetch_to_file(config_response.curl_chunks(curl_cmd), verify_file)
+        tracing.annotate(bytes_in=response.size)
+        metrics.observe_template(config_key, response.value, response.parsed_value())
         print_success(f"Verified {config_key} - saved to {config_key}_verify.json")
         return True
     except Exception as e:
@@ -589,19 +781,59 @@ def verify_config(config_key, session_folder, userid, apikey):
         return False
 
 
-def post_all_configs(session_folder, configs_processed, userid, apikey, skip_confirmations=False):
+def check_budgets(session_folder, configs_processed):
+    """Check each _after.json against config_budgets.json and its _before.json
+
+    Prints the violations, saves budget_report.json in the session folder
+    and returns the configs a 'block' budget keeps from being POSTed
+    """
+    import config_budget
+
+    try:
+        results = config_budget.check_session(session_folder, configs_processed)
+    except (OSError, ValueError) as e:
+        print_error(f"Could not check config budgets: {e}")
+        return []
+    config_budget.save_report(session_folder, results)
+
+    for config_key, result in results.items():
+        for violation in result['violations']:
+            message = f"{config_key}: {config_budget.format_violation(violation)}"
+            if violation['level'] == 'block':
+                print_error(f"Over budget - {message}")
+            else:
+                print_info(f"Budget warning - {message}")
+    return [config_key for config_key, result in results.items() if result['blocked']]
+
+
+def post_all_configs(session_folder, configs_processed, userid, apikey, skip_confirmations=False,
+                     journal=None, inputs=None, allow_over_budget=False):
     """Ask for permission and POST all configs
 
     Args:
         skip_confirmations: If True, skip terminal prompts (for web UI usage)
+        journal: Optional SessionJournal; configs already posted with the same
+                 _after.json are skipped and each POST is checkpointed
+        inputs: Campaign inputs, used to replay the change onto a config that
+                someone else changed since it was fetched (without them
+                such a config isn't POSTed)
+        allow_over_budget: POST configs that exceed a 'block' budget in
+                           config_budgets.json anyway (otherwise they're skipped)
     """
+    import tracing
+
+    blocked = check_budgets(session_folder, configs_processed)
+    if blocked and allow_over_budget:
+        print_info(f"Posting over-budget configs anyway (--allow-over-budget): {', '.join(blocked)}")
+        blocked = []
+
     if not skip_confirmations:
         print_header("📤 Ready to POST to Production")
 
         print(f"{Colors.YELLOW}{Colors.BOLD}IMPORTANT:{Colors.ENDC}")
         print("You are about to POST these configs to the PRODUCTION API:")
         for config in configs_processed:
-            print(f"  • {config}")
+            print(f"  • {config}" + (" (over budget, will be skipped)" if config in blocked else ""))
         print(f"\n{Colors.YELLOW}This will modify the live production system.{Colors.ENDC}\n")
 
         # First confirmation
@@ -632,14 +864,39 @@ def post_all_configs(session_folder, configs_processed, userid, apikey, skip_con
     verified_count = 0
 
     for config in configs_processed:
-        if post_config(config, session_folder, userid, apikey):
+        if config in blocked:
+            print_error(f"Skipping POST of {config}: over its budget in config_budgets.json "
+                        f"(shrink it, raise the budget or rerun with --allow-over-budget)")
+            continue
+
+        after_hash = file_hash(os.path.join(session_folder, f"{config}_after.json"))
+
+        if journal and journal.is_done('post', config, after=after_hash):
+            print_info(f"Skipping POST of {config} (already posted, unchanged)")
             posted_count += 1
+            if journal.is_done('verify', config):
+                verified_count += 1
+            continue
+
+        if journal:
+            journal.start('post', config)
+        with tracing.span('post', config=config):
+            posted = post_config(config, session_folder, userid, apikey, inputs=inputs, journal=journal)
+        if posted:
+            posted_count += 1
+            if journal:
+                # _after.json is regenerated if the POST had to rebase
+                journal.done('post', config, after=file_hash(os.path.join(session_folder, f"{config}_after.json")))
 
             # Verify the change
             import time
             time.sleep(1)  # Brief delay before verification
-            if verify_config(config, session_folder, userid, apikey):
+            with tracing.span('verify', config=config):
+                verified = verify_config(config, session_folder, userid, apikey)
+            if verified:
                 verified_count += 1
+                if journal:
+                    journal.done('verify', config)
         else:
             print_error(f"Skipping verification for {config} due to POST failure")
 
@@ -656,6 +913,31 @@ def post_all_configs(session_folder, configs_processed, userid, apikey, skip_con
         return False
 
 
+def patch_section(session_folder, configs_processed):
+    """'Changes' section of campaign_info.txt: JSON Patch summary per config"""
+    import config_diff
+
+    lines = []
+    for config_key in configs_processed:
+        try:
+            patch = config_diff.get_config_patch(session_folder, config_key)
+        except (OSError, ValueError) as e:
+            lines.append(f"{config_key}: could not compute patch ({e})")
+            continue
+        if patch is None:
+            continue  # Velocity template
+
+        lines.append(f"{config_key}: {config_diff.patch_summary(patch)} - {config_key}_patch.json")
+        for op in patch[:config_diff.PATCH_OPS_IN_SUMMARY]:
+            lines.append(f"  {op['op']:8} {op['path']}")
+        if len(patch) > config_diff.PATCH_OPS_IN_SUMMARY:
+            lines.append(f"  ... {len(patch) - config_diff.PATCH_OPS_IN_SUMMARY} more")
+
+    if not lines:
+        return ""
+    return "\nChanges (JSON Patch, RFC 6902):\n-------------------------------\n" + "\n".join(lines) + "\n"
+
+
 def generate_campaign_info(session_folder, inputs, configs_processed, posted=False):
     """Generate campaign_info.txt with complete summary"""
     info_file = os.path.join(session_folder, "campaign_info.txt")
@@ -691,12 +973,15 @@ Configs Processed:
         status = "✓ Posted & Verified" if posted else "✓ Processed (ready for review)"
         content += f"{i}. {config} - {status}\n"
 
+    content += patch_section(session_folder, configs_processed)
+
     if not posted:
         content += f"""
 Next Steps:
 -----------
 1. Review all _after.json files to verify changes
-2. Compare _before.json with _after.json for each config
+2. Compare _before.json with _after.json for each config (see Changes above
+   and the *_patch.json files)
 3. When satisfied, POST each _after.json file to the API
 4. Verify changes by fetching configs again
 
@@ -729,6 +1014,8 @@ Files in this session:
 - *_after_unescaped.json: Human-readable modified versions
 - *_after.json: Versions that were posted to production
 - *_verify.json: Fetched after POST to verify changes
+- *_patch.json: JSON Patch (RFC 6902) from _before to _after
+- trace.json: Per-stage timings (open in chrome://tracing or ui.perfetto.dev)
 
 Notes:
 ------
@@ -762,6 +1049,12 @@ def parse_args():
     parser.add_argument('--custom-subtitle', help='Custom subtitle (if subtitle-id is 0)')
     parser.add_argument('--dry-run', action='store_true', help='Generate files but skip POST')
     parser.add_argument('--auto-post', action='store_true', help='Auto-POST without confirmation (dangerous!)')
+    parser.add_argument('--allow-over-budget', action='store_true',
+                        help='POST configs that exceed their size/complexity budget in config_budgets.json')
+    parser.add_argument('--resume', metavar='SESSION',
+                        help='Resume an interrupted run (session folder path or name under backups/)')
+    parser.add_argument('--profile-memory', action='store_true',
+                        help='Report peak memory and top allocation sites per stage (tracemalloc)')
 
     return parser.parse_args()
 
@@ -829,13 +1122,52 @@ def collect_campaign_inputs_from_args(args):
 
 def main():
     """Main orchestration function"""
+    global processor_runner
+
     # Parse command-line arguments
     args = parse_args()
+    import tracing  # after parse_args, so --help doesn't load it
 
     # Check if running in non-interactive mode
-    non_interactive = args.campaign_name is not None
+    non_interactive = args.campaign_name is not None or args.resume is not None
+    journal = None
+    session_folder = None
+
+    if args.profile_memory:
+        import memory_profile
+        memory_profile.start()
+        if processor_runner is None:
+            # Run processors in this process so their allocations are traced
+            from campaign_daemon import WarmCache, run_processor
+            cache = WarmCache()
+            processor_runner = lambda cmd: run_processor(cache, cmd)
+
+    tracer = tracing.start("setup_campaign_master")
+    input_span = tracer.begin('input')
+
+    if args.resume:
+        print_header("🎯 Campaign Setup Master Script (Resume)")
+
+        session_folder = resolve_session_folder(args.resume, str(APP_DIR / "backups"))
+        if not session_folder:
+            print_error(f"No journal.jsonl found for session: {args.resume}")
+            sys.exit(1)
 
-    if non_interactive:
+        journal = SessionJournal(session_folder)
+        session = journal.session()
+        credentials = load_credentials()
+        if not session or not credentials:
+            print_error("Journal has no session record" if not session else "credentials.json not found")
+            sys.exit(1)
+
+        inputs = dict(session['inputs'])
+        inputs['userid'] = credentials['userid']
+        inputs['apikey'] = credentials['apikey']
+
+        interrupted = journal.interrupted()
+        if interrupted:
+            print_info(f"Interrupted stages (will be redone): {', '.join(interrupted)}")
+    elif non_interactive:
         print_header("🎯 Campaign Setup Master Script (Non-Interactive Mode)")
         print(f"{Colors.BOLD}Running with provided arguments...{Colors.ENDC}\n")
 
@@ -866,6 +1198,8 @@ def main():
         # Collect inputs interactively
         inputs = collect_campaign_inputs()
 
+    input_span.end()
+
     try:
         # Step 1: Already done (collected via args or interactive)
         if not non_interactive:
@@ -887,35 +1221,49 @@ def main():
 
         # Step 2: Determine which configs are needed
         print_step(2, "Determining Required Configs")
-        configs_needed = determine_configs_needed(inputs['campaign_type'])
+        configs_needed = journal.session()['configs'] if journal else determine_configs_needed(inputs['campaign_type'])
         print_info(f"Campaign type '{inputs['campaign_type']}' requires {len(configs_needed)} configs:")
         for config in configs_needed:
             print(f"  • {config}")
 
         # Step 3: Create session folder
         print_step(3, "Creating Session Folder")
-        session_folder = create_session_folder(inputs['campaign_name'])
-        print_success(f"Created: {session_folder}")
+        if journal:
+            print_success(f"Resuming: {session_folder}")
+        else:
+            session_folder = create_session_folder(inputs['campaign_name'])
+            journal = SessionJournal(session_folder)
+            if journal.session() and journal.pending():
+                print_info(f"This folder has an unfinished run ({len(journal.pending())} config(s) not posted). "
+                           f"Use --resume {os.path.basename(session_folder)} to continue it instead.")
+            journal.begin(inputs, configs_needed)
+            print_success(f"Created: {session_folder}")
 
         # Step 4: Fetch all configs
         print_step(4, "Fetching Configs from API")
         for config in configs_needed:
-            if not fetch_config(config, session_folder, inputs['userid'], inputs['apikey']):
+            with tracing.span('fetch', config=config):
+                fetched = fetch_stage(config, session_folder, inputs, journal)
+            if not fetched:
                 print_error(f"Failed to fetch {config}. Aborting.")
+                print_info(f"Fix the problem and run with --resume {os.path.basename(session_folder)}")
                 return 1
 
         # Step 5: Process all configs
         print_step(5, "Processing Configs")
         configs_processed = []
         for config in configs_needed:
-            if process_config(config, session_folder, inputs):
+            with tracing.span('process', config=config):
+                processed = process_stage(config, session_folder, inputs, journal)
+            if processed:
                 configs_processed.append(config)
             else:
                 print_error(f"Failed to process {config}. Continuing with others...")
 
         # Step 6: Generate campaign info
         print_step(6, "Generating Campaign Summary")
-        generate_campaign_info(session_folder, inputs, configs_processed, posted=False)
+        with tracing.span('write'):
+            generate_campaign_info(session_folder, inputs, configs_processed, posted=False)
 
         # Final summary before asking about POST
         print_header("✓ Campaign Setup Complete!")
@@ -936,20 +1284,26 @@ def main():
         # Handle dry-run mode
         if args.dry_run:
             print(f"\n{Colors.YELLOW}--dry-run mode: Skipping POST to production{Colors.ENDC}")
+            check_budgets(session_folder, configs_processed)
             print(f"{Colors.CYAN}Files generated successfully. Review them in:{Colors.ENDC}")
             print(f"  {session_folder}\n")
         elif args.auto_post:
             print(f"\n{Colors.YELLOW}--auto-post mode: POSTing without confirmation{Colors.ENDC}")
-            if post_all_configs(session_folder, configs_processed, inputs['userid'], inputs['apikey']):
-                generate_campaign_info(session_folder, inputs, configs_processed, posted=True)
+            if post_all_configs(session_folder, configs_processed, inputs['userid'], inputs['apikey'],
+                                journal=journal, inputs=inputs, allow_over_budget=args.allow_over_budget):
+                with tracing.span('write'):
+                    generate_campaign_info(session_folder, inputs, configs_processed, posted=True)
                 print(f"\n{Colors.CYAN}✨ Campaign is now LIVE in production! ✨{Colors.ENDC}\n")
             else:
                 print_error("Some configs failed to POST. Check output above.")
+                print_info(f"Retry only the failed ones with --resume {os.path.basename(session_folder)}")
         else:
             # Interactive confirmation
-            if post_all_configs(session_folder, configs_processed, inputs['userid'], inputs['apikey']):
+            if post_all_configs(session_folder, configs_processed, inputs['userid'], inputs['apikey'],
+                                journal=journal, inputs=inputs, allow_over_budget=args.allow_over_budget):
                 # Update campaign_info.txt to reflect posted status
-                generate_campaign_info(session_folder, inputs, configs_processed, posted=True)
+                with tracing.span('write'):
+                    generate_campaign_info(session_folder, inputs, configs_processed, posted=True)
                 print(f"\n{Colors.CYAN}✨ Campaign is now LIVE in production! ✨{Colors.ENDC}\n")
             else:
                 # User chose not to post or POST failed
@@ -972,7 +1326,18 @@ def main():
         import traceback
         traceback.print_exc()
         return 1
+    finally:
+        if session_folder:
+            summary = tracing.finish(session_folder)
+            if summary:
+                print_info(f"{summary} (trace.json in session folder)")
+        if args.profile_memory:
+            import memory_profile
+            print(f"\n{memory_profile.finish(session_folder)}")
+            if session_folder:
+                print_info(f"Saved to {memory_profile.REPORT_FILE} in session folder")
 
 
 if __name__ == "__main__":
-    sys.exit(main())
+    from campaign_daemon import forward_or_run
+    sys.exit(forward_or_run(__file__, main))
@@ -1,23 +1,29 @@
 #!/usr/bin/env python3
 """
 Show journey rules for specific campaigns
+
+Usage:
+    python3 show_campaign_journeys.py                      # the 3 batch job campaigns
+    python3 show_campaign_journeys.py upi_streak_5 ...     # any campaigns
 """
 
-import requests
-import json
 import sys
+from journey_graph import JourneyGraph
 from retool_integration import load_credentials, HeimdalJourneyConfigAPI, parse_value_field
 
 
+DEFAULT_CAMPAIGNS = [
+    "upi_25x1_streak",
+    "snp_flat_10_multilob_act_react",
+    "cred_mtu_single_lob_others_retention"
+]
+
+
 def main():
-    campaigns = [
-        "upi_25x1_streak",
-        "snp_flat_10_multilob_act_react",
-        "cred_mtu_single_lob_others_retention"
-    ]
+    campaigns = sys.argv[1:] or DEFAULT_CAMPAIGNS
 
     print("\n" + "="*80)
-    print("JOURNEY RULES FOR 3 BATCH JOBS")
+    print(f"JOURNEY RULES FOR {len(campaigns)} CAMPAIGN(S)")
     print("="*80)
 
     # Load credentials
@@ -42,24 +48,30 @@ def main():
         print(f"❌ Failed to parse: {error}")
         sys.exit(1)
 
-    # Get journey rules
-    journey_rules = value_obj.get('journey_rules', {}).get('configs', [])
+    # Index journey rules and chains once
+    graph = JourneyGraph(value_obj)
 
-    # Find rules for these campaigns
     for campaign in campaigns:
         print(f"\n{'='*80}")
         print(f"CAMPAIGN: {campaign}")
         print('='*80)
 
-        found_rules = [
-            config for config in journey_rules
-            if config.get('config_key') == campaign
-        ]
+        found_rules = graph.rules_for(campaign)
 
         if not found_rules:
             print("  ⚠️  No journey rules found")
             continue
 
+        previous = sorted(graph.predecessors(campaign))
+        chain = graph.chain(campaign)
+        print(f"\n  Reached from: {', '.join(previous) if previous else '(start of chain)'}")
+        print(f"  Chain:        {' → '.join([campaign] + chain) if chain else '(no next campaign)'}")
+        if graph.on_cycle(campaign):
+            print("  ❌ Cycle: the chain leads back to this campaign")
+        missing = [successor for successor in graph.successors(campaign) if successor not in graph]
+        for successor in sorted(missing):
+            print(f"  ⚠️  Next campaign '{successor}' has no rules in the config")
+
         print(f"\n  Found {len(found_rules)} journey rule(s):\n")
 
         for i, rule in enumerate(found_rules, 1):
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Lightweight Stage Tracing
+
+Records wall time, bytes in/out and retries for each pipeline stage (input,
+fetch, process, write, post, verify, retool) and writes them to trace.json
+in the session folder in Chrome trace-event format - open it in
+chrome://tracing or https://ui.perfetto.dev.
+
+An aggregate one-line summary is also written into campaign_info.txt.
+
+Usage:
+    tracer = tracing.start("setup_campaign_master")
+    with tracing.span("fetch", config="STREAK_CONFIG"):
+        ...
+        tracing.annotate(bytes_in=len(body))
+    tracing.finish(session_folder)
+
+When no tracer is active, span() and annotate() do nothing, so library
+functions can annotate unconditionally.
+
+With --profile-memory (memory_profile.start()), every span is also a
+memory-profile stage.
+"""
+
+import json
+import _thread
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Any, Optional
+
+
+TRACE_FILE = "trace.json"
+
+# Prefix of the summary line in campaign_info.txt
+SUMMARY_PREFIX = "Trace summary:"
+
+# Order stages appear in the summary
+STAGE_ORDER = ['input', 'fetch', 'process', 'write', 'post', 'verify', 'retool']
+
+_active = None
+
+
+class Span:
+    """One timed stage; args are shown in the trace viewer"""
+
+    def __init__(self, tracer: "Tracer", stage: str, args: Dict[str, Any]):
+        self.tracer = tracer
+        self.stage = stage
+        self.args = args
+        self.ts_us = time.time() * 1e6
+        self.tid = _thread.get_ident()
+        self._started = time.perf_counter()
+
+        # memory_profile is only imported by --profile-memory runs
+        memory_profile = sys.modules.get('memory_profile')
+        profiler = memory_profile.active() if memory_profile else None
+        label = args.get('config')
+        self._memory = (profiler, profiler.begin(f"{stage} {label}" if label else stage)) if profiler else None
+
+    def end(self):
+        duration_us = (time.perf_counter() - self._started) * 1e6
+        if self._memory:
+            profiler, entry = self._memory
+            profiler.end(entry)
+        self.tracer._close(self, duration_us)
+
+
+class Tracer:
+    """
+    Collects spans for one entry-point run. Each thread nests its own spans
+    (e.g. the cleanup script's parallel fetch/POST workers); events from
+    all threads are collected together, tagged with their thread id.
+    """
+
+    def __init__(self, process_name: str):
+        self.process_name = process_name
+        self.pid = os.getpid()
+        self.events: List[Dict[str, Any]] = []
+        self._local = _thread._local()  # threading.local, without importing threading
+        self._lock = _thread.allocate_lock()
+
+    @property
+    def _stack(self) -> List[Span]:
+        """Open spans of the calling thread, innermost last"""
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    def begin(self, stage: str, **args) -> Span:
+        span = Span(self, stage, {k: v for k, v in args.items() if v is not None})
+        self._stack.append(span)
+        return span
+
+    def _close(self, span: Span, duration_us: float):
+        stack = self._stack
+        if span in stack:
+            stack.remove(span)
+
+        label = span.args.get('config')
+        with self._lock:
+            self.events.append({
+                'name': f"{span.stage} {label}" if label else span.stage,
+                'cat': span.stage,
+                'ph': 'X',
+                'ts': round(span.ts_us),
+                'dur': round(duration_us),
+                'pid': self.pid,
+                'tid': span.tid,
+                'args': span.args
+            })
+
+    def annotate(self, **args):
+        """Add (or, for numbers, accumulate) args on the innermost open span"""
+        if not self._stack:
+            return
+        span_args = self._stack[-1].args
+        for key, value in args.items():
+            if isinstance(value, (int, float)) and isinstance(span_args.get(key), (int, float)):
+                span_args[key] += value
+            else:
+                span_args[key] = value
+
+
+def start(process_name: str) -> Tracer:
+    """Start tracing for this run (replaces any earlier tracer)"""
+    global _active
+    _active = Tracer(process_name)
+    return _active
+
+
+def active() -> Optional[Tracer]:
+    return _active
+
+
+@contextmanager
+def span(stage: str, **args):
+    """Time a stage on the active tracer (no-op when tracing isn't started)"""
+    if _active is None:
+        yield None
+        return
+
+    current = _active.begin(stage, **args)
+    try:
+        yield current
+    except BaseException as e:
+        current.args['error'] = type(e).__name__
+        raise
+    finally:
+        current.end()
+
+
+def annotate(**args):
+    """bytes_in / bytes_out / retries / ... on the current span, if any"""
+    if _active is not None:
+        _active.annotate(**args)
+
+
+def summarize(events: List[Dict[str, Any]]) -> str:
+    """One line: count, total time and bytes per stage, plus retries (and write conflicts / coalesced edits, if any)"""
+    stages: Dict[str, Dict[str, float]] = {}
+    retries = 0
+    conflicts = 0
+    rebases = 0
+    coalesced = 0
+
+    for event in events:
+        if event.get('ph') != 'X':
+            continue
+        totals = stages.setdefault(event['cat'], {'count': 0, 'dur': 0, 'bytes_in': 0, 'bytes_out': 0})
+        totals['count'] += 1
+        totals['dur'] += event['dur']
+        totals['bytes_in'] += event['args'].get('bytes_in', 0)
+        totals['bytes_out'] += event['args'].get('bytes_out', 0)
+        retries += event['args'].get('retries', 0)
+        conflicts += event['args'].get('conflicts', 0)
+        rebases += event['args'].get('rebases', 0)
+        coalesced += event['args'].get('coalesced', 0)
+
+    ordered = sorted(stages, key=lambda s: (STAGE_ORDER.index(s) if s in STAGE_ORDER else len(STAGE_ORDER), s))
+    parts = []
+    for stage in ordered:
+        totals = stages[stage]
+        part = f"{stage} {totals['count']}x {totals['dur'] / 1e6:.2f}s"
+        io = []
+        if totals['bytes_in']:
+            io.append(f"{totals['bytes_in'] / 1024:.0f}KB in")
+        if totals['bytes_out']:
+            io.append(f"{totals['bytes_out'] / 1024:.0f}KB out")
+        if io:
+            part += f" ({', '.join(io)})"
+        parts.append(part)
+
+    parts.append(f"retries {retries}")
+    if conflicts:
+        parts.append(f"write conflicts {conflicts} (rebased {rebases}x)")
+    if coalesced:
+        parts.append(f"coalesced edits {coalesced}")
+    return " | ".join(parts)
+
+
+def finish(session_folder: str, tracer: Optional[Tracer] = None) -> Optional[str]:
+    """
+    Merge this run's spans into <session>/trace.json and refresh the summary
+    line in campaign_info.txt. Returns the summary line.
+
+    Spans are appended to what's already in trace.json, so separate runs
+    (e.g. the web app's processing and POST reruns) end up in one trace.
+    """
+    tracer = tracer or _active
+    if tracer is None or not tracer.events:
+        return None
+
+    trace_file = os.path.join(session_folder, TRACE_FILE)
+    events = []
+    if os.path.exists(trace_file):
+        try:
+            with open(trace_file, 'r') as f:
+                events = json.load(f).get('traceEvents', [])
+        except (json.JSONDecodeError, OSError):
+            events = []
+
+    # Metadata event so the viewer labels this run's spans by entry point
+    events.append({'name': 'process_name', 'ph': 'M', 'pid': tracer.pid,
+                   'args': {'name': f"{tracer.process_name} ({tracer.pid})"}})
+    events.extend(tracer.events)
+    tracer.events = []
+
+    with open(trace_file, 'w') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, indent=1)
+
+    summary = f"{SUMMARY_PREFIX} {summarize(events)}"
+
+    info_file = os.path.join(session_folder, "campaign_info.txt")
+    if os.path.exists(info_file):
+        with open(info_file, 'r') as f:
+            lines = [line for line in f.read().splitlines() if not line.startswith(SUMMARY_PREFIX)]
+        while lines and not lines[-1].strip():
+            lines.pop()
+        lines += ["", summary]
+        with open(info_file, 'w') as f:
+            f.write("\n".join(lines) + "\n")
+
+    return summary
@@ -10,18 +10,6 @@ import json
 from pathlib import Path
 from datetime import datetime
 
-# Rich library imports
-from rich.console import Console
-from rich.panel import Panel
-from rich.table import Table
-from rich.prompt import Prompt, Confirm, IntPrompt
-from rich.progress import Progress, SpinnerColumn, TextColumn
-from rich import box
-from rich.text import Text
-from rich.layout import Layout
-from rich.live import Live
-from rich.align import Align
-
 # Import our existing logic
 sys.path.insert(0, str(Path(__file__).parent))
 from setup_campaign_master import (
@@ -30,15 +18,37 @@ from setup_campaign_master import (
     fetch_config, process_config, generate_campaign_info,
     post_all_configs
 )
-from retool_integration import (
-    HeimdalJourneyConfigAPI, parse_value_field,
-    add_campaign_to_config, check_campaign_exists
-)
 
-console = Console()
+# rich (and retool_integration, which pulls in requests) are imported inside
+# the functions that use them, so importing this module stays cheap
+
+
+_console = None
+
+
+def get_console():
+    """Return the shared rich Console, creating it on first use"""
+    global _console
+    if _console is None:
+        from rich.console import Console
+        _console = Console()
+    return _console
+
+
+class _LazyConsole:
+    """Stands in for the rich Console until it's first used"""
+
+    def __getattr__(self, name):
+        return getattr(get_console(), name)
+
+
+console = _LazyConsole()
 
 def show_header():
     """Show beautiful header"""
+    from rich.panel import Panel
+    from rich.align import Align
+
     header = Panel.fit(
         "[bold cyan]Campaign Setup Wizard[/bold cyan]\n"
         "[dim]Simplified campaign configuration for streak campaigns[/dim]",
@@ -52,6 +62,9 @@ def show_header():
 
 def show_step_header(step_num, total_steps, title):
     """Show step progress"""
+    from rich.panel import Panel
+    from rich import box
+
     progress_text = f"[bold cyan]Step {step_num}/{total_steps}:[/bold cyan] {title}"
     console.print(Panel(progress_text, border_style="cyan", box=box.ROUNDED))
     console.print()
@@ -59,6 +72,10 @@ def show_step_header(step_num, total_steps, title):
 
 def get_basic_details():
     """Collect basic campaign details"""
+    from rich.table import Table
+    from rich.prompt import Prompt, IntPrompt
+    from rich import box
+
     show_step_header(1, 7, "Basic Campaign Details")
 
     inputs = {}
@@ -116,6 +133,8 @@ def get_basic_details():
 
 def get_transaction_details(inputs):
     """Collect transaction details"""
+    from rich.prompt import IntPrompt
+
     show_step_header(2, 7, "Transaction Details")
 
     inputs['min_txn_amount'] = IntPrompt.ask(
@@ -140,6 +159,8 @@ def get_transaction_details(inputs):
 
 def get_eligibility_details(inputs):
     """Collect eligibility details"""
+    from rich.prompt import Prompt, Confirm
+
     show_step_header(3, 7, "Additional Eligibility")
 
     inputs['is_rupay'] = Confirm.ask("[cyan]Is this a RuPay campaign?[/cyan]", default=False)
@@ -158,6 +179,10 @@ def get_eligibility_details(inputs):
 
 def select_banner(inputs):
     """Banner selection with table"""
+    from rich.table import Table
+    from rich.prompt import Prompt, IntPrompt
+    from rich import box
+
     show_step_header(4, 7, "Banner Selection")
 
     # Load banner registry
@@ -207,6 +232,10 @@ def select_banner(inputs):
 
 def select_subtitle(inputs):
     """Subtitle selection with table"""
+    from rich.table import Table
+    from rich.prompt import Prompt, IntPrompt
+    from rich import box
+
     show_step_header(5, 7, "Bottom Sheet Subtitle")
 
     # Load subtitle templates
@@ -285,6 +314,10 @@ def load_api_credentials(inputs):
 
 def show_summary(inputs):
     """Show beautiful summary before processing"""
+    from rich.table import Table
+    from rich.prompt import Confirm
+    from rich import box
+
     show_step_header(6, 7, "Campaign Summary")
 
     # Create summary table
@@ -322,6 +355,8 @@ def show_summary(inputs):
 
 def process_campaign(inputs):
     """Process all configs with progress indicators"""
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+
     show_step_header(7, 7, "Processing Campaign")
 
     # Determine configs needed
@@ -336,7 +371,7 @@ def process_campaign(inputs):
     with Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
-        console=console
+        console=get_console()
     ) as progress:
         for config in configs_needed:
             task = progress.add_task(f"Fetching {config}...", total=None)
@@ -354,7 +389,7 @@ def process_campaign(inputs):
     with Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
-        console=console
+        console=get_console()
     ) as progress:
         for config in configs_needed:
             task = progress.add_task(f"Processing {config}...", total=None)
@@ -375,6 +410,9 @@ def process_campaign(inputs):
 
 def show_completion(session_folder, configs_processed):
     """Show completion summary"""
+    from rich.panel import Panel
+    from rich import box
+
     completion_panel = Panel(
         "[bold green]✨ Campaign Setup Complete! ✨[/bold green]\n\n"
         f"[cyan]Session Folder:[/cyan]\n{session_folder}\n\n"
@@ -389,6 +427,15 @@ def show_completion(session_folder, configs_processed):
 
 def update_retool_config(inputs):
     """Update Retool STREAK_JOURNEY_JOB_CONFIG with campaign details"""
+    from rich.prompt import Prompt, Confirm
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    from retool_integration import (
+        HeimdalJourneyConfigAPI, parse_value_field,
+        add_campaign_to_config, check_campaign_exists, post_with_rebase
+    )
+    from journey_config import MissingAnchor
+    import wire_format
+
     console.print("\n[bold cyan]Retool Configuration Update[/bold cyan]\n")
 
     # Initialize API and fetch config first
@@ -398,7 +445,7 @@ def update_retool_config(inputs):
     with Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
-        console=console
+        console=get_console()
     ) as progress:
         # Fetch config
         task = progress.add_task("Fetching config...", total=None)
@@ -472,7 +519,7 @@ def update_retool_config(inputs):
     with Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
-        console=console
+        console=get_console()
     ) as progress:
 
         # Check if campaign already exists
@@ -492,20 +539,32 @@ def update_retool_config(inputs):
 
         # Add campaign
         task = progress.add_task("Adding campaign...", total=None)
-        modified_value_obj = add_campaign_to_config(
-            inputs['campaign_name'],
-            inputs['campaign_id'],
-            next_campaign,
-            value_obj
-        )
+        try:
+            modified_value_obj = add_campaign_to_config(
+                inputs['campaign_name'],
+                inputs['campaign_id'],
+                next_campaign,
+                value_obj
+            )
+        except MissingAnchor as e:
+            progress.update(task, description=f"[red]✗ {e}[/red]")
+            console.print(f"[red]✗ Retool update failed: {e}[/red]\n")
+            return False
         progress.update(task, description="[green]✓ Campaign added to config[/green]")
 
         # Update config
         task = progress.add_task("Posting to Retool...", total=None)
-        config_data['value'] = json.dumps(modified_value_obj, indent=2)
-        config_data['updated_by'] = f"campaign_setup_{inputs['campaign_name']}"
-
-        success, message = api.update_config(config_data)
+        payload = dict(config_data)
+        payload['value'] = wire_format.edit_value(config_data['value'], modified_value_obj,
+                                                  "STREAK_JOURNEY_JOB_CONFIG")
+        payload['updated_by'] = f"campaign_setup_{inputs['campaign_name']}"
+
+        # Under the config's write lock, re-checked against the live config
+        success, message = post_with_rebase(
+            api, config_data, payload,
+            lambda value: add_campaign_to_config(inputs['campaign_name'], inputs['campaign_id'],
+                                                 next_campaign, value),
+            verbose=False)
         if success:
             progress.update(task, description="[green]✓ Retool config updated[/green]")
             console.print("\n[bold green]✅ Retool configuration updated successfully![/bold green]\n")
@@ -518,6 +577,8 @@ def update_retool_config(inputs):
 
 def ask_about_posting(session_folder, configs_processed, inputs):
     """Ask about posting to production with double confirmation"""
+    from rich.prompt import Confirm
+
     console.print("[bold yellow]POST to Production[/bold yellow]\n")
 
     console.print("[yellow]⚠  This will modify the LIVE production system[/yellow]")
@@ -543,7 +604,7 @@ def ask_about_posting(session_folder, configs_processed, inputs):
 
     # POST configs
     console.print()
-    if post_all_configs(session_folder, configs_processed, inputs['userid'], inputs['apikey']):
+    if post_all_configs(session_folder, configs_processed, inputs['userid'], inputs['apikey'], inputs=inputs):
         generate_campaign_info(session_folder, inputs, configs_processed, posted=True)
         console.print("\n[bold green]✨ Campaign configs posted successfully! ✨[/bold green]\n")
 
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Pruned Removal of Campaign References from Config Values
+
+The cleanup scripts remove campaign names wherever they appear as list
+items - eligibility lists, carousel conditions - and, for some scripts,
+as dict keys. remove_strings() does that in place with an
+explicit stack (no recursion limit on deep templates) and skips work the
+serialized value shows can't find anything:
+
+1. presence: a target whose quoted form ("name") isn't in the value text
+   can't be in the value; if none are, nothing is traversed
+2. occurrence budget: every string equal to a target shows up as one
+   quoted occurrence in the text, so once the traversal has seen as many
+   of them (as list items, dict keys or dict values) as the text holds,
+   the subtrees still on the stack can't contain any and are dropped
+
+Both checks are only used when they're sound: targets that JSON could
+write escaped (non-ASCII, quotes, backslashes, slashes, control
+characters) or \\u escapes of ASCII characters in the text turn them off,
+and a missing text means a full traversal. Extra occurrences (e.g. inside
+a longer string) only make the budget looser.
+
+Usage:
+    removals = value_prune.remove_strings(value_obj, frozenset(names), text=value_str)
+    # [('/configs/3/conditions/streak_type/value/1', 'snp_rup_may'), ...]
+
+Removals are reported in document order, as JSON pointers into the value
+as it was before anything was removed.
+"""
+
+import re
+from typing import Any, FrozenSet, List, Optional, Tuple
+
+
+# A \u escape of a printable ASCII character: a target could be written that way
+_ASCII_ESCAPE = re.compile(r'\\u00[2-7][0-9a-fA-F]')
+
+
+def _quotable(target: str) -> bool:
+    """True if every serializer writes target as plain "target" (no escapes)"""
+    return target.isascii() and target.isprintable() and not any(c in target for c in '"\\/')
+
+
+def presence(targets: FrozenSet[str], text: Optional[str]) -> Tuple[FrozenSet[str], Optional[int]]:
+    """
+    (targets that may be in the value, occurrence budget or None) from the
+    value's serialized text
+    """
+    if not targets:
+        return targets, 0
+    if text is None or not all(_quotable(target) for target in targets) or _ASCII_ESCAPE.search(text):
+        return targets, None
+
+    # One pass for all targets
+    found = re.findall('"(' + '|'.join(re.escape(target) for target in sorted(targets)) + ')"', text)
+    return frozenset(found), len(found)
+
+
+def _document_order(removals: List[Tuple[Any, str]]) -> List[Tuple[str, str]]:
+    """
+    Sort removals ((parent link, token, container), item) into document
+    order and render their JSON pointers
+    """
+    from config_diff import escape_pointer_token
+
+    key_positions = {}
+
+    def position(container, token):
+        if type(container) is list:
+            return token
+        if id(container) not in key_positions:
+            key_positions[id(container)] = {key: i for i, key in enumerate(container)}
+        return key_positions[id(container)][token]
+
+    ordered = []
+    for link, item in removals:
+        positions = []
+        tokens = []
+        while link is not None:
+            link, token, container = link
+            positions.append(position(container, token))
+            tokens.append(token)
+        ordered.append((positions[::-1], "".join(f"/{escape_pointer_token(t)}" for t in reversed(tokens)), item))
+
+    ordered.sort(key=lambda removal: removal[0])
+    return [(pointer, item) for _, pointer, item in ordered]
+
+
+def remove_strings(value_obj: Any, targets: FrozenSet[str], text: Optional[str] = None,
+                   keys: bool = False) -> List[Tuple[str, str]]:
+    """
+    Remove every list item equal to a target from value_obj, in place
+
+    Args:
+        value_obj: Parsed config value
+        targets: Strings to remove
+        text: The value's serialized text, for pruning (optional)
+        keys: Also delete dict entries whose key is a target (their
+              values aren't searched)
+
+    Returns:
+        [(JSON pointer, removed string)] in document order
+    """
+    present, budget = presence(frozenset(targets), text)
+    if not present:
+        return []
+
+    # ((parent link, token, container), item); a link is the container's
+    # own (parent link, token, parent container) - built per container,
+    # turned into pointers only for what's removed
+    removals = []
+    doomed_keys = []
+    seen = 0
+    stack = [(value_obj, None)]
+    pop = stack.pop
+    push = stack.append
+
+    # Children are pushed last-first, so containers come off the stack in
+    # document order
+    while stack:
+        if budget is not None and seen >= budget:
+            break  # every occurrence in the text is accounted for
+        obj, link = pop()
+
+        if type(obj) is dict:
+            target_keys = not present.isdisjoint(obj)
+            for key, val in reversed(obj.items()):
+                if target_keys and key in present:
+                    seen += 1
+                    if keys:
+                        removals.append(((link, key, obj), key))
+                        doomed_keys.append((obj, key))
+                        continue
+                kind = type(val)
+                if kind is str:
+                    if val in present:
+                        seen += 1
+                elif kind is dict or kind is list:
+                    push((val, (link, key, obj)))
+
+        elif type(obj) is list:
+            kept = None
+            children = None
+            for i, item in enumerate(obj):
+                kind = type(item)
+                if kind is str:
+                    if item in present:
+                        seen += 1
+                        removals.append(((link, i, obj), item))
+                        if kept is None:
+                            kept = obj[:i]
+                        continue
+                elif kind is dict or kind is list:
+                    if children is None:
+                        children = []
+                    children.append((item, (link, i, obj)))
+                if kept is not None:
+                    kept.append(item)
+            if kept is not None:
+                obj[:] = kept
+            if children:
+                children.reverse()
+                stack += children
+
+    if not removals:
+        return []
+
+    # Dict key positions are read for the ordering, so keys go last
+    ordered = _document_order(removals)
+    for obj, key in doomed_keys:
+        del obj[key]
+    return ordered
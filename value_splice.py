@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Minimal-Edit Writer for Config Values
+
+Re-serializing a whole config value rewrites every byte of it: any layout
+difference from what Heimdall stored (key order, spacing, \\r\\n vs \\n)
+shows up as a whole-document change in Heimdall's history. splice_patch()
+instead applies a JSON Patch (config_diff.json_patch) to the original value
+*text*: new blocks are rendered in the layout found around them and
+inserted at their position, removed blocks are cut out, and every other
+byte is left untouched.
+
+Only add/remove/replace ops below the root are supported; anything else
+raises SpliceError so the caller can fall back to a full re-serialization.
+The caller is expected to parse the result and compare it with the
+intended value (wire_format.edit_value does).
+"""
+
+import json
+import re
+from itertools import islice
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+
+import json_backend
+
+
+# More ops than this and splicing (one scan per op) stops paying off
+MAX_SPLICE_OPS = 20
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+# C scanner from the stdlib decoder: scan_once(text, pos) -> (value, end)
+_scan_once = json.JSONDecoder().scan_once
+
+
+class SpliceError(ValueError):
+    """The patch can't be applied to the text without re-serializing"""
+
+
+def _skip_ws(text: str, pos: int) -> int:
+    return _WHITESPACE.match(text, pos).end()
+
+
+def _scan(text: str, pos: int) -> Tuple[Any, int]:
+    try:
+        return _scan_once(text, pos)
+    except StopIteration:
+        raise SpliceError(f"Invalid JSON at offset {pos}")
+
+
+def _children(text: str, pos: int) -> Iterator[Tuple[Optional[str], int, int, int]]:
+    """
+    Yield (key, start, value_start, value_end) for each member of the object
+    or array opening at pos. key is None for array elements; start is where
+    the key (or element) begins.
+    """
+    closing = '}' if text[pos] == '{' else ']'
+    pos = _skip_ws(text, pos + 1)
+    if text[pos:pos + 1] == closing:
+        return
+
+    while True:
+        key = None
+        start = pos
+        if closing == '}':
+            key, pos = _scan(text, pos)
+            pos = _skip_ws(text, pos)
+            if text[pos:pos + 1] != ':':
+                raise SpliceError(f"Expected ':' at offset {pos}")
+            pos = _skip_ws(text, pos + 1)
+        value_start = pos
+        _, pos = _scan(text, pos)
+        yield key, start, value_start, pos
+
+        pos = _skip_ws(text, pos)
+        char = text[pos:pos + 1]
+        if char == ',':
+            pos = _skip_ws(text, pos + 1)
+        elif char == closing:
+            return
+        else:
+            raise SpliceError(f"Expected ',' or '{closing}' at offset {pos}")
+
+
+def _parse_pointer(path: str) -> List[str]:
+    if not path.startswith('/'):
+        raise SpliceError(f"Can't splice at {path!r}")
+    return [token.replace('~1', '/').replace('~0', '~') for token in path[1:].split('/')]
+
+
+def _matches(key: Optional[str], index: int, token: str) -> bool:
+    return token == (str(index) if key is None else key)
+
+
+def _find_container(text: str, tokens: List[str]) -> int:
+    """Offset of the object/array the last token points into"""
+    pos = _skip_ws(text, 0)
+    for token in tokens[:-1]:
+        if text[pos:pos + 1] not in ('{', '['):
+            raise SpliceError(f"Path not found: /{'/'.join(tokens)}")
+        pos = _child_start(text, pos, token)
+        if pos is None:
+            raise SpliceError(f"Path not found: /{'/'.join(tokens)}")
+
+    if text[pos:pos + 1] not in ('{', '['):
+        raise SpliceError(f"Path not found: /{'/'.join(tokens)}")
+    return pos
+
+
+def _child_start(text: str, pos: int, token: str) -> Optional[int]:
+    """
+    Where the value of member token of the container at pos starts, without
+    scanning that value (descending into a large block costs nothing extra)
+    """
+    is_object = text[pos] == '{'
+    pos = _skip_ws(text, pos + 1)
+    index = 0
+    while text[pos:pos + 1] not in ('}', ']', ''):
+        key = None
+        if is_object:
+            key, pos = _scan(text, pos)
+            pos = _skip_ws(text, pos)
+            if text[pos:pos + 1] != ':':
+                raise SpliceError(f"Expected ':' at offset {pos}")
+            pos = _skip_ws(text, pos + 1)
+        if _matches(key, index, token):
+            return pos
+        _, pos = _scan(text, pos)
+        pos = _skip_ws(text, pos)
+        if text[pos:pos + 1] == ',':
+            pos = _skip_ws(text, pos + 1)
+        index += 1
+    return None
+
+
+def _line_indent(text: str, pos: int) -> str:
+    """Whitespace at the start of the line containing pos"""
+    line_start = max(text.rfind('\n', 0, pos), text.rfind('\r', 0, pos)) + 1
+    end = line_start
+    while end < pos and text[end] in ' \t':
+        end += 1
+    return text[line_start:end]
+
+
+def _layout(text: str) -> Dict[str, Any]:
+    """Newline, indent step and separators used by the original text"""
+    pos = _skip_ws(text, 0)
+    if text[pos:pos + 1] not in ('{', '['):
+        raise SpliceError("Value is not an object or array")
+
+    lead = text[pos + 1:_skip_ws(text, pos + 1)]
+    if '\n' not in lead:
+        # Single line: json.dumps default separators or compact ones, told
+        # apart by the space after the first key (or array element)
+        after = pos + 1 + len(lead)
+        if text[after:after + 1] in (']', '}'):
+            spaced = False
+        else:
+            _, after = _scan(text, after)
+            spaced = text[after:after + 2] in (': ', ', ')
+        return {'indent': None, 'separators': (', ', ': ') if spaced else (',', ':')}
+
+    newline = '\r\n' if '\r\n' in lead else '\n'
+    indent = lead[lead.rfind('\n') + 1:]
+    if not indent or indent.strip():
+        raise SpliceError("Can't determine the indentation")
+    return {'indent': len(indent), 'newline': newline}
+
+
+def _render(value: Any, indent: str, layout: Dict[str, Any]) -> str:
+    if layout['indent'] is None:
+        return json_backend.dumps(value, separators=layout['separators'])
+    text = json_backend.dumps(value, indent=layout['indent'])
+    return text.replace('\n', layout['newline'] + indent)
+
+
+def _apply(text: str, op: Dict[str, Any], layout: Dict[str, Any]) -> str:
+    tokens = _parse_pointer(op['path'])
+    container = _find_container(text, tokens)
+    is_list = text[container] == '['
+    last = tokens[-1]
+
+    if is_list:
+        if last == '-' and op['op'] == 'add':
+            members = list(_children(text, container))
+            target = len(members)
+        elif last.isdigit() and (last == '0' or not last.startswith('0')):
+            target = int(last)
+            # Only the members up to the one after target matter (and the
+            # first two, for the separator)
+            members = list(islice(_children(text, container), max(target + 2, 2)))
+        else:
+            raise SpliceError(f"Invalid list index in {op['path']}")
+    else:
+        members = list(_children(text, container))
+        target = next((i for i, member in enumerate(members) if member[0] == last), None)
+        if op['op'] == 'add' and target is not None:
+            op = dict(op, op='replace')  # adding an existing member replaces it
+        elif op['op'] == 'add':
+            target = len(members)
+
+    if target is None or target > len(members) or (target == len(members) and op['op'] != 'add'):
+        raise SpliceError(f"Path not found: {op['path']}")
+
+    if op['op'] == 'replace':
+        _, _, value_start, value_end = members[target]
+        rendered = _render(op['value'], _line_indent(text, value_start), layout)
+        return text[:value_start] + rendered + text[value_end:]
+
+    if op['op'] == 'remove':
+        if len(members) == 1:
+            close = _skip_ws(text, members[0][3])
+            return text[:container + 1] + text[close:]
+        if target < len(members) - 1:
+            return text[:members[target][1]] + text[members[target + 1][1]:]
+        return text[:members[target - 1][3]] + text[members[target][3]:]
+
+    if op['op'] != 'add':
+        raise SpliceError(f"Unsupported op: {op['op']}")
+    if not members:
+        return _fill_empty(text, container, last, op['value'], layout)
+
+    # Separator between members as written in the original (',' + whitespace)
+    if len(members) > 1:
+        separator = text[members[0][3]:members[1][1]]
+    elif layout['indent'] is None:
+        separator = layout['separators'][0]
+    else:
+        separator = ',' + text[container + 1:members[0][1]]
+
+    rendered = _render(op['value'], _line_indent(text, members[0][1]), layout)
+    if not is_list:
+        _, key_end = _scan(text, members[0][1])
+        rendered = json.dumps(last) + text[key_end:members[0][2]] + rendered
+
+    if target < len(members):
+        start = members[target][1]
+        return text[:start] + rendered + separator + text[start:]
+    end = members[-1][3]
+    return text[:end] + separator + rendered + text[end:]
+
+
+def _fill_empty(text: str, container: int, key: str, value: Any, layout: Dict[str, Any]) -> str:
+    """Add the first member to an empty object/array, laid out like json.dumps would"""
+    close = _skip_ws(text, container + 1)
+    if layout['indent'] is None:
+        rendered = _render(value, "", layout)
+        if text[container] == '{':
+            rendered = json.dumps(key) + layout['separators'][1] + rendered
+        return text[:container + 1] + rendered + text[close:]
+
+    outer = _line_indent(text, container)
+    inner = outer + " " * layout['indent']
+    rendered = _render(value, inner, layout)
+    if text[container] == '{':
+        rendered = json.dumps(key) + ": " + rendered
+    newline = layout['newline']
+    return text[:container + 1] + newline + inner + rendered + newline + outer + text[close:]
+
+
+def splice_patch(text: str, patch: List[Dict[str, Any]]) -> str:
+    """
+    Apply a JSON Patch to JSON text, leaving bytes outside the patched
+    blocks unchanged. Raises SpliceError if it can't.
+    """
+    if len(patch) > MAX_SPLICE_OPS:
+        raise SpliceError(f"{len(patch)} ops (max {MAX_SPLICE_OPS})")
+
+    layout = _layout(text)
+    for op in patch:
+        text = _apply(text, op, layout)
+    return text
@@ -0,0 +1,1032 @@
+#!/usr/bin/env python3
+"""
+STREAK_BLOCK_TEMPLATE Pruning and Compaction (Velocity)
+
+STREAK_BLOCK_TEMPLATE picks a banner and a bottom_sheet per campaign with
+#if/#elseif chains on the campaign UUID:
+
+    #if($!campaign_id == "a" || $!campaign_id == "b")
+    "url": "https://.../snp_streak_bottomsheet.png",
+    #elseif($!campaign_id == "c")
+    ...
+    #else
+    ...
+    #end
+
+The cleanup scripts used to skip the template to preserve image URLs, so
+clauses of removed campaigns piled up and Heimdall evaluates every one of
+them on each render. remove_campaigns() takes campaigns out safely:
+
+- a campaign's clause is cut out of its || chain; the rest of the chain
+  (and the banner URL the other campaigns share) stays as it was
+- a branch with no clauses left is dropped; if it was the #if, the next
+  #elseif becomes the #if (or the #else body is all that's left)
+- only conditions made of nothing but `$!campaign_id == "..."` clauses
+  (and compacted lists, below) are touched; anything else (status
+  checks, ...) is left alone and reported
+- the result is parsed again and, for every other campaign UUID in the
+  template, each chain must still pick the same branch body - otherwise
+  TemplateError is raised and nothing is changed
+
+Adding campaigns to a shared banner (process_streak_block_template.py,
+Case A) grows its || chain, and every render walks it clause by clause.
+compact_conditions() rewrites chains of COMPACT_MIN or more clauses into
+one membership test (Velocity can't call a method on a literal, so the
+list is set just before the chain):
+
+    #set($cids_1 = ["a", "b", "c", "d"])
+    #if($cids_1.contains("$!campaign_id"))
+
+== compares objects of different classes by toString(), but contains()
+uses equals(), so a Long or UUID campaign_id would never be in a list of
+strings; the id is interpolated into a string first. The list lookup
+still compares item by item, so the Velocity-side comparisons don't go
+down; the template gets smaller and each chain is one test.
+
+and checks the result with render(), an offline renderer for the part of
+Velocity the template uses: both versions are rendered for every known
+campaign UUID (plus none, "" and an unknown one) and must be identical.
+
+Usage:
+    pruned, report = velocity_template.remove_campaigns(template, {"df36a1e6-...", ...})
+    compacted, report = velocity_template.compact_conditions(template)
+    velocity_template.template_stats(template)
+    # {'bytes': 21187, 'conditions': 80, 'elseif': 44, 'campaign_clauses': 68,
+    #  'membership_tests': 0, 'comparisons': 68, 'longest_or_chain': 6}
+
+    python3 velocity_template.py <saved GET response> [campaign_id ...]
+    python3 velocity_template.py <saved GET response> --compact [--output FILE]
+"""
+
+import re
+import sys
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+
+class TemplateError(ValueError):
+    """The template's directives don't nest, or an edit would change what another campaign renders"""
+
+
+# #if( / #elseif( / #foreach( / #set( take an argument; #else / #end stand alone
+_DIRECTIVE = re.compile(r'#\{?(elseif|if|foreach|set|else|end)\b\}?')
+
+CAMPAIGN_CLAUSE = re.compile(r'\$!?\{?campaign_id\}?\s*==\s*"([^"]*)"')
+# $list.contains("$!campaign_id") (or $!campaign_id unquoted), $list being
+# #set to a list of campaign ids
+MEMBERSHIP_TEST = re.compile(r'\$!?\{?([A-Za-z]\w*)\}?\.contains\(\s*("?)\$!?\{?campaign_id\}?\2\s*\)')
+_SET_LIST = re.compile(r'#\{?set\}?\s*\(\s*\$!?\{?([A-Za-z]\w*)\}?\s*=\s*\[([^\]]*)\]\s*\)')
+_STRING_ITEMS = re.compile(r'\s*(?:"[^"]*"\s*(?:,\s*"[^"]*"\s*)*)?')
+_SEPARATOR = re.compile(r'\s*\|\|\s*')
+_URL = re.compile(r'"url":\s*"([^"]*)"')
+
+# Shortest || chain compact_conditions() rewrites (shorter ones don't get smaller)
+COMPACT_MIN = 4
+LIST_PREFIX = "cids_"
+
+
+def _condition_end(template: str, open_paren: int) -> int:
+    """Index just past the ) closing the condition that starts at open_paren"""
+    depth = 0
+    i = open_paren
+    in_string = False
+    while i < len(template):
+        char = template[i]
+        if in_string:
+            if char == '\\':
+                i += 1
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    raise TemplateError(f"Unclosed condition at offset {open_paren}")
+
+
+def _directives(template: str):
+    """Every directive in order: {'kind', 'start', 'end', 'condition': (start, end) of its argument or None}"""
+    pos = 0
+    while True:
+        match = _DIRECTIVE.search(template, pos)
+        if match is None:
+            return
+        kind = match.group(1)
+        start, end = match.span()
+        condition = None
+
+        if kind in ('if', 'elseif', 'foreach', 'set'):
+            open_paren = end
+            while open_paren < len(template) and template[open_paren] in ' \t':
+                open_paren += 1
+            if open_paren >= len(template) or template[open_paren] != '(':
+                pos = end  # not a directive (e.g. "#if" in text)
+                continue
+            end = _condition_end(template, open_paren)
+            condition = (open_paren + 1, end - 1)
+
+        yield {'kind': kind, 'start': start, 'end': end, 'condition': condition}
+        pos = end
+
+
+def parse_chains(template: str) -> List[Dict[str, Any]]:
+    """
+    Every #if chain in the template, in order of its #if:
+    {'branches': [{'kind': 'if'/'elseif'/'else', 'start', 'end' (of the
+    directive), 'condition': (start, end) or None}], 'end': (start, end)
+    of its #end}. Raises TemplateError if the directives don't nest.
+    """
+    chains = []
+    stack = []
+    for branch in _directives(template):
+        kind = branch['kind']
+        start = branch['start']
+        if kind == 'set':
+            continue
+        if kind == 'if':
+            chain = {'branches': [branch], 'end': None}
+            chains.append(chain)
+            stack.append(chain)
+        elif kind == 'foreach':
+            stack.append({'branches': [branch], 'end': None})
+        elif kind in ('elseif', 'else'):
+            if not stack or stack[-1]['branches'][0]['kind'] != 'if' or stack[-1]['branches'][-1]['kind'] == 'else':
+                raise TemplateError(f"#{kind} without an open #if at offset {start}")
+            stack[-1]['branches'].append(branch)
+        else:
+            if not stack:
+                raise TemplateError(f"#end without an open block at offset {start}")
+            stack.pop()['end'] = (start, branch['end'])
+
+    if stack:
+        raise TemplateError(f"#{stack[-1]['branches'][0]['kind']} at offset "
+                            f"{stack[-1]['branches'][0]['start']} is never closed")
+    return chains
+
+
+def campaign_lists(template: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Lists of campaign ids set in the template (#set($cids_1 = ["a", "b"])):
+    {name: {'start', 'end' (of the #set), 'items': (start, end) inside the
+    brackets, 'ids': [...]}}; names set more than once are left out
+    """
+    lists = {}
+    repeated = set()
+    for match in _SET_LIST.finditer(template):
+        name = match.group(1)
+        if name in lists or not _STRING_ITEMS.fullmatch(match.group(2)):
+            repeated.add(name)
+            continue
+        lists[name] = {'start': match.start(), 'end': match.end(), 'items': match.span(2),
+                       'ids': re.findall(r'"([^"]*)"', match.group(2))}
+    for name in repeated:
+        lists.pop(name, None)
+    return lists
+
+
+def campaign_terms(condition: str,
+                   lists: Optional[Dict[str, Dict[str, Any]]] = None) -> Optional[List[Tuple[int, int, List[str], Optional[str]]]]:
+    """
+    [(start, end, campaign_ids, list name or None)] per || term of a
+    condition made only of `$!campaign_id == "..."` clauses and
+    `$list.contains("$!campaign_id")` tests; None for anything else
+    """
+    terms = []
+    pos = len(condition) - len(condition.lstrip())
+    while True:
+        match = CAMPAIGN_CLAUSE.match(condition, pos)
+        if match:
+            terms.append((match.start(), match.end(), [match.group(1)], None))
+        else:
+            match = MEMBERSHIP_TEST.match(condition, pos)
+            if not match or not lists or match.group(1) not in lists:
+                return None
+            terms.append((match.start(), match.end(), lists[match.group(1)]['ids'], match.group(1)))
+        separator = _SEPARATOR.match(condition, match.end())
+        if separator is None:
+            break
+        pos = separator.end()
+    if condition[match.end():].strip():
+        return None
+    return terms
+
+
+def campaign_clauses(condition: str) -> Optional[List[Tuple[int, int, str]]]:
+    """
+    [(start, end, campaign_id)] of a condition made only of
+    `$!campaign_id == "..."` clauses joined by ||; None for anything else
+    """
+    terms = campaign_terms(condition)
+    if terms is None:
+        return None
+    return [(start, end, ids[0]) for start, end, ids, _ in terms]
+
+
+def known_campaign_ids(template: str) -> List[str]:
+    """Campaign ids the template's conditions test, in order of appearance"""
+    ids = dict.fromkeys(CAMPAIGN_CLAUSE.findall(template))
+    lists = campaign_lists(template)
+    for match in MEMBERSHIP_TEST.finditer(template):
+        if match.group(1) in lists:
+            ids.update(dict.fromkeys(lists[match.group(1)]['ids']))
+    return list(ids)
+
+
+def _body(template: str, chain: Dict[str, Any], index: int) -> str:
+    """Text between a branch's directive and the next branch (or #end)"""
+    branches = chain['branches']
+    stop = branches[index + 1]['start'] if index + 1 < len(branches) else chain['end'][0]
+    return template[branches[index]['end']:stop]
+
+
+def _line_start(template: str, pos: int) -> int:
+    """Start of pos's line if only whitespace precedes pos on it, else pos"""
+    line_start = template.rfind('\n', 0, pos) + 1
+    return line_start if not template[line_start:pos].strip() else pos
+
+
+def _line_end(template: str, pos: int) -> int:
+    """Past the newline ending pos's line if only whitespace follows pos on it, else pos"""
+    newline = template.find('\n', pos)
+    if newline == -1:
+        return pos if template[pos:].strip() else len(template)
+    return newline + 1 if not template[pos:newline].strip() else pos
+
+
+def campaign_routes(template: str, chains: Optional[List[Dict[str, Any]]] = None,
+                    lists: Optional[Dict[str, Dict[str, Any]]] = None) -> List[Tuple[Dict[str, str], str]]:
+    """
+    ({campaign_id: body of the branch it takes}, body without a match - the
+    #else or '') for each campaign chain (every condition a campaign test)
+    """
+    if lists is None:
+        lists = campaign_lists(template)
+    routes = []
+    for chain in chains if chains is not None else parse_chains(template):
+        branches = chain['branches']
+        conditions = [campaign_terms(template[b['condition'][0]:b['condition'][1]], lists)
+                      for b in branches if b['kind'] != 'else']
+        if any(terms is None for terms in conditions):
+            continue
+        bodies = {}
+        for index, terms in enumerate(conditions):
+            body = None
+            for _, _, ids, _ in terms:
+                for campaign_id in ids:
+                    if campaign_id not in bodies:
+                        if body is None:
+                            body = _body(template, chain, index).strip()
+                        bodies[campaign_id] = body
+        default = _body(template, chain, len(branches) - 1).strip() if branches[-1]['kind'] == 'else' else ''
+        routes.append((bodies, default))
+    return routes
+
+
+def template_stats(template: str) -> Dict[str, int]:
+    """
+    Size and condition counts (conditions = #if( + #elseif(, as in
+    metrics.py; comparisons = campaign_id comparisons when no branch
+    matches: one per == clause, one per list item for a membership test,
+    since contains() calls equals() on each item)
+    """
+    lists = campaign_lists(template)
+    lengths = []
+    for match in re.finditer(r'#\{?(?:else)?if\}?\s*\(', template):
+        try:
+            end = _condition_end(template, match.end() - 1)
+        except TemplateError:
+            continue
+        terms = campaign_terms(template[match.end():end - 1], lists)
+        if terms:
+            lengths.append(len(terms))
+    clauses = len(CAMPAIGN_CLAUSE.findall(template))
+    membership_tests = 0
+    list_items = 0
+    for match in MEMBERSHIP_TEST.finditer(template):
+        membership_tests += 1
+        list_items += len(lists[match.group(1)]['ids']) if match.group(1) in lists else 1
+    return {
+        'bytes': len(template.encode('utf-8')),
+        'conditions': template.count('#if(') + template.count('#elseif('),
+        'elseif': template.count('#elseif('),
+        'campaign_clauses': clauses,
+        'membership_tests': membership_tests,
+        'comparisons': clauses + list_items,
+        'longest_or_chain': max(lengths, default=0)
+    }
+
+
+def _line_number(template: str, pos: int) -> int:
+    return template.count('\n', 0, pos) + 1
+
+
+def _rewrite_condition(condition: str, clauses: List[Tuple[int, int, str]], keep: List[bool]) -> str:
+    """condition with only the kept clauses, keeping their original separators and spacing"""
+    pieces = [condition[:clauses[0][0]]]
+    first = True
+    for index, (start, end, _) in enumerate(clauses):
+        if not keep[index]:
+            continue
+        if not first:
+            pieces.append(condition[clauses[index - 1][1]:start])
+        pieces.append(condition[start:end])
+        first = False
+    pieces.append(condition[clauses[-1][1]:])
+    return "".join(pieces)
+
+
+def _list_items(campaign_ids: Iterable[str]) -> str:
+    return ", ".join(f'"{campaign_id}"' for campaign_id in campaign_ids)
+
+
+def _apply(template: str, edits: List[Tuple[int, int, str]]) -> str:
+    """template with the (start, end, replacement) edits; an edit inside an earlier one is skipped"""
+    pieces = []
+    pos = 0
+    for start, end, replacement in sorted(edits):
+        if start < pos:
+            continue  # inside a branch that's dropped anyway
+        pieces.append(template[pos:start])
+        pieces.append(replacement)
+        pos = end
+    pieces.append(template[pos:])
+    return "".join(pieces)
+
+
+def remove_campaigns(template: str, campaign_ids: Iterable[str]) -> Tuple[str, Dict[str, Any]]:
+    """
+    Remove the campaigns' clauses from the template's campaign chains
+
+    Returns:
+        (pruned template, report) with report = {
+            'removed': [(campaign_id, line)], clauses removed (original lines)
+            'dropped_branches': [line], branches left without clauses
+            'skipped': [(campaign_id, line)], in conditions that aren't
+                plain campaign OR-chains (left alone)
+            'urls_kept': [url], banner URLs of dropped branches still used
+            'urls_dropped': [url], banner URLs no longer in the template
+            'before': template_stats, 'after': template_stats }
+
+    Raises:
+        TemplateError: The directives don't nest, or the result would
+                       change the branch another campaign gets
+    """
+    targets = frozenset(campaign_ids)
+    chains = parse_chains(template)
+    lists = campaign_lists(template)
+    report = {'removed': [], 'dropped_branches': [], 'skipped': [], 'urls_kept': [], 'urls_dropped': []}
+    edits = []  # (start, end, replacement), non-overlapping
+    dropped_urls = []
+
+    def drop_list(name):
+        edits.append((_line_start(template, lists[name]['start']), _line_end(template, lists[name]['end']), ""))
+
+    for chain in chains:
+        branches = chain['branches']
+        keep = []
+        for branch in branches:
+            if branch['kind'] == 'else':
+                keep.append(True)
+                continue
+            start, end = branch['condition']
+            condition = template[start:end]
+            terms = campaign_terms(condition, lists)
+            if terms is None:
+                for match in CAMPAIGN_CLAUSE.finditer(condition):
+                    if match.group(1) in targets:
+                        report['skipped'].append((match.group(1), _line_number(template, start)))
+                keep.append(True)
+                continue
+
+            if all(name is None for _, _, _, name in terms):
+                clauses = [(term_start, term_end, ids[0]) for term_start, term_end, ids, _ in terms]
+                kept = [clause[2] not in targets for clause in clauses]
+                for clause, kept_clause in zip(clauses, kept):
+                    if not kept_clause:
+                        report['removed'].append((clause[2], _line_number(template, start + clause[0])))
+                if all(kept):
+                    keep.append(True)
+                elif any(kept):
+                    edits.append((start, end, _rewrite_condition(condition, clauses, kept)))
+                    keep.append(True)
+                else:
+                    keep.append(False)
+                continue
+
+            # Compacted: removed ids come out of the lists, emptied lists out of the condition
+            kept_terms = []
+            emptied = []
+            for term_start, term_end, ids, name in terms:
+                line = _line_number(template, start + term_start if name is None else lists[name]['start'])
+                kept_ids = [campaign_id for campaign_id in ids if campaign_id not in targets]
+                report['removed'].extend((campaign_id, line) for campaign_id in ids if campaign_id in targets)
+                if not kept_ids:
+                    if name is not None:
+                        emptied.append(name)
+                    continue
+                kept_terms.append(condition[term_start:term_end])
+                if name is not None and len(kept_ids) < len(ids):
+                    edits.append(lists[name]['items'] + (_list_items(kept_ids),))
+            for name in emptied:
+                drop_list(name)
+            if len(kept_terms) < len(terms) and kept_terms:
+                edits.append((start, end, " || ".join(kept_terms)))
+            keep.append(bool(kept_terms))
+
+        if all(keep):
+            continue
+
+        for index, branch in enumerate(branches):
+            if not keep[index]:
+                report['dropped_branches'].append(_line_number(template, branch['start']))
+                dropped_urls.extend(_URL.findall(_body(template, chain, index)))
+
+        survivors = [index for index, kept in enumerate(keep) if kept]
+        chain_start = _line_start(template, branches[0]['start'])
+        if not survivors:
+            # Nothing left: the whole chain goes
+            edits.append((chain_start, _line_end(template, chain['end'][1]), ""))
+            continue
+        if branches[survivors[0]]['kind'] == 'else':
+            # Only the #else is left: its body is all that renders
+            edits.append((chain_start, _line_end(template, chain['end'][1]),
+                          template[_line_end(template, branches[survivors[0]]['end']):
+                                   _line_start(template, chain['end'][0])]))
+            continue
+
+        for index, branch in enumerate(branches):
+            if keep[index]:
+                continue
+            following = branches[index + 1]['start'] if index + 1 < len(branches) else chain['end'][0]
+            edits.append((_line_start(template, branch['start']), _line_start(template, following), ""))
+        if not keep[0]:
+            # The first surviving #elseif becomes the #if
+            first = branches[survivors[0]]
+            keyword = template.index('elseif', first['start'])
+            edits.append((keyword, keyword + len('elseif'), 'if'))
+
+    pruned = _apply(template, edits)
+
+    _check(template, pruned, targets)
+
+    for url in dict.fromkeys(dropped_urls):
+        (report['urls_kept'] if url in pruned else report['urls_dropped']).append(url)
+    report['before'] = template_stats(template)
+    report['after'] = template_stats(pruned)
+    return pruned, report
+
+
+def _check(template: str, pruned: str, targets: frozenset):
+    """Every other campaign must still get the same branch bodies"""
+    others = set(known_campaign_ids(template)) - targets
+    # Chains of removed campaigns only are gone (or just their #else body is left)
+    before = [route for route in campaign_routes(template) if not others.isdisjoint(route[0])]
+    after = campaign_routes(pruned)
+    if len(before) != len(after):
+        raise TemplateError("Pruning would change the template's campaign chains; template left unchanged")
+    for (old_bodies, old_default), (new_bodies, new_default) in zip(before, after):
+        for campaign_id in others:
+            if old_bodies.get(campaign_id, old_default) != new_bodies.get(campaign_id, new_default):
+                raise TemplateError(f"Pruning would change what campaign {campaign_id} renders; "
+                                    f"template left unchanged")
+
+
+def banner_branches(template: str) -> List[Dict[str, Any]]:
+    """
+    Branches of campaign chains whose body starts with a "url" (the banner
+    asset): {'kind', 'start', 'condition': (start, end) or None for the
+    #else, 'ids', 'list': name of the branch's campaign list or None, 'url'}
+    """
+    lists = campaign_lists(template)
+    banners = []
+    for chain in parse_chains(template):
+        for index, branch in enumerate(chain['branches']):
+            url = _URL.match(_body(template, chain, index).lstrip())
+            if url is None:
+                continue
+            terms = []
+            if branch['kind'] != 'else':
+                terms = campaign_terms(template[branch['condition'][0]:branch['condition'][1]], lists)
+                if terms is None:
+                    continue
+            names = [name for _, _, _, name in terms if name is not None]
+            banners.append({'kind': branch['kind'], 'start': branch['start'], 'condition': branch['condition'],
+                            'ids': [campaign_id for _, _, ids, _ in terms for campaign_id in ids],
+                            'list': names[-1] if names else None, 'url': url.group(1)})
+    return banners
+
+
+def add_campaign(template: str, branch: Dict[str, Any], campaign_id: str) -> str:
+    """
+    template with campaign_id added to a banner_branches() branch: into its
+    campaign list if it has one, else as another || clause
+    """
+    if branch['list'] is not None:
+        start, end = campaign_lists(template)[branch['list']]['items']
+        items = template[start:end]
+        added = f'{items.rstrip()}, "{campaign_id}"' if items.strip() else f'"{campaign_id}"'
+        return template[:start] + added + template[end:]
+    end = branch['condition'][1]
+    return template[:end] + f' || $!campaign_id == "{campaign_id}"' + template[end:]
+
+
+# --- Offline rendering --------------------------------------------------
+
+_TOKEN = re.compile(r'''\s*(?:
+      (?P<string>"(?:[^"\\]|\\.)*"|'[^']*')
+    | (?P<number>\d+(?:\.\d+)?)
+    | (?P<ref>\$!?\{?[A-Za-z]\w*(?:\.[A-Za-z]\w*)*\}?)
+    | (?P<word>true|false|null|and|or|not)\b
+    | (?P<op>==|!=|&&|\|\||<=|>=|[<>!()\[\],=])
+    )''', re.X)
+_TEXT_REFERENCE = re.compile(r'\$(!)?(\{)?([A-Za-z]\w*(?:\.[A-Za-z]\w*)*)(?(2)\})')
+
+
+def _tokens(expression: str) -> List[Tuple[str, str]]:
+    tokens = []
+    pos = 0
+    while expression[pos:].strip():
+        match = _TOKEN.match(expression, pos)
+        if match is None:
+            raise TemplateError(f"Can't evaluate {expression.strip()!r} offline (at {expression[pos:].strip()[:20]!r})")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'word' and value in ('and', 'or', 'not'):
+            kind, value = 'op', {'and': '&&', 'or': '||', 'not': '!'}[value]
+        tokens.append((kind, value))
+        pos = match.end()
+    return tokens
+
+
+def _path(reference: str) -> Tuple[str, ...]:
+    return tuple(reference.lstrip('$!').strip('{}').split('.'))
+
+
+def _resolve(context: Dict[str, Any], path: Tuple[str, ...]) -> Any:
+    value = context.get(path[0])
+    for name in path[1:]:
+        value = value.get(name) if isinstance(value, dict) else None
+    return value
+
+
+def _truthy(value: Any) -> bool:
+    """Velocity 2 #if: null, false and empty strings/lists/maps are false"""
+    if value is None or value is False:
+        return False
+    if isinstance(value, (str, list, dict)):
+        return len(value) > 0
+    return True
+
+
+def _equal(left: Any, right: Any) -> bool:
+    if left is None or right is None:
+        return left is right
+    if isinstance(left, (int, float)) and isinstance(right, (int, float)) and not isinstance(left, bool):
+        return left == right
+    return _to_text(left) == _to_text(right)
+
+
+def _java_equals(left: Any, right: Any) -> bool:
+    """Object.equals(): no coercion between types (contains() uses it, unlike ==)"""
+    return type(left) is type(right) and left == right
+
+
+def _to_text(value: Any) -> str:
+    if value is True or value is False:
+        return 'true' if value else 'false'
+    if isinstance(value, list):
+        return "[" + ", ".join(_to_text(item) for item in value) + "]"
+    return str(value)
+
+
+def _compile_expression(expression: str):
+    """expression → function(context) for ==, !=, <, >, &&, ||, !, lists and .contains()"""
+    tokens = _tokens(expression)
+    pos = [0]
+
+    def peek():
+        return tokens[pos[0]] if pos[0] < len(tokens) else (None, None)
+
+    def take(value=None):
+        token = peek()
+        if token[0] is None or (value is not None and token[1] != value):
+            raise TemplateError(f"Can't evaluate {expression.strip()!r} offline")
+        pos[0] += 1
+        return token
+
+    def parse_or():
+        left = parse_and()
+        while peek() == ('op', '||'):
+            take()
+            right = parse_and()
+            left = (lambda a, b: lambda c: _truthy(a(c)) or _truthy(b(c)))(left, right)
+        return left
+
+    def parse_and():
+        left = parse_not()
+        while peek() == ('op', '&&'):
+            take()
+            right = parse_not()
+            left = (lambda a, b: lambda c: _truthy(a(c)) and _truthy(b(c)))(left, right)
+        return left
+
+    def parse_not():
+        if peek() == ('op', '!'):
+            take()
+            operand = parse_not()
+            return lambda c: not _truthy(operand(c))
+        return parse_comparison()
+
+    def parse_comparison():
+        left = parse_primary()
+        if peek()[0] == 'op' and peek()[1] in ('==', '!=', '<', '>', '<=', '>='):
+            op = take()[1]
+            right = parse_primary()
+            if op == '==':
+                return lambda c: _equal(left(c), right(c))
+            if op == '!=':
+                return lambda c: not _equal(left(c), right(c))
+            compare = {'<': lambda a, b: a < b, '>': lambda a, b: a > b,
+                       '<=': lambda a, b: a <= b, '>=': lambda a, b: a >= b}[op]
+            return lambda c: (lambda a, b: isinstance(a, (int, float)) and isinstance(b, (int, float))
+                              and compare(a, b))(left(c), right(c))
+        return left
+
+    def parse_primary():
+        kind, value = take()
+        if kind == 'string':
+            text = value[1:-1]
+            if value[0] == '"' and '$' in text:
+                pieces = _text_node(text)  # interpolated, like a double-quoted Velocity string
+                return lambda c: _render_pieces(pieces, c)
+            return lambda c: text
+        if kind == 'number':
+            number = float(value) if '.' in value else int(value)
+            return lambda c: number
+        if kind == 'word':
+            constant = {'true': True, 'false': False, 'null': None}[value]
+            return lambda c: constant
+        if value == '(':
+            inner = parse_or()
+            take(')')
+            return inner
+        if value == '[':
+            items = []
+            while peek() != ('op', ']'):
+                items.append(parse_or())
+                if peek() == ('op', ','):
+                    take()
+            take(']')
+            return lambda c: [item(c) for item in items]
+        if kind == 'ref':
+            path = _path(value)
+            if peek() == ('op', '('):
+                take()
+                args = []
+                while peek() != ('op', ')'):
+                    args.append(parse_or())
+                    if peek() == ('op', ','):
+                        take()
+                take(')')
+                if path[-1] != 'contains' or len(args) != 1:
+                    raise TemplateError(f"Can't evaluate {value}(...) offline")
+                owner = path[:-1]
+                return lambda c: (lambda items, item: isinstance(items, list)
+                                  and any(_java_equals(i, item) for i in items))(_resolve(c, owner), args[0](c))
+            return lambda c: _resolve(c, path)
+        raise TemplateError(f"Can't evaluate {expression.strip()!r} offline")
+
+    compiled = parse_or()
+    if pos[0] != len(tokens):
+        raise TemplateError(f"Can't evaluate {expression.strip()!r} offline")
+    return compiled
+
+
+def _text_node(text: str) -> List[Any]:
+    """Literal text and (quiet, path, source) references"""
+    pieces = []
+    pos = 0
+    for match in _TEXT_REFERENCE.finditer(text):
+        pieces.append(text[pos:match.start()])
+        pieces.append((bool(match.group(1)), tuple(match.group(3).split('.')), match.group(0)))
+        pos = match.end()
+    pieces.append(text[pos:])
+    return [piece for piece in pieces if piece != ""]
+
+
+def compile_template(template: str) -> List[Any]:
+    """
+    Node tree for render(). A directive alone on its line takes the line
+    with it (Velocity 2 "lines" space gobbling).
+    """
+    root = []
+    stack = [('root', root, None)]
+    pos = 0
+    for directive in _directives(template):
+        start, end = directive['start'], directive['end']
+        line_start = template.rfind('\n', 0, start) + 1
+        newline = template.find('\n', end)
+        line_end = len(template) if newline == -1 else newline + 1
+        if not template[line_start:start].strip() and not template[end:line_end].strip():
+            start, end = line_start, line_end
+        if template[pos:start]:
+            stack[-1][1].append(('text', template[pos:start]))
+        pos = end
+
+        kind = directive['kind']
+        argument = template[directive['condition'][0]:directive['condition'][1]] if directive['condition'] else None
+        if kind == 'if':
+            branches = [[_compile_expression(argument), []]]
+            stack[-1][1].append(('if', branches))
+            stack.append(('if', branches[0][1], branches))
+        elif kind in ('elseif', 'else'):
+            if stack[-1][0] != 'if':
+                raise TemplateError(f"#{kind} without an open #if at offset {directive['start']}")
+            branches = stack.pop()[2]
+            branches.append([_compile_expression(argument) if kind == 'elseif' else None, []])
+            stack.append(('if', branches[-1][1], branches))
+        elif kind == 'foreach':
+            match = re.fullmatch(r'\s*\$!?\{?(\w+)\}?\s+in\s+(.+?)\s*', argument)
+            if match is None:
+                raise TemplateError(f"Can't evaluate #foreach({argument}) offline")
+            body = []
+            stack[-1][1].append(('foreach', match.group(1), _compile_expression(match.group(2)), body))
+            stack.append(('foreach', body, None))
+        elif kind == 'set':
+            match = re.fullmatch(r'\s*\$!?\{?(\w+)\}?\s*=\s*(.+?)\s*', argument, re.S)
+            if match is None:
+                raise TemplateError(f"Can't evaluate #set({argument}) offline")
+            stack[-1][1].append(('set', match.group(1), _compile_expression(match.group(2))))
+        else:
+            if len(stack) == 1:
+                raise TemplateError(f"#end without an open block at offset {directive['start']}")
+            stack.pop()
+
+    if len(stack) > 1:
+        raise TemplateError(f"#{stack[-1][0]} is never closed")
+    if template[pos:]:
+        root.append(('text', template[pos:]))
+    for nodes in _node_lists(root):
+        nodes[:] = [('pieces', _text_node(node[1])) if node[0] == 'text' else node for node in nodes]
+    return root
+
+
+def _node_lists(nodes: List[Any]):
+    yield nodes
+    for node in nodes:
+        if node[0] == 'if':
+            for _, body in node[1]:
+                yield from _node_lists(body)
+        elif node[0] == 'foreach':
+            yield from _node_lists(node[3])
+
+
+def _render_pieces(pieces: List[Any], context: Dict[str, Any], out: Optional[List[str]] = None) -> str:
+    """_text_node() pieces with their references resolved (appended to out, or returned)"""
+    text = []
+    for piece in pieces:
+        if type(piece) is str:
+            text.append(piece)
+        else:
+            value = _resolve(context, piece[1])
+            text.append(_to_text(value) if value is not None else ("" if piece[0] else piece[2]))
+    if out is None:
+        return "".join(text)
+    out.extend(text)
+    return ""
+
+
+def _render_nodes(nodes: List[Any], context: Dict[str, Any], out: List[str]):
+    for node in nodes:
+        kind = node[0]
+        if kind == 'pieces':
+            _render_pieces(node[1], context, out)
+        elif kind == 'if':
+            for condition, body in node[1]:
+                if condition is None or _truthy(condition(context)):
+                    _render_nodes(body, context, out)
+                    break
+        elif kind == 'foreach':
+            items = node[2](context)
+            items = list(items.values()) if isinstance(items, dict) else items if isinstance(items, list) else []
+            saved = (context.get(node[1]), context.get('foreach'))
+            for index, item in enumerate(items):
+                context[node[1]] = item
+                context['foreach'] = {'index': index, 'count': index + 1, 'hasNext': index + 1 < len(items),
+                                      'first': index == 0, 'last': index + 1 == len(items)}
+                _render_nodes(node[3], context, out)
+            context[node[1]], context['foreach'] = saved
+        else:
+            context[node[1]] = node[2](context)
+
+
+def render(template: Any, context: Dict[str, Any]) -> str:
+    """
+    Render the template (text or compile_template() nodes) offline with
+    the part of Velocity STREAK_BLOCK_TEMPLATE uses: references, #if/
+    #elseif/#else, #foreach, #set, comparisons, && || !, list literals
+    and .contains(). Raises TemplateError for anything else.
+    """
+    nodes = compile_template(template) if isinstance(template, str) else template
+    out = []
+    _render_nodes(nodes, dict(context), out)
+    return "".join(out)
+
+
+# Streak block contexts the renders are compared under (campaign_id is set per render)
+SAMPLE_CONTEXTS = [
+    {'streak_type': "UPI", 'expiry_time_in_epoch_ms': 1767225600000, 'completed_levels': 0, 'total_levels': 5,
+     'total_cashback_earned': 0, 'social_proofing_text': "10k people joined", 'social_proofing_asset_url': "a.png",
+     'arf_ui_details': {'reward_text_variant1': "earn up to 100"}, 'tnc_rules': ["rule 1", "rule 2"],
+     'streak_items': [{'status': status, 'bottom_text': "day", 'lob_reference_id': "ref",
+                       'game': {'game_id': "g", 'game_instance_id': "i", 'game_type': "SCRATCH",
+                                'game_usage_id': "u"}}
+                      for status in ("unlocked", "allotted", "claimed")]},
+    {'streak_type': "UPI", 'completed_levels': 2, 'total_levels': 5, 'total_cashback_earned': 30,
+     'tnc_rules': [], 'streak_items': [{'status': "locked"}]}
+]
+
+
+class JavaObject:
+    """
+    A campaign_id that isn't a String (a Long or UUID): == compares it with
+    a string through toString(), equals() (contains()) never matches one
+    """
+    __slots__ = ('text',)
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def __str__(self) -> str:
+        return self.text
+
+    def __repr__(self) -> str:
+        return f"JavaObject({self.text!r})"
+
+
+def check_equivalent(before: str, after: str, campaign_ids: Iterable[str],
+                     contexts: Optional[List[Dict[str, Any]]] = None) -> int:
+    """
+    Render both templates for every campaign id, as a String and as a
+    JavaObject (and none, "" and an unknown one), under each context;
+    returns the number of renders
+
+    Raises:
+        TemplateError: A render differs, or a template can't be rendered offline
+    """
+    before_nodes = compile_template(before)
+    after_nodes = compile_template(after)
+    renders = 0
+    campaign_ids = list(dict.fromkeys(campaign_ids))
+    for campaign_id in (campaign_ids + [JavaObject(campaign_id) for campaign_id in campaign_ids]
+                        + [None, "", "00000000-0000-0000-0000-000000000000"]):
+        for context in contexts or SAMPLE_CONTEXTS:
+            context = dict(context, campaign_id=campaign_id)
+            if render(before_nodes, context) != render(after_nodes, context):
+                raise TemplateError(f"Rendering differs for campaign {campaign_id!r}; template left unchanged")
+            renders += 2
+    return renders
+
+
+def compact_conditions(template: str, min_clauses: int = COMPACT_MIN, known_ids: Iterable[str] = (),
+                       contexts: Optional[List[Dict[str, Any]]] = None) -> Tuple[str, Dict[str, Any]]:
+    """
+    Rewrite campaign || chains of min_clauses or more clauses into one
+    membership test on a list #set just before the chain
+
+    Args:
+        known_ids: More campaign ids to check the result with (the
+                   template's own are always checked)
+
+    Returns:
+        (compacted template, report) with report = {
+            'compacted': [(line, clauses)], conditions rewritten
+            'renders': renders compared,
+            'before': template_stats, 'after': template_stats }
+
+    Raises:
+        TemplateError: The template can't be parsed or rendered offline,
+                       or a render differs (nothing is changed)
+    """
+    chains = parse_chains(template)
+    taken = set(re.findall(r'\$!?\{?([A-Za-z]\w*)', template))
+    newline = "\r\n" if "\r\n" in template else "\n"
+    edits = []
+    compacted = []
+    next_list = 1
+
+    for chain in chains:
+        sets = []
+        for branch in chain['branches']:
+            if branch['kind'] == 'else':
+                continue
+            start, end = branch['condition']
+            condition = template[start:end]
+            clauses = campaign_clauses(condition)
+            if clauses is None:
+                continue
+            # "" stays a == clause: a missing campaign_id mustn't depend on how contains() sees it
+            ids = [campaign_id for campaign_id in dict.fromkeys(clause[2] for clause in clauses) if campaign_id]
+            if len(ids) < min_clauses:
+                continue
+
+            while f"{LIST_PREFIX}{next_list}" in taken:
+                next_list += 1
+            name = f"{LIST_PREFIX}{next_list}"
+            taken.add(name)
+            reference = re.match(r'\$!?\{?campaign_id\}?', condition[clauses[0][0]:]).group(0)
+            test = f'${name}.contains("{reference}")'
+            if any(not clause[2] for clause in clauses):
+                test = f'{reference} == "" || {test}'
+            edits.append((start, end, condition[:clauses[0][0]] + test + condition[clauses[-1][1]:]))
+            sets.append(f"#set(${name} = [{_list_items(ids)}])")
+            compacted.append((_line_number(template, branch['start']), len(clauses)))
+
+        if sets:
+            first = chain['branches'][0]['start']
+            line_start = _line_start(template, first)
+            if line_start < first or first == 0 or template[first - 1] == '\n':
+                indent = template[line_start:first]
+                edits.append((line_start, line_start, "".join(f"{indent}{line}{newline}" for line in sets)))
+            else:
+                edits.append((first, first, "".join(sets)))
+
+    result = _apply(template, edits)
+    parse_chains(result)
+    renders = check_equivalent(template, result, list(known_ids) + known_campaign_ids(template), contexts)
+    return result, {'compacted': compacted, 'renders': renders,
+                    'before': template_stats(template), 'after': template_stats(result)}
+
+
+def format_stats(before: Dict[str, int], after: Dict[str, int]) -> str:
+    """One line: size and condition counts before → after"""
+    return (f"{before['bytes']:,} → {after['bytes']:,} bytes, "
+            f"conditions {before['conditions']} → {after['conditions']}, "
+            f"campaign comparisons {before['comparisons']} → {after['comparisons']}, "
+            f"longest || chain {before['longest_or_chain']} → {after['longest_or_chain']}")
+
+
+def main():
+    """Stats of a saved STREAK_BLOCK_TEMPLATE, and dry runs of removing campaigns / compacting"""
+    import argparse
+    import json_backend
+
+    parser = argparse.ArgumentParser(description='Inspect, prune or compact a saved STREAK_BLOCK_TEMPLATE')
+    parser.add_argument('template', help='Saved GET response (or its value)')
+    parser.add_argument('campaign_ids', nargs='*', help='Campaigns to remove')
+    parser.add_argument('--compact', action='store_true', help='Rewrite long || chains into membership tests')
+    parser.add_argument('--min-clauses', type=int, default=COMPACT_MIN,
+                        help=f'Shortest || chain to compact (default: {COMPACT_MIN})')
+    parser.add_argument('--ids', metavar='FILE', help='JSON list of more known campaign ids to verify with')
+    parser.add_argument('--output', metavar='FILE', help='Write the GET response with the new value here')
+    args = parser.parse_args()
+
+    with open(args.template, 'r') as f:
+        data = json_backend.load(f)
+    template = data['value'] if isinstance(data, dict) else data
+    known_ids = []
+    if args.ids:
+        with open(args.ids, 'r') as f:
+            known_ids = json_backend.load(f)
+
+    before = template_stats(template)
+    result = template
+    try:
+        parse_chains(template)
+        if args.campaign_ids:
+            result, report = remove_campaigns(result, args.campaign_ids)
+            for campaign_id, line in report['removed']:
+                print(f"  - {campaign_id} (line {line})")
+            for campaign_id, line in report['skipped']:
+                print(f"  ⚠️  {campaign_id} (line {line}): not a plain campaign_id condition, left alone")
+            print(f"  Dropped {len(report['dropped_branches'])} empty branches")
+            for url in report['urls_dropped']:
+                print(f"  Banner no longer used: {url}")
+        if args.compact:
+            result, report = compact_conditions(result, args.min_clauses, known_ids)
+            for line, clauses in report['compacted']:
+                print(f"  ✓ line {line}: {clauses} clauses → 1 membership test")
+            print(f"  Renders identical for every known campaign ({report['renders']:,} renders)")
+    except TemplateError as e:
+        print(f"❌ {e}")
+        return 1
+
+    if result is template:
+        print(", ".join(f"{key} {value:,}" for key, value in before.items()))
+        return 0
+
+    print(format_stats(before, template_stats(result)))
+    if args.output:
+        data = dict(data, value=result) if isinstance(data, dict) else result
+        with open(args.output, 'w') as f:
+            json_backend.dump(data, f, indent=2)
+        print(f"✓ Saved to: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
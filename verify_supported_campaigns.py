@@ -3,7 +3,6 @@
 Show which campaigns the 5 supported UUIDs map to
 """
 
-import requests
 import json
 import sys
 from retool_integration import load_credentials, HeimdalJourneyConfigAPI, parse_value_field
@@ -20,10 +20,9 @@ from setup_campaign_master import (
     fetch_config, process_config, generate_campaign_info,
     post_all_configs
 )
-from retool_integration import (
-    HeimdalJourneyConfigAPI, parse_value_field,
-    add_campaign_to_config, check_campaign_exists
-)
+from config_diff import get_config_diff, get_config_patch, patch_summary, render_hunk
+import tracing
+import wire_format
 
 # Page configuration
 st.set_page_config(
@@ -77,6 +76,13 @@ if 'configs_posted' not in st.session_state:
     st.session_state.configs_posted = False
 if 'retool_data' not in st.session_state:
     st.session_state.retool_data = None
+if 'processing_result' not in st.session_state:
+    st.session_state.processing_result = None
+if 'diff_pages' not in st.session_state:
+    st.session_state.diff_pages = {}
+
+# Number of diff hunks rendered per "Show more" click
+DIFF_PAGE_SIZE = 20
 
 
 def show_header():
@@ -417,12 +423,10 @@ def step6_summary():
             st.rerun()
 
 
-def step7_processing():
-    """Step 7: Process Campaign"""
-    st.markdown('<div class="step-header"><h3>⚙️ Step 7/7: Processing Campaign</h3></div>', unsafe_allow_html=True)
-
-    inputs = st.session_state.inputs
+def run_processing(inputs):
+    """Fetch and process all configs, returning (session_folder, configs_processed)"""
     configs_needed = determine_configs_needed(inputs['campaign_type'])
+    tracing.start("web_app step7_processing")
 
     # Create session folder
     try:
@@ -430,7 +434,7 @@ def step7_processing():
         st.success(f"✓ Created session folder: `{session_folder}`")
     except Exception as e:
         st.error(f"✗ Failed to create session folder: {e}")
-        return
+        return None
 
     # Progress tracking
     progress_bar = st.progress(0)
@@ -442,7 +446,9 @@ def step7_processing():
     for i, config in enumerate(configs_needed):
         try:
             status_text.text(f"Fetching {config}...")
-            if fetch_config(config, session_folder, inputs['userid'], inputs['apikey']):
+            with tracing.span('fetch', config=config):
+                fetched = fetch_config(config, session_folder, inputs['userid'], inputs['apikey'])
+            if fetched:
                 st.success(f"✓ Fetched {config}")
             else:
                 st.error(f"✗ Failed {config}")
@@ -466,7 +472,9 @@ def step7_processing():
 
         try:
             status_text.text(f"Processing {config}...")
-            if process_config(config, session_folder, inputs):
+            with tracing.span('process', config=config):
+                processed = process_config(config, session_folder, inputs)
+            if processed:
                 st.success(f"✓ Processed {config}")
                 configs_processed.append(config)
             else:
@@ -477,7 +485,8 @@ def step7_processing():
 
     # Generate summary
     try:
-        generate_campaign_info(session_folder, inputs, configs_processed, posted=False)
+        with tracing.span('write'):
+            generate_campaign_info(session_folder, inputs, configs_processed, posted=False)
         st.success("✓ Generated campaign_info.txt")
     except Exception as e:
         st.error(f"✗ Failed to generate campaign_info.txt: {e}")
@@ -485,12 +494,98 @@ def step7_processing():
     status_text.empty()
     progress_bar.progress(1.0)
 
+    summary = tracing.finish(session_folder)
+    if summary:
+        st.caption(summary)
+
+    return session_folder, configs_processed
+
+
+def show_diff_panel(session_folder, configs_processed):
+    """Before/after review panel - diffs one config at a time, on demand"""
+    st.subheader("Review Changes")
+
+    if not configs_processed:
+        st.info("No processed configs to review")
+        return
+
+    config_key = st.selectbox("Config to review", configs_processed, key="diff_config")
+
+    try:
+        diff = get_config_diff(session_folder, config_key)
+    except Exception as e:
+        st.error(f"✗ Could not diff {config_key}: {e}")
+        return
+
+    stats = diff['stats']
+    st.caption(
+        f"{stats['added']} added · {stats['removed']} removed · {stats['changed']} changed "
+        f"· {diff['before_bytes']:,} → {diff['after_bytes']:,} bytes"
+    )
+
+    patch = get_config_patch(session_folder, config_key)
+    if patch:
+        with st.expander(f"🧩 JSON Patch (RFC 6902) · {patch_summary(patch)}"):
+            patch_json = json.dumps(patch, indent=2)
+            st.download_button("Download patch", patch_json, file_name=f"{config_key}_patch.json",
+                               mime="application/json", key=f"patch_download_{config_key}")
+            st.code(patch_json, language='json')
+
+    hunks = diff['hunks']
+    if not hunks:
+        st.info("No differences found")
+        return
+
+    # Render incrementally: only the first N hunks until the user asks for more
+    page_key = f"{session_folder}:{config_key}"
+    shown = st.session_state.diff_pages.get(page_key, DIFF_PAGE_SIZE)
+
+    op_icons = {'added': '🟢', 'removed': '🔴', 'changed': '🟡'}
+    for hunk in hunks[:shown]:
+        with st.expander(f"{op_icons[hunk['op']]} {hunk['op']} · {hunk['label']} · `{hunk['path']}`"):
+            for line in hunk.get('context', []):
+                st.caption(line)
+            st.code(render_hunk(hunk), language='diff' if diff['kind'] == 'text' or hunk['op'] == 'changed' else 'json')
+
+    if shown < len(hunks):
+        if st.button(f"Show more ({len(hunks) - shown} remaining)", key=f"diff_more_{config_key}"):
+            st.session_state.diff_pages[page_key] = shown + DIFF_PAGE_SIZE
+            st.rerun()
+
+
+def step7_processing():
+    """Step 7: Process Campaign"""
+    # Imported here rather than at the top: pulls in requests, which the
+    # login and input steps never need
+    from retool_integration import (
+        HeimdalJourneyConfigAPI, parse_value_field,
+        add_campaign_to_config, check_campaign_exists, post_with_rebase
+    )
+    from journey_graph import JourneyGraph
+
+    st.markdown('<div class="step-header"><h3>⚙️ Step 7/7: Processing Campaign</h3></div>', unsafe_allow_html=True)
+
+    inputs = st.session_state.inputs
+
+    # Fetch + process only once per campaign; widget clicks below trigger reruns
+    if st.session_state.processing_result is None:
+        result = run_processing(inputs)
+        if result is None:
+            return
+        st.session_state.processing_result = result
+    else:
+        st.caption("✓ Configs already fetched and processed for this campaign")
+
+    session_folder, configs_processed = st.session_state.processing_result
+
     # Show completion
     st.markdown('<div class="success-box"><h3>✨ Campaign Setup Complete! ✨</h3></div>', unsafe_allow_html=True)
     st.write(f"**Session Folder:** `{session_folder}`")
     st.write(f"**Configs Processed:** {len(configs_processed)}")
     st.write("All files are ready for review")
 
+    show_diff_panel(session_folder, configs_processed)
+
     # Post to production option
     st.markdown("---")
     st.markdown('<div class="warning-box"><h4>⚠️ POST to Production</h4></div>', unsafe_allow_html=True)
@@ -507,9 +602,12 @@ def step7_processing():
             st.error("Please confirm by checking the box above")
         else:
             st.markdown("### Posting to Production...")
+            tracing.start("web_app step7_processing")
             # Pass skip_confirmations=True to avoid terminal prompts
-            if post_all_configs(session_folder, configs_processed, inputs['userid'], inputs['apikey'], skip_confirmations=True):
-                generate_campaign_info(session_folder, inputs, configs_processed, posted=True)
+            if post_all_configs(session_folder, configs_processed, inputs['userid'], inputs['apikey'],
+                                skip_confirmations=True, inputs=inputs):
+                with tracing.span('write'):
+                    generate_campaign_info(session_folder, inputs, configs_processed, posted=True)
                 st.success("✨ Streak configs posted successfully! ✨")
 
                 # Mark as posted and fetch Retool data
@@ -518,7 +616,7 @@ def step7_processing():
                 # Initialize API and fetch existing campaigns
                 api = HeimdalJourneyConfigAPI(inputs['userid'], inputs['apikey'])
 
-                with st.spinner("Fetching existing campaigns..."):
+                with st.spinner("Fetching existing campaigns..."), tracing.span('retool', config='STREAK_JOURNEY_JOB_CONFIG'):
                     success, config_data, error = api.get_config()
                     if success:
                         success, value_obj, error = parse_value_field(config_data)
@@ -527,10 +625,12 @@ def step7_processing():
                             st.session_state.retool_data = {
                                 'api': api,
                                 'config_data': config_data,
-                                'value_obj': value_obj
+                                'value_obj': value_obj,
+                                'journey_graph': JourneyGraph(value_obj)
                             }
             else:
                 st.warning("Some configs failed to POST. Check output above.")
+            tracing.finish(session_folder)
 
     # Show Retool section if configs were posted (persists across reruns)
     if st.session_state.configs_posted and st.session_state.retool_data:
@@ -542,14 +642,9 @@ def step7_processing():
         config_data = retool_data['config_data']
         value_obj = retool_data['value_obj']
 
-        # Get existing campaigns
-        batch_rules = value_obj.get('batch_assignment_rules', {}).get('configs', [])
-        journey_rules = value_obj.get('journey_rules', {}).get('configs', [])
-        existing_campaigns = set()
-        for config in batch_rules + journey_rules:
-            campaign_name = config.get('config_key')
-            if campaign_name:
-                existing_campaigns.add(campaign_name)
+        # Existing campaigns and chains, indexed once per fetch
+        graph = retool_data['journey_graph']
+        existing_campaigns = graph.campaigns()
 
         st.info(f"Found {len(existing_campaigns)} existing campaigns")
 
@@ -558,24 +653,27 @@ def step7_processing():
 
         next_campaign = "NA"
         if is_chain:
-            next_campaign = st.text_input(
-                "Next campaign name (must exist in config)",
-                placeholder="e.g., snp_new_10x5_streak",
+            next_campaign = st.selectbox(
+                "Next campaign",
+                existing_campaigns,
+                index=None,
+                placeholder="Choose the campaign users move on to",
                 key="next_campaign"
-            )
-
-            # Validate
-            if next_campaign and next_campaign != "NA":
-                if next_campaign in existing_campaigns:
-                    st.success(f"✓ Found '{next_campaign}' in config")
-                else:
-                    st.error(f"✗ Campaign '{next_campaign}' not found in config")
-                    with st.expander("Show available campaigns"):
-                        for camp in sorted(existing_campaigns)[:20]:
-                            st.write(f"• {camp}")
+            ) or "NA"
+
+            if next_campaign != "NA":
+                chain = graph.chain(next_campaign)
+                st.caption(f"Chain: {inputs['campaign_name']} → {' → '.join([next_campaign] + chain)}")
+                if graph.reaches(next_campaign, inputs['campaign_name']):
+                    st.error(f"✗ '{next_campaign}' leads back to '{inputs['campaign_name']}' - "
+                             f"this would create a cycle")
+                for name, successor in graph.dangling():
+                    if name == next_campaign or name in chain:
+                        st.warning(f"⚠ '{name}' chains to '{successor}', which isn't in the config")
 
         if st.button("Update Retool Config", key="update_retool"):
-            with st.spinner("Updating Retool configuration..."):
+            tracing.start("web_app step7_processing")
+            with st.spinner("Updating Retool configuration..."), tracing.span('retool', config='STREAK_JOURNEY_JOB_CONFIG'):
                 try:
                     # Check duplicates
                     exists_in = check_campaign_exists(
@@ -599,12 +697,20 @@ def step7_processing():
                             value_obj
                         )
 
-                        # Update config
-                        config_data['value'] = json.dumps(modified_value_obj, indent=2)
-                        config_data['updated_by'] = f"campaign_setup_{inputs['campaign_name']}"
+                        # Update config (config_data stays the fetched base)
+                        payload = dict(config_data)
+                        payload['value'] = wire_format.edit_value(config_data['value'], modified_value_obj,
+                                                                  "STREAK_JOURNEY_JOB_CONFIG")
+                        payload['updated_by'] = f"campaign_setup_{inputs['campaign_name']}"
 
+                        # Under the config's write lock, re-checked against the live config: if it changed since it
+                        # was fetched, the campaign is added to the newer version instead
                         st.info("Posting update to API...")
-                        success, message = api.update_config(config_data)
+                        success, message = post_with_rebase(
+                            api, config_data, payload,
+                            lambda value: add_campaign_to_config(inputs['campaign_name'], inputs['campaign_id'],
+                                                                 next_campaign, value),
+                            verbose=False)
 
                         if success:
                             st.success("✅ Retool configuration updated successfully!")
@@ -618,12 +724,15 @@ def step7_processing():
                 except Exception as e:
                     st.error(f"❌ Error updating Retool config: {str(e)}")
                     st.exception(e)  # Shows full traceback for debugging
+            tracing.finish(session_folder)
 
     if st.button("🔄 Start New Campaign", key="restart"):
         st.session_state.step = 1
         st.session_state.inputs = {}
         st.session_state.configs_posted = False
         st.session_state.retool_data = None
+        st.session_state.processing_result = None
+        st.session_state.diff_pages = {}
         st.rerun()
 
 
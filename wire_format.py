@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Wire Format for POSTed Config Values
+
+Every JSON config is POSTed with its value as a JSON string. How that string
+is laid out is chosen per config key in wire_formats.json:
+
+- pretty:  the layout each writer has always used (indent=2 with \\r\\n
+           line endings for the eligibility configs and STREAK_CONFIG,
+           compact separators for SCAN/PTP, indent=2 for the journey config)
+- compact: no whitespace at all (separators=(',', ':'))
+- sorted:  compact with keys sorted, so equal content is always byte-equal
+
+Whitespace is a large share of what Heimdall stores and serves, so configs
+that nobody reads in Heimdall's UI can be switched to compact or sorted.
+Non-pretty output is parsed back and compared with the original before it
+is used, so the content can never differ from the pretty version.
+
+In pretty mode, processors write through edit_value(): the changes are
+spliced into the value text Heimdall returned (value_splice.py), so the
+bytes outside the new/changed blocks stay exactly as they were. If the
+splice isn't possible or doesn't parse back to the intended value, the
+value is re-serialized as above.
+
+Report the bytes each mode would save for a session's configs:
+    python3 wire_format.py backups/<session_folder>
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+import json_backend
+
+
+APP_DIR = Path(__file__).parent
+FORMATS_FILE = APP_DIR / "wire_formats.json"
+
+MODES = ['pretty', 'compact', 'sorted']
+
+# The layout each writer used before wire formats existed
+PRETTY_CRLF = {'STREAK_ELIGIBILITY', 'STREAK_TXN_ELIGIBILITY', 'STREAK_CONFIG'}
+PRETTY_COMPACT = {'SCAN_HOMEPAGE_CONFIG', 'PTP_STREAK_CONFIG'}
+
+_formats: Optional[Dict[str, str]] = None
+
+
+def load_formats() -> Dict[str, str]:
+    """config_key -> mode from wire_formats.json (missing keys are 'pretty')"""
+    global _formats
+    if _formats is None:
+        try:
+            with open(FORMATS_FILE, 'r') as f:
+                _formats = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            _formats = {}
+        unknown = {key: mode for key, mode in _formats.items() if mode not in MODES}
+        if unknown:
+            raise ValueError(f"Unknown wire format(s) in {FORMATS_FILE.name}: {unknown} "
+                             f"(expected one of {', '.join(MODES)})")
+    return _formats
+
+
+def mode_for(config_key: str) -> str:
+    return load_formats().get(config_key, 'pretty')
+
+
+def serialize(value_obj: Any, config_key: str, mode: str) -> str:
+    """value_obj as a value string in the given mode (no safety check)"""
+    if mode == 'compact':
+        return json_backend.dumps(value_obj, separators=(',', ':'))
+    if mode == 'sorted':
+        return json_backend.dumps(value_obj, separators=(',', ':'), sort_keys=True)
+    if mode != 'pretty':
+        raise ValueError(f"Unknown wire format: {mode}")
+
+    if config_key in PRETTY_COMPACT:
+        return json_backend.dumps(value_obj, separators=(',', ':'))
+    if config_key in PRETTY_CRLF:
+        return json_backend.dumps(value_obj, indent=2).replace('\n', '\r\n')
+    return json_backend.dumps(value_obj, indent=2)
+
+
+def dumps_value(value_obj: Any, config_key: str, mode: Optional[str] = None) -> str:
+    """
+    Serialize a config's value for POST in its configured wire format.
+
+    Raises ValueError if a non-pretty rendering doesn't parse back to the
+    same content.
+    """
+    mode = mode or mode_for(config_key)
+    text = serialize(value_obj, config_key, mode)
+
+    if mode != 'pretty' and json_backend.loads(text) != value_obj:
+        raise ValueError(f"{config_key}: {mode} wire format changed the config content")
+    return text
+
+
+def edit_value(original: str, value_obj: Any, config_key: str, mode: Optional[str] = None) -> str:
+    """
+    Value string for value_obj, the edited version of the original value
+    string: a minimal splice of original in pretty mode, dumps_value()
+    otherwise (or when the splice fails its parse-back check).
+    """
+    mode = mode or mode_for(config_key)
+    if mode == 'pretty' and isinstance(original, str):
+        import config_diff
+        import value_splice
+
+        try:
+            patch = config_diff.json_patch(json_backend.loads(original), value_obj)
+            text = value_splice.splice_patch(original, patch)
+            # Type-strict: == would accept a splice that wrote 1 where the edit set true
+            if config_diff.same_value(json_backend.loads(text), value_obj):
+                return text
+        except ValueError:
+            pass  # SpliceError or unparseable original: re-serialize
+    return dumps_value(value_obj, config_key, mode)
+
+
+def report(session_folder: str) -> str:
+    """Size of each config's _after.json value in every mode, and the savings vs pretty"""
+    import config_response
+
+    lines = [f"  {'config':28} {'mode':8} {'pretty':>10} {'compact':>10} {'sorted':>10} {'saved':>14}"]
+    total_current = total_pretty = 0
+
+    for name in sorted(os.listdir(session_folder)):
+        if not name.endswith('_after.json'):
+            continue
+        config_key = name[:-len('_after.json')]
+        response = config_response.load(os.path.join(session_folder, name))
+        value_obj = response.parsed_value()
+        if value_obj is None:
+            continue  # not JSON (STREAK_BLOCK_TEMPLATE)
+
+        sizes = {}
+        for mode in MODES:
+            text = dumps_value(value_obj, config_key, mode)
+            sizes[mode] = len(text.encode('utf-8'))
+
+        mode = mode_for(config_key)
+        saved = sizes['pretty'] - sizes[mode]
+        total_current += sizes[mode]
+        total_pretty += sizes['pretty']
+        percent = f"{saved / sizes['pretty'] * 100:.0f}%" if sizes['pretty'] else "-"
+        best = min(sizes['compact'], sizes['sorted'])
+        lines.append(f"  {config_key:28} {mode:8} {sizes['pretty']:10,} {sizes['compact']:10,} "
+                     f"{sizes['sorted']:10,} {saved:8,} ({percent})"
+                     + ("" if mode != 'pretty' or best == sizes['pretty'] else
+                        f"   could save {sizes['pretty'] - best:,}"))
+
+    if total_pretty:
+        lines.append(f"\n  Total: {total_current:,} bytes with current modes, "
+                     f"{total_pretty - total_current:,} saved vs all-pretty")
+    return "\n".join(lines)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Show bytes saved per wire format for a session')
+    parser.add_argument('session_folder', help='Session folder containing *_after.json files')
+    args = parser.parse_args()
+
+    print(f"📦 Wire formats for {args.session_folder} (modes from {FORMATS_FILE.name})\n")
+    print(report(args.session_folder))
+    print("\n✓ Every compact/sorted rendering parsed back to identical content")
+
+
+if __name__ == "__main__":
+    main()